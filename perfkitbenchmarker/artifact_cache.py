@@ -0,0 +1,260 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Content-addressed cache of files that PKB copies to VMs.
+
+Files are identified by their sha256. On the machine running PKB, downloaded
+URLs and tarballs of batched files are kept in a directory under --temp_dir
+that is shared by runs. On Linux VMs, pushed files are kept in
+REMOTE_CACHE_DIR, so pushing a file that a VM already has, e.g. to a static VM
+or a VM of a restored spec, is a link on the VM instead of an upload.
+
+Each cache is kept under --artifact_cache_max_gb by removing its least recently
+used files when a file is added.
+"""
+
+import collections
+import hashlib
+import logging
+import os
+import posixpath
+import tarfile
+import threading
+import uuid
+
+from absl import flags
+from perfkitbenchmarker import errors
+from perfkitbenchmarker import temp_dir
+import requests
+
+ARTIFACT_CACHE = flags.DEFINE_boolean(
+    'artifact_cache',
+    False,
+    'Whether to cache files pushed to Linux VMs on the VMs by sha256, and '
+    'fallback URLs of preprovisioned data on the machine running PKB, which '
+    'then pushes them to the VMs. Files pushed to Linux VMs are hard links '
+    'to the cached files where possible, so they must be replaced rather '
+    'than modified in place.',
+)
+ARTIFACT_CACHE_MAX_GB = flags.DEFINE_float(
+    'artifact_cache_max_gb',
+    10,
+    'Size in GB above which the least recently used files are removed from '
+    'the artifact cache on the machine running PKB and on each Linux VM.',
+)
+
+# Relative to the home directory of the VM user.
+REMOTE_CACHE_DIR = '.pkb_artifacts'
+
+_CHUNK_SIZE = 1 << 20
+_DOWNLOAD_TIMEOUT = 600
+_BYTES_PER_GB = 1 << 30
+# Infix of the names of files that are still being written.
+_PARTIAL = '.partial-'
+
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+_key_locks = collections.defaultdict(threading.Lock)
+# Cached files handed out by this process, which are never evicted.
+_in_use = set()
+_evict_lock = threading.Lock()
+
+
+def _CacheDir():
+  path = temp_dir.GetArtifactCacheDirPath()
+  os.makedirs(path, exist_ok=True)
+  return path
+
+
+def _MaxBytes():
+  return int(ARTIFACT_CACHE_MAX_GB.value * _BYTES_PER_GB)
+
+
+def _PartialPath(path):
+  return '%s%s%s' % (path, _PARTIAL, uuid.uuid4().hex)
+
+
+def _Use(path):
+  """Marks a cached file as used by this process and returns its path."""
+  with _evict_lock:
+    _in_use.add(path)
+  os.utime(path)
+  return path
+
+
+def _Evict():
+  """Removes the least recently used files until the cache fits its limit."""
+  with _evict_lock:
+    entries = []
+    for entry in os.scandir(_CacheDir()):
+      if _PARTIAL not in entry.name:
+        stat = entry.stat()
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+      if total <= _MaxBytes():
+        break
+      if path in _in_use:
+        continue
+      logging.info('Evicting %s from the artifact cache.', path)
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+      total -= size
+
+
+def FileSha256(path):
+  """Returns the sha256 of a local file, cached by path, size and mtime."""
+  stat = os.stat(path)
+  key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+  with _file_hashes_lock:
+    if key in _file_hashes:
+      return _file_hashes[key]
+  sha256 = hashlib.sha256()
+  with open(path, 'rb') as f:
+    for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+      sha256.update(chunk)
+  with _file_hashes_lock:
+    _file_hashes[key] = sha256.hexdigest()
+  return _file_hashes[key]
+
+
+def RemoteCachePath(sha256sum):
+  """Returns where a file with the given sha256 is cached on a VM."""
+  return posixpath.join(REMOTE_CACHE_DIR, sha256sum)
+
+
+def RemotePartialPath(sha256sum):
+  """Returns where a file with the given sha256 is uploaded to on a VM."""
+  return RemoteCachePath(sha256sum) + _PARTIAL + uuid.uuid4().hex
+
+
+def RemoteEvictCommand(sha256sum):
+  """Returns a command that fits the cache of a VM into its limit.
+
+  Files are removed by least recent mtime, which pushes update. Files that are
+  still being uploaded and the file with the given sha256 are kept.
+
+  Args:
+    sha256sum: The sha256 of the file that was just added.
+  """
+  return (
+      f'cd {REMOTE_CACHE_DIR} && total=$(find . -type f -printf '
+      "'%s\\n' | awk '{t += $1} END {print t + 0}') && "
+      f"for f in $(ls -tr --ignore='*{_PARTIAL}*'); do "
+      f'[ "$total" -le {_MaxBytes()} ] && break; '
+      f'[ "$f" = {sha256sum} ] && continue; '
+      'total=$((total - $(stat -c %s "$f"))); rm -f "$f"; done'
+  )
+
+
+def FetchUrl(url, sha256sum=None):
+  """Downloads a URL into the local cache once and returns its path.
+
+  Concurrent calls for the same URL wait for a single download.
+
+  Args:
+    url: The URL to download.
+    sha256sum: The expected sha256 of the content, if known. The content is
+      cached under it and verified after downloading.
+
+  Returns:
+    The path of the cached content.
+
+  Raises:
+    errors.Setup.BadPreprovisionedDataError: If the content does not match
+      sha256sum.
+  """
+  key = sha256sum or 'url-' + hashlib.sha256(url.encode()).hexdigest()
+  path = os.path.join(_CacheDir(), key)
+  with _key_locks[key]:
+    if os.path.exists(path):
+      return _Use(path)
+    logging.info('Downloading %s into the artifact cache.', url)
+    partial = _PartialPath(path)
+    with requests.get(url, stream=True, timeout=_DOWNLOAD_TIMEOUT) as response:
+      response.raise_for_status()
+      with open(partial, 'wb') as f:
+        for chunk in response.iter_content(_CHUNK_SIZE):
+          f.write(chunk)
+    actual = FileSha256(partial)
+    if sha256sum and actual != sha256sum:
+      os.remove(partial)
+      raise errors.Setup.BadPreprovisionedDataError(
+          'Invalid sha256sum for %s: %s (actual) != %s (expected).'
+          % (url, actual, sha256sum)
+      )
+    os.replace(partial, path)
+    _Use(path)
+  _Evict()
+  return path
+
+
+def _PathDigest(path):
+  """Returns a digest of a local file or directory tree and its names."""
+  digest = hashlib.sha256()
+  if os.path.isdir(path):
+    for root, dirs, files in os.walk(path):
+      dirs.sort()
+      for name in sorted(files):
+        file_path = os.path.join(root, name)
+        digest.update(os.path.relpath(file_path, path).encode() + b'\0')
+        digest.update(FileSha256(file_path).encode())
+  else:
+    digest.update(FileSha256(path).encode())
+  return digest.hexdigest()
+
+
+def _WriteTarball(paths, tarball):
+  with tarfile.open(tarball, 'w') as tar:
+    for path in paths:
+      tar.add(path, arcname=os.path.basename(os.path.normpath(path)))
+
+
+def CreateTarball(paths):
+  """Returns a tarball of local files and directories.
+
+  Members are named by the basenames of paths, so extracting the tarball into
+  a directory has the same effect as copying each path into it.
+
+  With --artifact_cache, the tarball is cached. Otherwise it is a new file in
+  the run directory, which the caller removes.
+
+  Args:
+    paths: Local paths of files or directories.
+
+  Returns:
+    The local path of the tarball.
+  """
+  if not ARTIFACT_CACHE.value:
+    run_dir = temp_dir.GetRunDirPath()
+    os.makedirs(run_dir, exist_ok=True)
+    tarball = os.path.join(run_dir, 'files-%s.tar' % uuid.uuid4().hex)
+    _WriteTarball(paths, tarball)
+    return tarball
+  digest = hashlib.sha256()
+  for path in paths:
+    digest.update(os.path.basename(os.path.normpath(path)).encode() + b'\0')
+    digest.update(_PathDigest(path).encode())
+  key = 'tar-' + digest.hexdigest()
+  tarball = os.path.join(_CacheDir(), key + '.tar')
+  with _key_locks[key]:
+    if os.path.exists(tarball):
+      return _Use(tarball)
+    partial = _PartialPath(tarball)
+    _WriteTarball(paths, partial)
+    os.replace(partial, tarball)
+    _Use(tarball)
+  _Evict()
+  return tarball
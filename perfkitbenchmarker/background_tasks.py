@@ -53,12 +53,15 @@ keeping the risk of deadlock low.
 
 
 import abc
+import atexit
 import collections
 from concurrent import futures
 import ctypes
 import functools
+import itertools
 import logging
 import os
+import pickle
 import queue
 import signal
 import threading
@@ -231,28 +234,48 @@ class _BackgroundTask:
     args: Series of unnamed arguments to be passed to the target.
     kwargs: dict. Keyword arguments to be passed to the target.
     context: _BackgroundTaskThreadContext. Thread-specific state to be inherited
-      from parent to child thread.
+      from parent to child thread, or None if the worker already has it.
     return_value: Return value if the call was executed successfully, or None
       otherwise.
     traceback: The traceback string if the call raised an exception, or None
       otherwise.
+    queued_time: time.monotonic() value when the task was submitted.
+    start_time: time.monotonic() value when the task started running, or None.
+    end_time: time.monotonic() value when the task finished running, or None.
   """
 
-  def __init__(self, target, args, kwargs, thread_context):
+  def __init__(self, target, args, kwargs, thread_context, queued_time=None):
     self.target = target
     self.args = args
     self.kwargs = kwargs
     self.context = thread_context
     self.return_value = None
     self.traceback = None
+    self.queued_time = time.monotonic() if queued_time is None else queued_time
+    self.start_time = None
+    self.end_time = None
+
+  @property
+  def queue_wait_time(self):
+    """Seconds the task waited for a free worker before it started."""
+    return self.start_time - self.queued_time
+
+  @property
+  def run_time(self):
+    """Seconds the task spent running."""
+    return self.end_time - self.start_time
 
   def Run(self):
     """Sets the current thread context and executes the target."""
-    self.context.CopyToCurrentThread()
+    self.start_time = time.monotonic()
+    if self.context:
+      self.context.CopyToCurrentThread()
     try:
       self.return_value = self.target(*self.args, **self.kwargs)
     except Exception:
       self.traceback = traceback.format_exc()
+    finally:
+      self.end_time = time.monotonic()
 
 
 class _BackgroundTaskManager(metaclass=abc.ABCMeta):
@@ -274,7 +297,7 @@ class _BackgroundTaskManager(metaclass=abc.ABCMeta):
     pass
 
   @abc.abstractmethod
-  def StartTask(self, target, args, kwargs, thread_context):
+  def StartTask(self, target, args, kwargs, thread_context, queued_time=None):
     """Creates and starts a _BackgroundTask.
 
     The created task is appended to self.tasks.
@@ -285,6 +308,8 @@ class _BackgroundTaskManager(metaclass=abc.ABCMeta):
       kwargs: dict. Keyword arguments to be passed to the target.
       thread_context: _BackgroundTaskThreadContext. Thread-specific state to be
         inherited from parent to child thread.
+      queued_time: Optional time at which the task was submitted. Defaults to
+        now.
     """
     raise NotImplementedError()
 
@@ -307,27 +332,26 @@ class _BackgroundTaskManager(metaclass=abc.ABCMeta):
     raise NotImplementedError()
 
 
-def _ExecuteBackgroundThreadTasks(worker_id, task_queue, response_queue):
+def _ExecuteBackgroundThreadTasks(task_queue, bootstrap_queue):
   """Executes tasks received on a task queue.
 
-  Executed in a child Thread by _BackgroundThreadTaskManager.
+  Executed in a child Thread owned by _ThreadWorkerPool. The thread outlives
+  any single _BackgroundThreadTaskManager and runs tasks for each manager that
+  leases it.
 
   Args:
-    worker_id: int. Identifier for the child thread relative to other child
-      threads.
     task_queue: _NonPollingSingleReaderQueue. Queue from which input is read.
       Each value in the queue can be one of three types of values. If it is a
-      (task_id, _BackgroundTask) pair, the task is executed on this thread. If
-      it is _THREAD_STOP_PROCESSING, the thread stops executing. If it is
-      _THREAD_WAIT_FOR_KEYBOARD_INTERRUPT, the thread waits for a
-      KeyboardInterrupt.
-    response_queue: _SingleReaderQueue. Queue to which output is written. It
-      receives worker_id when this thread's bootstrap code has completed and
-      receives a (worker_id, task_id) pair for each task completed on this
-      thread.
+      (response_queue, worker_id, task_id, _BackgroundTask) tuple, the task is
+      executed on this thread and (worker_id, task_id) is written to
+      response_queue when it completes. If it is _THREAD_STOP_PROCESSING, the
+      thread stops executing. If it is _THREAD_WAIT_FOR_KEYBOARD_INTERRUPT, the
+      thread waits for a KeyboardInterrupt.
+    bootstrap_queue: _SingleReaderQueue. Receives None when this thread's
+      bootstrap code has completed.
   """
   try:
-    response_queue.Put(worker_id)
+    bootstrap_queue.Put(None)
     while True:
       task_tuple = task_queue.Get()
       if task_tuple == _THREAD_STOP_PROCESSING:
@@ -335,8 +359,10 @@ def _ExecuteBackgroundThreadTasks(worker_id, task_queue, response_queue):
       elif task_tuple == _THREAD_WAIT_FOR_KEYBOARD_INTERRUPT:
         while True:
           time.sleep(_WAIT_MAX_RECHECK_DELAY)
-      task_id, task = task_tuple
+      response_queue, worker_id, task_id, task = task_tuple
       task.Run()
+      # Don't keep the benchmark alive while this thread sits idle in the pool.
+      context.SetThreadBenchmarkSpec(None)
       response_queue.Put((worker_id, task_id))
   except KeyboardInterrupt:
     # TODO(user): Detect when the log would be unhelpful (e.g. if the
@@ -344,55 +370,105 @@ def _ExecuteBackgroundThreadTasks(worker_id, task_queue, response_queue):
     # sub-loop). Only log in helpful cases, like when the task is interrupted.
     logging.debug(
         'Child thread %s received a KeyboardInterrupt from its parent.',
-        worker_id,
+        threading.current_thread().name,
         exc_info=True,
     )
 
 
+class _ThreadWorker:
+  """A child thread and the queue from which it reads tasks."""
+
+  def __init__(self, bootstrap_queue):
+    self.task_queue = _NonPollingSingleReaderQueue()
+    self.thread = threading.Thread(
+        target=_ExecuteBackgroundThreadTasks,
+        args=(self.task_queue, bootstrap_queue),
+    )
+    self.thread.daemon = True
+    self.thread.start()
+
+
+class _ThreadWorkerPool:
+  """Child threads that are reused across calls to RunParallelThreads.
+
+  Large clusters make many RunThreaded calls back to back, each of which would
+  otherwise start and join up to --max_concurrent_threads threads. Instead,
+  each _BackgroundThreadTaskManager leases workers from this pool for the
+  duration of one call and returns them afterwards. Workers interrupted by a
+  KeyboardInterrupt have exited and are dropped from the pool.
+
+  The idle list is a deque, whose append and pop are atomic, so that no Lock
+  is needed (see the module docstring).
+  """
+
+  def __init__(self):
+    self._idle_workers = collections.deque()
+
+  def Acquire(self, count):
+    """Returns count workers, starting new threads if too few are idle."""
+    workers = []
+    while len(workers) < count:
+      try:
+        worker = self._idle_workers.pop()
+      except IndexError:
+        break
+      if worker.thread.is_alive():
+        workers.append(worker)
+    bootstrap_queue = _SingleReaderQueue()
+    new_workers = [
+        _ThreadWorker(bootstrap_queue) for _ in range(count - len(workers))
+    ]
+    # Wait for each new Thread to finish its bootstrap code. Starting threads
+    # upfront like this and reusing them for later tasks minimizes the risk of
+    # a KeyboardInterrupt interfering with any of the Lock interactions.
+    for _ in new_workers:
+      bootstrap_queue.Get()
+    return workers + new_workers
+
+  def Release(self, workers, max_idle_workers):
+    """Returns workers to the pool, stopping any beyond max_idle_workers."""
+    for worker in workers:
+      if not worker.thread.is_alive():
+        continue
+      if len(self._idle_workers) < max_idle_workers:
+        self._idle_workers.append(worker)
+      else:
+        worker.task_queue.Put(_THREAD_STOP_PROCESSING)
+
+
+_THREAD_WORKER_POOL = _ThreadWorkerPool()
+
+
+def _MaxIdleThreads():
+  """Returns how many idle threads _THREAD_WORKER_POOL may keep."""
+  if FLAGS.is_parsed() and FLAGS.max_concurrent_threads:
+    return max(FLAGS.max_concurrent_threads, MAX_CONCURRENT_THREADS)
+  return MAX_CONCURRENT_THREADS
+
+
 class _BackgroundThreadTaskManager(_BackgroundTaskManager):
   """Manages state for background tasks started in child threads."""
 
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self._response_queue = _SingleReaderQueue()
-    self._task_queues = []
-    self._threads = []
-    self._available_worker_ids = list(range(self._max_concurrency))
-    uninitialized_worker_ids = set(self._available_worker_ids)
-    for worker_id in self._available_worker_ids:
-      task_queue = _NonPollingSingleReaderQueue()
-      self._task_queues.append(task_queue)
-      thread = threading.Thread(
-          target=_ExecuteBackgroundThreadTasks,
-          args=(worker_id, task_queue, self._response_queue),
-      )
-      thread.daemon = True
-      self._threads.append(thread)
-      thread.start()
-    # Wait for each Thread to finish its bootstrap code. Starting all the
-    # threads upfront like this and reusing them for later calls minimizes the
-    # risk of a KeyboardInterrupt interfering with any of the Lock interactions.
-    for _ in self._threads:
-      worker_id = self._response_queue.Get()
-      uninitialized_worker_ids.remove(worker_id)
-    assert not uninitialized_worker_ids, uninitialized_worker_ids
+    self._workers = _THREAD_WORKER_POOL.Acquire(self._max_concurrency)
+    self._available_worker_ids = list(range(len(self._workers)))
 
   def __exit__(self, *unused_args, **unused_kwargs):
-    # Shut down worker threads.
-    for task_queue in self._task_queues:
-      task_queue.Put(_THREAD_STOP_PROCESSING)
-    for thread in self._threads:
-      _WaitForCondition(lambda: not thread.is_alive())
+    _THREAD_WORKER_POOL.Release(self._workers, _MaxIdleThreads())
 
-  def StartTask(self, target, args, kwargs, thread_context):
+  def StartTask(self, target, args, kwargs, thread_context, queued_time=None):
     assert (
         self._available_worker_ids
     ), 'StartTask called when no threads were available'
-    task = _BackgroundTask(target, args, kwargs, thread_context)
+    task = _BackgroundTask(target, args, kwargs, thread_context, queued_time)
     task_id = len(self.tasks)
     self.tasks.append(task)
     worker_id = self._available_worker_ids.pop()
-    self._task_queues[worker_id].Put((task_id, task))
+    self._workers[worker_id].task_queue.Put(
+        (self._response_queue, worker_id, task_id, task)
+    )
 
   def AwaitAnyTask(self):
     worker_id, task_id = self._response_queue.Get()
@@ -400,20 +476,39 @@ class _BackgroundThreadTaskManager(_BackgroundTaskManager):
     return task_id
 
   def HandleKeyboardInterrupt(self):
+    threads = [worker.thread for worker in self._workers]
     # Raise a KeyboardInterrupt in each child thread.
-    for thread in self._threads:
+    for thread in threads:
       ctypes.pythonapi.PyThreadState_SetAsyncExc(
           ctypes.c_long(thread.ident), ctypes.py_object(KeyboardInterrupt)
       )
     # Wake threads up from possible non-interruptable wait states so they can
     # actually see the KeyboardInterrupt.
-    for task_queue, thread in zip(self._task_queues, self._threads):
-      task_queue.Put(_THREAD_WAIT_FOR_KEYBOARD_INTERRUPT)
-    for thread in self._threads:
+    for worker in self._workers:
+      worker.task_queue.Put(_THREAD_WAIT_FOR_KEYBOARD_INTERRUPT)
+    for thread in threads:
       _WaitForCondition(lambda: not thread.is_alive())
 
 
-def _ExecuteProcessTask(task):
+def _InitializeProcessWorker():
+  """Prepares a child process of _PROCESS_EXECUTOR_POOL to run tasks."""
+
+  def handle_sigint(signum, frame):
+    # Ignore any new SIGINTs since we are already tearing down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Execute the default SIGINT handler which throws a KeyboardInterrupt
+    # in the main thread of the process.
+    signal.default_int_handler(signum, frame)
+
+  signal.signal(signal.SIGINT, handle_sigint)
+
+
+# ID of the thread context a child process last copied, see
+# _ExecuteProcessTask.
+_process_worker_context_id = None
+
+
+def _ExecuteProcessTask(task, context_id, pickled_context):
   """Function invoked in another process by _BackgroundProcessTaskManager.
 
   Executes a specified task function and returns the result or exception
@@ -425,24 +520,91 @@ def _ExecuteProcessTask(task):
 
   Args:
     task: _BackgroundTask to execute.
+    context_id: (pid, int) tuple. Identifies the RunParallelProcesses call of
+      the task.
+    pickled_context: bytes. The pickled _BackgroundTaskThreadContext of the
+      call. It is only unpickled by the first task of the call that the process
+      runs, so that the benchmark spec is copied to each process once.
 
   Returns:
-    (result, traceback) tuple. The first element is the return value from the
-    task function, or None if the function raised an exception. The second
-    element is the exception traceback string, or None if the function
-    succeeded.
+    (result, traceback, start_time, end_time) tuple. The first element is the
+    return value from the task function, or None if the function raised an
+    exception. The second element is the exception traceback string, or None if
+    the function succeeded. The last two are when the task started and
+    finished running.
   """
+  global _process_worker_context_id
+  if _process_worker_context_id != context_id:
+    pickle.loads(pickled_context).CopyToCurrentThread()
+    _process_worker_context_id = context_id
+  task.Run()
+  return task.return_value, task.traceback, task.start_time, task.end_time
 
-  def handle_sigint(signum, frame):
-    # Ignore any new SIGINTs since we are already tearing down.
-    signal.signal(signal.SIGINT, signal.SIG_IGN)
-    # Execute the default SIGINT handler which throws a KeyboardInterrupt
-    # in the main thread of the process.
-    signal.default_int_handler(signum, frame)
 
-  signal.signal(signal.SIGINT, handle_sigint)
-  task.Run()
-  return task.return_value, task.traceback
+class _ProcessExecutorPool:
+  """The child processes that run tasks of all RunParallelProcesses calls.
+
+  Starting a ProcessPoolExecutor forks and bootstraps its processes, so a
+  single executor is kept for the PKB process and shut down at exit. It is
+  replaced when a call needs more processes than it has, or after it was shut
+  down because of a KeyboardInterrupt. Replaced executors finish the tasks
+  already submitted to them. Only the thread context is refreshed for each
+  call; other state of the processes is that of PKB when they were forked.
+
+  The executors are kept in a list rather than guarded by a Lock (see the
+  module docstring). The last one is reused. Concurrent calls may each start
+  an executor, so all of them are kept for the shutdown at exit.
+  """
+
+  def __init__(self):
+    # Forked children start with a copy of the pool, whose executors belong to
+    # the parent, so the pool is reset when used in another process.
+    self._pid = os.getpid()
+    self._executors = []
+    self._max_workers = 0
+    atexit.register(self.Shutdown)
+
+  def Get(self, max_workers):
+    """Returns an executor with at least max_workers processes."""
+    if self._pid != os.getpid():
+      self._pid = os.getpid()
+      self._executors = []
+      self._max_workers = 0
+    executors = self._executors
+    if executors and self._max_workers >= max_workers:
+      return executors[-1]
+    max_workers = max(max_workers, self._max_workers)
+    if executors:
+      self.Discard(executors[-1])
+    executor = futures.ProcessPoolExecutor(
+        max_workers, initializer=_InitializeProcessWorker
+    )
+    self._max_workers = max_workers
+    self._executors.append(executor)
+    return executor
+
+  def Discard(self, executor):
+    """Stops reusing executor and lets its processes exit once idle."""
+    if executor not in self._executors:
+      return
+    if executor is self._executors[-1]:
+      self._max_workers = 0
+    self._executors.remove(executor)
+    executor.shutdown(wait=False)
+
+  def Shutdown(self):
+    """Shuts down the executors started by this process."""
+    if self._pid != os.getpid():
+      return
+    while self._executors:
+      self._executors.pop().shutdown(wait=True)
+    self._max_workers = 0
+
+
+_PROCESS_EXECUTOR_POOL = _ProcessExecutorPool()
+
+# Distinguishes the thread contexts of RunParallelProcesses calls.
+_PROCESS_CONTEXT_IDS = itertools.count()
 
 
 class _BackgroundProcessTaskManager(_BackgroundTaskManager):
@@ -458,21 +620,20 @@ class _BackgroundProcessTaskManager(_BackgroundTaskManager):
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self._active_futures = {}
-    self._executor = futures.ProcessPoolExecutor(self._max_concurrency)
-
-  def __enter__(self):
-    self._executor.__enter__()
-    return self
-
-  def __exit__(self, *args, **kwargs):
-    # Note: This invokes a non-interruptable wait.
-    return self._executor.__exit__(*args, **kwargs)
-
-  def StartTask(self, target, args, kwargs, thread_context):
-    task = _BackgroundTask(target, args, kwargs, thread_context)
+    self._executor = _PROCESS_EXECUTOR_POOL.Get(self._max_concurrency)
+    self._context_id = (os.getpid(), next(_PROCESS_CONTEXT_IDS))
+    # Pickled by the first StartTask call, which provides the thread context.
+    self._pickled_context = None
+
+  def StartTask(self, target, args, kwargs, thread_context, queued_time=None):
+    if self._pickled_context is None:
+      self._pickled_context = pickle.dumps(thread_context)
+    task = _BackgroundTask(target, args, kwargs, None, queued_time)
     task_id = len(self.tasks)
     self.tasks.append(task)
-    future = self._executor.submit(_ExecuteProcessTask, task)
+    future = self._executor.submit(
+        _ExecuteProcessTask, task, self._context_id, self._pickled_context
+    )
     self._active_futures[future] = task_id
 
   def AwaitAnyTask(self):
@@ -486,17 +647,44 @@ class _BackgroundProcessTaskManager(_BackgroundTaskManager):
     future = completed_tasks.pop()
     task_id = self._active_futures.pop(future)
     task = self.tasks[task_id]
-    task.return_value, task.traceback = future.result()
+    try:
+      task.return_value, task.traceback, task.start_time, task.end_time = (
+          future.result()
+      )
+    except futures.BrokenExecutor:
+      # E.g. a child process was killed. Later calls start a new executor.
+      _PROCESS_EXECUTOR_POOL.Discard(self._executor)
+      raise
     return task_id
 
   def HandleKeyboardInterrupt(self):
     # If this thread received an interrupt signal, then processes started with
     # a ProcessPoolExecutor will also have received an interrupt without any
-    # extra work needed from this class. Only need to wait for child processes.
+    # extra work needed from this class. Only need to wait for child processes,
+    # which exit on the interrupt, so the executor is not reused.
     # Note: This invokes a non-interruptable wait.
+    _PROCESS_EXECUTOR_POOL.Discard(self._executor)
     self._executor.shutdown(wait=True)
 
 
+def _LogTaskTimings(tasks):
+  """Logs how long parallel tasks waited for a worker and how long they ran."""
+  finished = [task for task in tasks if task.end_time is not None]
+  if len(finished) < 2:
+    return
+  queue_waits = [task.queue_wait_time for task in finished]
+  run_times = [task.run_time for task in finished]
+  logging.debug(
+      'Ran %d parallel tasks. Queue wait: mean %.3fs, max %.3fs. '
+      'Run time: mean %.3fs, max %.3fs.',
+      len(finished),
+      sum(queue_waits) / len(finished),
+      max(queue_waits),
+      sum(run_times) / len(finished),
+      max(run_times),
+  )
+
+
 def _RunParallelTasks(
     target_arg_tuples,
     max_concurrency,
@@ -526,6 +714,7 @@ def _RunParallelTasks(
         functions.
   """
   thread_context = _BackgroundTaskThreadContext()
+  queued_time = time.monotonic()
   max_concurrency = min(max_concurrency, len(target_arg_tuples))
   error_strings = []
   started_task_count = 0
@@ -539,7 +728,9 @@ def _RunParallelTasks(
         ):
           # Start a new task.
           target, args, kwargs = target_arg_tuples[started_task_count]
-          task_manager.StartTask(target, args, kwargs, thread_context)
+          task_manager.StartTask(
+              target, args, kwargs, thread_context, queued_time
+          )
           started_task_count += 1
           active_task_count += 1
           if post_task_delay:
@@ -569,6 +760,8 @@ def _RunParallelTasks(
       task_manager.HandleKeyboardInterrupt()
       raise
 
+  _LogTaskTimings(task_manager.tasks)
+
   if error_strings:
     # TODO(user): Combine errors.VmUtil.ThreadException and
     # errors.VmUtil.CalledProcessException so this can be a single exception
@@ -22,6 +22,7 @@ import re
 from absl import flags
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import flag_alias
+from perfkitbenchmarker import import_util
 from perfkitbenchmarker import units
 import yaml
 
@@ -293,6 +294,12 @@ class OverrideFlags:
     if not self._config_dict:
       return
 
+    import_util.LoadModulesDefiningFlags(
+        [key for key in self._config_dict if key not in self._flag_values]
+    )
+    if any(key not in self._flag_values for key in self._config_dict):
+      # The flag may be defined in a way the module index can't see.
+      import_util.LoadAllLazyModules()
     for key, value in self._config_dict.items():
       if key not in self._flag_values:
         raise errors.Config.UnrecognizedOption(
@@ -0,0 +1,313 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""An HdrHistogram implementation for merging and querying latency logs.
+
+Load generators such as YCSB write HdrHistogram interval logs, where each line
+holds a base64 encoded, zlib compressed histogram. This module decodes those
+histograms in process so that logs from many clients can be merged by adding
+their counts arrays, without running HdrHistogram's Java tooling.
+
+See https://github.com/HdrHistogram/HdrHistogram for the reference
+implementation and encoding format.
+"""
+
+import base64
+import math
+import struct
+import zlib
+
+import numpy as np
+
+# Cookies identifying V2 encoded and V2 compressed histograms. The low nibble
+# of the second byte holds a word size hint and is masked off before comparing.
+_V2_ENCODING_COOKIE = 0x1C849303
+_V2_COMPRESSED_ENCODING_COOKIE = 0x1C849304
+_COOKIE_MASK = ~0xF0
+
+# cookie, payload length, normalizing index offset, significant digits,
+# lowest discernible value, highest trackable value, integer to double ratio.
+_ENCODING_HEADER = struct.Struct('>iiiiqqd')
+_COMPRESSED_HEADER = struct.Struct('>ii')
+
+
+class HdrHistogramError(Exception):
+  """Raised when a histogram cannot be decoded or merged."""
+
+
+class HdrHistogram:
+  """A histogram with bounded relative precision over a wide value range.
+
+  Attributes:
+    lowest_discernible_value: The smallest value that can be told apart from 0.
+    highest_trackable_value: The largest value that can be recorded.
+    significant_figures: The number of significant decimal digits kept.
+    counts: np.ndarray of int64 counts, one per bucket index.
+  """
+
+  def __init__(
+      self,
+      lowest_discernible_value: int = 1,
+      highest_trackable_value: int = 3600 * 1000 * 1000,
+      significant_figures: int = 3,
+  ):
+    if lowest_discernible_value < 1:
+      raise ValueError('lowest_discernible_value must be at least 1.')
+    if highest_trackable_value < 2 * lowest_discernible_value:
+      raise ValueError(
+          'highest_trackable_value must be at least twice '
+          'lowest_discernible_value.'
+      )
+    if not 0 <= significant_figures <= 5:
+      raise ValueError('significant_figures must be between 0 and 5.')
+    self.lowest_discernible_value = lowest_discernible_value
+    self.highest_trackable_value = highest_trackable_value
+    self.significant_figures = significant_figures
+
+    largest_single_unit_value = 2 * 10**significant_figures
+    sub_bucket_count_magnitude = math.ceil(math.log2(largest_single_unit_value))
+    self._sub_bucket_half_count_magnitude = (
+        max(sub_bucket_count_magnitude, 1) - 1
+    )
+    self._unit_magnitude = int(math.floor(math.log2(lowest_discernible_value)))
+    self._sub_bucket_count = 1 << (self._sub_bucket_half_count_magnitude + 1)
+    self._sub_bucket_half_count = self._sub_bucket_count // 2
+    self._sub_bucket_mask = (self._sub_bucket_count - 1) << self._unit_magnitude
+
+    buckets_needed = 1
+    smallest_untrackable_value = self._sub_bucket_count << self._unit_magnitude
+    while smallest_untrackable_value <= highest_trackable_value:
+      smallest_untrackable_value <<= 1
+      buckets_needed += 1
+    self.counts = np.zeros(
+        (buckets_needed + 1) * self._sub_bucket_half_count, dtype=np.int64
+    )
+
+  def __repr__(self):
+    return '<{} total_count={} significant_figures={}>'.format(
+        type(self).__name__, self.total_count, self.significant_figures
+    )
+
+  @property
+  def total_count(self) -> int:
+    return int(self.counts.sum())
+
+  def _Layout(self):
+    return self._unit_magnitude, self._sub_bucket_half_count_magnitude
+
+  def _IndexForValue(self, value: int) -> int:
+    bucket_index = (value | self._sub_bucket_mask).bit_length() - (
+        self._unit_magnitude + self._sub_bucket_half_count_magnitude + 1
+    )
+    sub_bucket_index = value >> (bucket_index + self._unit_magnitude)
+    return ((bucket_index + 1) << self._sub_bucket_half_count_magnitude) + (
+        sub_bucket_index - self._sub_bucket_half_count
+    )
+
+  def _BucketValues(self):
+    """Returns the lowest and highest value equivalent to each bucket index."""
+    indices = np.arange(self.counts.size, dtype=np.int64)
+    bucket_index = (indices >> self._sub_bucket_half_count_magnitude) - 1
+    sub_bucket_index = (
+        indices & (self._sub_bucket_half_count - 1)
+    ) + self._sub_bucket_half_count
+    first_bucket = bucket_index < 0
+    sub_bucket_index[first_bucket] -= self._sub_bucket_half_count
+    bucket_index[first_bucket] = 0
+    shift = bucket_index + self._unit_magnitude
+    lowest = sub_bucket_index << shift
+    return lowest, lowest + (np.int64(1) << shift) - 1
+
+  def RecordValue(self, value: int, count: int = 1):
+    """Records count occurrences of an integer value."""
+    if value < 0 or value > self.highest_trackable_value:
+      raise ValueError(
+          'Value %s is outside of [0, %s].'
+          % (value, self.highest_trackable_value)
+      )
+    self.counts[self._IndexForValue(int(value))] += count
+
+  def Add(self, other: 'HdrHistogram'):
+    """Adds the counts of another histogram with the same precision."""
+    if self._Layout() != other._Layout():  # pylint: disable=protected-access
+      raise HdrHistogramError(
+          'Cannot add histograms with different precision or units.'
+      )
+    if other.counts.size > self.counts.size:
+      self.counts = np.concatenate(
+          [self.counts, np.zeros(other.counts.size - self.counts.size, np.int64)]
+      )
+      self.highest_trackable_value = other.highest_trackable_value
+    self.counts[: other.counts.size] += other.counts
+
+  def ValuesAtPercentiles(self, percentiles) -> dict[float, int]:
+    """Returns the value at each percentile in [0, 100].
+
+    Like HdrHistogram's getValueAtPercentile, this reports the highest value
+    equivalent to the bucket holding the requested rank. The cumulative counts
+    are computed once for all percentiles.
+
+    Args:
+      percentiles: Iterable of percentiles.
+
+    Returns:
+      Dict mapping each percentile to its value, in recorded units.
+
+    Raises:
+      ValueError: If the histogram is empty or a percentile is outside of
+        [0, 100].
+    """
+    cumulative = np.cumsum(self.counts)
+    total = int(cumulative[-1]) if cumulative.size else 0
+    if not total:
+      raise ValueError("Can't compute percentiles of an empty histogram.")
+    _, highest = self._BucketValues()
+    result = {}
+    for percentile in percentiles:
+      if percentile < 0 or percentile > 100:
+        raise ValueError('Invalid percentile: {}'.format(percentile))
+      # Like the reference implementation, step below the percentile so that
+      # floating point error can't push the rank past an exact boundary.
+      rank = max(CountAtPercentile(percentile, total), 1)
+      index = int(np.searchsorted(cumulative, rank, side='left'))
+      result[percentile] = int(highest[index])
+    return result
+
+  def NonZeroBuckets(self):
+    """Yields (highest equivalent value, count) for every non-empty bucket."""
+    _, highest = self._BucketValues()
+    for index in np.flatnonzero(self.counts):
+      yield int(highest[index]), int(self.counts[index])
+
+  @classmethod
+  def Decode(cls, data: bytes) -> 'HdrHistogram':
+    """Decodes a V2 encoded histogram, compressed or not."""
+    if len(data) < _COMPRESSED_HEADER.size:
+      raise HdrHistogramError('Encoded histogram is truncated.')
+    cookie, length = _COMPRESSED_HEADER.unpack_from(data)
+    if cookie & _COOKIE_MASK == _V2_COMPRESSED_ENCODING_COOKIE:
+      try:
+        data = zlib.decompress(
+            data[_COMPRESSED_HEADER.size : _COMPRESSED_HEADER.size + length]
+        )
+      except zlib.error as e:
+        raise HdrHistogramError(f'Invalid compressed histogram: {e}') from e
+    if len(data) < _ENCODING_HEADER.size:
+      raise HdrHistogramError('Encoded histogram is truncated.')
+    (
+        cookie,
+        payload_length,
+        normalizing_index_offset,
+        significant_figures,
+        lowest_discernible_value,
+        highest_trackable_value,
+        _,
+    ) = _ENCODING_HEADER.unpack_from(data)
+    if cookie & _COOKIE_MASK != _V2_ENCODING_COOKIE:
+      raise HdrHistogramError('Unsupported histogram encoding %#x.' % cookie)
+    if normalizing_index_offset:
+      raise HdrHistogramError('Normalized histograms are not supported.')
+    payload = data[_ENCODING_HEADER.size : _ENCODING_HEADER.size + payload_length]
+    if len(payload) != payload_length:
+      raise HdrHistogramError('Encoded histogram payload is truncated.')
+
+    histogram = cls(
+        lowest_discernible_value, highest_trackable_value, significant_figures
+    )
+    counts = histogram.counts
+    index = 0
+    for value in _DecodeZigZagLeb128(payload):
+      if value < 0:
+        # A negative value encodes a run of empty buckets.
+        index -= value
+        continue
+      if index >= counts.size:
+        raise HdrHistogramError('Encoded histogram has too many buckets.')
+      counts[index] = value
+      index += 1
+    return histogram
+
+  @classmethod
+  def FromBase64(cls, encoded: str) -> 'HdrHistogram':
+    """Decodes a histogram as written in an HdrHistogram interval log."""
+    try:
+      data = base64.b64decode(encoded.strip(), validate=True)
+    except ValueError as e:
+      raise HdrHistogramError(f'Invalid base64 histogram: {e}') from e
+    return cls.Decode(data)
+
+
+def CountAtPercentile(percentile: float, total: int) -> int:
+  """Returns the number of values at or below a percentile of total."""
+  return math.ceil(math.nextafter(percentile, -math.inf) * total / 100)
+
+
+def _DecodeZigZagLeb128(payload: bytes):
+  """Yields the ZigZag LEB128 encoded integers in payload.
+
+  Each value takes at most 9 bytes; the 9th byte contributes all 8 of its bits.
+  """
+  value = 0
+  shift = 0
+  for byte in payload:
+    if shift == 56:
+      value |= byte << 56
+    else:
+      value |= (byte & 0x7F) << shift
+      if byte & 0x80:
+        shift += 7
+        continue
+    yield (value >> 1) ^ -(value & 1)
+    value = 0
+    shift = 0
+  if shift:
+    raise HdrHistogramError('Encoded histogram payload is truncated.')
+
+
+def ParseIntervalLogLine(line: str) -> HdrHistogram | None:
+  """Decodes the histogram on one line of an HdrHistogram interval log.
+
+  Lines look like '[Tag=tag,]start,interval_length,interval_max,histogram'.
+
+  Args:
+    line: A line from an interval log.
+
+  Returns:
+    The decoded histogram, or None for comments, headers and blank lines.
+
+  Raises:
+    HdrHistogramError: If the line is malformed.
+  """
+  line = line.strip()
+  if not line or line.startswith('#') or line.startswith('"'):
+    return None
+  fields = line.split(',')
+  if fields[0].startswith('Tag='):
+    fields = fields[1:]
+  if len(fields) != 4:
+    raise HdrHistogramError(f'Malformed interval log line: {line[:80]}')
+  return HdrHistogram.FromBase64(fields[3])
+
+
+def ParseIntervalLog(log: str) -> HdrHistogram | None:
+  """Decodes and adds up every interval histogram in an interval log."""
+  result = None
+  for line in log.splitlines():
+    histogram = ParseIntervalLogLine(line)
+    if histogram is None:
+      continue
+    if result is None:
+      result = histogram
+    else:
+      result.Add(histogram)
+  return result
@@ -14,9 +14,49 @@
 
 """Utilities for dynamically importing python files."""
 
+import collections.abc
 import importlib
+import importlib.abc
 import logging
+import os
 import pkgutil
+import re
+import sys
+import threading
+
+from absl import flags
+
+# Flags are defined with a literal name as the first argument, e.g.
+# flags.DEFINE_string('name', ...) or flags.DEFINE_enum(name='name', ...).
+_FLAG_DEFINITION = re.compile(
+    r"""\bDEFINE_\w+\(\s*(?:name\s*=\s*)?['"]([\w-]+)['"]"""
+)
+
+# Flags read through FLAGS by a literal name, e.g. FLAGS.name, FLAGS['name'],
+# getattr(FLAGS, 'name') or FLAGS.get_flag_value('name', default).
+_FLAG_REFERENCE = re.compile(
+    r"""\b(?:FLAGS\.)?get_flag_value\(\s*['"]([\w-]+)['"]"""
+    r"""|\bgetattr\(\s*(?:flags\.)?FLAGS\s*,\s*['"]([\w-]+)['"]"""
+    r"""|\bFLAGS(?:\.(\w+)|\[\s*['"]([\w-]+)['"]\s*\])"""
+)
+
+# Flags read through FLAGS by a computed name, e.g. FLAGS[flag_name].
+_COMPUTED_FLAG_REFERENCE = re.compile(
+    r"""\b(?:FLAGS\[|getattr\(\s*(?:flags\.)?FLAGS\s*,|get_flag_value\()"""
+    r"""\s*[^'"\s]"""
+)
+
+# Only modules of this package read flags defined by lazily loaded modules.
+_PACKAGE_PREFIX = __name__.rpartition('.')[0] + '.'
+
+# Registries whose modules are imported when needed, see LazyModuleRegistry.
+_lazy_registries = []
+
+# Module name -> (names of the flags it reads, whether it computes names).
+_flag_references = {}
+
+# Names of the modules whose flag dependencies were loaded.
+_flag_dependencies_loaded = set()
 
 
 def LoadModulesForPath(path, package_prefix=None):
@@ -44,3 +84,275 @@ def LoadModulesForPath(path, package_prefix=None):
   ):
     if not is_pkg:
       yield importlib.import_module(modname)
+
+
+def _IterModuleSources(path, package_prefix):
+  """Yields (module name, source file) for modules on path without importing.
+
+  Like pkgutil.walk_packages, modules in sub-packages are included but
+  directories without an __init__.py are not.
+  """
+  for finder, modname, is_pkg in pkgutil.iter_modules(path):
+    full_name = package_prefix + '.' + modname
+    directory = getattr(finder, 'path', None)
+    if directory is None:
+      continue
+    if is_pkg:
+      yield from _IterModuleSources(
+          [os.path.join(directory, modname)], full_name
+      )
+    else:
+      yield full_name, os.path.join(directory, modname + '.py')
+
+
+class LazyModuleRegistry(collections.abc.Mapping):
+  """Maps names to the modules on a path, importing each on first access.
+
+  The registry is indexed by scanning module sources instead of importing
+  them, so that a run only imports the modules it uses. The index records the
+  name of each module and the flags it defines, see LoadModulesDefiningFlags.
+
+  Modules are registered under the literal value of name_attribute in their
+  source (e.g. BENCHMARK_NAME = 'fio'), or under their module name if
+  name_attribute is None. Modules that compute name_attribute are imported
+  while indexing.
+  """
+
+  def __init__(
+      self, path, package_prefix, name_attribute=None, extra_entries=None
+  ):
+    """Initializes the registry.
+
+    Args:
+      path: Path containing python modules, e.g. a package's __path__.
+      package_prefix: Package name of the modules on path.
+      name_attribute: Name of the module attribute holding the registered
+        name, or None to register modules under their module name.
+      extra_entries: Optional callable returning (name, value) pairs to also
+        register. It is called the first time a name is not found in the
+        index.
+    """
+    self._path = list(path)
+    self.package_prefix = package_prefix
+    self._name_attribute = name_attribute
+    self._extra_entries = extra_entries
+    self._lock = threading.RLock()
+    self._module_names = None  # Registered name -> module name.
+    self._flag_modules = None  # Flag name -> module names.
+    self._entries = {}
+    self._extras_loaded = False
+    _lazy_registries.append(self)
+
+  def _Index(self):
+    """Returns the registered names, scanning module sources on first use."""
+    with self._lock:
+      if self._module_names is not None:
+        return self._module_names
+      name_pattern = None
+      if self._name_attribute:
+        name_pattern = re.compile(
+            r"""^%s\s*=\s*['"]([^'"]+)['"]\s*$"""
+            % re.escape(self._name_attribute),
+            re.MULTILINE,
+        )
+      module_names = {}
+      flag_modules = collections.defaultdict(list)
+      for modname, source_file in _IterModuleSources(
+          self._path, self.package_prefix
+      ):
+        with open(source_file, encoding='utf-8') as f:
+          source = f.read()
+        for flag_name in _FLAG_DEFINITION.findall(source):
+          flag_modules[flag_name].append(modname)
+        _flag_references[modname] = _FindFlagReferences(source)
+        if name_pattern is None:
+          name = modname.split('.')[-1]
+        else:
+          match = name_pattern.search(source)
+          if match:
+            name = match.group(1)
+          else:
+            module = _ImportModule(modname)
+            name = getattr(module, self._name_attribute)
+            self._entries[name] = module
+        if name in module_names:
+          raise ValueError(
+              'There are multiple modules with %s "%s"'
+              % (self._name_attribute or 'name', name)
+          )
+        module_names[name] = modname
+      self._flag_modules = flag_modules
+      self._module_names = module_names
+      return module_names
+
+  def _LoadExtraEntries(self):
+    with self._lock:
+      if self._extras_loaded or not self._extra_entries:
+        return
+      self._extras_loaded = True
+      for name, value in self._extra_entries():
+        self._entries.setdefault(name, value)
+
+  def __getitem__(self, name):
+    entry = self._entries.get(name)
+    if entry is not None:
+      return entry
+    module_names = self._Index()
+    if name in module_names:
+      with self._lock:
+        entry = _ImportModule(module_names[name])
+        self._entries[name] = entry
+        return entry
+    self._LoadExtraEntries()
+    return self._entries[name]
+
+  def __contains__(self, name):
+    if name in self._entries or name in self._Index():
+      return True
+    self._LoadExtraEntries()
+    return name in self._entries
+
+  def __iter__(self):
+    names = list(self._Index())
+    self._LoadExtraEntries()
+    names.extend(name for name in self._entries if name not in names)
+    return iter(names)
+
+  def __len__(self):
+    return sum(1 for _ in self)
+
+  def LoadAll(self):
+    """Imports every module and returns them in path order."""
+    return [self[name] for name in self._Index()]
+
+  def ModulesDefiningFlags(self, flag_names):
+    """Returns the names of modules whose source defines any of flag_names."""
+    self._Index()
+    return {
+        modname
+        for flag_name in flag_names
+        for modname in self._flag_modules.get(flag_name, ())
+    }
+
+
+def _FindFlagReferences(source):
+  """Returns the flag names a source reads and whether it computes some."""
+  names = {
+      next(group for group in groups if group)
+      for groups in _FLAG_REFERENCE.findall(source)
+  }
+  return names, bool(_COMPUTED_FLAG_REFERENCE.search(source))
+
+
+def _GetFlagReferences(module):
+  """Returns _FindFlagReferences of a module, scanning its source."""
+  references = _flag_references.get(module.__name__)
+  if references is None:
+    references = set(), False
+    source_file = getattr(module, '__file__', None)
+    if source_file and source_file.endswith('.py'):
+      with open(source_file, encoding='utf-8') as f:
+        references = _FindFlagReferences(f.read())
+    _flag_references[module.__name__] = references
+  return references
+
+
+def _IsLazilyRegistered(modname):
+  return any(
+      modname.startswith(registry.package_prefix + '.')
+      for registry in _lazy_registries
+  )
+
+
+def _ImportModule(modname):
+  """Imports a module along with the modules defining flags it reads."""
+  imported = set(sys.modules)
+  module = importlib.import_module(modname)
+  LoadFlagDependencies(
+      [module] + [sys.modules[name] for name in set(sys.modules) - imported]
+  )
+  return module
+
+
+def LoadFlagDependencies(modules):
+  """Imports the lazily registered modules defining flags that modules read.
+
+  Modules may read flags that are defined by a lazily registered module they
+  don't import, e.g. a package reading the flags of the benchmark using it.
+  Lazily registered modules that read flags by computed names, e.g.
+  FLAGS[flag_name], import every lazily registered module. Other modules only
+  compute the names of flags that they define or iterate over.
+
+  Args:
+    modules: Iterable of imported modules.
+  """
+  for module in modules:
+    if (
+        not module.__name__.startswith(_PACKAGE_PREFIX)
+        or module.__name__ in _flag_dependencies_loaded
+    ):
+      continue
+    # Added first, since loading dependencies may import the module again.
+    _flag_dependencies_loaded.add(module.__name__)
+    names, computed = _GetFlagReferences(module)
+    if computed and _IsLazilyRegistered(module.__name__):
+      LoadAllLazyModules()
+      continue
+    missing = [name for name in names if name not in flags.FLAGS]
+    if missing:
+      LoadModulesDefiningFlags(missing)
+
+
+def LoadModulesDefiningFlags(flag_names):
+  """Imports the lazily registered modules that define any of flag_names."""
+  for registry in _lazy_registries:
+    for modname in sorted(registry.ModulesDefiningFlags(flag_names)):
+      if modname not in sys.modules:
+        _ImportModule(modname)
+
+
+def LoadAllLazyModules():
+  """Imports every lazily registered module, e.g. to list all flags."""
+  for registry in _lazy_registries:
+    registry.LoadAll()
+
+
+class _FlagDependencyLoader(importlib.abc.Loader):
+  """Wraps the loader of a module to load its flag dependencies after it."""
+
+  def __init__(self, loader):
+    self._loader = loader
+
+  def __getattr__(self, name):
+    return getattr(self._loader, name)
+
+  def create_module(self, spec):
+    return self._loader.create_module(spec)
+
+  def exec_module(self, module):
+    self._loader.exec_module(module)
+    LoadFlagDependencies([module])
+
+
+class _FlagDependencyFinder(importlib.abc.MetaPathFinder):
+  """Loads the flag dependencies of lazily registered modules.
+
+  Registries load them for the modules they import, but modules are also
+  imported directly, e.g. by tests or by other modules.
+  """
+
+  def find_spec(self, fullname, path, target=None):
+    if not _IsLazilyRegistered(fullname):
+      return None
+    for finder in sys.meta_path:
+      if finder is self or not hasattr(finder, 'find_spec'):
+        continue
+      spec = finder.find_spec(fullname, path, target)
+      if spec is not None:
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+          spec.loader = _FlagDependencyLoader(spec.loader)
+        return spec
+    return None
+
+
+sys.meta_path.insert(0, _FlagDependencyFinder())
@@ -0,0 +1,281 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Plans installing several PerfKit packages on a VM at once.
+
+PerfKit packages install themselves imperatively, e.g.
+
+  def AptInstall(vm):
+    vm.Install('build_tools')
+    vm.InstallPackages('libaio-dev zlib1g-dev')
+    vm.RemoteCommand('git clone ...')
+
+so their dependencies are not declared anywhere. The planner reads the leading
+vm.Install and vm.InstallPackages calls of each install function, which have
+no preconditions, to build the dependency graph of the requested packages and
+to collect operating system packages that can be installed in one package
+manager transaction before any PerfKit package install runs.
+"""
+
+import ast
+import dataclasses
+import functools
+import inspect
+import logging
+import textwrap
+import types
+from typing import Callable, Iterable, Sequence
+
+
+@dataclasses.dataclass(frozen=True)
+class LeadingSteps:
+  """The leading install steps of a package's install function.
+
+  Attributes:
+    os_packages: Operating system packages passed to vm.InstallPackages.
+    dependencies: PerfKit packages passed to vm.Install.
+    complete: Whether these steps are all the install function does.
+  """
+
+  os_packages: tuple[str, ...] = ()
+  dependencies: tuple[str, ...] = ()
+  complete: bool = False
+
+
+@dataclasses.dataclass
+class InstallPlan:
+  """How to install a set of PerfKit packages.
+
+  Attributes:
+    os_packages: Operating system packages to install in one transaction,
+      before any PerfKit package.
+    satisfied: PerfKit packages that are fully installed by os_packages.
+    levels: PerfKit packages to install with vm.Install. Packages in a level
+      only depend on packages in earlier levels, so a level can be installed
+      concurrently.
+  """
+
+  os_packages: list[str] = dataclasses.field(default_factory=list)
+  satisfied: list[str] = dataclasses.field(default_factory=list)
+  levels: list[list[str]] = dataclasses.field(default_factory=list)
+
+
+class _StepCollector:
+  """Collects the leading vm.Install* and vm.InstallPackages calls."""
+
+  def __init__(self, module: types.ModuleType, tree: ast.Module):
+    self._module = module
+    self._functions = {
+        node.name: node
+        for node in tree.body
+        if isinstance(node, ast.FunctionDef)
+    }
+    self.os_packages = []
+    self.dependencies = []
+
+  def CollectFunction(self, name: str, visited=()) -> bool:
+    """Collects the steps of a module function; returns whether complete."""
+    function = self._functions.get(name)
+    if function is None or name in visited or not function.args.args:
+      return False
+    params = {arg.arg for arg in function.args.args}
+    vm = function.args.args[0].arg
+    body = function.body
+    if (
+        body
+        and isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+    ):
+      body = body[1:]  # Docstring.
+    for statement in body:
+      if not self._CollectStatement(statement, vm, params, visited + (name,)):
+        return False
+    return True
+
+  def _Constant(self, node, params, loop_values=None):
+    """Returns the string value of node, or None if it is not constant."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+      return [node.value]
+    if isinstance(node, ast.Name):
+      if loop_values is not None and node.id == loop_values[0]:
+        return loop_values[1]
+      if node.id in params:
+        return None
+      value = getattr(self._module, node.id, None)
+      if isinstance(value, str):
+        return [value]
+    return None
+
+  def _CollectCall(self, call, vm, params, visited, loop_values=None) -> bool:
+    """Collects one call statement; returns whether it was understood."""
+    if call.keywords:
+      return False
+    func = call.func
+    if (
+        isinstance(func, ast.Attribute)
+        and isinstance(func.value, ast.Name)
+        and func.value.id == vm
+        and func.attr in ('Install', 'InstallPackages')
+        and len(call.args) == 1
+    ):
+      values = self._Constant(call.args[0], params, loop_values)
+      if values is None:
+        return False
+      for value in values:
+        if func.attr == 'Install':
+          self.dependencies.append(value)
+        else:
+          self.os_packages.extend(value.split())
+      return True
+    # vm.InstallMany(['a', 'b'])
+    if (
+        isinstance(func, ast.Attribute)
+        and isinstance(func.value, ast.Name)
+        and func.value.id == vm
+        and func.attr == 'InstallMany'
+        and len(call.args) == 1
+        and isinstance(call.args[0], (ast.List, ast.Tuple))
+    ):
+      values = [self._Constant(elt, params) for elt in call.args[0].elts]
+      if any(value is None for value in values):
+        return False
+      self.dependencies.extend(value[0] for value in values)
+      return True
+    # A module helper called with only the VM, e.g. _Install(vm).
+    if (
+        isinstance(func, ast.Name)
+        and loop_values is None
+        and len(call.args) == 1
+        and isinstance(call.args[0], ast.Name)
+        and call.args[0].id == vm
+    ):
+      return self.CollectFunction(func.id, visited)
+    return False
+
+  def _CollectStatement(self, statement, vm, params, visited) -> bool:
+    if isinstance(statement, ast.Expr) and isinstance(
+        statement.value, ast.Call
+    ):
+      return self._CollectCall(statement.value, vm, params, visited)
+    # for name in ['a', 'b']: vm.Install(name)
+    if (
+        isinstance(statement, ast.For)
+        and not statement.orelse
+        and isinstance(statement.target, ast.Name)
+        and isinstance(statement.iter, (ast.List, ast.Tuple))
+    ):
+      values = [self._Constant(elt, params) for elt in statement.iter.elts]
+      if any(value is None for value in values):
+        return False
+      loop_values = (statement.target.id, [value[0] for value in values])
+      return all(
+          isinstance(inner, ast.Expr)
+          and isinstance(inner.value, ast.Call)
+          and self._CollectCall(
+              inner.value, vm, params, visited, loop_values=loop_values
+          )
+          for inner in statement.body
+      )
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def _ParseModule(module: types.ModuleType) -> ast.Module | None:
+  try:
+    return ast.parse(textwrap.dedent(inspect.getsource(module)))
+  except (OSError, TypeError, SyntaxError):
+    logging.debug('Unable to read the source of %s.', module)
+    return None
+
+
+def GetLeadingSteps(
+    module: types.ModuleType, method_names: Sequence[str]
+) -> LeadingSteps:
+  """Returns the leading install steps of a package module.
+
+  Args:
+    module: A PerfKit package module.
+    method_names: Install function names, in the order the VM's Install looks
+      them up, e.g. ('AptInstall', 'Install').
+
+  Returns:
+    The vm.Install and vm.InstallPackages calls that start the first install
+    function found, up to the first statement that is anything else.
+  """
+  method = next((name for name in method_names if hasattr(module, name)), None)
+  tree = _ParseModule(module) if method else None
+  if tree is None:
+    return LeadingSteps()
+  collector = _StepCollector(module, tree)
+  complete = collector.CollectFunction(method)
+  return LeadingSteps(
+      tuple(collector.os_packages), tuple(collector.dependencies), complete
+  )
+
+
+def Plan(
+    package_names: Iterable[str],
+    installed: set[str],
+    get_package: Callable[[str], types.ModuleType],
+    method_names: Sequence[str],
+) -> InstallPlan:
+  """Plans installing PerfKit packages and their known dependencies.
+
+  Operating system packages of a package are only installed up front when all
+  of its known dependencies are themselves fully satisfied by the up front
+  transaction, since other dependencies may e.g. add the package repositories
+  they come from.
+
+  Args:
+    package_names: Names of the PerfKit packages to install.
+    installed: Names of PerfKit packages that are already installed.
+    get_package: Returns the module of a PerfKit package.
+    method_names: Install function names, see GetLeadingSteps.
+
+  Returns:
+    An InstallPlan.
+  """
+  steps = {}
+  order = []  # Dependencies before dependents.
+
+  def Visit(name):
+    if name in installed or name in steps:
+      return
+    steps[name] = GetLeadingSteps(get_package(name), method_names)
+    for dependency in steps[name].dependencies:
+      Visit(dependency)
+    order.append(name)
+
+  for name in package_names:
+    Visit(name)
+
+  plan = InstallPlan()
+  hoisted = set()
+  depths = {}
+  for name in order:
+    dependencies = [d for d in steps[name].dependencies if d in steps]
+    if all(d in hoisted and steps[d].complete for d in dependencies):
+      hoisted.add(name)
+      for os_package in steps[name].os_packages:
+        if os_package not in plan.os_packages:
+          plan.os_packages.append(os_package)
+      if steps[name].complete:
+        plan.satisfied.append(name)
+        continue
+    depth = max((depths.get(d, -1) + 1 for d in dependencies), default=0)
+    depths[name] = depth
+    while len(plan.levels) <= depth:
+      plan.levels.append([])
+    plan.levels[depth].append(name)
+  plan.levels = [level for level in plan.levels if level]
+  return plan
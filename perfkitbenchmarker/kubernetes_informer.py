@@ -0,0 +1,344 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Keeps an in-memory view of Kubernetes pods from a kubectl watch.
+
+Waiting for and inspecting many pods with one kubectl command per pod and
+poll forks thousands of processes at scale. A PodInformer lists the pods once
+and then keeps a single 'kubectl get pods --watch' open, indexing the pods by
+name and recording when each status condition, e.g. Ready, was first observed
+to become True. Waits and condition lookups are answered from that index.
+
+Each watch starts by listing the current pods as ADDED events. Pods that are
+missing from that list, e.g. because they were deleted while a watch was being
+restarted, are dropped from the index once the list ends.
+"""
+
+import codecs
+import collections
+import json
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+from absl import flags
+from perfkitbenchmarker import container_service
+from perfkitbenchmarker import errors
+from perfkitbenchmarker import vm_util
+
+FLAGS = flags.FLAGS
+
+# How long to wait before restarting a watch that ended, e.g. because the API
+# server closed it.
+_RESTART_DELAY = 1
+# How long the output of a watch must pause for its initial list of pods to be
+# considered complete. kubectl writes the list at once, but only after it was
+# fetched from the API server.
+_LIST_IDLE_TIMEOUT = 10
+_CHUNK_SIZE = 64 * 1024
+
+
+class InformerTimeoutError(errors.Error):
+  """Raised when pods don't reach the awaited state in time."""
+
+
+def _ReadLines(pipe: Any, idle_timeout: float) -> Iterator[str | None]:
+  """Yields the lines of a binary pipe as they arrive.
+
+  Args:
+    pipe: The pipe to read until its end.
+    idle_timeout: How many seconds without output to wait before yielding
+      None, which is yielded again after each further idle_timeout.
+
+  Yields:
+    The decoded lines, with their line endings, or None when idle.
+  """
+  decoder = codecs.getincrementaldecoder('utf-8')('replace')
+  pending = ''
+  while True:
+    ready, _, _ = select.select([pipe], [], [], idle_timeout)
+    if not ready:
+      yield None
+      continue
+    chunk = os.read(pipe.fileno(), _CHUNK_SIZE)
+    lines = (pending + decoder.decode(chunk, final=not chunk)).splitlines(
+        keepends=True
+    )
+    pending = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+    yield from lines
+    if not chunk:
+      if pending:
+        yield pending
+      return
+
+
+def _DecodeJsonStream(
+    lines: Iterable[str | None],
+) -> Iterator[dict[str, Any] | None]:
+  """Yields the objects of a stream of concatenated, indented JSON objects.
+
+  None items, e.g. from _ReadLines when idle, are passed through.
+  """
+  buffer = []
+  for line in lines:
+    if line is None:
+      yield None
+      continue
+    buffer.append(line)
+    # kubectl indents everything but the braces of top level objects.
+    if line.rstrip() == '}':
+      yield json.loads(''.join(buffer))
+      buffer = []
+
+
+def _TrueConditions(pod: dict[str, Any]) -> set[str]:
+  return {
+      condition['type']
+      for condition in pod.get('status', {}).get('conditions', [])
+      if condition.get('status') == 'True'
+  }
+
+
+class PodInformer:
+  """Watches the pods of a namespace.
+
+  Attributes:
+    namespace: The namespace of the pods.
+    label_selector: If set, only pods matching it are watched.
+  """
+
+  def __init__(
+      self, namespace: str = 'default', label_selector: str | None = None
+  ):
+    self.namespace = namespace
+    self.label_selector = label_selector
+    self._condition = threading.Condition()
+    self._pods = {}
+    # Pod name -> condition type -> time the condition was first seen True.
+    self._transitions = collections.defaultdict(dict)
+    self._stopped = threading.Event()
+    self._process = None
+    self._thread = None
+
+  def __enter__(self):
+    self.Start()
+    return self
+
+  def __exit__(self, *unused_args):
+    self.Stop()
+
+  def _GetPodsCommand(self, *args: str) -> list[str]:
+    cmd = ['get', 'pods', '-n', self.namespace, '-o', 'json']
+    if self.label_selector:
+      cmd += ['-l', self.label_selector]
+    return cmd + list(args)
+
+  def Start(self):
+    """Lists the current pods and starts watching for changes."""
+    stdout, _, _ = container_service.RunKubectlCommand(self._GetPodsCommand())
+    with self._condition:
+      for pod in json.loads(stdout)['items']:
+        self._pods[pod['metadata']['name']] = pod
+    self._thread = threading.Thread(target=self._Watch, daemon=True)
+    self._thread.start()
+
+  def Stop(self):
+    """Stops watching. The index keeps the last observed state."""
+    self._stopped.set()
+    with self._condition:
+      process = self._process
+    if process:
+      process.terminate()
+    if self._thread:
+      self._thread.join()
+
+  def _Watch(self):
+    """Runs the watch until stopped, restarting it when it ends."""
+    stderr_path = vm_util.PrependTempDir(
+        f'kubectl_watch_{self.namespace}_{id(self)}.stderr'
+    )
+    while not self._stopped.is_set():
+      cmd = [FLAGS.kubectl, '--kubeconfig', FLAGS.kubeconfig]
+      cmd += self._GetPodsCommand('--watch', '--output-watch-events')
+      logging.info('Watching pods: %s', ' '.join(cmd))
+      with open(stderr_path, 'a') as stderr:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        with self._condition:
+          self._process = process
+        if self._stopped.is_set():
+          process.terminate()
+        try:
+          self.HandleWatch(
+              _DecodeJsonStream(_ReadLines(process.stdout, _LIST_IDLE_TIMEOUT))
+          )
+        except ValueError as e:
+          logging.warning('Failed to parse the pod watch: %s', e)
+        finally:
+          process.terminate()
+          process.wait()
+      if not self._stopped.is_set():
+        logging.info(
+            'Pod watch ended with %s, see %s. Restarting it.',
+            process.returncode,
+            stderr_path,
+        )
+        self._stopped.wait(_RESTART_DELAY)
+
+  def HandleWatch(self, events: Iterable[dict[str, Any] | None]):
+    """Updates the index with the events of a watch.
+
+    The watch starts with an ADDED event per existing pod. Its initial list
+    ends at the first other event, or at a None item, which marks a pause in
+    the watch. Pods missing from the list are then removed, since the watch
+    won't report their deletion.
+
+    Args:
+      events: The watch events, with None items when the watch paused.
+    """
+    listed = set()
+    for event in events:
+      if listed is not None and (event is None or event['type'] != 'ADDED'):
+        self._RemovePodsExcept(listed)
+        listed = None
+      if event is None:
+        continue
+      if listed is not None:
+        listed.add(event['object']['metadata']['name'])
+      self.HandleEvent(event)
+
+  def _RemovePodsExcept(self, names: set[str]):
+    """Removes the pods that are not named, as if they were deleted."""
+    with self._condition:
+      stale = [pod for name, pod in self._pods.items() if name not in names]
+    for pod in stale:
+      logging.info(
+          'Removing pod %s, which the pod watch no longer lists.',
+          pod['metadata']['name'],
+      )
+      self.HandleEvent({'type': 'DELETED', 'object': pod})
+
+  def HandleEvent(
+      self, event: dict[str, Any], observed_time: float | None = None
+  ):
+    """Updates the index with a watch event.
+
+    Args:
+      event: A watch event, with the event type and the pod object.
+      observed_time: When the event was observed. Defaults to now.
+    """
+    if observed_time is None:
+      observed_time = time.time()
+    pod = event['object']
+    name = pod['metadata']['name']
+    with self._condition:
+      previous = self._pods.get(name)
+      if event['type'] == 'DELETED':
+        self._pods.pop(name, None)
+      else:
+        self._pods[name] = pod
+        already_true = _TrueConditions(previous) if previous else set()
+        for condition_type in _TrueConditions(pod) - already_true:
+          self._transitions[name].setdefault(condition_type, observed_time)
+      self._condition.notify_all()
+
+  def GetPodNames(self) -> list[str]:
+    """Returns the names of the pods that currently exist."""
+    with self._condition:
+      return list(self._pods)
+
+  def GetConditions(self, pod_name: str) -> list[dict[str, str]]:
+    """Returns the last status conditions reported for a pod."""
+    with self._condition:
+      pod = self._pods.get(pod_name, {})
+      return list(pod.get('status', {}).get('conditions', []))
+
+  def GetTransitionTimes(self) -> dict[str, list[float]]:
+    """Returns when conditions were observed to become True, by type.
+
+    Conditions that were already True when the informer started are not
+    included.
+    """
+    times = collections.defaultdict(list)
+    with self._condition:
+      for transitions in self._transitions.values():
+        for condition_type, observed_time in transitions.items():
+          times[condition_type].append(observed_time)
+    return dict(times)
+
+  def WaitFor(
+      self,
+      predicate: Callable[[dict[str, dict[str, Any]]], bool],
+      timeout: float,
+      description: str = 'pods',
+  ):
+    """Blocks until predicate returns True for the pods by name.
+
+    Args:
+      predicate: Called with the pods by name whenever they change.
+      timeout: How many seconds to wait.
+      description: What is awaited, for the timeout error.
+
+    Raises:
+      InformerTimeoutError: If predicate didn't return True in time.
+    """
+    with self._condition:
+      if not self._condition.wait_for(
+          lambda: predicate(self._pods), timeout=timeout
+      ):
+        raise InformerTimeoutError(
+            f'Timed out after {timeout}s waiting for {description}.'
+        )
+
+  def WaitForPods(
+      self,
+      count: int,
+      timeout: float,
+      condition_type: str | None = None,
+      exclude: Iterable[str] = (),
+  ) -> list[str]:
+    """Waits for at least count pods, optionally with a True condition.
+
+    Args:
+      count: The number of pods to wait for.
+      timeout: How many seconds to wait.
+      condition_type: If set, only pods with this condition True count.
+      exclude: Names of pods that don't count, e.g. preexisting pods.
+
+    Returns:
+      The names of the counted pods.
+
+    Raises:
+      InformerTimeoutError: If there weren't enough pods in time.
+    """
+    exclude = set(exclude)
+    matches = []
+
+    def _Enough(pods: dict[str, dict[str, Any]]) -> bool:
+      matches[:] = [
+          name
+          for name, pod in pods.items()
+          if name not in exclude
+          and (condition_type is None or condition_type in _TrueConditions(pod))
+      ]
+      return len(matches) >= count
+
+    self.WaitFor(
+        _Enough,
+        timeout,
+        f'{count} pods' + (f' with {condition_type}' if condition_type else ''),
+    )
+    return matches
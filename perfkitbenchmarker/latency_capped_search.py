@@ -0,0 +1,311 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Searches for the highest load a system sustains under a latency cap.
+
+Load generators, e.g. memtier or YCSB, implement LoadGenerator, which runs a
+single probe at an integer load level such as a QPS target or a client count.
+Search probes load levels between a bound known to meet the cap and a bound
+assumed to violate it, narrowing them until they are within a resolution.
+
+Probes can be screened by first running them for a fraction of their duration
+and stopping when the short run already clearly violates the cap, and probes
+whose latency is within the measurement noise of the cap can be repeated.
+"""
+
+import abc
+import collections
+import dataclasses
+import logging
+import math
+import statistics
+from typing import Any
+
+from absl import flags
+from perfkitbenchmarker import sample
+
+BISECTION = 'bisection'
+SECANT = 'secant'
+
+_STRATEGY = flags.DEFINE_enum(
+    'latency_search_strategy',
+    BISECTION,
+    [BISECTION, SECANT],
+    'How latency capped throughput searches choose the next load to probe. '
+    '"bisection" probes the middle of the remaining range. "secant" '
+    'interpolates the load at which latency reaches the cap from the '
+    'latencies at the bounds, kept within the middle half of the range.',
+)
+_SCREENING_FRACTION = flags.DEFINE_float(
+    'latency_search_screening_fraction',
+    0,
+    'If set, latency capped throughput searches first run each probe for '
+    'this fraction of its duration and skip the full run when the latency '
+    'already exceeds the cap by more than --latency_search_tolerance.',
+    lower_bound=0,
+    upper_bound=1,
+)
+_TOLERANCE = flags.DEFINE_float(
+    'latency_search_tolerance',
+    0,
+    'Relative noise of probe latencies in latency capped throughput '
+    'searches. Probes within this fraction of the cap are repeated up to '
+    '--latency_search_max_repeats times and decided by the median latency.',
+    lower_bound=0,
+)
+_MAX_REPEATS = flags.DEFINE_integer(
+    'latency_search_max_repeats',
+    1,
+    'Maximum number of full runs of a probe in latency capped throughput '
+    'searches.',
+    lower_bound=1,
+)
+
+
+@dataclasses.dataclass
+class ProbeResult:
+  """Measurements of a single run of a load generator.
+
+  Attributes:
+    throughput: The throughput achieved.
+    latency: The latency compared against the cap, e.g. a p99.
+    samples: Samples reported by the load generator for the run.
+    metadata: Load generator parameters of the run, added to probe samples.
+    details: Load generator specific results, e.g. parsed output.
+  """
+
+  throughput: float
+  latency: float
+  samples: list[sample.Sample] = dataclasses.field(default_factory=list)
+  metadata: dict[str, Any] = dataclasses.field(default_factory=dict)
+  details: Any = None
+
+
+@dataclasses.dataclass
+class Probe:
+  """A run of a load generator during a search.
+
+  Attributes:
+    load: The load level of the run.
+    duration_fraction: The fraction of the full probe duration it ran for.
+    result: The measurements of the run.
+    under_cap: Whether the latency of the run was under the cap.
+  """
+
+  load: int
+  duration_fraction: float
+  result: ProbeResult
+  under_cap: bool
+
+
+class LoadGenerator(abc.ABC):
+  """Runs load at a level chosen by Search."""
+
+  THROUGHPUT_UNIT = 'ops/s'
+
+  @abc.abstractmethod
+  def Probe(self, load: int, duration_fraction: float) -> ProbeResult:
+    """Runs the given load and returns its measurements.
+
+    Args:
+      load: The load level to run.
+      duration_fraction: The fraction of the full probe duration to run for.
+        Short runs are used to screen out loads that violate the cap.
+    """
+
+
+@dataclasses.dataclass
+class SearchResult:
+  """The result of Search.
+
+  Attributes:
+    probes: Every run in the order they ran.
+    latency_cap: The latency cap of the search.
+    throughput_unit: The unit of probe throughputs.
+  """
+
+  probes: list[Probe]
+  latency_cap: float
+  throughput_unit: str = LoadGenerator.THROUGHPUT_UNIT
+
+  @property
+  def best(self) -> ProbeResult | None:
+    """Returns the highest throughput of the loads decided under the cap."""
+    return self.GetBest()
+
+  def GetBest(self, min_latency: float | None = None) -> ProbeResult | None:
+    """Returns the highest throughput of the loads decided under the cap.
+
+    Loads are decided as Search decides them, by the median latency of their
+    full runs, and represented by the full run with the median latency.
+
+    Args:
+      min_latency: If set, loads whose representative run has a lower latency
+        are skipped.
+    """
+    full_runs = collections.defaultdict(list)
+    for probe in self.probes:
+      if probe.duration_fraction >= 1:
+        full_runs[probe.load].append(probe.result)
+    best = None
+    for results in full_runs.values():
+      latencies = [result.latency for result in results]
+      if statistics.median(latencies) > self.latency_cap:
+        continue
+      median_low = statistics.median_low(latencies)
+      result = next(r for r in results if r.latency == median_low)
+      if min_latency is not None and result.latency < min_latency:
+        continue
+      if best is None or result.throughput > best.throughput:
+        best = result
+    return best
+
+  def GetSamples(
+      self, metadata: dict[str, Any] | None = None
+  ) -> list[sample.Sample]:
+    """Returns a throughput sample for every probe."""
+    samples = []
+    for index, probe in enumerate(self.probes):
+      probe_metadata = {
+          'latency_search_probe': index,
+          'latency_search_load': probe.load,
+          'latency_search_latency': probe.result.latency,
+          'latency_search_latency_cap': self.latency_cap,
+          'latency_search_under_cap': probe.under_cap,
+          'latency_search_duration_fraction': probe.duration_fraction,
+          'latency_search_strategy': _STRATEGY.value,
+      }
+      probe_metadata.update(probe.result.metadata)
+      probe_metadata.update(metadata or {})
+      samples.append(
+          sample.Sample(
+              'Latency Capped Search Probe Throughput',
+              probe.result.throughput,
+              self.throughput_unit,
+              probe_metadata,
+          )
+      )
+    return samples
+
+
+class _Search:
+  """State of a single search."""
+
+  def __init__(
+      self,
+      generator: LoadGenerator,
+      latency_cap: float,
+      lower_bound: float,
+      upper_bound: float,
+  ):
+    self.generator = generator
+    self.latency_cap = latency_cap
+    self.lower_bound = lower_bound
+    self.upper_bound = upper_bound
+    self.lower_latency = None
+    self.upper_latency = None
+    self.probes = []
+
+  def _Run(self, load: int, duration_fraction: float) -> ProbeResult:
+    result = self.generator.Probe(load, duration_fraction)
+    self.probes.append(
+        Probe(
+            load,
+            duration_fraction,
+            result,
+            result.latency <= self.latency_cap,
+        )
+    )
+    logging.info(
+        'Latency capped search probe at load %s for %s of its duration: '
+        'throughput %s, latency %s, cap %s.',
+        load,
+        duration_fraction,
+        result.throughput,
+        result.latency,
+        self.latency_cap,
+    )
+    return result
+
+  def Measure(self, load: int) -> float:
+    """Probes the load and returns the latency that decides it."""
+    if 0 < _SCREENING_FRACTION.value < 1:
+      result = self._Run(load, _SCREENING_FRACTION.value)
+      if result.latency > self.latency_cap * (1 + _TOLERANCE.value):
+        return result.latency
+    latencies = []
+    while True:
+      latencies.append(self._Run(load, 1).latency)
+      if len(latencies) >= _MAX_REPEATS.value:
+        break
+      noise = self.latency_cap * _TOLERANCE.value
+      if abs(statistics.median(latencies) - self.latency_cap) >= noise:
+        break
+    return statistics.median(latencies)
+
+  def NextLoad(self) -> int:
+    """Returns the next load to probe between the bounds."""
+    width = self.upper_bound - self.lower_bound
+    midpoint = self.lower_bound + math.ceil(width / 2)
+    if (
+        _STRATEGY.value != SECANT
+        or self.lower_latency is None
+        or self.upper_latency is None
+        or self.upper_latency <= self.lower_latency
+    ):
+      return midpoint
+    estimate = self.lower_bound + (self.latency_cap - self.lower_latency) * (
+        width / (self.upper_latency - self.lower_latency)
+    )
+    estimate = min(
+        max(estimate, self.lower_bound + width / 4),
+        self.upper_bound - width / 4,
+    )
+    load = round(estimate)
+    if not self.lower_bound < load < self.upper_bound:
+      return midpoint
+    return load
+
+
+def Search(
+    generator: LoadGenerator,
+    latency_cap: float,
+    lower_bound: float,
+    upper_bound: float,
+    initial_load: int | None = None,
+    resolution: float = 1,
+) -> SearchResult:
+  """Finds the highest load that the generator runs under the latency cap.
+
+  Args:
+    generator: The load generator to probe.
+    latency_cap: The highest acceptable latency.
+    lower_bound: A load assumed to be under the cap. It is not probed.
+    upper_bound: A load assumed to be over the cap. It is not probed.
+    initial_load: The first load to probe. Defaults to the middle of the
+      bounds.
+    resolution: The search stops once the bounds are this close. At least 1.
+
+  Returns:
+    The probes of the search.
+  """
+  search = _Search(generator, latency_cap, lower_bound, upper_bound)
+  load = search.NextLoad() if initial_load is None else initial_load
+  while search.upper_bound - search.lower_bound > max(resolution, 1):
+    latency = search.Measure(load)
+    if latency <= latency_cap:
+      search.lower_bound, search.lower_latency = load, latency
+    else:
+      search.upper_bound, search.upper_latency = load, latency
+    load = search.NextLoad()
+  return SearchResult(search.probes, latency_cap, generator.THROUGHPUT_UNIT)
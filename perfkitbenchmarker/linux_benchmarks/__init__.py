@@ -14,23 +14,20 @@
 """Contains benchmark imports and a list of benchmarks.
 
 All modules within this package are considered benchmarks, and are loaded
-dynamically. Add non-benchmark code to other packages.
+lazily when they are first looked up in VALID_BENCHMARKS. Add non-benchmark
+code to other packages.
 """
 
 from perfkitbenchmarker import import_util
 
+# Benchmark modules are only imported when a run looks them up by name.
+VALID_BENCHMARKS = import_util.LazyModuleRegistry(
+    __path__, __name__, name_attribute='BENCHMARK_NAME'
+)
 
-def _LoadBenchmarks():
-  return list(import_util.LoadModulesForPath(__path__, __name__))
 
-
-BENCHMARKS = _LoadBenchmarks()
-
-VALID_BENCHMARKS = {}
-for module in BENCHMARKS:
-  if module.BENCHMARK_NAME in VALID_BENCHMARKS:
-    raise ValueError(
-        'There are multiple benchmarks with BENCHMARK_NAME "%s"'
-        % (module.BENCHMARK_NAME)
-    )
-  VALID_BENCHMARKS[module.BENCHMARK_NAME] = module
+def __getattr__(name):
+  # BENCHMARKS imports every benchmark module, so it is only built on use.
+  if name == 'BENCHMARKS':
+    return VALID_BENCHMARKS.LoadAll()
+  raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -253,7 +253,11 @@ def _BurstRequestsOverTime(
         f' --ai_burst_time {throughput_load_driver.BURST_TIME.value}'
         f' --_ai_throughput_parallel_requests {burst_requests}'
         ' --ai_throw_on_client_errors='
-        f'{throughput_load_driver.THROW_ON_CLIENT_ERRORS.value}',
+        f'{throughput_load_driver.THROW_ON_CLIENT_ERRORS.value}'
+        f' --ai_load_mode {throughput_load_driver.LOAD_MODE.value}'
+        ' --ai_arrival_distribution'
+        f' {throughput_load_driver.ARRIVAL_DISTRIBUTION.value}'
+        f' --ai_max_concurrency {throughput_load_driver.MAX_CONCURRENCY.value}',
         timeout=throughput_load_driver.GetOverallTimeout(),
     )
   except errors.VmUtil.IssueCommandTimeoutError as timeout_error:
@@ -295,7 +299,15 @@ def _AggregateResponses(
       'test_duration': throughput_load_driver.TEST_DURATION.value,
       'burst_time': throughput_load_driver.BURST_TIME.value,
       'effective_qps': effective_qps,
+      'load_mode': throughput_load_driver.LOAD_MODE.value,
   })
+  if throughput_load_driver.LOAD_MODE.value == throughput_load_driver.OPEN_LOOP:
+    metadata.update({
+        'arrival_distribution': (
+            throughput_load_driver.ARRIVAL_DISTRIBUTION.value
+        ),
+        'max_concurrency': throughput_load_driver.MAX_CONCURRENCY.value,
+    })
   samples = []
   if failed_durations:
     samples.append(
@@ -350,6 +362,26 @@ def _AggregateResponses(
           metadata,
       )
   )
+  corrected_durations = [
+      response.CorrectedLatency()
+      for response in responses
+      if response.scheduled_time is not None
+  ]
+  if corrected_durations:
+    # Latency from when each request should have been sent, which also counts
+    # time spent waiting on an overloaded client or concurrency cap.
+    percentiles = sample.PercentileCalculator(
+        corrected_durations, [50, 90, 99]
+    )
+    for stat in ('p50', 'p90', 'p99', 'average'):
+      samples.append(
+          sample.Sample(
+              f'corrected_response_time_{stat}',
+              percentiles[stat],
+              'seconds',
+              metadata,
+          )
+      )
   return samples
 
 
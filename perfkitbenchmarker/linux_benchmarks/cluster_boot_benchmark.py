@@ -134,6 +134,11 @@ _BOOT_TEST_PORT_LISTENING = flags.DEFINE_boolean(
     'Test the time it takes to successfully connect to the port that is used '
     'to run the remote command.',
 )
+flags.DEFINE_boolean(
+    'cluster_boot_test_rdp_port_listening',
+    False,
+    'Test the time it takes to successfully connect to the RDP port.',
+)
 _LINUX_BOOT_METRICS = flags.DEFINE_boolean(
     'cluster_boot_linux_boot_metrics',
     False,
@@ -80,7 +80,7 @@ def Prepare(benchmark_spec):
       os.path.join(FLAGS.local_query_dir, query)
       for query in FLAGS.edw_power_queries.split(',')
   ]
-  any(vm.PushFile(query_loc) for query_loc in query_locations)
+  vm.PushFiles(query_locations)
 
 
 def Run(benchmark_spec):
@@ -92,8 +92,9 @@ def Prepare(bm_spec: benchmark_spec.BenchmarkSpec) -> None:
   for vm in bm_spec.vms:
     vm.RemoteCommand(f'{_ENV.value} pip install absl-py')
     vm.AuthenticateVm()
-    for script in [_TEST_SCRIPT, _SERVER_SCRIPT]:
-      vm.PushFile(data.ResourcePath(script), script)
+    vm.PushFiles(
+        [data.ResourcePath(script) for script in (_TEST_SCRIPT, _SERVER_SCRIPT)]
+    )
   server1, server2 = bm_spec.vms[0], bm_spec.vms[1]
   server1_addr = _SERVER_ADDR.format(hostname=server1.hostname, port=_PORT)
   server2_addr = _SERVER_ADDR.format(hostname=server2.hostname, port=_PORT)
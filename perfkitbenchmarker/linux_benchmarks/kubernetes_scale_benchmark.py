@@ -12,6 +12,7 @@ from perfkitbenchmarker import benchmark_spec
 from perfkitbenchmarker import configs
 from perfkitbenchmarker import container_service
 from perfkitbenchmarker import errors
+from perfkitbenchmarker import kubernetes_informer
 from perfkitbenchmarker import sample
 
 
@@ -37,6 +38,13 @@ kubernetes_scale:
 NUM_NEW_INSTANCES = flags.DEFINE_integer(
     'kubernetes_goal_replicas', 5, 'Number of new instances to create'
 )
+WATCH = flags.DEFINE_boolean(
+    'kubernetes_scale_watch',
+    False,
+    'Whether to follow pods with a single kubectl watch instead of kubectl '
+    'commands per pod, and also report when pod conditions were observed to '
+    'become true as pod_<condition>_observed samples.',
+)
 
 # kubectl pods don't allow _'s.
 SPEC_NAME = 'hello_world'
@@ -81,9 +89,17 @@ def Run(bm_spec: benchmark_spec.BenchmarkSpec) -> list[sample.Sample]:
   cluster = bm_spec.container_cluster
   assert isinstance(cluster, container_service.KubernetesCluster)
 
-  samples, rollout_name = ScaleUpPods(cluster)
-  start_time = _GetRolloutCreationTime(rollout_name)
-  samples += ParseEvents(cluster, start_time)
+  informer = None
+  if WATCH.value:
+    informer = kubernetes_informer.PodInformer()
+    informer.Start()
+  try:
+    samples, rollout_name = ScaleUpPods(cluster, informer)
+    start_time = _GetRolloutCreationTime(rollout_name)
+    samples += ParseEvents(cluster, start_time, informer)
+  finally:
+    if informer:
+      informer.Stop()
   metadata = {'goal_replicas': NUM_NEW_INSTANCES.value}
   for s in samples:
     s.metadata.update(metadata)
@@ -92,10 +108,19 @@ def Run(bm_spec: benchmark_spec.BenchmarkSpec) -> list[sample.Sample]:
 
 def ScaleUpPods(
     cluster: container_service.KubernetesCluster,
+    informer: kubernetes_informer.PodInformer | None = None,
 ) -> tuple[list[sample.Sample], str]:
-  """Scales up pods on a kubernetes cluster. Returns samples & rollout name."""
+  """Scales up pods on a kubernetes cluster. Returns samples & rollout name.
+
+  Args:
+    cluster: The cluster to scale up pods on.
+    informer: If set, pods are awaited with it instead of kubectl commands.
+  """
   samples = []
-  initial_pods = set(cluster.GetAllPodNames())
+  if informer:
+    initial_pods = set(informer.GetPodNames())
+  else:
+    initial_pods = set(cluster.GetAllPodNames())
   logging.info('Initial pods: %s', initial_pods)
 
   # Request X new pods via YAML apply.
@@ -117,14 +142,54 @@ def ScaleUpPods(
   rollout_name = next(resource_names)
 
   start_polling_time = time.monotonic()
-  cluster.WaitForRollout(rollout_name, timeout=max_wait_time)
+  if informer:
+    all_new_pods = _WaitForPodsWithInformer(
+        informer, num_new_instances, initial_pods, max_wait_time
+    )
+  else:
+    all_new_pods = _WaitForPods(
+        cluster, rollout_name, num_new_instances, initial_pods, max_wait_time
+    )
+  end_polling_time = time.monotonic()
+  logging.info(
+      'In %d seconds, found all new pods %s',
+      end_polling_time - start_polling_time,
+      all_new_pods,
+  )
+  samples.append(
+      sample.Sample(
+          'pod_polling_duration',
+          end_polling_time - start_polling_time,
+          'seconds',
+      )
+  )
+  return samples, rollout_name
 
-  all_new_pods = set(cluster.GetAllPodNames()) - initial_pods
+
+def _CheckNewPodCount(
+    num_new_instances: int, all_new_pods: set[str]
+) -> set[str]:
+  """Returns the new pods, raising if there are fewer than requested."""
   if len(all_new_pods) < num_new_instances:
     raise errors.Benchmarks.RunError(
         'Failed to scale up to %d pods, only found %d.'
         % (num_new_instances, len(all_new_pods))
     )
+  return all_new_pods
+
+
+def _WaitForPods(
+    cluster: container_service.KubernetesCluster,
+    rollout_name: str,
+    num_new_instances: int,
+    initial_pods: set[str],
+    max_wait_time: int,
+) -> set[str]:
+  """Waits for the rollout and all pods to be ready. Returns the new pods."""
+  cluster.WaitForRollout(rollout_name, timeout=max_wait_time)
+
+  all_new_pods = set(cluster.GetAllPodNames()) - initial_pods
+  _CheckNewPodCount(num_new_instances, all_new_pods)
   try:
     cluster.WaitForResource(
         'pod',
@@ -138,20 +203,32 @@ def ScaleUpPods(
         ' Failure will be checked later by number of pods with ready events.',
         e,
     )
-  end_polling_time = time.monotonic()
-  logging.info(
-      'In %d seconds, found all new pods %s',
-      end_polling_time - start_polling_time,
-      all_new_pods,
-  )
-  samples.append(
-      sample.Sample(
-          'pod_polling_duration',
-          end_polling_time - start_polling_time,
-          'seconds',
-      )
+  return all_new_pods
+
+
+def _WaitForPodsWithInformer(
+    informer: kubernetes_informer.PodInformer,
+    num_new_instances: int,
+    initial_pods: set[str],
+    max_wait_time: int,
+) -> set[str]:
+  """Waits for the new pods to be ready using the informer."""
+  try:
+    informer.WaitForPods(
+        num_new_instances,
+        max_wait_time,
+        condition_type='Ready',
+        exclude=initial_pods,
+    )
+  except kubernetes_informer.InformerTimeoutError as e:
+    logging.info(
+        'Failed to wait for all pods to be ready: %s. Failure will be checked'
+        ' later by number of pods with ready events.',
+        e,
+    )
+  return _CheckNewPodCount(
+      num_new_instances, set(informer.GetPodNames()) - initial_pods
   )
-  return samples, rollout_name
 
 
 def _GetPodStatusConditions(pod_name: str) -> list[dict[str, str]]:
@@ -185,20 +262,49 @@ def ConvertToEpochTime(timestamp: str) -> int:
 def ParseEvents(
     cluster: container_service.KubernetesCluster,
     start_time: float,
+    informer: kubernetes_informer.PodInformer | None = None,
 ) -> list[sample.Sample]:
-  """Parses events into samples."""
-  all_pods = cluster.GetAllPodNames()
+  """Parses events into samples.
+
+  Args:
+    cluster: The cluster of the pods.
+    start_time: The time that sample values are relative to.
+    informer: If set, pod conditions are read from it instead of with a
+      kubectl command per pod, and the times it observed conditions become
+      true are reported too.
+
+  Returns:
+    Samples summarizing when pod conditions became true.
+  """
+  if informer:
+    all_pods = informer.GetPodNames()
+    get_conditions = informer.GetConditions
+  else:
+    all_pods = cluster.GetAllPodNames()
+    get_conditions = _GetPodStatusConditions
   overall_times = collections.defaultdict(list)
   for pod in all_pods:
-    conditions = _GetPodStatusConditions(pod)
+    conditions = get_conditions(pod)
     for condition in conditions:
       str_time = condition['lastTransitionTime']
       overall_times[condition['type']].append(ConvertToEpochTime(str_time))
 
+  samples = _SummarizeEvents(overall_times, start_time, '')
+  if informer:
+    samples += _SummarizeEvents(
+        informer.GetTransitionTimes(), start_time, 'observed_'
+    )
+  return samples
+
+
+def _SummarizeEvents(
+    overall_times: dict[str, list[float]], start_time: float, qualifier: str
+) -> list[sample.Sample]:
+  """Returns samples summarizing the timestamps of each event."""
   samples = []
   for event, timestamps in overall_times.items():
     summaries = _SummarizeTimestamps(timestamps)
-    prefix = f'pod_{event}_'
+    prefix = f'pod_{event}_{qualifier}'
     for percentile, value in summaries.items():
       samples.append(
           sample.Sample(
@@ -501,30 +501,33 @@ def _WaitForResponses(launcher_vms):
   """Wait for all results or server shutdown or TIMEOUT_SECONDS."""
 
   # if any listener server exited, stop waiting.
-  def _LauncherError(vm):
-    error, _ = vm.RemoteCommand(
-        'grep ERROR ' + _LISTENER_SERVER_LOG, ignore_failure=True
-    )
-    return error
-
-  error_str = background_tasks.RunThreaded(_LauncherError, launcher_vms)
+  error_str = [
+      error
+      for error, _ in linux_virtual_machine.RemoteCommands(
+          launcher_vms,
+          'grep ERROR ' + _LISTENER_SERVER_LOG,
+          ignore_failure=True,
+      )
+  ]
   if any(error_str):
     raise errors.Benchmarks.RunError(
         'Some listening server errored out: %s' % error_str
     )
 
-  def _CountState(vm, state):
-    stdout, _ = vm.RemoteCommand(
-        f'grep -c {state} {_RESULTS_FILE_PATH}', ignore_failure=True
-    )
-    try:
-      return int(stdout)
-    except ValueError:
-      return -1
-
-  boots = background_tasks.RunThreaded(
-      lambda vm: _CountState(vm, STATUS_PASSING), launcher_vms
-  )
+  def _CountState(state):
+    counts = []
+    for stdout, _ in linux_virtual_machine.RemoteCommands(
+        launcher_vms,
+        f'grep -c {state} {_RESULTS_FILE_PATH}',
+        ignore_failure=True,
+    ):
+      try:
+        counts.append(int(stdout))
+      except ValueError:
+        counts.append(-1)
+    return counts
+
+  boots = _CountState(STATUS_PASSING)
   for vm, boot_count in zip(launcher_vms, boots):
     logging.info(
         'Launcher %s reported %d/%d booted VMs',
@@ -534,9 +537,7 @@ def _WaitForResponses(launcher_vms):
     )
   total_running_count = 0
   if _ReportRunningStatus():
-    running = background_tasks.RunThreaded(
-        lambda vm: _CountState(vm, STATUS_RUNNING), launcher_vms
-    )
+    running = _CountState(STATUS_RUNNING)
     for vm, running_count in zip(launcher_vms, running):
       logging.info(
           'Launcher %s reported %d/%d running VMs',
@@ -674,9 +675,8 @@ def Run(benchmark_spec):
     A list of benchmark samples.
   """
   launcher_vms = benchmark_spec.vm_groups['servers']
-  background_tasks.RunThreaded(
-      lambda vm: vm.RemoteCommand('bash {} 2>&1 | tee log'.format(_BOOT_PATH)),
-      launcher_vms,
+  linux_virtual_machine.RemoteCommands(
+      launcher_vms, 'bash {} 2>&1 | tee log'.format(_BOOT_PATH)
   )
   try:
     _WaitForResponses(launcher_vms)
@@ -699,6 +699,4 @@ def Cleanup(benchmark_spec):
   """
   launcher_vms = benchmark_spec.vm_groups['servers']
   command = 'bash {} 2>&1 | tee clean_up_log'.format(_CLEAN_UP_SCRIPT_PATH)
-  background_tasks.RunThreaded(
-      lambda vm: vm.RemoteCommand(command), launcher_vms
-  )
+  linux_virtual_machine.RemoteCommands(launcher_vms, command)
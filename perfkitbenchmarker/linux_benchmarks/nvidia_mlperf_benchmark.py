@@ -27,6 +27,7 @@ from perfkitbenchmarker import configs
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import regex_util
 from perfkitbenchmarker import sample
+from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker import vm_util
 from perfkitbenchmarker.linux_benchmarks import mlperf_benchmark as mlperf
 from perfkitbenchmarker.linux_packages import nvidia_driver
@@ -166,9 +167,6 @@ def _PrepareData(vm):
   # Mount object storage
   vm.RemoteCommand('sudo mkdir -p /data/ && sudo chmod a+w /data')
   vm.RemoteCommand('sudo umount /data', ignore_failure=True)
-  vm.InstallPreprovisionedBenchmarkData(
-      BENCHMARK_NAME, ['sentencepiece.model'], vm.GetScratchDir()
-  )
   if provider == 'gs':
     vm.RemoteCommand(
         'sudo mount -t gcsfuse -o '
@@ -208,6 +206,9 @@ def Prepare(benchmark_spec):
   if not FUSE_BUCKET.value:
     raise ValueError('mlperf_fuse_path must be specified')
   vms = benchmark_spec.vms
+  virtual_machine.InstallPreprovisionedBenchmarkDataOnVms(
+      vms, BENCHMARK_NAME, ['sentencepiece.model'], vms[0].GetScratchDir()
+  )
   background_tasks.RunThreaded(_PrepareData, vms)
   background_tasks.RunThreaded(_PrepareNvidiaMlperf, vms)
   slurm.ConfigureSlurm(vms)
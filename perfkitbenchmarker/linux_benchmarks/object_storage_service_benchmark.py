@@ -257,6 +257,14 @@ flags.DEFINE_float(
     'the histograms during post-processing, but impossible to '
     'go in the opposite direction.',
 )
+_LATENCY_SKETCH_ACCURACY = flags.DEFINE_float(
+    'object_storage_latency_sketch_accuracy',
+    None,
+    'If set, a latency sketch sample will be created for each object size, '
+    'holding a sample.QuantileSketch of the multi-stream latencies with the '
+    'specified relative accuracy. Unlike percentiles, sketches of several '
+    'runs can be merged during post-processing.',
+)
 flags.DEFINE_boolean(
     'record_individual_latency_samples',
     False,
@@ -320,6 +328,8 @@ API_TEST_SCRIPT_PACKAGE_FILES = [
     'object_storage_interface.py',
     'azure_flags.py',
     'gcs_flags.py',
+    'local_flags.py',
+    'local_service.py',
     's3_flags.py',
 ]
 
@@ -701,6 +711,17 @@ def ProcessMultiStreamResults(
           )
       )
 
+    if _LATENCY_SKETCH_ACCURACY.value:
+      _AppendLatencySketchToResults(
+          results,
+          [
+              latency[active_sizes[i] == size]
+              for i, latency in enumerate(active_latencies)
+          ],
+          'Multi-stream %s latency sketch' % operation,
+          this_size_metadata,
+      )
+
   # Throughput metrics
   total_active_times = [np.sum(latency) for latency in active_latencies]
   active_durations = [
@@ -1580,6 +1601,30 @@ def _AppendPercentilesToResults(
     )
 
 
+def _AppendLatencySketchToResults(
+    output_results, stream_latencies, metric_name, metadata
+):
+  """Appends a sample with a QuantileSketch of the latencies of each stream.
+
+  The sketch is serialized to JSON in the sample metadata, so that sketches
+  of several runs can be merged with sample.QuantileSketch.Merge.
+
+  Args:
+    output_results: a list to append the sample to.
+    stream_latencies: a list of numpy arrays. Latencies of each stream.
+    metric_name: name of the sample.
+    metadata: dict. Base sample metadata.
+  """
+  sketch = sample.QuantileSketch(_LATENCY_SKETCH_ACCURACY.value)
+  for latencies in stream_latencies:
+    sketch.AddMany(latencies)
+  sketch_metadata = metadata.copy()
+  sketch_metadata['sketch'] = json.dumps(sketch.ToDict())
+  output_results.append(
+      sample.Sample(metric_name, 0.0, 'sketch', metadata=sketch_metadata)
+  )
+
+
 def CLIThroughputBenchmark(
     output_results, metadata, vm, command_builder, service, bucket
 ):
@@ -14,7 +14,8 @@
 """Contains package imports and a dictionary of package names and modules.
 
 All modules within this package are considered packages, and are loaded
-dynamically. Add non-package code to other packages.
+lazily when they are first looked up in PACKAGES. Add non-package code to
+other packages.
 
 Packages should, at a minimum, define install functions for each type of
 package manager (e.g. YumInstall(vm) and AptInstall(vm)).
@@ -38,21 +39,18 @@ packages in benchmarks.
 
 from perfkitbenchmarker import import_util
 
-
 # Place to install stuff. Persists across reboots.
 INSTALL_DIR = '/opt/pkb'
 
 
-def _LoadPackages():
-  packages = {
-      module.__name__.split('.')[-1]: module
-      for module in import_util.LoadModulesForPath(__path__, __name__)
-  }
-  packages.update(packages['docker'].CreateImagePackages())
-  return packages
+def _DockerImagePackages():
+  return PACKAGES['docker'].CreateImagePackages()
 
 
-PACKAGES = _LoadPackages()
+# Package modules are only imported when a VM installs them.
+PACKAGES = import_util.LazyModuleRegistry(
+    __path__, __name__, extra_entries=_DockerImagePackages
+)
 
 
 def GetPipPackageVersion(vm, package_name):
@@ -37,8 +37,7 @@ STEADY_STATE_MEASUREMENT_WINDOW = '-ssmw'
 
 def _Install(vm):
   vm.InstallPackages('fio')  # CloudHarmony doesn't work well with v2.7 fio
-  for deps in ['php', 'build_tools']:
-    vm.Install(deps)
+  vm.InstallMany(['php', 'build_tools'])
   vm.RemoteCommand(
       (
           'git clone https://github.com/cloudharmony/{benchmark}.git {dir}'
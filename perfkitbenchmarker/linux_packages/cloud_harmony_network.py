@@ -23,8 +23,7 @@ PACKAGE_NAME = 'cloud_harmony_network'
 
 def Install(vm):
   """Install Cloud Harmory network benchmark on VM."""
-  for deps in ['php', 'build_tools', 'curl']:
-    vm.Install(deps)
+  vm.InstallMany(['php', 'build_tools', 'curl'])
   vm.RemoteCommand(
       f'git clone --recurse-submodules {BENCHMARK_GIT_URL} {INSTALL_PATH}'
   )
@@ -16,12 +16,13 @@
 
 import collections
 import configparser
-import csv
 import io
+import itertools
 import json
 import logging
 import time
 from absl import flags
+import numpy as np
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import linux_packages
 from perfkitbenchmarker import regex_util
@@ -47,6 +48,8 @@ JOB_STONEWALL_PARAMETER = 'stonewall'
 # Defined in fio
 DATA_DIRECTION = {0: 'read', 1: 'write', 2: 'trim'}
 HIST_BUCKET_START_IDX = 3
+# Number of histogram log rows parsed at once. Each row has ~1856 buckets.
+_HIST_ROWS_PER_CHUNK = 1024
 
 # Patch fiologparser to return mean bucket.
 FIO_HIST_LOG_PARSER_PATCH = 'fiologparser_hist.patch'
@@ -61,8 +64,7 @@ def GetFioExec():
 
 def _Install(vm):
   """Installs the fio package on the VM."""
-  for p in ['build_tools', 'pip']:
-    vm.Install(p)
+  vm.InstallMany(['build_tools', 'pip'])
   for package in ('numpy', 'pandas'):
     vm.RemoteCommand(f'sudo pip3 install {package}')
   vm.RemoteCommand('git clone {} {}'.format(GIT_REPO, FIO_DIR))
@@ -374,6 +376,10 @@ def DeleteParameterFromJobFile(job_file, parameter):
 def _ParseHistogram(hist_log_file, mean_bin_vals):
   """Parses histogram log file reported by fio.
 
+  The log is read _HIST_ROWS_PER_CHUNK rows at a time and each chunk's bucket
+  columns are summed per key with NumPy, so memory use does not grow with the
+  size of the log.
+
   Args:
     hist_log_file: String. File name of fio histogram log. Format: time (msec),
       data direction (0: read, 1: write, 2: trim), block size, bin 0, .., etc
@@ -385,22 +391,33 @@ def _ParseHistogram(hist_log_file, mean_bin_vals):
   if not mean_bin_vals:
     logging.warning('Skipping log file %s.', hist_log_file)
     return {}
-  aggregates = dict()
+  totals = {}
   with open(hist_log_file) as f:
-    reader = csv.reader(f, delimiter=',')
-    for r in reader:
+    while True:
+      lines = list(itertools.islice(f, _HIST_ROWS_PER_CHUNK))
+      if not lines:
+        break
+      rows = np.loadtxt(lines, delimiter=',', dtype=np.int64, ndmin=2)
       # Use (data direction, block size) as key
-      key = (DATA_DIRECTION[int(r[1])], int(r[2]))
-
-      hist_list = []
-      for idx, v in enumerate(r[HIST_BUCKET_START_IDX:]):
-        if int(v):
-          hist_list.append(((mean_bin_vals[idx])/1000, int(v)))
-      todict = dict(hist_list)
-      if key not in aggregates:
-        aggregates[key] = collections.Counter()
-      aggregates[key].update(todict)
+      keys, key_indices = np.unique(rows[:, 1:3], axis=0, return_inverse=True)
+      for i, (direction, block_size) in enumerate(keys.tolist()):
+        counts = rows[key_indices.ravel() == i, HIST_BUCKET_START_IDX:].sum(
+            axis=0
+        )
+        key = (DATA_DIRECTION[direction], block_size)
+        if key in totals:
+          totals[key] += counts
+        else:
+          totals[key] = counts
 
+  aggregates = dict()
+  for key, counts in totals.items():
+    aggregates[key] = collections.Counter({
+        mean_bin_vals[idx] / 1000: count
+        for idx, count in zip(
+            np.flatnonzero(counts).tolist(), counts[counts != 0].tolist()
+        )
+    })
   return aggregates
 
 
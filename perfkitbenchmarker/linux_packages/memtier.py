@@ -25,7 +25,7 @@ import random
 import re
 import statistics
 import time
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
 from absl import flags
 from absl import logging
@@ -33,6 +33,8 @@ import numpy as np
 from perfkitbenchmarker import background_tasks
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import flag_util
+from perfkitbenchmarker import hdr_histogram
+from perfkitbenchmarker import latency_capped_search
 from perfkitbenchmarker import linux_packages
 from perfkitbenchmarker import sample
 from perfkitbenchmarker import virtual_machine
@@ -63,6 +65,28 @@ MAX_PIPELINES_COUNT = 5000
 MAX_CLIENTS_COUNT = 30
 
 MemtierHistogram = List[Dict[str, Union[float, int]]]
+# Percentiles printed by memtier, as keyed in MemtierResult.latency_dic.
+_LATENCY_PERCENTILES = (
+    '50',
+    '90',
+    '95',
+    '99',
+    '99.5',
+    '99.9',
+    '99.950',
+    '99.990',
+)
+# Percentiles in memtier's per second json output.
+_TIME_SERIES_PERCENTILES = {
+    'p50.00': 50.0,
+    'p90.00': 90.0,
+    'p95.00': 95.0,
+    'p99.00': 99.0,
+    'p99.50': 99.5,
+    'p99.90': 99.9,
+    'p99.95': 99.95,
+    'p99.99': 99.99,
+}
 
 FLAGS = flags.FLAGS
 
@@ -271,6 +295,16 @@ MEMTIER_TIME_SERIES = flags.DEFINE_bool(
         ' greatly increase the number of samples.'
     ),
 )
+MEMTIER_HISTOGRAM_AGGREGATION = flags.DEFINE_bool(
+    'memtier_histogram_aggregation',
+    False,
+    (
+        'Combine latencies across memtier clients by merging latency'
+        ' histograms, so that reported percentiles are over all requests'
+        ' instead of the average or max of per client percentiles. Collects'
+        ' memtier json output even without --memtier_time_series.'
+    ),
+)
 
 MEMTIER_SERVER_SELECTION = flags.DEFINE_enum(
     'memtier_server_selection',
@@ -589,6 +623,7 @@ def _RunParallelConnections(
     clients: int,
     pipelines: int,
     password: str | None = None,
+    duration_fraction: float = 1.0,
 ) -> list['MemtierResult']:
   """Runs memtier in parallel with the given connections."""
   run_args = []
@@ -599,6 +634,7 @@ def _RunParallelConnections(
       'clients': clients,
       'pipeline': pipelines,
       'password': password,
+      'duration_fraction': duration_fraction,
   }
 
   connections_by_vm = collections.defaultdict(list)
@@ -633,45 +669,32 @@ def _RunParallelConnections(
 
 
 class _LoadModifier(abc.ABC):
-  """Base class for load modification in binary search."""
+  """Base class for the load dimension of a latency capped search."""
+
+  @abc.abstractmethod
+  def GetBounds(self) -> Tuple[int, int]:
+    """Returns loads assumed to be under and over the latency cap."""
 
   @abc.abstractmethod
-  def GetInitialParameters(self) -> MemtierBinarySearchParameters:
-    """Returns the initial parameters used in the binary search."""
+  def GetInitialLoad(self) -> int:
+    """Returns the first load to probe."""
 
   @abc.abstractmethod
-  def ModifyLoad(
-      self, parameters: MemtierBinarySearchParameters, latency: float
-  ) -> MemtierBinarySearchParameters:
-    """Returns new search parameters."""
+  def GetParameters(self, load: int) -> MemtierBinarySearchParameters:
+    """Returns the memtier parameters that run the given load."""
 
 
 class _PipelineModifier(_LoadModifier):
-  """Modifies pipelines in single-client binary search."""
+  """Modifies pipelines in single-client search."""
 
-  def GetInitialParameters(self) -> MemtierBinarySearchParameters:
-    return MemtierBinarySearchParameters(
-        upper_bound=MAX_PIPELINES_COUNT, pipelines=MAX_PIPELINES_COUNT // 2
-    )
+  def GetBounds(self) -> Tuple[int, int]:
+    return 0, MAX_PIPELINES_COUNT
 
-  def ModifyLoad(
-      self, parameters: MemtierBinarySearchParameters, latency: float
-  ) -> MemtierBinarySearchParameters:
-    if latency <= MEMTIER_LATENCY_CAP.value:
-      lower_bound = parameters.pipelines
-      upper_bound = min(parameters.upper_bound, MAX_PIPELINES_COUNT)
-    else:
-      lower_bound = parameters.lower_bound
-      upper_bound = parameters.pipelines
+  def GetInitialLoad(self) -> int:
+    return MAX_PIPELINES_COUNT // 2
 
-    pipelines = lower_bound + math.ceil((upper_bound - lower_bound) / 2)
-    return MemtierBinarySearchParameters(
-        lower_bound=lower_bound,
-        upper_bound=upper_bound,
-        pipelines=pipelines,
-        threads=1,
-        clients=1,
-    )
+  def GetParameters(self, load: int) -> MemtierBinarySearchParameters:
+    return MemtierBinarySearchParameters(pipelines=load, threads=1, clients=1)
 
 
 def _FindFactor(number: int, max_threads: int, max_clients: int) -> int:
@@ -684,39 +707,82 @@ def _FindFactor(number: int, max_threads: int, max_clients: int) -> int:
 
 @dataclasses.dataclass
 class _ClientModifier(_LoadModifier):
-  """Modifies clients in single-pipeline binary search."""
+  """Modifies clients in single-pipeline search."""
 
   max_clients: int
   max_threads: int
 
-  def GetInitialParameters(self) -> MemtierBinarySearchParameters:
-    return MemtierBinarySearchParameters(
-        upper_bound=self.max_clients * self.max_threads,
-        threads=max(self.max_threads // 2, 1),
-        clients=self.max_clients,
-    )
+  def GetBounds(self) -> Tuple[int, int]:
+    # The maximum client count is probed too.
+    return 0, self.max_clients * self.max_threads + 1
 
-  def ModifyLoad(
-      self, parameters: MemtierBinarySearchParameters, latency: float
-  ) -> MemtierBinarySearchParameters:
-    if latency <= MEMTIER_LATENCY_CAP.value:
-      lower_bound = parameters.clients * parameters.threads + 1
-      upper_bound = min(
-          parameters.upper_bound, self.max_clients * self.max_threads
-      )
-    else:
-      lower_bound = parameters.lower_bound
-      upper_bound = parameters.clients * parameters.threads - 1
+  def GetInitialLoad(self) -> int:
+    return self.max_clients * max(self.max_threads // 2, 1)
 
-    total_clients = lower_bound + math.ceil((upper_bound - lower_bound) / 2)
-    threads = _FindFactor(total_clients, self.max_threads, self.max_clients)
-    clients = total_clients // threads
+  def GetParameters(self, load: int) -> MemtierBinarySearchParameters:
+    threads = _FindFactor(load, self.max_threads, self.max_clients)
     return MemtierBinarySearchParameters(
-        lower_bound=lower_bound,
-        upper_bound=upper_bound,
         pipelines=1,
         threads=threads,
-        clients=clients,
+        clients=load // threads,
+    )
+
+
+@dataclasses.dataclass
+class _MemtierLoadGenerator(latency_capped_search.LoadGenerator):
+  """Runs memtier at the load of a modifier over parallel connections."""
+
+  connections: list[MemtierConnection]
+  modifier: _LoadModifier
+  server_ip: str
+  server_port: int
+  password: str | None = None
+
+  def Probe(
+      self, load: int, duration_fraction: float
+  ) -> latency_capped_search.ProbeResult:
+    parameters = self.modifier.GetParameters(load)
+    result = _CombineResults(
+        _RunParallelConnections(
+            self.connections,
+            self.server_ip,
+            self.server_port,
+            parameters.threads,
+            parameters.clients,
+            parameters.pipelines,
+            self.password,
+            duration_fraction,
+        )
+    )
+    logging.info(
+        (
+            'Search for latency capped throughput.'
+            '\nMemtier ops throughput: %s qps'
+            '\nmemtier 95th percentile latency: %s ms'
+            '\n%s'
+        ),
+        result.ops_per_sec,
+        result.latency_dic['95'],
+        parameters,
+    )
+    result.parameters = parameters
+    result.metadata.update(
+        GetMetadata(
+            clients=parameters.clients,
+            threads=parameters.threads,
+            pipeline=parameters.pipelines,
+        )
+    )
+    # 95 percentile used to decide latency cap
+    return latency_capped_search.ProbeResult(
+        throughput=result.ops_per_sec,
+        latency=result.latency_dic['95'],
+        metadata={
+            'clients': parameters.clients,
+            'threads': parameters.threads,
+            'pipeline': parameters.pipelines,
+        },
+        details=result,
     )
 
 
@@ -725,12 +791,22 @@ def _CombineResults(results: list['MemtierResult']) -> 'MemtierResult':
   ops_per_sec = sum([result.ops_per_sec for result in results])
   kb_per_sec = sum([result.kb_per_sec for result in results])
   latency_ms = sum([result.latency_ms for result in results]) / len(results)
-  latency_dic = collections.defaultdict(int)
-  for result in results:
-    for k, v in result.latency_dic.items():
-      latency_dic[k] += v
-  for k in latency_dic:
-    latency_dic[k] /= len(results)
+  latency_histogram = None
+  if MEMTIER_HISTOGRAM_AGGREGATION.value:
+    latency_histogram = _MergeLatencyHistograms(results)
+  if latency_histogram is not None and ops_per_sec:
+    latency_ms = (
+        sum([result.latency_ms * result.ops_per_sec for result in results])
+        / ops_per_sec
+    )
+    latency_dic = _GetLatencyDic(latency_histogram, results[0].latency_dic)
+  else:
+    latency_dic = collections.defaultdict(int)
+    for result in results:
+      for k, v in result.latency_dic.items():
+        latency_dic[k] += v
+    for k in latency_dic:
+      latency_dic[k] /= len(results)
   return MemtierResult(
       ops_per_sec=ops_per_sec,
       kb_per_sec=kb_per_sec,
@@ -738,80 +814,102 @@ def _CombineResults(results: list['MemtierResult']) -> 'MemtierResult':
       latency_dic=latency_dic,
       metadata=results[0].metadata,
       parameters=results[0].parameters,
+      latency_histogram=latency_histogram,
+  )
+
+
+def _MergeLatencyHistograms(
+    results: list['MemtierResult'],
+) -> hdr_histogram.HdrHistogram | None:
+  """Merges the latency histograms of results, or None if one is missing."""
+  merged = None
+  for result in results:
+    if result.latency_histogram is None:
+      logging.warning('Missing memtier latency histogram, not merging.')
+      return None
+    if merged is None:
+      merged = copy.deepcopy(result.latency_histogram)
+    else:
+      merged.Add(result.latency_histogram)
+  if merged is None or not merged.total_count:
+    return None
+  return merged
+
+
+def _GetLatencyDic(
+    histogram: hdr_histogram.HdrHistogram, percentiles: Iterable[str]
+) -> Dict[str, float]:
+  """Returns the latency in ms at each percentile, keyed like latency_dic."""
+  percentiles = list(percentiles)
+  values = histogram.ValuesAtPercentiles(
+      [float(percentile) for percentile in percentiles]
   )
+  return {
+      percentile: values[float(percentile)] / 1000 for percentile in percentiles
+  }
 
 
-def _BinarySearchForLatencyCappedThroughput(
+def _SearchForLatencyCappedThroughput(
     connections: list[MemtierConnection],
     load_modifiers: list[_LoadModifier],
     server_ip: str,
     server_port: int,
     password: str | None = None,
-) -> list['MemtierResult']:
-  """Runs memtier to find the maximum throughput under a latency cap."""
-  results = []
+) -> list[latency_capped_search.SearchResult]:
+  """Runs memtier to find the maximum throughput under a latency cap.
+
+  Args:
+    connections: list of connections from client to server.
+    load_modifiers: The load dimensions to search, one search each.
+    server_ip: Ip address of the server.
+    server_port: Port of the server.
+    password: Password of the server.
+
+  Returns:
+    The result of each search. The details of probe results are
+    MemtierResults.
+  """
+  searches = []
   for modifier in load_modifiers:
-    parameters = modifier.GetInitialParameters()
-    current_max_result = MemtierResult(
-        latency_dic={
-            '50': 0,
-            '90': 0,
-            '95': 0,
-            '99': 0,
-            '99.5': 0,
-            '99.9': 0,
-            '99.950': 0,
-            '99.990': 0,
-        },
+    lower_bound, upper_bound = modifier.GetBounds()
+    search = latency_capped_search.Search(
+        _MemtierLoadGenerator(
+            connections, modifier, server_ip, server_port, password
+        ),
+        MEMTIER_LATENCY_CAP.value,
+        lower_bound,
+        upper_bound,
+        initial_load=modifier.GetInitialLoad(),
     )
-    while parameters.lower_bound < (parameters.upper_bound - 1):
-      parallel_results = _RunParallelConnections(
-          connections,
-          server_ip,
-          server_port,
-          parameters.threads,
-          parameters.clients,
-          parameters.pipelines,
-          password,
-      )
-      result = _CombineResults(parallel_results)
-      logging.info(
-          (
-              'Binary search for latency capped throughput.'
-              '\nMemtier ops throughput: %s qps'
-              '\nmemtier 95th percentile latency: %s ms'
-              '\n%s'
-          ),
-          result.ops_per_sec,
-          result.latency_dic['95'],
-          parameters,
-      )
-      if (
-          result.ops_per_sec > current_max_result.ops_per_sec
-          and result.latency_dic['95'] <= MEMTIER_LATENCY_CAP.value
-      ):
-        current_max_result = result
-        current_max_result.parameters = parameters
-        current_max_result.metadata.update(
-            GetMetadata(
-                clients=parameters.clients,
-                threads=parameters.threads,
-                pipeline=parameters.pipelines,
-            )
-        )
-      # 95 percentile used to decide latency cap
-      new_parameters = modifier.ModifyLoad(parameters, result.latency_dic['95'])
-      if new_parameters == parameters:
-        break
-      parameters = new_parameters
-    results.append(current_max_result)
+    searches.append(search)
+    best = _GetBestResult(search)
     logging.info(
         'Found optimal parameters %s for throughput %s and p95 latency %s',
-        current_max_result.parameters,
-        current_max_result.ops_per_sec,
-        current_max_result.latency_dic['95'],
+        best.parameters,
+        best.ops_per_sec,
+        best.latency_dic['95'],
     )
-  return results
+  return searches
+
+
+def _GetBestResult(
+    search: latency_capped_search.SearchResult,
+) -> 'MemtierResult':
+  """Returns the best MemtierResult of a search, or an empty one."""
+  if search.best:
+    return search.best.details
+  return MemtierResult(
+      latency_dic={
+          '50': 0,
+          '90': 0,
+          '95': 0,
+          '99': 0,
+          '99.5': 0,
+          '99.9': 0,
+          '99.950': 0,
+          '99.990': 0,
+      },
+  )
 
 
 def MeasureLatencyCappedThroughput(
@@ -825,14 +923,15 @@ def MeasureLatencyCappedThroughput(
   max_threads = client_vm.NumCpusForBenchmark(report_only_physical_cpus=True)
   max_clients = MAX_CLIENTS_COUNT // server_shard_count
   samples = []
-  for result in _BinarySearchForLatencyCappedThroughput(
+  for search in _SearchForLatencyCappedThroughput(
       [MemtierConnection(client_vm, server_ip, server_port)],
       [_PipelineModifier(), _ClientModifier(max_clients, max_threads)],
       server_ip,
       server_port,
       password,
   ):
-    samples.extend(result.GetSamples())
+    samples.extend(_GetBestResult(search).GetSamples())
+    samples.extend(search.GetSamples())
   return samples
 
 
@@ -878,20 +977,22 @@ def MeasureLatencyCappedThroughputDistribution(
       clients=FLAGS.memtier_clients[0],
       threads=FLAGS.memtier_threads[0],
   )
+  samples = []
   if MEMTIER_DISTRIBUTION_BINARY_SEARCH.value:
     max_threads = client_vms[0].NumCpusForBenchmark(
         report_only_physical_cpus=True
     )
     shards_per_client = server_shard_count / len(client_vms)
     max_clients = int(MAX_CLIENTS_COUNT // shards_per_client)
-    result = _BinarySearchForLatencyCappedThroughput(
+    search = _SearchForLatencyCappedThroughput(
         connections,
         [_ClientModifier(max_clients, max_threads)],
         server_ip,
         server_port,
         password,
     )[0]
-    parameters_for_test = result.parameters
+    parameters_for_test = _GetBestResult(search).parameters
+    samples.extend(search.GetSamples())
 
   logging.info(
       'Starting test iterations with parameters %s', parameters_for_test
@@ -909,7 +1010,6 @@ def MeasureLatencyCappedThroughputDistribution(
     )
     results.extend(results_for_run)
 
-  samples = []
   metrics = {
       'ops_per_sec': 'ops/s',
       'kb_per_sec': 'KB/s',
@@ -1105,8 +1205,26 @@ def _Run(
     password: str | None = None,
     unique_id: str | None = None,
     shard_addresses: str | None = None,
+    duration_fraction: float = 1.0,
 ) -> 'MemtierResult':
-  """Runs the memtier benchmark on the vm."""
+  """Runs the memtier benchmark on the vm.
+
+  Args:
+    vm: The client VM.
+    server_ip: Ip address of the server.
+    server_port: Port of the server.
+    threads: Number of memtier threads.
+    pipeline: Number of pipelined requests per client.
+    clients: Number of clients per thread.
+    password: Password of the server.
+    unique_id: Suffix of the output files.
+    shard_addresses: Addresses of the cluster shards to connect to.
+    duration_fraction: Fraction of the run duration or requests to run, for
+      short probes of latency capped searches.
+
+  Returns:
+    The parsed memtier output.
+  """
   logging.info(
       (
           'Start benchmarking redis/memcached using memtier:\n'
@@ -1131,7 +1249,7 @@ def _Run(
   json_results_file_name = '_'.join([JSON_OUT_FILE, file_name_suffix]) + '.log'
   json_results_file = (
       pathlib.PosixPath(f'{TMP_FOLDER}/{json_results_file_name}')
-      if MEMTIER_TIME_SERIES.value
+      if MEMTIER_TIME_SERIES.value or MEMTIER_HISTOGRAM_AGGREGATION.value
       else None
   )
   if json_results_file is not None:
@@ -1145,6 +1263,9 @@ def _Run(
       if MEMTIER_RUN_MODE.value == MemtierMode.NORMAL_RUN
       else WARM_UP_SECONDS + MEMTIER_CPU_DURATION.value
   )
+  if duration_fraction < 1:
+    requests = requests and max(int(requests * duration_fraction), 1)
+    test_time = test_time and max(int(test_time * duration_fraction), 1)
   cmd = BuildMemtierCommand(
       server=server_ip,
       port=server_port,
@@ -1200,7 +1321,29 @@ def _Run(
   with open(output_path) as output:
     summary_data = output.read()
     logging.info(summary_data)
-  return MemtierResult.Parse(summary_data, time_series_json)
+  return _ParseResults(summary_data, time_series_json)
+
+
+def _ParseResults(
+    summary_data: str, json_results: Dict[Any, Any] | None
+) -> 'MemtierResult':
+  """Parses the results of a memtier run.
+
+  Args:
+    summary_data: Text output of the run.
+    json_results: The json output of the run, if it was collected.
+
+  Returns:
+    MemtierResult object. Without --memtier_time_series, the json output is
+    only used for the latency histogram, so the samples of the result are
+    the same whether or not it was collected.
+  """
+  if MEMTIER_TIME_SERIES.value:
+    return MemtierResult.Parse(summary_data, json_results)
+  result = MemtierResult.Parse(summary_data, None)
+  if json_results:
+    result.latency_histogram = _ParseLatencyHistogram(json_results)
+  return result
 
 
 def GetMetadata(clients: int, threads: int, pipeline: int) -> Dict[str, Any]:
@@ -1258,6 +1401,10 @@ class MemtierResult:
   runtime_info: Dict[str, str] = dataclasses.field(default_factory=dict)
   metadata: Dict[str, Any] = dataclasses.field(default_factory=dict)
   parameters: MemtierBinarySearchParameters = MemtierBinarySearchParameters()
+  # Microsecond histogram of all requests, from memtier's json output.
+  latency_histogram: hdr_histogram.HdrHistogram | None = dataclasses.field(
+      default=None, compare=False, repr=False
+  )
 
   @classmethod
   def Parse(
@@ -1304,11 +1451,13 @@ class MemtierResult:
     ops_series = []
     latency_series = {}
     timestamps = []
+    latency_histogram = None
     if time_series_json:
       runtime_info = _GetRuntimeInfo(time_series_json)
       timestamps, ops_series, latency_series = _ParseTimeSeries(
           time_series_json
       )
+      latency_histogram = _ParseLatencyHistogram(time_series_json)
     return cls(
         ops_per_sec=aggregated_result.ops_per_sec,
         kb_per_sec=aggregated_result.kb_per_sec,
@@ -1320,6 +1469,7 @@ class MemtierResult:
         ops_series=ops_series,
         latency_series=latency_series,
         runtime_info=runtime_info,
+        latency_histogram=latency_histogram,
     )
 
   def GetSamples(
@@ -1428,6 +1578,16 @@ def AggregateMemtierResults(
       ),
       sample.Sample('Total KB Throughput', total_kb, 'KB/s', metadata=metadata),
   ]
+  if MEMTIER_HISTOGRAM_AGGREGATION.value:
+    latency_histogram = _MergeLatencyHistograms(memtier_results)
+    if latency_histogram is not None:
+      latency_dic = _GetLatencyDic(latency_histogram, _LATENCY_PERCENTILES)
+      for percentile, latency in latency_dic.items():
+        samples.append(
+            sample.Sample(
+                f'Total p{percentile} Latency', latency, 'ms', metadata=metadata
+            )
+        )
 
   if not MEMTIER_TIME_SERIES.value:
     return samples
@@ -1468,10 +1628,13 @@ def AggregateMemtierResults(
           latency_series[key].append([])
         latency_series[key][i].append(latency)
 
-  aggregate_latency_series = {
-      key: [max(latencies) for latencies in value]
-      for key, value in latency_series.items()
-  }
+  if MEMTIER_HISTOGRAM_AGGREGATION.value:
+    aggregate_latency_series = _AggregateLatencySeries(non_empty_results)
+  else:
+    aggregate_latency_series = {
+        key: [max(latencies) for latencies in value]
+        for key, value in latency_series.items()
+    }
 
   ramp_down_starts = timestamps[-1]
   # Gives 10s for ramp down
@@ -1490,6 +1653,11 @@ def AggregateMemtierResults(
       )
   )
   for key, value in aggregate_latency_series.items():
+    series_metadata = metadata
+    if MEMTIER_HISTOGRAM_AGGREGATION.value and key in _TIME_SERIES_PERCENTILES:
+      # Reconstructed from the percentiles each client printed, see
+      # _AggregateLatencySeries.
+      series_metadata = dict(metadata, approximate=True)
     samples.append(
         sample.CreateTimeSeriesSample(
             value,
@@ -1497,7 +1665,7 @@ def AggregateMemtierResults(
             f'{key}_time_series',
             'ms',
             1,
-            additional_metadata=metadata,
+            additional_metadata=series_metadata,
         )
     )
   individual_latencies = collections.defaultdict(list)
@@ -1527,6 +1695,112 @@ def AggregateMemtierResults(
   return samples
 
 
+def _AggregateLatencySeries(
+    memtier_results: List[MemtierResult],
+) -> Dict[str, List[float]]:
+  """Combines the per second latencies of all clients.
+
+  memtier only reports a few percentiles per second, so each client's second is
+  approximated by a histogram that puts the requests between two reported
+  percentiles at the higher one. These histograms are merged across clients for
+  every second and then queried, which reproduces the reported percentiles for a
+  single client. Across clients the percentiles are approximate, so their
+  samples have the 'approximate' metadata. Averages are weighted by request
+  count.
+
+  Args:
+    memtier_results: Results with aligned time series.
+
+  Returns:
+    Dict mapping each latency series key to its cross-client series.
+  """
+  keys = []
+  for result in memtier_results:
+    keys.extend(key for key in result.latency_series if key not in keys)
+  series_length = max(len(result.ops_series) for result in memtier_results)
+  aggregate = {key: [] for key in keys}
+  for i in range(series_length):
+    histogram = hdr_histogram.HdrHistogram()
+    total_count = 0
+    total_latency = 0.0
+    min_latencies = []
+    max_latencies = []
+    for result in memtier_results:
+      count = int(result.ops_series[i]) if i < len(result.ops_series) else 0
+      if count <= 0:
+        continue
+      second = {
+          key: values[i]
+          for key, values in result.latency_series.items()
+          if i < len(values)
+      }
+      total_count += count
+      total_latency += second.get('Average Latency', 0) * count
+      if 'Min Latency' in second:
+        min_latencies.append(second['Min Latency'])
+      if 'Max Latency' in second:
+        max_latencies.append(second['Max Latency'])
+      _RecordSecond(histogram, count, second)
+    for key in keys:
+      if not total_count:
+        value = 0
+      elif key in _TIME_SERIES_PERCENTILES:
+        percentile = _TIME_SERIES_PERCENTILES[key]
+        value = histogram.ValuesAtPercentiles([percentile])[percentile] / 1000
+      elif key == 'Average Latency':
+        value = total_latency / total_count
+      elif key == 'Min Latency':
+        value = min(min_latencies, default=0)
+      else:
+        value = max(max_latencies, default=0)
+      aggregate[key].append(value)
+  return aggregate
+
+
+def _RecordSecond(
+    histogram: hdr_histogram.HdrHistogram,
+    count: int,
+    second: Dict[str, float],
+) -> None:
+  """Records count requests with one client's per second latencies in ms."""
+  points = sorted(
+      (percentile, second[key])
+      for key, percentile in _TIME_SERIES_PERCENTILES.items()
+      if key in second
+  )
+  if 'Max Latency' in second:
+    points.append((100.0, second['Max Latency']))
+  recorded = 0
+  latency_us = 0
+  for percentile, latency in points:
+    latency_us = max(int(round(latency * 1000)), latency_us)
+    # The request at rank ceil(percentile * count) has this latency.
+    cumulative = min(hdr_histogram.CountAtPercentile(percentile, count), count)
+    if cumulative > recorded:
+      histogram.RecordValue(latency_us, cumulative - recorded)
+      recorded = cumulative
+  if recorded < count:
+    histogram.RecordValue(latency_us, count - recorded)
+
+
+def _ParseLatencyHistogram(
+    time_series_json: Dict[Any, Any],
+) -> hdr_histogram.HdrHistogram | None:
+  """Decodes the histogram of all requests in memtier's json output."""
+  try:
+    encoded = time_series_json['ALL STATS']['Totals']['Percentile Latencies'][
+        'Histogram log format'
+    ]['Compressed Histogram']
+  except (KeyError, TypeError):
+    logging.warning('No latency histogram in memtier json output.')
+    return None
+  try:
+    return hdr_histogram.HdrHistogram.FromBase64(encoded)
+  except hdr_histogram.HdrHistogramError as e:
+    logging.warning('Could not decode memtier latency histogram: %s', e)
+    return None
+
+
 def _ParseHistogram(
     memtier_results: str,
 ) -> Tuple[MemtierHistogram, MemtierHistogram]:
@@ -1591,16 +1865,7 @@ def _ParseTotalThroughputAndLatency(
         return float(totals[columns.index(key)])  # pylint: disable=cell-var-from-loop
 
       latency_dic = {}
-      for percentile in (
-          '50',
-          '90',
-          '95',
-          '99',
-          '99.5',
-          '99.9',
-          '99.950',
-          '99.990',
-      ):
+      for percentile in _LATENCY_PERCENTILES:
         latency_dic[percentile] = _FetchStat(f'p{percentile} Latency')
       return MemtierAggregateResult(
           ops_per_sec=_FetchStat('Ops/sec'),
@@ -35,7 +35,7 @@ per client VM, with an initial database size of 1GB (1k records).
 Each workload runs for at most 30 minutes.
 """
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Callable, Mapping, Sequence
 import copy
 import datetime
 import io
@@ -50,6 +50,7 @@ from perfkitbenchmarker import background_tasks
 from perfkitbenchmarker import data
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import events
+from perfkitbenchmarker import latency_capped_search
 from perfkitbenchmarker import linux_packages
 from perfkitbenchmarker import resource
 from perfkitbenchmarker import sample
@@ -107,6 +108,14 @@ flags.DEFINE_enum(
     ['op', 'intended', 'both'],
     'Measurement interval to use for ycsb. Defaults to op.',
 )
+_NATIVE_HDR_COMBINE = flags.DEFINE_boolean(
+    'ycsb_native_hdr_combine',
+    True,
+    'If true, decode and merge the clients\' hdrhistogram logs within PKB. '
+    'Otherwise the logs are copied to one client VM and merged with '
+    'HdrHistogram\'s HistogramLogProcessor. Only used with '
+    '--ycsb_measurement_type=hdrhistogram.',
+)
 flags.DEFINE_boolean(
     'ycsb_histogram',
     False,
@@ -780,6 +789,44 @@ def PushWorkload(vm, workload_file, remote_path):
   vm.PushFile(workload_file, remote_path)
 
 
+class _LatencyThresholdLoadGenerator(latency_capped_search.LoadGenerator):
+  """Runs YCSB at a target QPS for latency threshold mode."""
+
+  THROUGHPUT_UNIT = 'ops/sec'
+
+  def __init__(
+      self, execute_workload: Callable[[int, float], list[sample.Sample]]
+  ):
+    self._execute_workload = execute_workload
+
+  def Probe(
+      self, load: int, duration_fraction: float
+  ) -> latency_capped_search.ProbeResult:
+    run_samples = self._execute_workload(
+        load, _LATENCY_THRESHOLD_INCREMENT_MINS.value * duration_fraction
+    )
+    stats = ycsb_stats.ExtractStats(
+        run_samples, percentile=_LATENCY_THRESHOLD_PERCENTILE.value
+    )
+    logging.info(
+        'Run had throughput target %s and measured stats %s', load, stats
+    )
+    if _LATENCY_THRESHOLD_SLEEP_MINS.value:
+      logging.info(
+          'Run phase finished, sleeping for %s minutes before starting the '
+          'next run.',
+          _LATENCY_THRESHOLD_SLEEP_MINS.value,
+      )
+      time.sleep(_LATENCY_THRESHOLD_SLEEP_MINS.value * 60)
+    return latency_capped_search.ProbeResult(
+        throughput=stats.throughput,
+        latency=stats.read_latency,
+        samples=run_samples,
+        metadata={'ycsb_target_qps': load},
+        details=stats,
+    )
+
+
 class YCSBExecutor:
   """Load data and run benchmarks using YCSB.
 
@@ -1235,10 +1282,16 @@ class YCSBExecutor:
               )
 
           if self.measurement_type == ycsb_stats.HDRHISTOGRAM:
-            combined_log = ycsb_stats.CombineHdrHistogramLogFiles(
-                self.hdr_dir, parameters['hdrhistogram.output.path'], vms
-            )
-            parsed_hdr = ycsb_stats.ParseHdrLogs(combined_log)
+            hdr_files_dir = parameters['hdrhistogram.output.path']
+            if _NATIVE_HDR_COMBINE.value:
+              parsed_hdr = ycsb_stats.CombineHdrHistogramLogs(
+                  hdr_files_dir, vms
+              )
+            else:
+              combined_log = ycsb_stats.CombineHdrHistogramLogFiles(
+                  self.hdr_dir, hdr_files_dir, vms
+              )
+              parsed_hdr = ycsb_stats.ParseHdrLogs(combined_log)
             combined = ycsb_stats.CombineResults(
                 results, self.measurement_type, parsed_hdr
             )
@@ -1706,14 +1759,14 @@ class YCSBExecutor:
     """
 
     def _ExecuteWorkload(
-        target_qps: int, duration_mins: int
+        target_qps: int, duration_mins: float
     ) -> list[sample.Sample]:
       """Executes the workload after setting run-specific args."""
       if target_qps > 0:
         run_kwargs['target'] = target_qps
       else:
         run_kwargs.pop('target', None)
-      run_kwargs['maxexecutiontime'] = duration_mins * 60
+      run_kwargs['maxexecutiontime'] = int(duration_mins * 60)
       return self.RunStaircaseLoads(vms, workloads=[workload], **run_kwargs)
 
     def _AddMetadata(samples: list[sample.Sample]) -> list[sample.Sample]:
@@ -1751,73 +1804,35 @@ class YCSBExecutor:
       ).throughput
       time.sleep(_LATENCY_THRESHOLD_SLEEP_MINS.value * 60)
 
-      lower_bound = 0
-      upper_bound = max_throughput
-      current_max_stats = ycsb_stats.ThroughputLatencyResult()
-      result_samples = []
-      while (
-          lower_bound < (upper_bound - 1)
-          and upper_bound - lower_bound > max_throughput * 0.01
-      ):
-        target_qps = int((upper_bound + lower_bound) / 2)
-        run_samples = _ExecuteWorkload(
-            target_qps, _LATENCY_THRESHOLD_INCREMENT_MINS.value
-        )
-        stats = ycsb_stats.ExtractStats(
-            run_samples, percentile=_LATENCY_THRESHOLD_PERCENTILE.value
-        )
-        logging.info(
-            'Run had throughput target %s and measured stats %s',
-            target_qps,
-            stats,
-        )
-
-        if (
-            stats.throughput > current_max_stats.throughput
-            and stats.read_latency <= _LATENCY_THRESHOLD_TARGET.value
-            and stats.read_latency >= _LATENCY_THRESHOLD_TARGET_MIN.value
-        ):
-          # Compute a normalized QPS to attempt to make subtle differences in
-          # latency more even.
-          read_latency_normalized_qps = (
-              stats.throughput
-              / stats.read_latency
-              * _LATENCY_THRESHOLD_TARGET.value
-          )
-          run_samples.append(
-              sample.Sample(
-                  'Read Latency Normalized Throughput',
-                  read_latency_normalized_qps,
-                  'ops/sec',
-                  copy.copy(run_samples[0].metadata),
-              )
-          )
-          result_samples = run_samples
-          current_max_stats = stats
-
-        if stats.read_latency <= _LATENCY_THRESHOLD_TARGET.value:
-          lower_bound = target_qps
-        else:
-          upper_bound = target_qps
-
-        if _LATENCY_THRESHOLD_SLEEP_MINS.value:
-          logging.info(
-              'Run phase finished, sleeping for %s minutes before starting the '
-              'next run.',
-              _LATENCY_THRESHOLD_SLEEP_MINS.value,
-          )
-          time.sleep(_LATENCY_THRESHOLD_SLEEP_MINS.value * 60)
-
-      if (
-          not result_samples
-          or current_max_stats.read_latency
-          < _LATENCY_THRESHOLD_TARGET_MIN.value
-      ):
+      search = latency_capped_search.Search(
+          _LatencyThresholdLoadGenerator(_ExecuteWorkload),
+          _LATENCY_THRESHOLD_TARGET.value,
+          lower_bound=0,
+          upper_bound=max_throughput,
+          resolution=max_throughput * 0.01,
+      )
+      best = search.GetBest(min_latency=_LATENCY_THRESHOLD_TARGET_MIN.value)
+      if best is None:
         raise RetriableLatencySearchBoundsError(
             'Unable to find the requested latency - try modifying the min and'
             ' target latency.'
         )
-      return _AddMetadata(result_samples) + max_throughput_samples
+      # Compute a normalized QPS to attempt to make subtle differences in
+      # latency more even.
+      result_samples = best.samples
+      result_samples.append(
+          sample.Sample(
+              'Read Latency Normalized Throughput',
+              best.throughput / best.latency * _LATENCY_THRESHOLD_TARGET.value,
+              'ops/sec',
+              copy.copy(result_samples[0].metadata),
+          )
+      )
+      return (
+          _AddMetadata(result_samples)
+          + max_throughput_samples
+          + search.GetSamples()
+      )
 
     return _RunLatencyThresholdModeSingleWorkload()
 
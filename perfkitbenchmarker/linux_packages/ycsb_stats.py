@@ -30,6 +30,7 @@ import re
 from absl import flags
 from perfkitbenchmarker import background_tasks
 from perfkitbenchmarker import errors
+from perfkitbenchmarker import hdr_histogram
 from perfkitbenchmarker import linux_packages
 from perfkitbenchmarker import sample
 from perfkitbenchmarker import virtual_machine
@@ -652,16 +653,18 @@ def _PercentilesFromHistogram(ycsb_histogram, percentiles=_DEFAULT_PERCENTILES):
     ValueError: If one or more percentiles are outside [0, 100].
   """
   result = collections.OrderedDict()
-  histogram = sorted(ycsb_histogram)
+  latencies, freqs = list(zip(*sorted(ycsb_histogram)))
+  # Build the cumulative weights once and look up every percentile in them.
+  cumulative = list(_CumulativeSum(freqs))
   for percentile in percentiles:
     if percentile < 0 or percentile > 100:
       raise ValueError('Invalid percentile: {}'.format(percentile))
     if math.modf(percentile)[0] < 1e-7:
       percentile = int(percentile)
     label = 'p{}'.format(percentile)
-    latencies, freqs = list(zip(*histogram))
-    time_ms = _WeightedQuantile(latencies, freqs, percentile * 0.01)
-    result[label] = time_ms
+    # Same lookup as _WeightedQuantile.
+    i = bisect.bisect_left(cumulative, cumulative[-1] * percentile * 0.01)
+    result[label] = latencies[min(i, len(latencies) - 1)]
   return result
 
 
@@ -989,6 +992,85 @@ def CombineHdrHistogramLogFiles(
   return hdrhistograms
 
 
+def _HdrHistogramTuples(
+    histogram: hdr_histogram.HdrHistogram,
+) -> list[_HdrHistogramTuple]:
+  """Converts a histogram of microsecond latencies to histogram tuples.
+
+  Produces the same (percentile, latency in ms, count) tuples as
+  ParseHdrLogFile, with one tuple per non-empty bucket.
+
+  Args:
+    histogram: The histogram to convert.
+
+  Returns:
+    List of (percentile, value, count) tuples.
+  """
+  result = []
+  total_count = histogram.total_count
+  prev_total_count = 0
+  for value, count in histogram.NonZeroBuckets():
+    percentile = math.floor(prev_total_count / total_count * 100000) / 1000.0
+    result.append((percentile, value / 1000, count))
+    prev_total_count += count
+  return result
+
+
+def CombineHdrHistogramLogs(
+    hdr_files_dir: str,
+    vms: Iterable[virtual_machine.VirtualMachine],
+) -> dict[str, list[_HdrHistogramTuple]]:
+  """Combine the hdr histogram logs of multiple clients by group type.
+
+  Unlike CombineHdrHistogramLogFiles, the last interval histogram logged by
+  each client is decoded and merged in PKB, so the only remote commands are
+  one parallel read per client.
+
+  Args:
+    hdr_files_dir: directory on the remote vms where hdr files are stored.
+    vms: remote vms
+
+  Returns:
+    dict of histogram tuples keyed by lowercase group type, in the format
+    returned by ParseHdrLogs.
+
+  Raises:
+    CombineHdrLogError: if a client's .hdr log cannot be decoded or merged.
+  """
+  vms = list(vms)
+  hdrhistograms = {}
+  for grouptype in HDRHISTOGRAM_GROUPS:
+
+    def _GetHdrHistogramLog(vm, group=grouptype):
+      filename = f'{hdr_files_dir}{group}.hdr'
+      return vm.RemoteCommand(f'touch {filename} && tail -1 {filename}')[0]
+
+    results = background_tasks.RunThreaded(_GetHdrHistogramLog, vms)
+
+    # It's possible that there is no result for certain group, e.g., read
+    # only, update only.
+    if not all(results):
+      continue
+
+    combined = None
+    for log in results:
+      try:
+        histogram = hdr_histogram.ParseIntervalLog(log)
+        if histogram is None:
+          continue
+        if combined is None:
+          combined = histogram
+        else:
+          combined.Add(histogram)
+      # It's possible for YCSB client VMs to output a malformed/truncated .hdr
+      # log file. See https://github.com/HdrHistogram/HdrHistogram/issues/201.
+      except hdr_histogram.HdrHistogramError as e:
+        raise CombineHdrLogError(f'Error combining hdr logs: {e}') from e
+    if combined is not None and combined.total_count:
+      hdrhistograms[grouptype.lower()] = _HdrHistogramTuples(combined)
+  return hdrhistograms
+
+
 def CreateSamples(
     ycsb_result: YcsbResult,
     ycsb_version: str,
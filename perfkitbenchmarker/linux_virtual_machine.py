@@ -42,13 +42,17 @@ import uuid
 
 from absl import flags
 from packaging import version as packaging_version
+from perfkitbenchmarker import artifact_cache
 from perfkitbenchmarker import background_tasks
+from perfkitbenchmarker import data
 from perfkitbenchmarker import disk
 from perfkitbenchmarker import errors
+from perfkitbenchmarker import install_planner
 from perfkitbenchmarker import linux_packages
 from perfkitbenchmarker import os_mixin
 from perfkitbenchmarker import os_types
 from perfkitbenchmarker import regex_util
+from perfkitbenchmarker import remote_agent
 from perfkitbenchmarker import sample
 from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker import vm_util
@@ -271,6 +275,15 @@ _DISABLE_CSTATE_BY_NAME_AND_DEEPER = flags.DEFINE_string(
     ' will remain enabled.',
 )
 
+_PACKAGE_INSTALL_PARALLELISM = flags.DEFINE_integer(
+    'package_install_parallelism',
+    1,
+    'The number of PerfKit packages that InstallMany installs concurrently '
+    'on a VM. Packages only run concurrently once the packages they install '
+    'with vm.Install are installed.',
+    lower_bound=1,
+)
+
 _ENABLE_NVME_INTERRUPT_COALEASING = flags.DEFINE_bool(
     'enable_nvme_interrupt_coaleasing',
     False,
@@ -431,6 +444,10 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
   # TODO(spencerkim): Record ib device metadata.
   _IGNORE_NETWORK_DEVICE_PREFIXES = ('lo', 'docker', 'ib')
 
+  # Names of the package functions Install calls, in order of preference.
+  # InstallMany plans installs when these are set.
+  _PACKAGE_INSTALL_METHODS = ()
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     # N.B. If you override ssh_port you must override remote_access_ports and
@@ -443,7 +460,18 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
     self.ssh_internal_time = None
 
     self._remote_command_script_upload_lock = threading.Lock()
+    # Serializes package manager commands, which take a lock on the VM.
+    self._package_manager_lock = threading.Lock()
+    self._install_locks = collections.defaultdict(threading.Lock)
     self._has_remote_command_script = False
+    # With --remote_command_agent, the agent is used once VM_TMP_DIR exists
+    # and until the VM reboots.
+    self._remote_agent = None
+    self._remote_agent_lock = threading.Lock()
+    self._use_remote_agent = False
+    self._remote_agent_failed = False
+    # sha256s of files known to be in the VM's artifact cache.
+    self._cached_artifacts = set()
     self._needs_reboot = False
     self._lscpu_cache = None
     self._partition_table = {}
@@ -696,6 +724,7 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
     self._SetNumCpus()
     self.SetupProxy()
     self._CreateVmTmpDir()
+    self._use_remote_agent = True
     self._SetTransparentHugepages()
     self._DisableCstates()
     if FLAGS.setup_remote_firewall:
@@ -1332,6 +1361,80 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
   def RemoteCopy(self, file_path, remote_path='', copy_to=True):
     self.RemoteHostCopy(file_path, remote_path, copy_to)
 
+  def PushFile(self, source_path, remote_path=''):
+    """Copies a file or a directory to the VM.
+
+    With --artifact_cache, files are uploaded into the VM's artifact cache
+    unless it already has a file with the same sha256, and hard linked from
+    there, or copied if the destination is on another filesystem.
+
+    Args:
+      source_path: The location of the file or directory on the LOCAL machine.
+      remote_path: The destination of the file on the REMOTE machine, default is
+        the home directory.
+    """
+    if not artifact_cache.ARTIFACT_CACHE.value or not os.path.isfile(
+        source_path
+    ):
+      super().PushFile(source_path, remote_path)
+      return
+    sha256sum = artifact_cache.FileSha256(source_path)
+    cached_path = artifact_cache.RemoteCachePath(sha256sum)
+    if sha256sum not in self._cached_artifacts and not self.TryRemoteCommand(
+        f'test -f {cached_path}'
+    ):
+      partial_path = artifact_cache.RemotePartialPath(sha256sum)
+      self.RemoteCommand(f'mkdir -p {artifact_cache.REMOTE_CACHE_DIR}')
+      self.RemoteCopy(source_path, partial_path)
+      self.RemoteCommand(f'mv -f {partial_path} {cached_path}')
+      self.RemoteCommand(artifact_cache.RemoteEvictCommand(sha256sum))
+    self._cached_artifacts.add(sha256sum)
+    # Same destination as scp: into remote_path if it is a directory.
+    destination = remote_path or '.'
+    filename = os.path.basename(source_path)
+
+    def _LinkOrCopy(target):
+      return (
+          f'ln -f {cached_path} {target} 2>/dev/null || '
+          f'cp --reflink=auto -p {cached_path} {target}'
+      )
+
+    # Touching the cached file marks it as recently used.
+    self.RemoteCommand(
+        f'touch -c {cached_path} && if [ -d {destination} ]; then '
+        f'{_LinkOrCopy(posixpath.join(destination, filename))}; '
+        f'else {_LinkOrCopy(destination)}; fi'
+    )
+
+  def PushFiles(self, source_paths, remote_path=''):
+    """Copies several files or directories into a directory on the VM.
+
+    The files are sent as a single tarball, which is cached like a file pushed
+    with PushFile if --artifact_cache is set.
+
+    Args:
+      source_paths: The locations of the files or directories on the LOCAL
+        machine.
+      remote_path: The destination directory on the REMOTE machine, default is
+        the home directory.
+    """
+    source_paths = list(source_paths)
+    if len(source_paths) < 2:
+      super().PushFiles(source_paths, remote_path)
+      return
+    tarball = artifact_cache.CreateTarball(source_paths)
+    remote_tarball = os.path.basename(tarball)
+    try:
+      self.PushFile(tarball, remote_tarball)
+    finally:
+      if not artifact_cache.ARTIFACT_CACHE.value:
+        os.remove(tarball)
+    destination = remote_path or '.'
+    self.RemoteCommand(
+        f'mkdir -p {destination} && tar -xf {remote_tarball} -C {destination}'
+        f' && rm -f {remote_tarball}'
+    )
+
   def RemoteHostCopy(self, file_path, remote_path='', copy_to=True):
     """Copies a file to or from the VM.
 
@@ -1508,6 +1611,30 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
       RemoteCommandError: If there was a problem establishing the connection.
     """
     stack_level += 1
+    agent = None if login_shell or ip_address else self._GetRemoteAgent()
+    if agent:
+      if should_pre_log:
+        logger.info(
+            'Running on %s via agent: %s',
+            self.name,
+            command,
+            stacklevel=stack_level,
+        )
+      try:
+        stdout, stderr, retcode = agent.Run(
+            command, timeout=timeout, stack_level=stack_level
+        )
+      except remote_agent.AgentError as e:
+        logging.warning('%s Running the command over ssh.', e)
+      else:
+        if retcode and not ignore_failure:
+          raise errors.VirtualMachine.RemoteCommandError(
+              'Got non-zero return code (%s) executing %s via the agent on '
+              '%s\nSTDOUT: %sSTDERR: %s'
+              % (retcode, command, self.name, stdout, stderr)
+          )
+        return (stdout, stderr, retcode)
+
     if retries is None:
       retries = FLAGS.ssh_retries
     if vm_util.RunningOnWindows():
@@ -1515,14 +1642,7 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
       # newlines are escaped.
       command = command.replace('\n', '\\n')
 
-    if ip_address is None:
-      ip_address = self.GetConnectionIp()
-    user_host = '%s@%s' % (self.user_name, ip_address)
-    ssh_cmd = ['ssh', '-A', '-p', str(self.ssh_port), user_host]
-    ssh_private_key = (
-        self.ssh_private_key if self.is_static else vm_util.GetPrivateKeyPath()
-    )
-    ssh_cmd.extend(vm_util.GetSshOptions(ssh_private_key))
+    ssh_cmd = self._GetSshCommand(ip_address)
 
     if should_pre_log:
       logger.info(
@@ -1565,6 +1685,70 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
 
     return (stdout, stderr, retcode)
 
+  def _GetSshCommand(self, ip_address: str | None = None) -> list[str]:
+    """Returns the ssh command, without the remote command, to reach the VM."""
+    if ip_address is None:
+      ip_address = self.GetConnectionIp()
+    user_host = '%s@%s' % (self.user_name, ip_address)
+    ssh_cmd = ['ssh', '-A', '-p', str(self.ssh_port), user_host]
+    ssh_private_key = (
+        self.ssh_private_key if self.is_static else vm_util.GetPrivateKeyPath()
+    )
+    ssh_cmd.extend(vm_util.GetSshOptions(ssh_private_key))
+    return ssh_cmd
+
+  def _GetRemoteAgent(self) -> remote_agent.RemoteAgent | None:
+    """Returns the remote command agent of the VM, starting it if needed.
+
+    Returns:
+      The agent, or None if commands should run over ssh: when
+      --remote_command_agent is not set, the VM is not prepared or rebooting,
+      or the agent failed to start, in which case it isn't tried again.
+    """
+    if (
+        not remote_agent.REMOTE_COMMAND_AGENT.value
+        or not self._use_remote_agent
+    ):
+      return None
+    with self._remote_agent_lock:
+      if self._remote_agent_failed:
+        return None
+      if self._remote_agent is None or self._remote_agent.closed:
+        remote_path = posixpath.join(
+            vm_util.VM_TMP_DIR, remote_agent.AGENT_SCRIPT
+        )
+        agent = remote_agent.RemoteAgent(
+            self._GetSshCommand() + [f'python3 -u {remote_path}'], self.name
+        )
+        try:
+          # Copied with scp, because pushing files may run remote commands.
+          self.RemoteHostCopy(
+              data.ResourcePath(remote_agent.AGENT_SCRIPT), remote_path
+          )
+          agent.Start()
+        except (
+            errors.VirtualMachine.RemoteCommandError,
+            remote_agent.AgentError,
+        ) as e:
+          logging.warning(
+              'Running commands on %s over ssh, because the remote command '
+              'agent failed to start: %s',
+              self.name,
+              e,
+          )
+          self._remote_agent_failed = True
+          return None
+        self._remote_agent = agent
+      return self._remote_agent
+
+  def _CloseRemoteAgent(self):
+    """Stops the remote command agent until the VM is prepared again."""
+    self._use_remote_agent = False
+    with self._remote_agent_lock:
+      if self._remote_agent:
+        self._remote_agent.Close()
+        self._remote_agent = None
+
   def RemoteHostCommand(self, *args, **kwargs) -> Tuple[str, str]:
     """Runs a command on the VM.
 
@@ -1594,6 +1778,7 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
   def _Reboot(self):
     """OS-specific implementation of reboot command."""
     self._CheckRebootability()
+    self._CloseRemoteAgent()
     self.RemoteCommand('sudo reboot', ignore_failure=True)
 
   def _AfterReboot(self):
@@ -1610,6 +1795,7 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
     if self.install_packages:
       self._CreateInstallDir()
     self._CreateVmTmpDir()
+    self._use_remote_agent = True
     self._SetTransparentHugepages()
     self._DisableCstates()
     self._has_remote_command_script = False
@@ -1752,6 +1938,15 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
 
   def _RemoteFileExists(self, file_path: str) -> bool:
     """Returns true if the file exists on the VM."""
+    agent = None
+    # Paths with wildcards are expanded by the shell.
+    if _RunsCommandsOverSsh(self) and not re.search(r'[*?[]', file_path):
+      agent = self._GetRemoteAgent()
+    if agent:
+      try:
+        return agent.Stat(file_path) is not None
+      except remote_agent.AgentError as e:
+        logging.warning('%s Checking for %s over ssh.', e, file_path)
     stdout, _ = self.RemoteCommand(
         f'ls {file_path} >> /dev/null 2>&1 || echo file_not_exist'
     )
@@ -2128,6 +2323,38 @@ class BaseLinuxMixin(os_mixin.BaseOsMixin):
     """Installs packages using the OS's package manager."""
     pass
 
+  def InstallMany(self, package_names):
+    """Installs several PerfKit packages on the VM.
+
+    The OS packages that the packages install up front are installed in a
+    single package manager transaction, then packages whose dependencies are
+    installed run concurrently, up to --package_install_parallelism at a time.
+
+    Args:
+      package_names: Names of the PerfKit packages. They may be installed in any
+        order, so must not depend on each other except through vm.Install.
+    """
+    if not self.install_packages:
+      return
+    if not self._PACKAGE_INSTALL_METHODS:
+      super().InstallMany(package_names)
+      return
+    plan = install_planner.Plan(
+        package_names,
+        set(self._installed_packages),
+        linux_packages.PACKAGES.__getitem__,
+        self._PACKAGE_INSTALL_METHODS,
+    )
+    if plan.os_packages:
+      self.InstallPackages(' '.join(plan.os_packages))
+    self._installed_packages.update(plan.satisfied)
+    for level in plan.levels:
+      background_tasks.RunThreaded(
+          self.Install,
+          level,
+          max_concurrent_threads=_PACKAGE_INSTALL_PARALLELISM.value,
+      )
+
   def _IsSmtEnabled(self):
     """Whether simultaneous multithreading (SMT) is enabled on the vm.
 
@@ -2275,11 +2502,108 @@ def _IncrementStackLevel(**kwargs: Any) -> Any:
   return kwargs
 
 
+def _RunsCommandsOverSsh(vm) -> bool:
+  """Returns whether vm.RemoteCommand is a plain ssh to the VM."""
+  return isinstance(vm, BaseLinuxMixin) and all(
+      getattr(type(vm), name) is getattr(BaseLinuxMixin, name)
+      for name in (
+          'RemoteCommand',
+          'RemoteCommandWithReturnCode',
+          'RemoteHostCommandWithReturnCode',
+      )
+  )
+
+
+def RemoteCommands(
+    vms: list[Any],
+    command: str,
+    ignore_failure: bool = False,
+    timeout: float | None = None,
+) -> list[Tuple[str, str]]:
+  """Runs a command on many VMs at once, as RemoteCommand on each would.
+
+  The ssh commands of VMs that run commands over ssh share one
+  vm_util.IssueCommands batch instead of a thread each. Other VMs, e.g. VMs
+  that run commands in a container, run RemoteCommand in threads.
+
+  Args:
+    vms: The VMs to run the command on.
+    command: A valid bash command.
+    ignore_failure: Ignore any failure if set to true.
+    timeout: The timeout for each command.
+
+  Returns:
+    A tuple of stdout, stderr from running the command on each VM.
+
+  Raises:
+    RemoteCommandError: If the command failed on a VM.
+  """
+  results = [None] * len(vms)
+  ssh_indices = [i for i, vm in enumerate(vms) if _RunsCommandsOverSsh(vm)]
+  other_indices = sorted(set(range(len(vms))) - set(ssh_indices))
+  if other_indices:
+    kwargs = {'ignore_failure': ignore_failure}
+    if timeout is not None:
+      kwargs['timeout'] = timeout
+    other_results = background_tasks.RunThreaded(
+        lambda vm: vm.RemoteCommand(command, **kwargs),
+        [vms[i] for i in other_indices],
+    )
+    for i, result in zip(other_indices, other_results):
+      results[i] = result
+
+  if vm_util.RunningOnWindows():
+    # Multi-line commands passed to ssh won't work on Windows unless the
+    # newlines are escaped.
+    command = command.replace('\n', '\\n')
+  ssh_commands = {i: vms[i]._GetSshCommand() + [command] for i in ssh_indices}
+  pending = ssh_indices
+  for _ in range(FLAGS.ssh_retries):
+    if not pending:
+      break
+    logging.info('Running on %s VMs via ssh: %s', len(pending), command)
+    outputs = vm_util.IssueCommands(
+        [
+            vm_util.BatchCommand(
+                ssh_commands[i],
+                target=vms[i].name,
+                timeout=timeout,
+                should_pre_log=False,
+                raise_on_failure=False,
+            )
+            for i in pending
+        ],
+    )
+    for i, output in zip(pending, outputs):
+      results[i] = output
+    # Retry on 255 because this indicates an SSH failure
+    pending = [i for i in pending if results[i][2] == RETRYABLE_SSH_RETCODE]
+
+  for i in ssh_indices:
+    stdout, stderr, retcode = results[i]
+    if retcode and not ignore_failure:
+      raise errors.VirtualMachine.RemoteCommandError(
+          'Got non-zero return code (%s) executing %s on %s\n'
+          'Full command: %s\nSTDOUT: %sSTDERR: %s'
+          % (
+              retcode,
+              command,
+              vms[i].name,
+              ' '.join(ssh_commands[i]),
+              stdout,
+              stderr,
+          )
+      )
+    results[i] = (stdout, stderr)
+  return results
+
+
 class ClearMixin(BaseLinuxMixin):
   """Class holding Clear Linux specific VM methods and attributes."""
 
   OS_TYPE = os_types.CLEAR
   BASE_OS_TYPE = os_types.CLEAR
+  _PACKAGE_INSTALL_METHODS = ('SwupdInstall', 'Install')
 
   def OnStartup(self):
     """Eliminates the need to have a tty to run sudo commands."""
@@ -2327,13 +2651,16 @@ class ClearMixin(BaseLinuxMixin):
 
   def InstallPackages(self, packages: str) -> None:
     """Installs packages using the swupd bundle manager."""
-    self.RemoteCommand('sudo swupd bundle-add {}'.format(packages))
+    with self._package_manager_lock:
+      self.RemoteCommand('sudo swupd bundle-add {}'.format(packages))
 
   def Install(self, package_name):
     """Installs a PerfKit package on the VM."""
     if not self.install_packages:
       return
-    if package_name not in self._installed_packages:
+    with self._install_locks[package_name]:
+      if package_name in self._installed_packages:
+        return
       package = linux_packages.PACKAGES[package_name]
       if hasattr(package, 'SwupdInstall'):
         package.SwupdInstall(self)
@@ -2465,6 +2792,7 @@ class BaseRhelMixin(BaseLinuxMixin):
 
   # OS_TYPE = os_types.RHEL
   BASE_OS_TYPE = os_types.RHEL
+  _PACKAGE_INSTALL_METHODS = ('YumInstall', 'Install')
 
   # RHEL's command to create a initramfs image.
   INIT_RAM_FS_CMD = 'sudo dracut --regenerate-all -f'
@@ -2530,7 +2858,8 @@ class BaseRhelMixin(BaseLinuxMixin):
     cmd = f'sudo {self.PACKAGE_MANAGER} install -y {packages}'
     if self.PACKAGE_MANAGER == DNF:
       cmd += ' --allowerasing'
-    self.RemoteCommand(cmd)
+    with self._package_manager_lock:
+      self.RemoteCommand(cmd)
 
   @vm_util.Retry(max_retries=UPDATE_RETRIES)
   def InstallPackageGroup(self, package_group):
@@ -2538,13 +2867,16 @@ class BaseRhelMixin(BaseLinuxMixin):
     cmd = f'sudo {self.PACKAGE_MANAGER} groupinstall -y "{package_group}"'
     if self.PACKAGE_MANAGER == DNF:
       cmd += ' --allowerasing'
-    self.RemoteCommand(cmd)
+    with self._package_manager_lock:
+      self.RemoteCommand(cmd)
 
   def Install(self, package_name):
     """Installs a PerfKit package on the VM."""
     if not self.install_packages:
       return
-    if package_name not in self._installed_packages:
+    with self._install_locks[package_name]:
+      if package_name in self._installed_packages:
+        return
       package = linux_packages.PACKAGES[package_name]
       if hasattr(package, 'YumInstall'):
         package.YumInstall(self)
@@ -2730,6 +3062,7 @@ class BaseDebianMixin(BaseLinuxMixin):
 
   OS_TYPE = 'base-only'
   BASE_OS_TYPE = os_types.DEBIAN
+  _PACKAGE_INSTALL_METHODS = ('AptInstall', 'Install')
 
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
@@ -2791,9 +3124,19 @@ class BaseDebianMixin(BaseLinuxMixin):
     if not self.install_packages:
       return
 
-    if not self._apt_updated:
-      self.AptUpdate()
-      self._apt_updated = True
+    self._AptUpdateOnce()
+    with self._package_manager_lock:
+      self._AptInstall(packages)
+
+  def _AptUpdateOnce(self):
+    """Runs apt-get update if it has not been run yet."""
+    with self._package_manager_lock:
+      if not self._apt_updated:
+        self.AptUpdate()
+        self._apt_updated = True
+
+  def _AptInstall(self, packages):
+    """Runs apt-get install, updating package lists on failure."""
     try:
       install_command = (
           "sudo DEBIAN_FRONTEND='noninteractive' /usr/bin/apt-get -y install %s"
@@ -2821,11 +3164,11 @@ class BaseDebianMixin(BaseLinuxMixin):
     if not self.install_packages:
       return
 
-    if not self._apt_updated:
-      self.AptUpdate()
-      self._apt_updated = True
+    self._AptUpdateOnce()
 
-    if package_name not in self._installed_packages:
+    with self._install_locks[package_name]:
+      if package_name in self._installed_packages:
+        return
       package = linux_packages.PACKAGES[package_name]
       if hasattr(package, 'AptInstall'):
         package.AptInstall(self)
@@ -0,0 +1,182 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""On-disk cache of the output of read-only cloud CLI commands.
+
+Lookups such as the zones of a region or the default image of an OS change
+rarely, but each one pays the startup time of the cloud CLI, and parallel and
+back-to-back runs repeat them. With --cloud_metadata_cache, the output of such
+commands is kept in a directory under --temp_dir that is shared by processes
+and runs, and reused until its time to live passes.
+
+Entries are keyed by the command line and the environment variables that
+select the CLI configuration. Output that fails to parse is dropped, so the
+next lookup runs the command again.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Sequence
+
+from absl import flags
+from perfkitbenchmarker import sample
+from perfkitbenchmarker import temp_dir
+
+CLOUD_METADATA_CACHE = flags.DEFINE_boolean(
+    'cloud_metadata_cache',
+    False,
+    'Whether to cache the output of read-only cloud CLI lookups, e.g. the '
+    'zones of a region or default images, on disk under --temp_dir, where '
+    'later lookups of other processes and runs reuse it until it expires.',
+)
+
+# Environment variables that change what the same command line returns.
+_CONFIG_ENVIRONMENT_VARIABLES = (
+    'AWS_CONFIG_FILE',
+    'AWS_DEFAULT_REGION',
+    'AWS_PROFILE',
+    'CLOUDSDK_ACTIVE_CONFIG_NAME',
+    'CLOUDSDK_CONFIG',
+    'CLOUDSDK_CORE_PROJECT',
+)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+_stats = collections.Counter()
+_stats_lock = threading.Lock()
+_key_locks = collections.defaultdict(threading.Lock)
+
+
+def _CacheDir():
+  path = temp_dir.GetMetadataCacheDirPath()
+  os.makedirs(path, exist_ok=True)
+  return path
+
+
+def _EntryPath(key: Sequence[str]) -> str:
+  environment = {
+      name: os.environ[name]
+      for name in _CONFIG_ENVIRONMENT_VARIABLES
+      if name in os.environ
+  }
+  digest = hashlib.sha256(
+      json.dumps([list(key), environment]).encode()
+  ).hexdigest()
+  return os.path.join(_CacheDir(), digest)
+
+
+def _Read(path: str) -> str | None:
+  """Returns the cached output at path, or None if missing or expired."""
+  try:
+    with open(path) as f:
+      entry = json.load(f)
+  except FileNotFoundError:
+    return None
+  except (OSError, ValueError) as e:
+    logging.warning('Ignoring unreadable metadata cache entry %s: %s', path, e)
+    return None
+  if entry.get('expires', 0) <= time.time():
+    return None
+  return entry.get('output')
+
+
+def _Write(path: str, key: Sequence[str], output: str, ttl: float):
+  """Atomically replaces the entry at path, so readers never see a part."""
+  entry = {'key': list(key), 'expires': time.time() + ttl, 'output': output}
+  with tempfile.NamedTemporaryFile(
+      'w', dir=os.path.dirname(path), delete=False
+  ) as f:
+    json.dump(entry, f)
+  os.replace(f.name, path)
+
+
+def _Remove(path: str):
+  try:
+    os.remove(path)
+  except FileNotFoundError:
+    pass
+
+
+def _Count(stat: str):
+  with _stats_lock:
+    _stats[stat] += 1
+
+
+def Get(
+    key: Sequence[str],
+    ttl: float,
+    issue: Callable[[], str],
+    parse: Callable[[str], Any] = lambda output: output,
+) -> Any:
+  """Returns the parsed output of a read-only command, cached on disk.
+
+  Args:
+    key: Identifies the output, typically the command line.
+    ttl: The number of seconds to reuse the output for.
+    issue: Runs the command and returns its output. Errors are not cached.
+    parse: Parses the output. If it raises, the cached output is dropped.
+
+  Returns:
+    What parse returned.
+  """
+  if not CLOUD_METADATA_CACHE.value:
+    return parse(issue())
+  path = _EntryPath(key)
+  with _key_locks[path]:
+    output = _Read(path)
+    if output is None:
+      _Count('misses')
+      try:
+        output = issue()
+      except Exception:
+        _Count('errors')
+        _Remove(path)
+        raise
+      _Write(path, key, output, ttl)
+    else:
+      _Count('hits')
+      logging.debug('Using cached output of %s.', ' '.join(key))
+    try:
+      return parse(output)
+    except Exception:
+      _Count('errors')
+      _Remove(path)
+      raise
+
+
+def Invalidate(key: Sequence[str]):
+  """Drops the cached output of key, e.g. when using it failed."""
+  if CLOUD_METADATA_CACHE.value:
+    _Remove(_EntryPath(key))
+
+
+def GetSamples() -> list[sample.Sample]:
+  """Returns hit, miss and error counts since the last call."""
+  if not CLOUD_METADATA_CACHE.value:
+    return []
+  with _stats_lock:
+    stats = _stats.copy()
+    _stats.clear()
+  return [
+      sample.Sample(
+          f'Cloud Metadata Cache {stat.capitalize()}', stats[stat], 'count'
+      )
+      for stat in ('hits', 'misses', 'errors')
+  ]
@@ -446,6 +446,16 @@ class BaseOsMixin(command_interface.CommandInterface, metaclass=abc.ABCMeta):
     """Installs a PerfKit package on the VM."""
     raise NotImplementedError()
 
+  def InstallMany(self, package_names):
+    """Installs several PerfKit packages on the VM.
+
+    Args:
+      package_names: Names of the PerfKit packages. They may be installed in any
+        order, so must not depend on each other except through vm.Install.
+    """
+    for package_name in package_names:
+      self.Install(package_name)
+
   def Uninstall(self, package_name):
     """Uninstalls a PerfKit package on the VM."""
     raise NotImplementedError()
@@ -476,6 +486,18 @@ class BaseOsMixin(command_interface.CommandInterface, metaclass=abc.ABCMeta):
     """
     self.RemoteCopy(source_path, remote_path)
 
+  def PushFiles(self, source_paths, remote_path=''):
+    """Copies several files or directories into a directory on the VM.
+
+    Args:
+      source_paths: The locations of the files or directories on the LOCAL
+        machine.
+      remote_path: The destination directory on the REMOTE machine, default is
+        the home directory.
+    """
+    for source_path in source_paths:
+      self.PushFile(source_path, remote_path)
+
   def PullFile(self, local_path, remote_path):
     """Copies a file or a directory from the VM to the local machine.
 
@@ -88,9 +88,11 @@ from perfkitbenchmarker import events
 from perfkitbenchmarker import flag_alias
 from perfkitbenchmarker import flag_util
 from perfkitbenchmarker import flags as pkb_flags
+from perfkitbenchmarker import import_util
 from perfkitbenchmarker import linux_benchmarks
 from perfkitbenchmarker import linux_virtual_machine
 from perfkitbenchmarker import log_util
+from perfkitbenchmarker import metadata_cache
 from perfkitbenchmarker import os_types
 from perfkitbenchmarker import package_lookup
 from perfkitbenchmarker import providers
@@ -398,11 +400,61 @@ def _InjectBenchmarkInfoIntoDocumentation():
       benchmark_sets_list
   )
 
+# Flags that list the flags of every module.
+_HELP_FLAGS = frozenset([
+    '?',
+    'h',
+    'help',
+    'helpfull',
+    'helpshort',
+    'helpxml',
+    'helpmatch',
+    'helpmatchmd',
+])
+
+
+def _GetFlagNames(argv):
+  """Returns the names of the flags passed in argv, with flagfiles expanded."""
+  names = set()
+  for arg in FLAGS.read_flags_from_files(argv[1:], force_gnu=False):
+    if arg == '--':
+      break
+    if not arg.startswith('-'):
+      continue
+    name = arg.lstrip('-').split('=', 1)[0]
+    names.add(name)
+    if name.startswith('no'):
+      names.add(name[2:])
+  return names
+
+
+def _HelpRequested(argv):
+  try:
+    return bool(_GetFlagNames(argv) & _HELP_FLAGS)
+  except flags.Error:
+    return False
+
+
+def _LoadModulesForFlags(argv):
+  """Imports the benchmark and package modules defining flags in argv."""
+  flag_names = _GetFlagNames(argv)
+  if flag_names & _HELP_FLAGS:
+    import_util.LoadAllLazyModules()
+  else:
+    import_util.LoadModulesDefiningFlags(flag_names)
+
 
 def _ParseFlags(argv):
   """Parses the command-line flags."""
   try:
-    argv = FLAGS(argv)
+    _LoadModulesForFlags(argv)
+    try:
+      argv = FLAGS(argv)
+    except flags.UnrecognizedFlagError:
+      # The flag may be defined in a way the module index can't see.
+      import_util.LoadAllLazyModules()
+      argv = FLAGS(argv)
+    import_util.LoadFlagDependencies(list(sys.modules.values()))
   except flags.Error as e:
     logging.error(e)
     logging.info('For usage instructions, use --helpmatch={module_name}')
@@ -1098,6 +1150,8 @@ def RunBenchmark(
             skip_teardown_conditions = ParseSkipTeardownConditions(
                 pkb_flags.SKIP_TEARDOWN_CONDITIONS.value
             )
+            # Make sure samples still queued for streaming are checked too.
+            collector.Flush()
             should_teardown = ShouldTeardown(
                 skip_teardown_conditions,
                 collector.published_samples + collector.samples,
@@ -1127,6 +1181,7 @@ def RunBenchmark(
 
         # Add resource related samples.
         collector.AddSamples(spec.GetSamples(), spec.name, spec)
+        collector.AddSamples(metadata_cache.GetSamples(), spec.name, spec)
       # except block will clean up benchmark specific resources on exception. It
       # may also clean up generic resources based on
       # FLAGS.always_teardown_on_exception.
@@ -1200,7 +1255,7 @@ def RunBenchmark(
         # don't prevent teardown.
         if stages.TEARDOWN in FLAGS.run_stage and should_teardown:
           spec.Delete()
-        if FLAGS.publish_after_run:
+        if FLAGS.publish_after_run or collector.streaming:
           collector.PublishSamples()
         events.benchmark_end.send(benchmark_spec=spec)
         # Pickle spec to save final resource state.
@@ -1343,7 +1398,14 @@ def RunBenchmarkTask(
     logging.info(
         run_start_msg, benchmark_info, current_run_count + 1, max_run_count
     )
-    collector = publisher.SampleCollector()
+    collector = publisher.SampleCollector(
+        streaming=publisher.STREAMING.value,
+        # Published samples are only consulted for skip_teardown_conditions.
+        retain_published_samples=(
+            not publisher.STREAMING.value
+            or bool(pkb_flags.SKIP_TEARDOWN_CONDITIONS.value)
+        ),
+    )
     # Make a new copy of the benchmark_spec for each run since currently a
     # benchmark spec isn't compatible with multiple runs. In particular, the
     # benchmark_spec doesn't correctly allow for a provision of resources
@@ -1625,6 +1687,10 @@ def RunBenchmarks():
 
   benchmark_spec_lists = None
   collector = publisher.SampleCollector()
+  if publisher.STREAMING.value or publisher.BATCH_SIZE.value:
+    # Samples are appended to the JSON output in batches, e.g. by each
+    # benchmark as it runs.
+    publisher.ResetJSONOutput()
   try:
     tasks = [(RunBenchmarkTask, (spec,), {}) for spec in benchmark_specs]
     if FLAGS.run_processes is None:
@@ -1885,6 +1951,8 @@ def Main():
   """Entrypoint for PerfKitBenchmarker."""
   assert sys.version_info >= (3, 11), 'PerfKitBenchmarker requires Python 3.11+'
   log_util.ConfigureBasicLogging()
-  _InjectBenchmarkInfoIntoDocumentation()
+  # Documenting every benchmark imports them all, so only do it for --help.
+  if _HelpRequested(sys.argv):
+    _InjectBenchmarkInfoIntoDocumentation()
   ParseArgs()
   return RunBenchmarks()
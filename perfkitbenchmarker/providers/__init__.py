@@ -94,6 +94,7 @@ def LoadProvider(provider_name, ignore_package_requirements=True):
     )
     if not modules:
       raise ImportError('No modules found for provider %s.' % provider_name)
+    import_util.LoadFlagDependencies(modules)
   except Exception:
     logging.error('Unable to load provider %s.', provider_name)
     raise
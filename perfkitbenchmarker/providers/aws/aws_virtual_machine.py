@@ -21,6 +21,7 @@ operate on the VM: boot, shutdown, etc.
 
 import base64
 import collections
+import functools
 import json
 import logging
 import ntpath
@@ -34,9 +35,11 @@ from perfkitbenchmarker import disk
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import flags as pkb_flags
 from perfkitbenchmarker import linux_virtual_machine
+from perfkitbenchmarker import metadata_cache
 from perfkitbenchmarker import placement_group
 from perfkitbenchmarker import provider_info
 from perfkitbenchmarker import resource
+from perfkitbenchmarker import status_poller
 from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker import vm_util
 from perfkitbenchmarker import windows_virtual_machine
@@ -171,6 +174,12 @@ class AwsDriverDoesntSupportFeatureError(Exception):
   """Raised if there is an attempt to set a feature not supported."""
 
 
+# How long image lookups are cached for with --cloud_metadata_cache. Images
+# don't change, but new default images are published.
+_IMAGE_DESCRIPTION_CACHE_TTL = 7 * metadata_cache.DAY
+_DEFAULT_IMAGE_CACHE_TTL = metadata_cache.HOUR
+
+
 class AwsUnexpectedWindowsAdapterOutputError(Exception):
   """Raised when querying the status of a windows adapter failed."""
 
@@ -187,6 +196,25 @@ class AwsImageNotFoundError(Exception):
   """Error indicating no appropriate AMI could be found."""
 
 
+def _ParseSsmImageParameter(stdout):
+  """Returns the image ID of an ssm get-parameters response."""
+  response = json.loads(stdout)
+  if response['InvalidParameters']:
+    raise AwsImageNotFoundError('Invalid SSM parameters:\n' + stdout)
+  parameters = response['Parameters']
+  assert len(parameters) == 1
+  return parameters[0]['Value']
+
+
+def _ParseDescribeImagesOutput(stdout):
+  """Returns the images of a describe-images response."""
+  if not stdout:
+    raise AwsImageNotFoundError(
+        'aws describe-images did not produce valid output.'
+    )
+  return json.loads(stdout)
+
+
 def GetRootBlockDeviceSpecForImage(image_id, region):
   """Queries the CLI and returns the root block device specification as a dict.
 
@@ -207,8 +235,14 @@ def GetRootBlockDeviceSpecForImage(image_id, region):
       '--query',
       'Images[]',
   ]
-  stdout, _ = util.IssueRetryableCommand(command)
-  images = json.loads(stdout)
+  images = metadata_cache.Get(
+      command,
+      _IMAGE_DESCRIPTION_CACHE_TTL,
+      lambda: util.IssueRetryableCommand(command)[0],
+      json.loads,
+  )
+  if not images:
+    metadata_cache.Invalidate(command)
   assert images
   assert len(images) == 1, (
       'Expected to receive only one image description for %s' % image_id
@@ -423,6 +457,45 @@ def _GetKeyfileSetKey(region):
   return (region, FLAGS.run_uri)
 
 
+# AWS accepts at most 200 values per filter.
+_MAX_FILTER_VALUES = 200
+
+
+def _DescribeInstancesByClientToken(region, client_tokens):
+  """Runs describe-instances for several client tokens.
+
+  Args:
+    region: The region of the instances.
+    client_tokens: The client tokens of the instances.
+
+  Returns:
+    A describe-instances response for each client token that has instances,
+    keyed by client token.
+  """
+  reservations_by_token = collections.defaultdict(list)
+  for i in range(0, len(client_tokens), _MAX_FILTER_VALUES):
+    describe_cmd = util.AWS_PREFIX + [
+        'ec2',
+        'describe-instances',
+        '--region=%s' % region,
+        '--filter=Name=client-token,Values=%s'
+        % ','.join(client_tokens[i : i + _MAX_FILTER_VALUES]),
+    ]
+    stdout, _ = util.IssueRetryableCommand(describe_cmd)
+    for reservation in json.loads(stdout)['Reservations']:
+      instances_by_token = collections.defaultdict(list)
+      for instance in reservation['Instances']:
+        instances_by_token[instance.get('ClientToken')].append(instance)
+      for token, instances in instances_by_token.items():
+        reservations_by_token[token].append(
+            dict(reservation, Instances=instances)
+        )
+  return {
+      token: {'Reservations': reservations}
+      for token, reservations in reservations_by_token.items()
+  }
+
+
 class AwsKeyFileManager:
   """Object for managing AWS Keyfiles."""
 
@@ -684,23 +757,20 @@ class AwsVirtualMachine(virtual_machine.BaseVirtualMachine):
             '--aws_image_name_filter is not supported for AWS OS Mixins that '
             'use SSM to select AMIs. You can still pass --image.'
         )
-      stdout, _, _ = vm_util.IssueCommand(
-          util.AWS_PREFIX
-          + [
-              'ssm',
-              'get-parameters',
-              '--region',
-              region,
-              '--names',
-              cls.IMAGE_SSM_PATTERN.format(**format_dict),
-          ]
+      ssm_cmd = util.AWS_PREFIX + [
+          'ssm',
+          'get-parameters',
+          '--region',
+          region,
+          '--names',
+          cls.IMAGE_SSM_PATTERN.format(**format_dict),
+      ]
+      return metadata_cache.Get(
+          ssm_cmd,
+          _DEFAULT_IMAGE_CACHE_TTL,
+          lambda: vm_util.IssueCommand(ssm_cmd)[0],
+          _ParseSsmImageParameter,
       )
-      response = json.loads(stdout)
-      if response['InvalidParameters']:
-        raise AwsImageNotFoundError('Invalid SSM parameters:\n' + stdout)
-      parameters = response['Parameters']
-      assert len(parameters) == 1
-      return parameters[0]['Value']
 
     # These cannot be REQUIRED_ATTRS, because nesting REQUIRED_ATTRS breaks.
     if not cls.IMAGE_OWNER:
@@ -745,19 +815,19 @@ class AwsVirtualMachine(virtual_machine.BaseVirtualMachine):
       # This is the default, but be explicit.
       describe_cmd.append('--no-include-deprecated')
     describe_cmd.extend(['--owners'] + cls.IMAGE_OWNER)
-    stdout, _ = util.IssueRetryableCommand(describe_cmd)
-
-    if not stdout:
-      raise AwsImageNotFoundError(
-          'aws describe-images did not produce valid output.'
-      )
+    all_images = metadata_cache.Get(
+        describe_cmd,
+        _DEFAULT_IMAGE_CACHE_TTL,
+        lambda: util.IssueRetryableCommand(describe_cmd)[0],
+        _ParseDescribeImagesOutput,
+    )
 
     if cls.IMAGE_NAME_REGEX:
       # Further filter images by the IMAGE_NAME_REGEX filter.
       image_name_regex = cls.IMAGE_NAME_REGEX.format(**format_dict)
       images = []
       excluded_images = []
-      for image in json.loads(stdout):
+      for image in all_images:
         if re.search(image_name_regex, image['Name']):
           images.append(image)
         else:
@@ -770,7 +840,7 @@ class AwsVirtualMachine(virtual_machine.BaseVirtualMachine):
             sorted(image['Name'] for image in excluded_images),
         )
     else:
-      images = json.loads(stdout)
+      images = all_images
 
     if not images:
       raise AwsImageNotFoundError('No AMIs with given filters found.')
@@ -779,6 +849,12 @@ class AwsVirtualMachine(virtual_machine.BaseVirtualMachine):
 
   def _RunDescribeInstancesCommand(self):
     """Runs the describe-instances command and return the response as JSON."""
+    if status_poller.COALESCE_STATUS_POLLING.value:
+      poller = status_poller.GetPoller(
+          ('aws', self.region),
+          functools.partial(_DescribeInstancesByClientToken, self.region),
+      )
+      return poller.Get(self.client_token) or {'Reservations': []}
     describe_cmd = util.AWS_PREFIX + [
         'ec2',
         'describe-instances',
@@ -27,6 +27,7 @@ operate on the VM: boot, shutdown, etc.
 import collections
 import copy
 import datetime
+import functools
 import itertools
 import json
 import logging
@@ -47,6 +48,7 @@ from perfkitbenchmarker import os_types
 from perfkitbenchmarker import placement_group
 from perfkitbenchmarker import provider_info
 from perfkitbenchmarker import resource
+from perfkitbenchmarker import status_poller
 from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker import vm_util
 from perfkitbenchmarker.configs import option_decoders
@@ -159,6 +161,24 @@ class GceServiceUnavailableError(Exception):
   """Error for retrying _Exists when the describe output indicates that 'The service is currently unavailable'."""
 
 
+def _ListInstances(project, zone, names):
+  """Returns the instances list entries of the named VMs in a zone by name."""
+  cmd = util.GcloudCommand(None, 'compute', 'instances', 'list')
+  if project:
+    cmd.flags['project'] = project
+  cmd.flags['zones'] = zone
+  cmd.flags['filter'] = 'name=(%s)' % ' '.join(names)
+  stdout, stderr, retcode = cmd.Issue(raise_on_failure=False)
+  if 'The service is currently unavailable' in stderr:
+    logging.info('instances list command failed, retrying.')
+    raise GceServiceUnavailableError()
+  if retcode:
+    raise errors.VmUtil.IssueCommandError(
+        'instances list command failed: %s' % stderr
+    )
+  return {instance['name']: instance for instance in json.loads(stdout)}
+
+
 class GceVmSpec(virtual_machine.BaseVmSpec):
   """Object containing the information needed to create a GceVirtualMachine.
 
@@ -1105,6 +1125,13 @@ class GceVirtualMachine(virtual_machine.BaseVirtualMachine):
   )
   def _Exists(self):
     """Returns true if the VM exists."""
+    if status_poller.COALESCE_STATUS_POLLING.value:
+      poller = status_poller.GetPoller(
+          ('gce', self.project, self.zone),
+          functools.partial(_ListInstances, self.project, self.zone),
+      )
+      response = poller.Get(self.name)
+      return bool(response) and response['status'] in INSTANCE_EXISTS_STATUSES
     getinstance_cmd = util.GcloudCommand(
         self, 'compute', 'instances', 'describe', self.name
     )
@@ -22,6 +22,7 @@ from typing import Any, Set
 from absl import flags
 from perfkitbenchmarker import context
 from perfkitbenchmarker import errors
+from perfkitbenchmarker import metadata_cache
 from perfkitbenchmarker import resource
 from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker import vm_util
@@ -57,6 +58,11 @@ RATE_LIMITED_MAX_POLLING_INTERVAL = 200
 # This must be set. Otherwise, calling Issue() will fail in util_test.py.
 RATE_LIMITED_FUZZ = 0.5
 RATE_LIMITED_TIMEOUT = 1200
+# How long lookups of zones, regions and machine types are cached for with
+# --cloud_metadata_cache.
+_LOCATION_CACHE_TTL = metadata_cache.DAY
+_PROJECT_NUMBER_CACHE_TTL = 7 * metadata_cache.DAY
+
 STOCKOUT_MESSAGE = (
     'Creation failed due to insufficient capacity indicating a '
     'potential stockout scenario.'
@@ -94,9 +100,12 @@ def GetProjectNumber(project_id: str | None = None) -> str:
       f'--filter=name:{project_id}',
       '--format=json',
   ]
-  stdout, _, _ = vm_util.IssueCommand(cmd)
-  result = json.loads(stdout)
-  return result[0]['projectNumber']
+  return metadata_cache.Get(
+      cmd,
+      _PROJECT_NUMBER_CACHE_TTL,
+      lambda: vm_util.IssueCommand(cmd)[0],
+      lambda stdout: json.loads(stdout)[0]['projectNumber'],
+  )
 
 
 def GetRegionFromZone(zone) -> str:
@@ -120,20 +129,28 @@ def IsRegion(location: str) -> bool:
   return bool(re.fullmatch(r'[a-z]+-[a-z]+[0-9]', location))
 
 
+def _IssueCachedListCommand(cmd: 'GcloudCommand') -> Set[str]:
+  """Returns the lines output by a list command, cached for a day."""
+  return metadata_cache.Get(
+      cmd.GetCommand(),
+      _LOCATION_CACHE_TTL,
+      lambda: cmd.Issue()[0],
+      lambda stdout: set(stdout.splitlines()),
+  )
+
+
 def GetAllZones() -> Set[str]:
   """Gets a list of valid zones."""
   cmd = GcloudCommand(None, 'compute', 'zones', 'list')
   cmd.flags['format'] = 'value(name)'
-  stdout, _, _ = cmd.Issue()
-  return set(stdout.splitlines())
+  return _IssueCachedListCommand(cmd)
 
 
 def GetAllRegions() -> Set[str]:
   """Gets a list of valid regions."""
   cmd = GcloudCommand(None, 'compute', 'regions', 'list')
   cmd.flags['format'] = 'value(name)'
-  stdout, _, _ = cmd.Issue()
-  return set(stdout.splitlines())
+  return _IssueCachedListCommand(cmd)
 
 
 def GetZonesInRegion(region) -> Set[str]:
@@ -143,8 +160,7 @@ def GetZonesInRegion(region) -> Set[str]:
       'filter': f"region='{region}'",
       'format': 'value(name)',
   })
-  stdout, _, _ = cmd.Issue()
-  return set(stdout.splitlines())
+  return _IssueCachedListCommand(cmd)
 
 
 def GetZonesFromMachineType(machine_type: str) -> Set[str]:
@@ -154,8 +170,7 @@ def GetZonesFromMachineType(machine_type: str) -> Set[str]:
       'filter': f"name='{machine_type}'",
       'format': 'value(zone)',
   })
-  stdout, _, _ = cmd.Issue()
-  zones_with_machine_type = set(stdout.splitlines())
+  zones_with_machine_type = _IssueCachedListCommand(cmd)
   all_usable_zones = GetAllZones()
   if zones_with_machine_type:
     # Under some circumstances machine type lists can contain zones that we do
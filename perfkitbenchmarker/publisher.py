@@ -18,7 +18,9 @@
 
 
 import abc
+import array
 import collections
+from collections import abc as collections_abc
 import copy
 import csv
 import datetime
@@ -29,8 +31,11 @@ import json
 import logging
 import math
 import operator
+import os
 import pprint
+import queue
 import sys
+import threading
 import time
 from typing import Any
 import uuid
@@ -164,6 +169,92 @@ flags.DEFINE_boolean(
     'record_log_publisher', True, 'Whether to use the log publisher or not.'
 )
 
+STREAMING = flags.DEFINE_boolean(
+    'publish_streaming',
+    False,
+    'If true, samples are handed to a background thread as soon as a benchmark '
+    'collects them and are published in batches while the run continues, '
+    'instead of being held in memory until all benchmarks finish.',
+)
+STREAMING_BATCH_SIZE = flags.DEFINE_integer(
+    'publish_streaming_batch_size',
+    1000,
+    'With --publish_streaming, publish once this many samples are pending.',
+    lower_bound=1,
+)
+STREAMING_PERIOD = flags.DEFINE_float(
+    'publish_streaming_period',
+    60.0,
+    'With --publish_streaming, publish pending samples at least this often, '
+    'in seconds.',
+    lower_bound=0.0,
+)
+STREAMING_QUEUE_SIZE = flags.DEFINE_integer(
+    'publish_streaming_queue_size',
+    10000,
+    'With --publish_streaming, the maximum number of samples waiting to be '
+    'published. Collecting more samples blocks until the publisher catches '
+    'up, which keeps memory bounded if a sink is slow.',
+    lower_bound=1,
+)
+
+PARALLEL = flags.DEFINE_boolean(
+    'publish_parallel',
+    False,
+    'If true, each publisher publishes from its own thread, so a slow sink '
+    'does not hold up the others. The first failure is raised once all '
+    'publishers finished.',
+)
+TIMEOUT = flags.DEFINE_float(
+    'publish_timeout',
+    None,
+    'With --publish_parallel, seconds to wait for the publishers to finish. '
+    'Publishers still running after the timeout are not retried again, and '
+    'their samples are written to --publish_journal_dir if their last '
+    'attempt fails. Default: wait indefinitely.',
+    lower_bound=0.0,
+)
+ARRAY_PAYLOAD_MIN_LENGTH = flags.DEFINE_integer(
+    'publish_array_payload_min_length',
+    None,
+    'If set, numeric lists in sample metadata with at least this many values, '
+    'e.g. time series values and raw latencies, are published as compressed '
+    'array payloads (see sample.ArrayPayload) instead of as lists. Default: '
+    'publish them as lists.',
+    lower_bound=1,
+)
+RETRIES = flags.DEFINE_integer(
+    'publish_retries',
+    0,
+    'Number of times to retry a publisher that raised an exception.',
+    lower_bound=0,
+)
+BATCH_SIZE = flags.DEFINE_integer(
+    'publish_batch_size',
+    None,
+    'If set, publishers are given at most this many samples at a time. Each '
+    'batch is retried on its own, and only the batches not yet published are '
+    'written to --publish_journal_dir if one fails. Publishers created from '
+    'flags, e.g. --json_path and --csv_path, append each batch. Default: give '
+    'publishers all samples at once.',
+    lower_bound=1,
+)
+RETRY_DELAY = flags.DEFINE_float(
+    'publish_retry_delay',
+    5.0,
+    'Seconds to wait before the first publish retry. The delay doubles with '
+    'each retry.',
+    lower_bound=0.0,
+)
+JOURNAL_DIR = flags.DEFINE_string(
+    'publish_journal_dir',
+    None,
+    'Directory to which samples that a publisher failed to publish are '
+    'written as newline-delimited JSON, to be republished later with '
+    '"python -m perfkitbenchmarker.publisher <publisher flags> <file>". '
+    'Default: the run temporary directory.',
+)
+
 DEFAULT_CREDENTIALS_JSON = 'credentials.json'
 GCS_OBJECT_NAME_LENGTH = 20
 
@@ -366,9 +457,11 @@ class SamplePublisher(metaclass=abc.ABCMeta):
   def PublishSamples(self, samples: list[pkb_sample.SampleDict]):
     """Publishes 'samples'.
 
-    PublishSamples will be called exactly once. Calling
-    SamplePublisher.PublishSamples multiple times may result in data being
-    overwritten.
+    PublishSamples is called once with all samples or, when samples are
+    published in batches, e.g. with --publish_streaming, once per batch. It is
+    called again with the same samples only if it raised an exception.
+    Publishers that write to a single destination must then add each batch to
+    it rather than overwrite earlier batches.
 
     Args:
       samples: list of dicts to publish.
@@ -381,6 +474,10 @@ class CSVPublisher(SamplePublisher):
 
   The default field names are written first, followed by all unique metadata
   keys found in the data.
+
+  When appending batches, rows are appended as long as their metadata keys
+  are columns of the file. Otherwise the file is rewritten with the new
+  columns added.
   """
 
   _DEFAULT_FIELDS = (
@@ -396,28 +493,53 @@ class CSVPublisher(SamplePublisher):
       'sample_uri',
   )
 
-  def __init__(self, path):
+  def __init__(self, path, append_batches=False):
+    """Initializes the publisher.
+
+    Args:
+      path: Path of the CSV file.
+      append_batches: If True, the first PublishSamples call overwrites the
+        file and later calls append to it, e.g. to publish batches. Otherwise
+        each call overwrites the file.
+    """
     super().__init__()
     self._path = path
+    self._append_batches = append_batches
+    # Columns of the file, once it was written when appending batches.
+    self._fields = None
 
   def PublishSamples(self, samples):
     samples = list(samples)
     # Union of all metadata keys.
-    meta_keys = sorted(
-        # pylint: disable-next=g-complex-comprehension
-        {key for sample in samples for key in sample['metadata']}
-    )
+    # pylint: disable-next=g-complex-comprehension
+    meta_keys = {key for sample in samples for key in sample['metadata']}
+    rows = []
+    for sample in samples:
+      d = {}
+      d.update(sample)
+      d.update(d.pop('metadata'))
+      rows.append(d)
 
     logging.info('Writing CSV results to %s', self._path)
+    previous_rows = []
+    if self._fields is not None:
+      if meta_keys.issubset(self._fields):
+        with open(self._path, 'a') as fp:
+          csv.DictWriter(fp, self._fields).writerows(rows)
+        return
+      # Earlier rows lack the new columns, so the file is rewritten.
+      with open(self._path) as fp:
+        previous_rows = list(csv.DictReader(fp))
+      meta_keys.update(self._fields[len(self._DEFAULT_FIELDS) :])
+
+    fields = list(self._DEFAULT_FIELDS) + sorted(meta_keys)
     with open(self._path, 'w') as fp:
-      writer = csv.DictWriter(fp, list(self._DEFAULT_FIELDS) + meta_keys)
+      writer = csv.DictWriter(fp, fields)
       writer.writeheader()
-
-      for sample in samples:
-        d = {}
-        d.update(sample)
-        d.update(d.pop('metadata'))
-        writer.writerow(d)
+      writer.writerows(previous_rows)
+      writer.writerows(rows)
+    if self._append_batches:
+      self._fields = fields
 
 
 class PrettyPrintStreamPublisher(SamplePublisher):
@@ -489,7 +611,10 @@ class PrettyPrintStreamPublisher(SamplePublisher):
   def _FormatMetadata(self, metadata):
     """Format 'metadata' as space-delimited key="value" pairs."""
     return ' '.join(
-        '{}="{}"'.format(k, v) for k, v in sorted(metadata.items())
+        '{}="{}"'.format(
+            k, repr(v) if isinstance(v, pkb_sample.ArrayPayload) else v
+        )
+        for k, v in sorted(metadata.items())
     )
 
   def PublishSamples(self, samples):
@@ -1050,6 +1175,413 @@ class InfluxDBPublisher(SamplePublisher):
       raise httplib.HTTPException
 
 
+class _FlushRequest:
+  """Marker queued to make StreamingSamplePublisher publish what it holds."""
+
+  def __init__(self, stop=False):
+    self.stop = stop
+    self.done = threading.Event()
+
+
+class StreamingSamplePublisher:
+  """Publishes samples in batches from a background thread.
+
+  Samples are handed to the thread through a bounded queue, so Put blocks
+  rather than buffering without limit when a sink falls behind. A batch is
+  published once it holds batch_size samples, once period seconds have passed
+  since the last publish, or when Flush or Close is called.
+
+  Attributes:
+    publish_fn: Callable that receives each batch as a list of sample dicts.
+    batch_size: Maximum number of samples per batch.
+    period: Maximum number of seconds a sample waits before being published.
+    num_published: Number of samples handed to publish_fn so far.
+  """
+
+  def __init__(self, publish_fn, batch_size=1000, period=60.0, max_queue=0):
+    self.publish_fn = publish_fn
+    self.batch_size = batch_size
+    self.period = period
+    self.num_published = 0
+    self._queue = queue.Queue(maxsize=max_queue)
+    self._thread = threading.Thread(
+        target=self._Run, name='StreamingSamplePublisher', daemon=True
+    )
+    self._thread.start()
+
+  def __repr__(self):
+    return '<{} batch_size={} period={}>'.format(
+        type(self).__name__, self.batch_size, self.period
+    )
+
+  def Put(self, sample: pkb_sample.SampleDict):
+    """Queues a sample for publishing, blocking while the queue is full."""
+    if not self._thread.is_alive():
+      raise RuntimeError('Cannot add samples to a closed publisher.')
+    self._queue.put(sample)
+
+  def Flush(self):
+    """Blocks until every sample queued so far has been published."""
+    self._Request(_FlushRequest())
+
+  def Close(self):
+    """Publishes all queued samples and stops the background thread."""
+    if self._thread.is_alive():
+      self._Request(_FlushRequest(stop=True))
+      self._thread.join()
+
+  def _Request(self, request: _FlushRequest):
+    self._queue.put(request)
+    # The thread may die from an unexpected error; don't wait on it forever.
+    while not request.done.wait(1):
+      if not self._thread.is_alive():
+        raise RuntimeError('Streaming sample publisher thread died.')
+
+  def _Publish(self, batch: list[pkb_sample.SampleDict]):
+    if not batch:
+      return
+    try:
+      self.publish_fn(batch)
+    except Exception:  # pylint: disable=broad-except
+      # Keep the thread alive so that later batches still get published.
+      logging.exception('Failed to publish %d samples.', len(batch))
+    self.num_published += len(batch)
+
+  def _Run(self):
+    batch = []
+    deadline = time.time() + self.period
+    while True:
+      try:
+        item = self._queue.get(timeout=max(0, deadline - time.time()))
+      except queue.Empty:
+        item = None
+      if isinstance(item, _FlushRequest):
+        self._Publish(batch)
+        batch = []
+        deadline = time.time() + self.period
+        item.done.set()
+        if item.stop:
+          return
+        continue
+      if item is not None:
+        batch.append(item)
+      if len(batch) >= self.batch_size or time.time() >= deadline:
+        self._Publish(batch)
+        batch = []
+        deadline = time.time() + self.period
+
+
+def _SpillSamples(publisher, samples) -> str | None:
+  """Writes samples that publisher failed to publish to the journal directory.
+
+  The journal uses the --json_path format, which RepublishJSONSamples reads.
+
+  Args:
+    publisher: The SamplePublisher that failed.
+    samples: The sample dicts it failed to publish.
+
+  Returns:
+    The path of the journal file, or None if it could not be written.
+  """
+  journal_dir = JOURNAL_DIR.value or os.path.join(
+      vm_util.GetTempDir(), 'unpublished_samples'
+  )
+  path = os.path.join(
+      journal_dir,
+      '{}-{}-{}.json'.format(
+          type(publisher).__name__, int(time.time()), uuid.uuid4().hex[:8]
+      ),
+  )
+  try:
+    os.makedirs(journal_dir, exist_ok=True)
+    NewlineDelimitedJSONPublisher(path, collapse_labels=True).PublishSamples(
+        samples
+    )
+  except Exception:  # pylint: disable=broad-except
+    logging.exception('Failed to write unpublished samples to %s.', path)
+    return None
+  logging.error(
+      'Wrote %d samples that %s failed to publish to %s. Republish them with '
+      '"python -m perfkitbenchmarker.publisher <publisher flags> %s".',
+      len(samples),
+      publisher,
+      path,
+      path,
+  )
+  return path
+
+
+def _PublishWithRetries(
+    publisher, samples, retries=0, retry_delay=0.0, cancelled=None
+):
+  """Publishes samples, retrying with exponential backoff on failure.
+
+  Samples are written to the journal directory if the last attempt fails.
+
+  Args:
+    publisher: The SamplePublisher to publish with.
+    samples: The sample dicts to publish.
+    retries: Number of retries after the first attempt.
+    retry_delay: Seconds to wait before the first retry. Doubles every retry.
+    cancelled: threading.Event. Once set, failures are not retried.
+
+  Raises:
+    Exception: Whatever the last attempt raised.
+  """
+  cancelled = cancelled or threading.Event()
+  for attempt in range(retries + 1):
+    try:
+      publisher.PublishSamples(samples)
+      return
+    except Exception:
+      logging.exception(
+          'Attempt %d of %d to publish %d samples with %s failed.',
+          attempt + 1,
+          retries + 1,
+          len(samples),
+          publisher,
+      )
+      if attempt == retries or cancelled.wait(retry_delay * 2**attempt):
+        _SpillSamples(publisher, samples)
+        raise
+
+
+def _PublishInBatches(
+    publisher,
+    samples,
+    batch_size=None,
+    retries=0,
+    retry_delay=0.0,
+    cancelled=None,
+):
+  """Publishes samples in batches, each with _PublishWithRetries.
+
+  Args:
+    publisher: The SamplePublisher to publish with.
+    samples: The sample dicts to publish.
+    batch_size: Maximum number of samples per PublishSamples call, or None to
+      publish all samples in one call.
+    retries: Number of retries of each batch after its first attempt.
+    retry_delay: Seconds to wait before the first retry. Doubles every retry.
+    cancelled: threading.Event. Once set, failures are not retried.
+
+  Raises:
+    Exception: Whatever the last attempt of the failed batch raised. The
+      samples of the batches after it are written to the journal directory.
+  """
+  if not batch_size or len(samples) <= batch_size:
+    _PublishWithRetries(publisher, samples, retries, retry_delay, cancelled)
+    return
+  for start in range(0, len(samples), batch_size):
+    end = start + batch_size
+    try:
+      _PublishWithRetries(
+          publisher, samples[start:end], retries, retry_delay, cancelled
+      )
+    except Exception:
+      if end < len(samples):
+        _SpillSamples(publisher, samples[end:])
+      raise
+
+
+def ResetJSONOutput():
+  """Truncates the --json_path file if --json_write_mode asks to overwrite it.
+
+  Streaming collectors and --publish_batch_size append to the JSON file each
+  time they publish a batch, so the file has to be truncated once up front
+  instead.
+  """
+  path = _GetJSONOutputPath()
+  if path and FLAGS.json_write_mode == 'w':
+    with open(path, 'w'):
+      pass
+
+
+def _GetJSONOutputPath():
+  """Returns the path samples are written to as JSON, or None."""
+  if not JSON_PATH.value:
+    return None
+  # Default publishing path needs to be qualified with the run_uri temp dir.
+  if JSON_PATH.value == DEFAULT_JSON_OUTPUT_NAME:
+    return vm_util.PrependTempDir(JSON_PATH.value)
+  return JSON_PATH.value
+
+
+def _InternKey(value):
+  """Returns a hashable key that is equal only for identical values.
+
+  Types are part of the key so that, for example, 1 and True, or [1] and (1,),
+  are not interned as the same value.
+
+  Args:
+    value: A metadata value, possibly a nested dict or list.
+
+  Returns:
+    A hashable key.
+  """
+  if isinstance(value, dict):
+    return (dict, tuple((k, _InternKey(v)) for k, v in value.items()))
+  if isinstance(value, (list, tuple, set, frozenset)):
+    return (type(value), tuple(_InternKey(v) for v in value))
+  try:
+    hash(value)
+  except TypeError:
+    # Values that can't be compared by content are only shared by identity.
+    return (type(value), id(value))
+  return (type(value), value)
+
+
+class _InternTable:
+  """Stores each distinct value once and refers to it by a small integer."""
+
+  def __init__(self):
+    self.values = []
+    self._ids = {}
+
+  def __getstate__(self):
+    # Identity based keys don't survive pickling, so rebuild the index.
+    return self.values
+
+  def __setstate__(self, values):
+    self.values = []
+    self._ids = {}
+    for value in values:
+      self.Add(value)
+
+  def Add(self, value) -> int:
+    """Returns the id of value, storing it if it is new."""
+    key = _InternKey(value)
+    value_id = self._ids.get(key)
+    if value_id is None:
+      value_id = self._ids[key] = len(self.values)
+      self.values.append(value)
+    return value_id
+
+
+class SampleStore(collections_abc.Sequence):
+  """A compact, append-only sequence of annotated sample dicts.
+
+  Benchmarks that emit time series can produce hundreds of thousands of
+  samples whose metadata is nearly identical. Rather than keeping one dict per
+  sample, each with its own copy of the metadata, the store keeps metric,
+  value, unit, timestamp and sample_uri in columns. Metadata dicts and the
+  (test, product_name, official, owner, run_uri) fields are interned, so
+  identical ones are stored once.
+
+  Reading a row builds a new SampleDict with the original key order. Its
+  'metadata' dict is shared with every other row that has identical metadata,
+  so copy it before modifying it. Dicts that don't have the shape produced by
+  SampleCollector.AddSamples are stored as they are.
+  """
+
+  _CONTEXT_FIELDS = ('test', 'product_name', 'official', 'owner', 'run_uri')
+  _ROW_KEYS = (
+      ('metric', 'value', 'unit', 'metadata', 'timestamp')
+      + _CONTEXT_FIELDS
+      + ('sample_uri',)
+  )
+
+  def __init__(self, samples=()):
+    self._metrics = []
+    self._values = array.array('d')
+    self._units = []
+    self._timestamps = array.array('d')
+    self._sample_uris = []
+    self._metadata_ids = array.array('L')
+    self._context_ids = array.array('L')
+    self._metadata = _InternTable()
+    self._contexts = _InternTable()
+    # Row index -> sample dict, for rows that are not stored in columns.
+    self._other_rows = {}
+    self.extend(samples)
+
+  def __len__(self):
+    return len(self._metrics)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self._Row(i) for i in range(*index.indices(len(self)))]
+    if index < 0:
+      index += len(self)
+    if not 0 <= index < len(self):
+      raise IndexError('SampleStore index out of range')
+    return self._Row(index)
+
+  def __iter__(self):
+    for i in range(len(self)):
+      yield self._Row(i)
+
+  def __eq__(self, other):
+    if not isinstance(other, (SampleStore, list)):
+      return NotImplemented
+    return len(self) == len(other) and list(self) == list(other)
+
+  def __add__(self, other):
+    return list(self) + list(other)
+
+  def __radd__(self, other):
+    return list(other) + list(self)
+
+  def __iadd__(self, other):
+    self.extend(other)
+    return self
+
+  def __repr__(self):
+    return '<{} samples={} distinct_metadata={}>'.format(
+        type(self).__name__, len(self), len(self._metadata.values)
+    )
+
+  def _Row(self, i) -> pkb_sample.SampleDict:
+    if i in self._other_rows:
+      return self._other_rows[i].copy()
+    row = {
+        'metric': self._metrics[i],
+        'value': self._values[i],
+        'unit': self._units[i],
+        'metadata': self._metadata.values[self._metadata_ids[i]],
+        'timestamp': self._timestamps[i],
+    }
+    row.update(
+        zip(self._CONTEXT_FIELDS, self._contexts.values[self._context_ids[i]])
+    )
+    row['sample_uri'] = self._sample_uris[i]
+    return pkb_sample.SampleDict(row)
+
+  def append(self, sample):  # pylint: disable=invalid-name
+    """Adds a sample dict to the store."""
+    if (
+        tuple(sample) == self._ROW_KEYS
+        and isinstance(sample['value'], float)
+        and isinstance(sample['timestamp'], float)
+        and isinstance(sample['metadata'], dict)
+    ):
+      self._metrics.append(sys.intern(sample['metric']))
+      self._values.append(sample['value'])
+      self._units.append(sys.intern(sample['unit']))
+      self._timestamps.append(sample['timestamp'])
+      self._metadata_ids.append(self._metadata.Add(sample['metadata']))
+      self._context_ids.append(
+          self._contexts.Add(
+              tuple(sample[field] for field in self._CONTEXT_FIELDS)
+          )
+      )
+      self._sample_uris.append(sample['sample_uri'])
+      return
+    self._other_rows[len(self)] = dict(sample)
+    self._metrics.append(None)
+    self._values.append(0.0)
+    self._units.append(None)
+    self._timestamps.append(0.0)
+    self._metadata_ids.append(0)
+    self._context_ids.append(0)
+    self._sample_uris.append(None)
+
+  def extend(self, samples):  # pylint: disable=invalid-name
+    """Adds each sample dict in an iterable to the store."""
+    for sample in samples:
+      self.append(sample)
+
+
 class SampleCollector:
   """A performance sample collector.
 
@@ -1057,8 +1589,9 @@ class SampleCollector:
   results via any number of SamplePublishers.
 
   Attributes:
-    samples: A list of Sample objects as dicts that have yet to be published.
-    published_samples: A list of Sample objects as dicts that have been
+    samples: A SampleStore of Sample objects as dicts that have yet to be
+      published.
+    published_samples: A SampleStore of Sample objects as dicts that have been
       published.
     metadata_providers: A list of MetadataProvider objects. Metadata providers
       to use.  Defaults to DEFAULT_METADATA_PROVIDERS.
@@ -1069,6 +1602,10 @@ class SampleCollector:
       PrettyPrintStreamPublisher, and NewlineDelimitedJSONPublisher targeting
       the run directory to the publishers list.
     run_uri: A unique tag for the run.
+    streaming: If True, samples are published in batches from a background
+      thread as they are added instead of being held until PublishSamples.
+    retain_published_samples: If False, published samples are dropped instead
+      of being kept in published_samples.
   """
 
   def __init__(
@@ -1077,11 +1614,13 @@ class SampleCollector:
       publishers=None,
       publishers_from_flags=True,
       add_default_publishers=True,
+      streaming=False,
+      retain_published_samples=True,
   ):
-    # List of samples yet to be published.
-    self.samples: list[pkb_sample.SampleDict] = []
-    # List of samples that have already been published.
-    self.published_samples: list[pkb_sample.SampleDict] = []
+    # Samples yet to be published.
+    self.samples = SampleStore()
+    # Samples that have already been published.
+    self.published_samples = SampleStore()
 
     if metadata_providers is not None:
       self.metadata_providers = metadata_providers
@@ -1092,10 +1631,22 @@ class SampleCollector:
     for publisher_class in EXTERNAL_PUBLISHERS:
       self.publishers.append(publisher_class())
     if publishers_from_flags:
-      self.publishers.extend(SampleCollector._PublishersFromFlags())
+      # Streaming and --publish_batch_size publish many batches, each of which
+      # must be appended.
+      self.publishers.extend(
+          SampleCollector._PublishersFromFlags(
+              append_batches=streaming or BATCH_SIZE.value is not None
+          )
+      )
     if add_default_publishers:
       self.publishers.extend(SampleCollector._DefaultPublishers())
 
+    self.streaming = streaming
+    self.retain_published_samples = retain_published_samples
+    self._streamer: StreamingSamplePublisher | None = None
+    # Guards published_samples, which the streaming thread appends to.
+    self._published_lock = threading.Lock()
+
     logging.debug('Using publishers: %s', str(self.publishers))
 
   @classmethod
@@ -1109,19 +1660,15 @@ class SampleCollector:
     return publishers
 
   @classmethod
-  def _PublishersFromFlags(cls):
+  def _PublishersFromFlags(cls, append_batches=False):
     publishers = []
 
-    if JSON_PATH.value:
-      # Default publishing path needs to be qualified with the run_uri temp dir.
-      if JSON_PATH.value == DEFAULT_JSON_OUTPUT_NAME:
-        publishing_json_path = vm_util.PrependTempDir(JSON_PATH.value)
-      else:
-        publishing_json_path = JSON_PATH.value
+    publishing_json_path = _GetJSONOutputPath()
+    if publishing_json_path:
       publishers.append(
           NewlineDelimitedJSONPublisher(
               publishing_json_path,
-              mode=FLAGS.json_write_mode,
+              mode='a' if append_batches else FLAGS.json_write_mode,
               collapse_labels=FLAGS.collapse_labels,
           )
       )
@@ -1154,7 +1701,9 @@ class SampleCollector:
           )
       )
     if FLAGS.csv_path:
-      publishers.append(CSVPublisher(FLAGS.csv_path))
+      publishers.append(
+          CSVPublisher(FLAGS.csv_path, append_batches=append_batches)
+      )
 
     if FLAGS.es_uri:
       publishers.append(
@@ -1191,30 +1740,136 @@ class SampleCollector:
             sample['metadata'], benchmark_spec
         )
 
+      if ARRAY_PAYLOAD_MIN_LENGTH.value:
+        sample['metadata'] = pkb_sample.EncodeArrays(
+            sample['metadata'], ARRAY_PAYLOAD_MIN_LENGTH.value
+        )
+
       sample['product_name'] = FLAGS.product_name
       sample['official'] = FLAGS.official
       sample['owner'] = FLAGS.owner
       sample['run_uri'] = benchmark_spec.uuid
       sample['sample_uri'] = str(uuid.uuid4())
-      self.samples.append(sample)
+      if self.streaming:
+        if not self._streamer:
+          self._streamer = StreamingSamplePublisher(
+              self._PublishBatch,
+              batch_size=STREAMING_BATCH_SIZE.value,
+              period=STREAMING_PERIOD.value,
+              max_queue=STREAMING_QUEUE_SIZE.value,
+          )
+        self._streamer.Put(sample)
+      else:
+        self.samples.append(sample)
+
+  def Flush(self):
+    """Blocks until samples handed to the streaming thread are published."""
+    if self._streamer:
+      self._streamer.Flush()
 
   def PublishSamples(self):
     """Publish samples via all registered publishers."""
+    if self._streamer:
+      self._streamer.Close()
+      self._streamer = None
     if not self.samples:
-      logging.warning('No samples to publish.')
+      if not self.streaming:
+        logging.warning('No samples to publish.')
       return
-    samples_for_console = []
-    for s in self.samples:
-      if not s.get(pkb_sample.DISABLE_CONSOLE_LOG, False):
-        samples_for_console.append(s)
+    self._PublishBatch(self.samples)
+    self.samples = SampleStore()
+
+  def _PublishBatch(self, samples):
+    """Publishes a sequence of sample dicts via all registered publishers."""
+    samples_for_console = samples
+    if any(s.get(pkb_sample.DISABLE_CONSOLE_LOG, False) for s in samples):
+      samples_for_console = [
+          s
+          for s in samples
+          if not s.get(pkb_sample.DISABLE_CONSOLE_LOG, False)
+      ]
+    self._PublishToAll(samples, samples_for_console)
+    if self.retain_published_samples:
+      with self._published_lock:
+        self.published_samples += samples
+
+  def _PublishToAll(self, samples, samples_for_console):
+    """Publishes samples to every publisher, in parallel if requested.
+
+    With --publish_batch_size, each publisher gets the samples in batches.
+    Samples a publisher fails to publish are written to --publish_journal_dir
+    before the failure is raised. With --publish_parallel, the failure of one
+    publisher doesn't stop the others and the first failure is raised once
+    they finished or --publish_timeout passed.
+
+    Args:
+      samples: Sequence of sample dicts.
+      samples_for_console: The samples for publishers that don't publish
+        console log data.
+
+    Raises:
+      Exception: Whatever a publisher raised.
+      TimeoutError: If a publisher did not finish by --publish_timeout.
+    """
+    cancelled = threading.Event()
+    failures = {}
+
+    def _Publish(publisher, publisher_samples):
+      try:
+        _PublishInBatches(
+            publisher,
+            publisher_samples,
+            BATCH_SIZE.value,
+            RETRIES.value,
+            RETRY_DELAY.value,
+            cancelled,
+        )
+      except Exception as e:  # pylint: disable=broad-except
+        failures[publisher] = e
+
+    threads = []
     for publisher in self.publishers:
-      publisher.PublishSamples(
-          self.samples
-          if publisher.PUBLISH_CONSOLE_LOG_DATA
-          else samples_for_console
+      publisher_samples = (
+          samples if publisher.PUBLISH_CONSOLE_LOG_DATA else samples_for_console
+      )
+      if not PARALLEL.value:
+        _PublishInBatches(
+            publisher,
+            publisher_samples,
+            BATCH_SIZE.value,
+            RETRIES.value,
+            RETRY_DELAY.value,
+        )
+        continue
+      # Daemon threads, so that a hung sink can't keep PKB from exiting.
+      thread = threading.Thread(
+          target=_Publish,
+          args=(publisher, publisher_samples),
+          name='Publish-{}'.format(type(publisher).__name__),
+          daemon=True,
+      )
+      thread.start()
+      threads.append((publisher, thread))
+
+    deadline = None if TIMEOUT.value is None else time.time() + TIMEOUT.value
+    timed_out = []
+    for publisher, thread in threads:
+      thread.join(None if deadline is None else max(0, deadline - time.time()))
+      if thread.is_alive():
+        timed_out.append(publisher)
+    if timed_out:
+      # Their current attempt may still succeed, so their samples are only
+      # spilled if it fails.
+      cancelled.set()
+    for publisher, _ in threads:
+      if publisher in failures:
+        raise failures[publisher]
+    if timed_out:
+      raise TimeoutError(
+          '{} did not finish publishing within {} seconds.'.format(
+              ', '.join(str(p) for p in timed_out), TIMEOUT.value
+          )
       )
-    self.published_samples += self.samples
-    self.samples = []
 
 
 def RepublishJSONSamples(path):
@@ -1231,7 +1886,15 @@ def RepublishJSONSamples(path):
     fields = sample.pop('labels')[1:-1].split('|,|')
     # Turn the fields into [[key, value], ...]
     key_values = [field.split(':', 1) for field in fields]
-    sample['metadata'] = {k: v for k, v in key_values}
+    # Array payloads stay encoded until something reads their values.
+    sample['metadata'] = {
+        k: (
+            pkb_sample.ArrayPayload(v)
+            if v.startswith(pkb_sample.ARRAY_PAYLOAD_PREFIX)
+            else v
+        )
+        for k, v in key_values
+    }
 
   # We can't use a SampleCollector because SampleCollector.AddSamples depends on
   # having a benchmark and a benchmark_spec.
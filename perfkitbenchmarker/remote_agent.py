@@ -0,0 +1,312 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Client of the agent that runs remote commands over one connection.
+
+Each remote command otherwise forks an ssh process and opens a channel, which
+dominates the cost of the many small commands some benchmarks run. With
+--remote_command_agent, Linux VMs push scripts/remote_command_agent.py and
+keep it running behind a single ssh process. Commands, file reads and writes
+and stat calls are then sent to it as requests that run concurrently, with the
+output of commands streamed back.
+
+When the agent can't be started or a request can't be sent to it,
+AgentError is raised and callers fall back to ssh. Once a request is sent it
+may have run, so it is never retried: a command whose connection breaks
+fails like an ssh command whose connection breaks.
+"""
+
+import base64
+import itertools
+import json
+import logging
+import subprocess
+import threading
+from typing import Any, Sequence, Tuple
+
+from absl import flags
+from perfkitbenchmarker import errors
+from perfkitbenchmarker import vm_util
+
+REMOTE_COMMAND_AGENT = flags.DEFINE_boolean(
+    'remote_command_agent',
+    False,
+    'Whether Linux VMs run remote commands through an agent that is kept '
+    'running behind a single ssh connection, instead of one ssh process per '
+    'command. Commands fall back to ssh if the agent is unavailable.',
+)
+
+AGENT_SCRIPT = 'remote_command_agent.py'
+
+# How long to wait for the agent to answer after it is launched.
+_START_TIMEOUT = 60
+# How long to wait for the reply of a command after its timeout.
+_REPLY_GRACE_PERIOD = 10
+# The return code of commands whose connection broke, as ssh returns it.
+_CONNECTION_FAILURE_RETCODE = 255
+
+
+class AgentError(errors.Error):
+  """Raised when a request could not be sent, so callers can use ssh."""
+
+
+class _Request:
+  """A request sent to the agent, and what it replied so far."""
+
+  def __init__(self):
+    self.output = {'stdout': [], 'stderr': []}
+    self.reply = None
+    self.done = threading.Event()
+
+
+class RemoteAgent:
+  """A connection to a running remote_command_agent.py.
+
+  Attributes:
+    name: Identifies the agent in logs, e.g. the name of its VM.
+  """
+
+  def __init__(self, launch_command: Sequence[str], name: str):
+    """Initializes the connection.
+
+    Args:
+      launch_command: Runs the agent with its stdin and stdout connected to
+        this process, e.g. 'ssh <vm> python3 remote_command_agent.py'.
+      name: Identifies the agent in logs.
+    """
+    self.name = name
+    self._launch_command = list(launch_command)
+    self._lock = threading.Lock()
+    self._requests = {}
+    self._ids = itertools.count(1)
+    self._closed = False
+    self._process = None
+    self._thread = None
+
+  def __getstate__(self):
+    # The connection belongs to this process, so an unpickled agent is closed
+    # and its VM starts a new one when it is next used.
+    return {'launch_command': self._launch_command, 'name': self.name}
+
+  def __setstate__(self, state):
+    self.__init__(state['launch_command'], state['name'])
+    self._closed = True
+
+  def Start(self):
+    """Launches the agent and waits for it to answer.
+
+    Raises:
+      AgentError: If the agent didn't answer.
+    """
+    logging.info('Starting remote command agent on %s.', self.name)
+    self._process = subprocess.Popen(
+        self._launch_command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    self._thread = threading.Thread(target=self._ReadReplies, daemon=True)
+    self._thread.start()
+    try:
+      self._Reply({'op': 'ping'}, _START_TIMEOUT)
+    except (
+        AgentError,
+        errors.VirtualMachine.RemoteCommandError,
+        errors.VmUtil.IssueCommandTimeoutError,
+    ) as e:
+      self.Close()
+      raise AgentError(f'The agent on {self.name} did not start: {e}') from e
+
+  def Close(self):
+    """Stops the agent. Requests that are still running fail."""
+    with self._lock:
+      self._closed = True
+    if self._process:
+      try:
+        self._process.stdin.close()
+      except OSError:
+        # The agent exited before reading what is left in the buffer.
+        pass
+      try:
+        self._process.wait(_REPLY_GRACE_PERIOD)
+      except subprocess.TimeoutExpired:
+        self._process.kill()
+        self._process.wait()
+    if self._thread:
+      self._thread.join()
+
+  @property
+  def closed(self) -> bool:
+    with self._lock:
+      return self._closed
+
+  def _ReadReplies(self):
+    """Hands the messages of the agent to their requests until it exits."""
+    for line in self._process.stdout:
+      try:
+        message = json.loads(line)
+        request_id = message['id']
+      except (ValueError, TypeError, KeyError):
+        # E.g. output of the login shell before the agent started.
+        logging.debug('Ignoring %r from the agent on %s.', line, self.name)
+        continue
+      with self._lock:
+        request = self._requests.get(request_id)
+        if request and message.get('done'):
+          del self._requests[request_id]
+      if not request:
+        continue
+      if message.get('done'):
+        request.reply = message
+        request.done.set()
+        continue
+      for stream, chunks in request.output.items():
+        if stream in message:
+          chunks.append(message[stream])
+    with self._lock:
+      self._closed = True
+      requests = list(self._requests.values())
+      self._requests.clear()
+    for request in requests:
+      request.done.set()
+
+  def _Call(self, message: dict[str, Any], timeout: float | None) -> _Request:
+    """Sends a request and waits for its reply.
+
+    Args:
+      message: The request, without its id.
+      timeout: How long to wait for the reply, or None to wait indefinitely.
+
+    Returns:
+      The request. Its reply is None if the connection broke first.
+
+    Raises:
+      AgentError: If the request could not be sent.
+      IssueCommandTimeoutError: If the reply didn't come in time.
+    """
+    request = _Request()
+    with self._lock:
+      if self._closed:
+        raise AgentError(f'The agent on {self.name} is closed.')
+      request_id = next(self._ids)
+      self._requests[request_id] = request
+      try:
+        self._process.stdin.write(
+            json.dumps(dict(message, id=request_id)).encode() + b'\n'
+        )
+        self._process.stdin.flush()
+      except OSError as e:
+        self._closed = True
+        del self._requests[request_id]
+        raise AgentError(
+            f'Failed to send a request to the agent on {self.name}: {e}'
+        ) from e
+    if not request.done.wait(timeout):
+      with self._lock:
+        self._requests.pop(request_id, None)
+      raise errors.VmUtil.IssueCommandTimeoutError(
+          f'The agent on {self.name} did not reply to {message} within '
+          f'{timeout}s.'
+      )
+    return request
+
+  def _Reply(
+      self, message: dict[str, Any], timeout: float | None = None
+  ) -> dict[str, Any]:
+    """Sends a request and returns its successful reply.
+
+    Raises:
+      AgentError: If the request could not be sent.
+      IssueCommandTimeoutError: If the reply didn't come in time.
+      RemoteCommandError: If the connection broke or the request failed.
+    """
+    request = self._Call(message, timeout)
+    if request.reply is None:
+      raise errors.VirtualMachine.RemoteCommandError(
+          f'The connection to the agent on {self.name} broke during '
+          f'{message["op"]} {message.get("path", "")}.'
+      )
+    if 'error' in request.reply:
+      raise errors.VirtualMachine.RemoteCommandError(
+          f'The agent on {self.name} failed to {message["op"]} '
+          f'{message.get("path", "")}: {request.reply["error"]}'
+      )
+    return request.reply
+
+  def Run(
+      self,
+      command: str,
+      timeout: float | None = None,
+      stack_level: int = 1,
+  ) -> Tuple[str, str, int]:
+    """Runs a command with bash, as ssh would.
+
+    Args:
+      command: A valid bash command.
+      timeout: The timeout of the command in seconds.
+      stack_level: Number of stack frames to skip & get an "interesting" caller,
+        for logging. 1 skips this function, 2 skips this & its caller, etc..
+
+    Returns:
+      A tuple of stdout, stderr, return_code from running the command. If the
+      connection broke while the command ran, the return code is 255, as
+      with ssh.
+
+    Raises:
+      AgentError: If the command could not be sent, so it didn't run.
+      IssueCommandTimeoutError: If the command timed out.
+      RemoteCommandError: If the agent failed to start the command.
+    """
+    message = {'op': 'run', 'command': command, 'timeout': timeout}
+    request = self._Call(
+        message, None if timeout is None else timeout + _REPLY_GRACE_PERIOD
+    )
+    reply = request.reply
+    stderr = ''.join(request.output['stderr'])
+    if reply is None:
+      reply = {'retcode': _CONNECTION_FAILURE_RETCODE, 'timed_out': False}
+      stderr += f'The connection to the agent on {self.name} broke.\n'
+    elif 'error' in reply:
+      raise errors.VirtualMachine.RemoteCommandError(
+          f'The agent on {self.name} failed to run {command}: {reply["error"]}'
+      )
+    # pylint: disable-next=protected-access
+    return vm_util._CheckIssueCommandResult(
+        f'{command} (agent on {self.name})',
+        ''.join(request.output['stdout']),
+        stderr,
+        reply['retcode'],
+        did_timeout=reply['timed_out'],
+        was_killed=reply['timed_out'],
+        timeout=timeout,
+        raise_on_failure=False,
+        stack_level=stack_level + 1,
+    )
+
+  def ReadFile(self, path: str) -> bytes:
+    """Returns the contents of a remote file."""
+    reply = self._Reply({'op': 'read', 'path': path})
+    return base64.b64decode(reply['data'])
+
+  def WriteFile(self, path: str, contents: bytes, mode: int | None = None):
+    """Writes a remote file, optionally setting its permission bits."""
+    self._Reply({
+        'op': 'write',
+        'path': path,
+        'data': base64.b64encode(contents).decode('ascii'),
+        'mode': mode,
+    })
+
+  def Stat(self, path: str) -> dict[str, float] | None:
+    """Returns the mode, size and mtime of a remote path, or None if missing."""
+    return self._Reply({'op': 'stat', 'path': path})['stat']
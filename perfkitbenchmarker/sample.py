@@ -13,12 +13,16 @@
 # limitations under the License.
 """A performance sample class."""
 
+import base64
 import calendar
 import collections
 import datetime
+import functools
 import math
+import numbers
 import time
 from typing import Any, Dict, List, NewType
+import zlib
 
 import numpy as np
 from perfkitbenchmarker import errors
@@ -54,6 +58,10 @@ TIME_SERIES_METADATA = [
 def PercentileCalculator(numbers, percentiles=PERCENTILES_LIST):
   """Computes percentiles, stddev and mean on a set of numbers.
 
+  The numbers are viewed as a NumPy array, so lists, arrays and objects
+  supporting the buffer protocol (e.g. array.array or memoryview) are all
+  accepted; arrays and buffers are not copied before the partition step.
+
   Args:
     numbers: A sequence of numbers to compute percentiles for.
     percentiles: If given, a list of percentiles to compute. Can be floats, ints
@@ -71,31 +79,214 @@ def PercentileCalculator(numbers, percentiles=PERCENTILES_LIST):
   if not len(numbers):
     raise ValueError("Can't compute percentiles of empty list.")
 
-  numbers_sorted = sorted(numbers)
-  count = len(numbers_sorted)
-  total = sum(numbers_sorted)
-  result = {}
+  values = np.asarray(numbers)
+  count = values.size
+  indices = []
   for percentile in percentiles:
     float(percentile)  # verify type
     if percentile < 0.0 or percentile > 100.0:
       raise ValueError('Invalid percentile %s' % percentile)
-
-    percentile_string = 'p%s' % str(percentile)
     index = int(count * float(percentile) / 100.0)
-    index = min(index, count - 1)  # Correction to handle 100th percentile.
-    result[percentile_string] = numbers_sorted[index]
+    indices.append(min(index, count - 1))  # Handle the 100th percentile.
 
-  average = total / float(count)
+  # A single partition places every requested rank at its sorted position.
+  partitioned = np.partition(values, sorted(set(indices)))
+  result = {}
+  for percentile, index in zip(percentiles, indices):
+    value = partitioned[index]
+    # Report plain Python numbers so results stay JSON serializable.
+    if isinstance(value, np.generic):
+      value = value.item()
+    result['p%s' % str(percentile)] = value
+
+  average = values.mean(dtype=np.float64).item()
   result['average'] = average
   if count > 1:
-    total_of_squares = sum([(i - average) ** 2 for i in numbers])
-    result['stddev'] = (total_of_squares / (count - 1)) ** 0.5
+    result['stddev'] = values.std(ddof=1, dtype=np.float64).item()
   else:
     result['stddev'] = 0
 
   return result
 
 
+class QuantileSketch:
+  """A mergeable, fixed-memory approximation of a distribution of values.
+
+  Values are counted in logarithmically sized buckets so that every reported
+  percentile is within relative_accuracy of a value that was actually added
+  (the DDSketch scheme). Sketches built with the same relative_accuracy can be
+  merged by adding bucket counts, so latencies recorded by several clients or
+  processes can be combined without keeping the raw values around.
+
+  Only non-negative values are supported, which covers latencies and sizes.
+
+  Attributes:
+    relative_accuracy: Maximum relative error of reported percentiles.
+    count: Number of values added.
+    total: Sum of all values added.
+    min: Smallest value added.
+    max: Largest value added.
+  """
+
+  def __init__(self, relative_accuracy: float = 0.01):
+    if not 0 < relative_accuracy < 1:
+      raise ValueError(
+          'relative_accuracy must be in (0, 1), got %s' % relative_accuracy
+      )
+    self.relative_accuracy = relative_accuracy
+    self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    self._log_gamma = math.log(self._gamma)
+    self._buckets: Dict[int, int] = collections.defaultdict(int)
+    self._zero_count = 0
+    # Mean and sum of squared differences from the mean of the values added.
+    self._mean = 0.0
+    self._m2 = 0.0
+    self.count = 0
+    self.total = 0.0
+    self.min = math.inf
+    self.max = -math.inf
+
+  def __len__(self):
+    return self.count
+
+  def Add(self, value: float, count: int = 1):
+    """Adds a value to the sketch count times."""
+    self.AddMany(np.full(count, value, dtype=np.float64))
+
+  def AddMany(self, values):
+    """Adds every value of a sequence, array or buffer to the sketch."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if not values.size:
+      return
+    if values.min() < 0:
+      raise ValueError('QuantileSketch only supports non-negative values.')
+    positive = values[values > 0]
+    self._zero_count += values.size - positive.size
+    if positive.size:
+      keys, counts = np.unique(
+          np.ceil(np.log(positive) / self._log_gamma).astype(np.int64),
+          return_counts=True,
+      )
+      for key, key_count in zip(keys.tolist(), counts.tolist()):
+        self._buckets[key] += key_count
+    mean = values.mean().item()
+    self._AddMoments(values.size, mean, np.square(values - mean).sum().item())
+    self.total += values.sum().item()
+    self.min = min(self.min, values.min().item())
+    self.max = max(self.max, values.max().item())
+
+  def Merge(self, other: 'QuantileSketch'):
+    """Adds all values recorded by another sketch to this one."""
+    if other.relative_accuracy != self.relative_accuracy:
+      raise ValueError(
+          'Cannot merge sketches with different relative accuracies: %s, %s'
+          % (self.relative_accuracy, other.relative_accuracy)
+      )
+    for key, key_count in other._buckets.items():  # pylint: disable=protected-access
+      self._buckets[key] += key_count
+    self._zero_count += other._zero_count  # pylint: disable=protected-access
+    self._AddMoments(other.count, other._mean, other._m2)  # pylint: disable=protected-access
+    self.total += other.total
+    self.min = min(self.min, other.min)
+    self.max = max(self.max, other.max)
+
+  def _AddMoments(self, count: int, mean: float, m2: float):
+    """Adds the count, mean and m2 of other values to those of the sketch.
+
+    This is the parallel variant of Welford's algorithm by Chan et al., which
+    is Welford's update when count is 1. Unlike subtracting the squared mean
+    from the mean of squares, it doesn't lose precision when the values are
+    large relative to their spread.
+    """
+    if not count:
+      return
+    total_count = self.count + count
+    delta = mean - self._mean
+    self._mean += delta * count / total_count
+    self._m2 += m2 + delta**2 * self.count * count / total_count
+    self.count = total_count
+
+  def Percentile(self, percentile: float) -> float:
+    """Returns the approximate value at a percentile in [0, 100].
+
+    Ranks are chosen the same way as PercentileCalculator.
+    """
+    return self.Percentiles([percentile])['p%s' % str(percentile)]
+
+  def Percentiles(self, percentiles=PERCENTILES_LIST) -> Dict[str, float]:
+    """Computes the same statistics as PercentileCalculator.
+
+    Args:
+      percentiles: A list of percentiles to compute.
+
+    Returns:
+      A dictionary of percentiles plus 'average' and 'stddev'.
+
+    Raises:
+      ValueError, if the sketch is empty or if a percentile is outside of
+      [0, 100].
+    """
+    if not self.count:
+      raise ValueError("Can't compute percentiles of empty sketch.")
+    keys = sorted(self._buckets)
+    cumulative = np.cumsum([self._buckets[key] for key in keys], dtype=np.int64)
+    result = {}
+    for percentile in percentiles:
+      float(percentile)  # verify type
+      if percentile < 0.0 or percentile > 100.0:
+        raise ValueError('Invalid percentile %s' % percentile)
+      index = min(int(self.count * float(percentile) / 100.0), self.count - 1)
+      if index == 0:
+        value = self.min
+      elif index == self.count - 1:
+        value = self.max
+      elif index < self._zero_count:
+        value = 0.0
+      else:
+        position = np.searchsorted(
+            cumulative, index - self._zero_count, side='right'
+        )
+        # The midpoint (in relative terms) of the bucket's value range.
+        value = 2 * self._gamma ** keys[position] / (self._gamma + 1)
+      result['p%s' % str(percentile)] = min(max(value, self.min), self.max)
+
+    result['average'] = self._mean
+    if self.count > 1:
+      result['stddev'] = (self._m2 / (self.count - 1)) ** 0.5
+    else:
+      result['stddev'] = 0
+    return result
+
+  def ToDict(self) -> Dict[str, Any]:
+    """Returns a JSON serializable representation of the sketch."""
+    return {
+        'relative_accuracy': self.relative_accuracy,
+        'buckets': {str(key): value for key, value in self._buckets.items()},
+        'zero_count': self._zero_count,
+        'count': self.count,
+        'total': self.total,
+        'mean': self._mean,
+        'm2': self._m2,
+        'min': self.min,
+        'max': self.max,
+    }
+
+  @classmethod
+  def FromDict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+    """Rebuilds a sketch from the output of ToDict."""
+    sketch = cls(data['relative_accuracy'])
+    for key, value in data['buckets'].items():
+      sketch._buckets[int(key)] = value  # pylint: disable=protected-access
+    sketch._zero_count = data['zero_count']  # pylint: disable=protected-access
+    sketch._mean = data['mean']  # pylint: disable=protected-access
+    sketch._m2 = data['m2']  # pylint: disable=protected-access
+    sketch.count = data['count']
+    sketch.total = data['total']
+    sketch.min = data['min']
+    sketch.max = data['max']
+    return sketch
+
+
 def GeoMean(iterable):
   """Calculate the geometric mean of a collection of numbers.
 
@@ -289,6 +480,91 @@ def CreateTimeSeriesSample(
   return Sample(metric, 0, units, metadata)
 
 
+ARRAY_PAYLOAD_PREFIX = 'pkb_array:'
+
+
+class ArrayPayload(str):
+  """A numeric array in sample metadata, encoded as a compact string.
+
+  The string is ARRAY_PAYLOAD_PREFIX followed by the numpy dtype, the number of
+  values and the base64 of the zlib compressed values, stored byte-shuffled so
+  that similar values compress well. Being a string, it is published like any
+  other label value and is only decoded when values is read.
+  """
+
+  def __new__(cls, encoded: str):
+    if not encoded.startswith(ARRAY_PAYLOAD_PREFIX):
+      raise ValueError('Not an array payload: %.40s' % encoded)
+    return super().__new__(cls, encoded)
+
+  def __repr__(self):
+    dtype, size, _ = self[len(ARRAY_PAYLOAD_PREFIX) :].split(':', 2)
+    return '<{} dtype={} size={}>'.format(type(self).__name__, dtype, size)
+
+  @classmethod
+  def FromValues(cls, values) -> 'ArrayPayload':
+    """Encodes a sequence of numbers."""
+    arr = np.asarray(values)
+    if arr.ndim != 1 or arr.dtype.kind not in 'iuf':
+      raise ValueError('Array payloads hold one dimensional numeric arrays.')
+    arr = arr.astype(arr.dtype.newbyteorder('<'), copy=False)
+    shuffled = arr.view(np.uint8).reshape(-1, arr.itemsize).T.tobytes()
+    return cls(
+        '%s%s:%d:%s'
+        % (
+            ARRAY_PAYLOAD_PREFIX,
+            arr.dtype.str,
+            arr.size,
+            base64.b64encode(zlib.compress(shuffled)).decode('ascii'),
+        )
+    )
+
+  @functools.cached_property
+  def values(self) -> np.ndarray:
+    """Returns the decoded values."""
+    dtype, size, blob = self[len(ARRAY_PAYLOAD_PREFIX) :].split(':', 2)
+    dtype = np.dtype(dtype)
+    shuffled = np.frombuffer(zlib.decompress(base64.b64decode(blob)), np.uint8)
+    return (
+        shuffled.reshape(dtype.itemsize, int(size))
+        .T.copy()
+        .view(dtype)
+        .reshape(-1)
+    )
+
+
+def EncodeArrays(metadata: Dict[str, Any], min_length: int) -> Dict[str, Any]:
+  """Returns metadata with long numeric sequences replaced by ArrayPayloads.
+
+  Args:
+    metadata: Sample metadata. It is not modified.
+    min_length: The shortest list, tuple or array to encode.
+  """
+  encoded = None
+  for key, value in metadata.items():
+    if isinstance(value, np.ndarray) and value.ndim != 1:
+      continue
+    if (
+        isinstance(value, (list, tuple, np.ndarray))
+        and len(value) >= min_length
+        and all(
+            isinstance(v, numbers.Real) and not isinstance(v, bool)
+            for v in value
+        )
+    ):
+      if encoded is None:
+        encoded = dict(metadata)
+      encoded[key] = ArrayPayload.FromValues(value)
+  return metadata if encoded is None else encoded
+
+
+def DecodeArray(value) -> np.ndarray:
+  """Returns the values of a metadata array, whether encoded or not."""
+  if isinstance(value, str):
+    return ArrayPayload(value).values
+  return np.asarray(value)
+
+
 def ConvertDateTimeToUnixMs(date: datetime.datetime):
   # calendar.timegm assumes the time is from UTC.
   # Convert the datetime to UTC timezone first.
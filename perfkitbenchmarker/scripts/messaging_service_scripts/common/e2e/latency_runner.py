@@ -1,6 +1,7 @@
 """Runners for end-to-end latency benchmark scenario."""
 
 import asyncio
+import contextlib
 import json
 import logging
 import multiprocessing as mp
@@ -10,6 +11,7 @@ import sys
 import traceback
 from typing import Any, Dict, Optional, Set
 
+from absl import flags
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import client
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import errors
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import log_utils
@@ -18,6 +20,28 @@ from perfkitbenchmarker.scripts.messaging_service_scripts.common.e2e import main
 from perfkitbenchmarker.scripts.messaging_service_scripts.common.e2e import protocol
 
 RECEIVER_PULL_TIME_MARGIN = 0.5  # seconds
+MAX_PUBLISH_BATCH_SIZE = 100
+
+_WINDOW_SIZE = flags.DEFINE_integer(
+    'e2e_window_size',
+    1,
+    lower_bound=1,
+    help=(
+        'Maximum number of messages in flight (published but not received '
+        'yet) on end-to-end latency benchmarks. If set to 1 (the default), '
+        'each message is received before the next one is published.'
+    ),
+)
+_TARGET_PUBLISH_RATE = flags.DEFINE_float(
+    'e2e_target_publish_rate',
+    0,
+    lower_bound=0,
+    help=(
+        'Target publish rate in messages per second for end-to-end latency '
+        'benchmarks with e2e_window_size greater than 1. If set to 0 (the '
+        'default), messages are published as fast as the window allows.'
+    ),
+)
 
 
 # setting dummy root logger, before flags are parsed
@@ -140,8 +164,17 @@ class EndToEndLatencyRunner(runners.BaseRunner):
           ...
         }
     """
+    if _WINDOW_SIZE.value > 1:
+      return asyncio.run(self._async_run_windowed_phase(number_of_messages))
     return asyncio.run(self._async_run_phase(number_of_messages))
 
+  def _setup_phase(self, number_of_messages: int) -> None:
+    self._publisher = main_process.PublisherWorker(self.PUBLISHER_PINNED_CPUS)
+    self._receiver = self.RECEIVER_WORKER(self.RECEIVER_PINNED_CPUS)
+    self._published_timestamps = [None] * number_of_messages
+    self._receive_timestamps = [None] * number_of_messages
+    self._ack_timestamps = [None] * number_of_messages
+
   async def _wait_until_received(self, seq: int) -> protocol.ReceptionReport:
     while True:
       report = await self._receiver.receive()
@@ -160,11 +193,7 @@ class EndToEndLatencyRunner(runners.BaseRunner):
     Returns:
       A dict of metrics.
     """
-    self._publisher = main_process.PublisherWorker(self.PUBLISHER_PINNED_CPUS)
-    self._receiver = self.RECEIVER_WORKER(self.RECEIVER_PINNED_CPUS)
-    self._published_timestamps = [None] * number_of_messages
-    self._receive_timestamps = [None] * number_of_messages
-    self._ack_timestamps = [None] * number_of_messages
+    self._setup_phase(number_of_messages)
     try:
       await asyncio.gather(self._publisher.start(), self._receiver.start())
       for i in range(number_of_messages):
@@ -190,6 +219,106 @@ class EndToEndLatencyRunner(runners.BaseRunner):
     print(json.dumps(metrics))
     return metrics
 
+  async def _async_run_windowed_phase(
+      self, number_of_messages: int
+  ) -> Dict[str, Any]:
+    """Coroutine implementing run phase logic with many messages in flight.
+
+    The receiver pulls continuously while the publisher is fed batches of
+    messages, so that up to e2e_window_size messages are published but not
+    received yet. Publishes are paced to e2e_target_publish_rate, if set.
+    Timestamps are still taken by the workers for each message, so latencies
+    are measured as in _async_run_phase, but under load.
+
+    Not re-entrant!
+
+    Args:
+      number_of_messages: Number of messages.
+
+    Returns:
+      A dict of metrics.
+    """
+    self._setup_phase(number_of_messages)
+    window = asyncio.Semaphore(_WINDOW_SIZE.value)
+    settled_seqs = set()
+    rate = _TARGET_PUBLISH_RATE.value
+    interval = 1 / rate if rate else 0.0
+    sent_batches = asyncio.Queue()
+    tasks = []
+
+    def settle(seq: int) -> None:
+      # A message leaves the window once received or once it failed to publish.
+      if seq not in settled_seqs:
+        settled_seqs.add(seq)
+        window.release()
+
+    async def publish_all() -> None:
+      seq = 0
+      while seq < number_of_messages:
+        await window.acquire()
+        batch_end = seq + 1
+        while (
+            batch_end < number_of_messages
+            and batch_end - seq < MAX_PUBLISH_BATCH_SIZE
+            and not window.locked()
+        ):
+          await window.acquire()
+          batch_end += 1
+        self._publisher.start_publish_batch(range(seq, batch_end), interval)
+        sent_batches.put_nowait(batch_end - seq)
+        seq = batch_end
+
+    async def collect_publish_acks() -> None:
+      while True:
+        batch_size = await sent_batches.get()
+        if batch_size is None:
+          return
+        ack_batch = await self._publisher.await_publish_batch(
+            main_process.BaseWorker.DEFAULT_TIMEOUT + batch_size * interval
+        )
+        for ack in ack_batch.acks:
+          if ack.publish_error is None:
+            self._record_message_published(ack)
+          else:
+            settle(ack.seq)
+
+    async def collect_reception_reports() -> None:
+      while True:
+        report_batch = await self._receiver.receive_batch()
+        for report in report_batch.reports:
+          self._record_message_reception(report)
+          settle(report.seq)
+        if report_batch.done:
+          return
+
+    try:
+      await asyncio.gather(self._publisher.start(), self._receiver.start())
+      await self._receiver.start_stream_consumption(number_of_messages)
+      # Give time for the receiver to actually start pulling.
+      await asyncio.sleep(RECEIVER_PULL_TIME_MARGIN)
+      publish_task = asyncio.create_task(publish_all())
+      ack_task = asyncio.create_task(collect_publish_acks())
+      tasks = [publish_task, ack_task]
+      try:
+        await collect_reception_reports()
+      finally:
+        # The receiver is done, anything not received by now was lost.
+        publish_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+          await publish_task
+        sent_batches.put_nowait(None)
+      await ack_task
+    except Exception:  # pylint: disable=broad-except
+      traceback.print_exc()
+    finally:
+      for task in tasks:
+        task.cancel()
+      await asyncio.gather(self._publisher.stop(), self._receiver.stop())
+
+    metrics = self._compute_metrics(number_of_messages)
+    print(json.dumps(metrics))
+    return metrics
+
 
 class StreamingPullEndToEndLatencyRunner(EndToEndLatencyRunner):
   """Runner for end-to-end latency measurement using StreamingPull."""
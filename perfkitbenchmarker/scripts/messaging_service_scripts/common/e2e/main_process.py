@@ -7,7 +7,7 @@ to measure end-to-end latency accurately.
 import asyncio
 import multiprocessing as mp
 import time
-from typing import Any, Callable, Optional, Set, Type
+from typing import Any, Callable, Optional, Sequence, Set, Type
 
 from absl import flags
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import app
@@ -107,6 +107,8 @@ class PublisherWorker(BaseWorker):
     - stop() to shutdown the subprocess
 
   You must await for the result of each async call before sending a new one.
+  The exception are batches: many start_publish_batch() calls may be
+  outstanding, and await_publish_batch() gets their results in order.
   Not thread-safe.
   """
 
@@ -134,6 +136,35 @@ class PublisherWorker(BaseWorker):
       )
     return response
 
+  def start_publish_batch(self, seqs: Sequence[int], interval: float = 0.0):
+    """Commands the worker to send a batch of messages without waiting.
+
+    Args:
+      seqs: Sequence numbers. Each must be an unsigned 32-bit integer.
+      interval: Time in seconds between consecutive publishes.
+    """
+    self.subprocess_in_writer.send(
+        protocol.PublishBatch(seqs=list(seqs), interval=interval)
+    )
+
+  async def await_publish_batch(
+      self, timeout: Optional[float] = None
+  ) -> protocol.AckPublishBatch:
+    """Awaits the results of the oldest outstanding batch.
+
+    Failed publishes are reported through the publish_error attribute of their
+    AckPublish rather than raised, so that the rest of the batch is kept.
+
+    Args:
+      timeout: Timeout in seconds. Defaults to BaseWorker.DEFAULT_TIMEOUT.
+
+    Returns:
+      An AckPublishBatch with one AckPublish per message, in order.
+    """
+    return await self._read_subprocess_output(
+        protocol.AckPublishBatch, timeout
+    )
+
 
 class ReceiverWorker(BaseWorker):
   """Represents a Receiver worker subprocess to measure end-to-end latency.
@@ -148,6 +179,10 @@ class ReceiverWorker(BaseWorker):
     - receive() up to once per start_consumption() call
     - stop() to shutdown the subprocess
 
+  Alternatively, start_stream_consumption() commands it to receive a whole
+  phase worth of messages, whose reports are read with receive_batch() until
+  one comes with done set.
+
   You must await for the result of each async call before sending a new one.
   Not thread safe.
   """
@@ -192,6 +227,39 @@ class ReceiverWorker(BaseWorker):
       raise errors.EndToEnd.ReceiverFailedOperationError(report.receive_error)
     return report
 
+  async def start_stream_consumption(
+      self, number_of_messages: int, timeout: Optional[float] = None
+  ):
+    """Commands the worker to pull messages continuously.
+
+    Then waits for the worker's ACK. The same caveats as in start_consumption
+    apply.
+
+    Args:
+      number_of_messages: The worker expects sequence numbers in
+        [0, number_of_messages).
+      timeout: Timeout in seconds. Defaults to BaseWorker.DEFAULT_TIMEOUT.
+    """
+    self.subprocess_in_writer.send(
+        protocol.ConsumeStream(number_of_messages=number_of_messages)
+    )
+    await self._read_subprocess_output(protocol.AckConsume, timeout)
+
+  async def receive_batch(
+      self, timeout: Optional[float] = None
+  ) -> protocol.ReceptionReportBatch:
+    """Awaits the next batch of reception reports of a stream consumption.
+
+    Args:
+      timeout: Timeout in seconds. Defaults to BaseWorker.DEFAULT_TIMEOUT.
+
+    Returns:
+      A ReceptionReportBatch.
+    """
+    return await self._read_subprocess_output(
+        protocol.ReceptionReportBatch, timeout
+    )
+
   async def purge_messages(self, timeout: Optional[float] = None):
     if timeout is None:
       timeout = self.PURGE_TIMEOUT
@@ -1,7 +1,7 @@
 """Classes for communication between subprocesses in end-to-end benchmarks."""
 
 import dataclasses
-from typing import Optional
+from typing import List, Optional
 
 
 @dataclasses.dataclass
@@ -27,6 +27,25 @@ class AckPublish:
   publish_error: Optional[str] = None
 
 
+@dataclasses.dataclass
+class PublishBatch:
+  """Message to signal a paced Publish command for many messages to subprocess.
+
+  Consecutive messages are published interval seconds apart. The schedule
+  carries over across batches, so a stream of batches keeps a steady rate.
+  """
+
+  seqs: List[int]
+  interval: float = 0.0
+
+
+@dataclasses.dataclass
+class AckPublishBatch:
+  """Message acknowledging PublishBatch with one AckPublish per message."""
+
+  acks: List[AckPublish]
+
+
 # TODO(odiego): Rename to Receive
 @dataclasses.dataclass
 class Consume:
@@ -53,6 +72,29 @@ class ReceptionReport:
   receive_error: Optional[str] = None
 
 
+@dataclasses.dataclass
+class ConsumeStream:
+  """Message to signal a windowed Consume command to subprocess.
+
+  The receiver keeps pulling until it has received the sequence numbers
+  [0, number_of_messages) or no message arrives for a whole pull timeout,
+  streaming its results back in ReceptionReportBatch messages.
+  """
+
+  number_of_messages: int
+
+
+@dataclasses.dataclass
+class ReceptionReportBatch:
+  """Message reporting many ConsumeStream results to main process.
+
+  done is set on the last batch sent for a ConsumeStream command.
+  """
+
+  reports: List[ReceptionReport]
+  done: bool = False
+
+
 @dataclasses.dataclass
 class Purge:
   """Message to signal a Purge command from the main process."""
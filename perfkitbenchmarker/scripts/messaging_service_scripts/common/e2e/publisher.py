@@ -5,7 +5,7 @@ import logging
 from multiprocessing import connection
 import os
 import time
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Optional, Tuple
 
 from absl import flags
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import log_utils
@@ -58,33 +58,63 @@ def main(
   times_iterable = (
       itertools.repeat(0) if iterations is None else range(iterations)
   )
+  next_publish_time = None
   for _ in times_iterable:
     logger.debug('Awaiting for Publish request from main...')
-    publish_obj = communicator.await_from_main(protocol.Publish)
-    message_payload = client.generate_message(
-        publish_obj.seq, FLAGS.message_size
+    publish_obj = communicator.await_from_main(
+        (protocol.Publish, protocol.PublishBatch)
     )
-    publish_timestamp = time.time_ns()
-    try:
-      logger.debug(
-          'Publishing message (seq=%d)...', publish_obj.seq, exc_info=True
+    if isinstance(publish_obj, protocol.PublishBatch):
+      ack_batch, next_publish_time = _publish_batch(
+          client, publish_obj, next_publish_time
       )
-      client.publish_message(message_payload)
-    except Exception as e:  # pylint: disable=broad-except
-      logger.debug(
-          'Got an error while publishing message (seq=%d).',
-          publish_obj.seq,
-          exc_info=True,
-      )
-      communicator.send(protocol.AckPublish(publish_error=repr(e)))
+      communicator.send(ack_batch)
     else:
-      logger.debug(
-          'Message (seq=%d) published successfully.',
-          publish_obj.seq,
-          exc_info=True,
-      )
-      communicator.send(
-          protocol.AckPublish(
-              seq=publish_obj.seq, publish_timestamp=publish_timestamp
-          )
-      )
+      communicator.send(_publish(client, publish_obj.seq))
+
+
+def _publish(client: Any, seq: int) -> protocol.AckPublish:
+  """Publishes a single message and reports the result."""
+  message_payload = client.generate_message(seq, FLAGS.message_size)
+  publish_timestamp = time.time_ns()
+  try:
+    logger.debug('Publishing message (seq=%d)...', seq, exc_info=True)
+    client.publish_message(message_payload)
+  except Exception as e:  # pylint: disable=broad-except
+    logger.debug(
+        'Got an error while publishing message (seq=%d).', seq, exc_info=True
+    )
+    return protocol.AckPublish(seq=seq, publish_error=repr(e))
+  logger.debug('Message (seq=%d) published successfully.', seq, exc_info=True)
+  return protocol.AckPublish(seq=seq, publish_timestamp=publish_timestamp)
+
+
+def _publish_batch(
+    client: Any,
+    publish_batch: protocol.PublishBatch,
+    next_publish_time: Optional[float],
+) -> Tuple[protocol.AckPublishBatch, float]:
+  """Publishes a batch of messages, spacing them publish_batch.interval apart.
+
+  Args:
+    client: The messaging service client.
+    publish_batch: The PublishBatch command.
+    next_publish_time: time.monotonic() value at which the next message is
+      scheduled, as returned by the previous call (or None). Schedules in the
+      past are moved to now, so an idle publisher doesn't burst to catch up.
+
+  Returns:
+    A tuple of the AckPublishBatch to send back and the time at which the
+    message following this batch is scheduled.
+  """
+  now = time.monotonic()
+  if next_publish_time is None or next_publish_time < now:
+    next_publish_time = now
+  acks = []
+  for seq in publish_batch.seqs:
+    delay = next_publish_time - time.monotonic()
+    if delay > 0:
+      time.sleep(delay)
+    acks.append(_publish(client, seq))
+    next_publish_time += publish_batch.interval
+  return protocol.AckPublishBatch(acks=acks), next_publish_time
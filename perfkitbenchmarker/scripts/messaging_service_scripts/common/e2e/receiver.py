@@ -20,6 +20,11 @@ FLAGS = flags.FLAGS
 # setting dummy root logger, before serialized_flags are parsed
 logger = logging.getLogger('')
 
+# Reception reports for a ConsumeStream command are sent to the main process
+# once this many are buffered, or after REPORT_FLUSH_INTERVAL seconds.
+REPORT_BATCH_SIZE = 100
+REPORT_FLUSH_INTERVAL = 0.05  # seconds
+
 
 class ReceiverRunner:
   """Controls the flow of the receiver process.
@@ -90,17 +95,22 @@ class ReceiverRunner:
   def process_state(self) -> None:
     self.state = self.state.process_state()
 
-  def await_message_received(self) -> Optional[protocol.ReceptionReport]:
+  def await_message_received(
+      self, timeout: float = common_client.TIMEOUT
+  ) -> Optional[protocol.ReceptionReport]:
     """Awaits a message from the messaging service and gets a reception report.
 
     The default implementation calls self.client.pull_message, and then
     self.process_message to get the reception report, but this may be
     overriden.
 
+    Args:
+      timeout: Maximum time to wait for a message, in seconds.
+
     Returns:
       A ReceptionReport object.
     """
-    message = self.client.pull_message(common_client.TIMEOUT)
+    message = self.client.pull_message(timeout)
     return self.process_message(message) if message is not None else None
 
   def process_message(self, message: Any) -> protocol.ReceptionReport:
@@ -197,15 +207,20 @@ class ReadyState(ReceiverState):
 
   Possible next states:
   - PullingState
+  - WindowedPullingState
   """
 
   # TODO(odiego): Rename consume to receive
   def process_state(self) -> ReceiverState:
     logger.debug('Awaiting for consume request from main...')
     consume_cmd = self.receiver_runner.communicator.await_from_main(
-        protocol.Consume, protocol.AckConsume()
+        (protocol.Consume, protocol.ConsumeStream), protocol.AckConsume()
     )
     deadline = time.time() + common_client.TIMEOUT
+    if isinstance(consume_cmd, protocol.ConsumeStream):
+      return self.get_next_state(
+          WindowedPullingState, consume_cmd=consume_cmd, deadline=deadline
+      )
     return self.get_next_state(
         PullingState, consume_cmd=consume_cmd, deadline=deadline
     )
@@ -259,6 +274,86 @@ class PullingState(ReceiverState):
       )
 
 
+class WindowedPullingState(ReceiverState):
+  """The state where we pull messages for a ConsumeStream command.
+
+  Reception reports are buffered and sent to the main process in
+  ReceptionReportBatch messages. While reports are buffered, pulls are bounded
+  by the flush interval so the main process' window doesn't stall on them.
+
+  Possible next states:
+  - WindowedPullingState while there are more messages to pull.
+  - ReadyState once all messages were received, or no new message arrived
+    before the deadline.
+  """
+
+  # TODO(odiego): Rename consume to receive
+  def __init__(
+      self,
+      receiver_runner: ReceiverRunner,
+      consume_cmd: protocol.ConsumeStream,
+      deadline: float,
+  ):
+    super().__init__(receiver_runner)
+    self.consume_cmd = consume_cmd
+    self.deadline = deadline
+    self.received_seqs = set()
+    self.pending_reports = []
+    self.last_flush = time.monotonic()
+
+  def process_state(self) -> ReceiverState:
+    timeout = common_client.TIMEOUT
+    if self.pending_reports:
+      timeout = max(
+          self.last_flush + REPORT_FLUSH_INTERVAL - time.monotonic(), 0
+      )
+    try:
+      reception_report = self.receiver_runner.await_message_received(timeout)
+    except Exception:  # pylint: disable=broad-except
+      logger.debug('Got an error while pulling a message.', exc_info=True)
+      reception_report = None
+    if reception_report is not None and self._is_expected(reception_report):
+      logger.debug('Received message (seq=%d)', reception_report.seq)
+      self.received_seqs.add(reception_report.seq)
+      self.receiver_runner.register_reception_report(reception_report)
+      self.pending_reports.append(reception_report)
+      self.deadline = time.time() + common_client.TIMEOUT
+    done = (
+        len(self.received_seqs) >= self.consume_cmd.number_of_messages
+        or time.time() > self.deadline
+    )
+    if (
+        done
+        or len(self.pending_reports) >= REPORT_BATCH_SIZE
+        or self.pending_reports
+        and time.monotonic() - self.last_flush >= REPORT_FLUSH_INTERVAL
+    ):
+      self.receiver_runner.send_reception_report(
+          protocol.ReceptionReportBatch(
+              reports=self.pending_reports, done=done
+          )
+      )
+      self.pending_reports = []
+      self.last_flush = time.monotonic()
+    if done:
+      logger.debug(
+          'Consume stream finished with %d/%d messages received.',
+          len(self.received_seqs),
+          self.consume_cmd.number_of_messages,
+      )
+      self.receiver_runner.iteration_count += 1
+      return self.get_next_state(ReadyState)
+    return self
+
+  def _is_expected(self, reception_report: protocol.ReceptionReport) -> bool:
+    """Filters out duplicate deliveries and stray messages."""
+    seq = reception_report.seq
+    return (
+        0 <= seq < self.consume_cmd.number_of_messages
+        and seq not in self.received_seqs
+    )
+
+
 class PullSuccessState(ReceiverState):
   """State reached after a successful message pull.
 
@@ -30,8 +30,10 @@ class StreamingPullReceiverRunner(receiver.ReceiverRunner):
     receiver.logger.debug('Starting streaming pull...')
     self.client.start_streaming_pull(self.on_message_received)
 
-  def await_message_received(self) -> Optional[protocol.ReceptionReport]:
+  def await_message_received(
+      self, timeout: float = common_client.TIMEOUT
+  ) -> Optional[protocol.ReceptionReport]:
     try:
-      return self.messages_received.get(timeout=common_client.TIMEOUT)
+      return self.messages_received.get(timeout=timeout)
     except queue.Empty:
       return None
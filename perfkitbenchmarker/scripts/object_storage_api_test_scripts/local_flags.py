@@ -0,0 +1,44 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Flags for the local object storage interface."""
+
+from absl import flags
+
+flags.DEFINE_string(
+    'local_storage_root',
+    '/tmp/pkb_local_object_storage',
+    'The directory holding the buckets of the LOCAL storage provider. Each '
+    'bucket is a subdirectory and each object a file.',
+)
+
+flags.DEFINE_boolean(
+    'local_storage_tmpfs',
+    False,
+    'If true, the LOCAL storage provider keeps its buckets on the /dev/shm '
+    'tmpfs, in a directory named like --local_storage_root, so that no disk '
+    'I/O is measured. Objects are still files shared by all processes.',
+)
+
+flags.DEFINE_float(
+    'local_storage_latency',
+    0.0,
+    'Seconds of latency the LOCAL storage provider adds to every request.',
+)
+
+flags.DEFINE_float(
+    'local_storage_bandwidth',
+    0.0,
+    'If positive, the LOCAL storage provider limits each read and write to '
+    'this many bytes per second.',
+)
@@ -0,0 +1,169 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""An interface to an object store in a local directory tree.
+
+The local service lets the API test scenarios run without a cloud bucket, so
+that the overhead of the test harness itself can be measured and profiled.
+Latency and bandwidth limits can be injected to approximate a real service.
+
+Objects are files, so worker processes and later invocations of the script
+see each other's objects as they would in a bucket. To leave out disk I/O, the
+tree can be kept on the /dev/shm tmpfs.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from absl import flags
+
+try:
+  # This is the path that we SCP object_storage_interface to.
+  from providers import object_storage_interface
+except ImportError:
+  # imports when running tests
+  from perfkitbenchmarker.scripts.object_storage_api_test_scripts import object_storage_interface
+
+FLAGS = flags.FLAGS
+
+# Prefix of the files that objects are written to before being renamed into
+# place, so that readers never see partially written objects.
+_TEMP_FILE_PREFIX = '.pkb_tmp_'
+
+# Where the buckets are kept with --local_storage_tmpfs.
+_TMPFS_DIR = '/dev/shm'
+
+
+class LocalService(object_storage_interface.ObjectStorageServiceBase):
+  """An object store backed by a local directory tree."""
+
+  def __init__(self):
+    if FLAGS.local_storage_latency < 0:
+      raise ValueError('--local_storage_latency must not be negative.')
+    if FLAGS.local_storage_bandwidth < 0:
+      raise ValueError('--local_storage_bandwidth must not be negative.')
+    root = FLAGS.local_storage_root
+    if FLAGS.local_storage_tmpfs:
+      if not os.path.isdir(_TMPFS_DIR):
+        raise ValueError('--local_storage_tmpfs requires %s.' % _TMPFS_DIR)
+      root = os.path.join(_TMPFS_DIR, os.path.basename(os.path.normpath(root)))
+    self.root = os.path.normpath(os.path.abspath(root))
+    self.latency = FLAGS.local_storage_latency
+    self.bandwidth = FLAGS.local_storage_bandwidth
+
+  def _SimulateTransfer(self, size):
+    """Sleeps for the injected latency plus the transfer time of size bytes."""
+    delay = self.latency
+    if self.bandwidth:
+      delay += size / self.bandwidth
+    if delay > 0:
+      time.sleep(delay)
+
+  def _ObjectPath(self, bucket, object_name):
+    path = os.path.normpath(os.path.join(self.root, bucket, object_name))
+    if not path.startswith(os.path.join(self.root, bucket, '')):
+      raise ValueError('Invalid object name %s' % object_name)
+    return path
+
+  def ListObjects(self, bucket, prefix):
+    prefix = prefix or ''
+    self._SimulateTransfer(0)
+    bucket_dir = os.path.join(self.root, bucket)
+    # Only walk the directories that can hold objects with the prefix.
+    start_dir = os.path.join(bucket_dir, os.path.dirname(prefix))
+    names = []
+    for dir_path, _, file_names in os.walk(start_dir):
+      for file_name in file_names:
+        if file_name.startswith(_TEMP_FILE_PREFIX):
+          continue
+        name = os.path.relpath(os.path.join(dir_path, file_name), bucket_dir)
+        name = name.replace(os.sep, '/')
+        if name.startswith(prefix):
+          names.append(name)
+    return names
+
+  def _DeleteObject(self, bucket, object_name):
+    os.remove(self._ObjectPath(bucket, object_name))
+
+  def DeleteObjects(
+      self,
+      bucket,
+      objects_to_delete,
+      objects_deleted=None,
+      delay_time=0,
+      object_sizes=None,
+  ):
+    start_times = []
+    latencies = []
+    sizes = []
+    for index, object_name in enumerate(objects_to_delete):
+      try:
+        time.sleep(delay_time)
+        start_time = time.time()
+        self._SimulateTransfer(0)
+        self._DeleteObject(bucket, object_name)
+        latency = time.time() - start_time
+        start_times.append(start_time)
+        latencies.append(latency)
+        if objects_deleted is not None:
+          objects_deleted.append(object_name)
+        if object_sizes:
+          sizes.append(object_sizes[index])
+      except Exception as e:  # pylint: disable=broad-except
+        logging.exception(
+            'Caught exception while deleting object %s: %s', object_name, e
+        )
+    return start_times, latencies, sizes
+
+  def BulkDeleteObjects(self, bucket, objects_to_delete, delay_time):
+    time.sleep(delay_time)
+    start_time = time.time()
+    self._SimulateTransfer(0)
+    for object_name in objects_to_delete:
+      self._DeleteObject(bucket, object_name)
+    latency = time.time() - start_time
+    return start_time, latency
+
+  def WriteObjectFromBuffer(self, bucket, object_name, stream, size):
+    stream.seek(0)
+    start_time = time.time()
+    if hasattr(stream, 'getbuffer'):
+      # E.g. a PayloadStream, whose bytes can be written without a copy.
+      data = stream.getbuffer()[:size]
+    else:
+      data = stream.read(size)
+    self._SimulateTransfer(len(data))
+    path = self._ObjectPath(bucket, object_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        prefix=_TEMP_FILE_PREFIX, dir=os.path.dirname(path)
+    )
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+      os.replace(temp_path, path)
+    except BaseException:
+      os.remove(temp_path)
+      raise
+    latency = time.time() - start_time
+    return start_time, latency
+
+  def ReadObject(self, bucket, object_name):
+    start_time = time.time()
+    with open(self._ObjectPath(bucket, object_name), 'rb') as f:
+      data = f.read()
+    self._SimulateTransfer(len(data))
+    latency = time.time() - start_time
+    return start_time, latency
@@ -24,9 +24,11 @@ run this script.
 
 
 import hashlib
+import io
 import json
 import logging
 import multiprocessing as mp
+from multiprocessing import shared_memory
 import os
 import random
 import string
@@ -44,11 +46,13 @@ try:
   # imports when running on the VM
   from providers import azure_flags
   from providers import gcs_flags
+  from providers import local_flags
   from providers import s3_flags
 except ImportError:
   # imports when running tests
   from perfkitbenchmarker.scripts.object_storage_api_test_scripts import azure_flags
   from perfkitbenchmarker.scripts.object_storage_api_test_scripts import gcs_flags
+  from perfkitbenchmarker.scripts.object_storage_api_test_scripts import local_flags
   from perfkitbenchmarker.scripts.object_storage_api_test_scripts import s3_flags
 
 # Object Naming Schemes
@@ -68,8 +72,9 @@ FLAGS = flags.FLAGS
 flags.DEFINE_enum(
     'storage_provider',
     'GCS',
-    ['GCS', 'S3', 'AZURE'],
-    'The target storage provider to test.',
+    ['GCS', 'S3', 'AZURE', 'LOCAL'],
+    'The target storage provider to test. LOCAL stores objects in a local '
+    'directory or on tmpfs, see local_flags.py.',
 )
 
 flags.DEFINE_string(
@@ -198,7 +203,12 @@ flags.DEFINE_float(
     'delete_delay', 0, 'Time to delay inbetween delete API call.'
 )
 
-STORAGE_TO_SCHEMA_DICT = {'GCS': 'gs', 'S3': 's3', 'AZURE': 'azure'}
+STORAGE_TO_SCHEMA_DICT = {
+    'GCS': 'gs',
+    'S3': 's3',
+    'AZURE': 'azure',
+    'LOCAL': 'file',
+}
 
 # If more than 5% of our upload or download operations fail for an iteration,
 # there is an availability issue with the service provider or the connection
@@ -437,6 +447,27 @@ def CleanupBucket(service):
     objects_to_cleanup = service.ListObjects(FLAGS.bucket, prefix=None)
 
 
+# Maps every byte value onto an ASCII letter, so that payloads can be made by
+# translating bulk random bytes instead of choosing one letter at a time.
+_PAYLOAD_TRANSLATION = bytes(
+    ord(string.ascii_letters[i % len(string.ascii_letters)]) for i in range(256)
+)
+# Random bytes are generated this many at a time to bound temporary memory.
+_PAYLOAD_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def _FillWithRandomLetters(buf):
+  """Fills a writable buffer with random ASCII letters.
+
+  Args:
+    buf: a writable object supporting the buffer protocol.
+  """
+  view = memoryview(buf).cast('B')
+  for start in range(0, len(view), _PAYLOAD_CHUNK_BYTES):
+    end = min(start + _PAYLOAD_CHUNK_BYTES, len(view))
+    view[start:end] = os.urandom(end - start).translate(_PAYLOAD_TRANSLATION)
+
+
 def GenerateWritePayload(size):
   """Generate random data for use with WriteObjectFromBuffer.
 
@@ -448,15 +479,118 @@ def GenerateWritePayload(size):
   """
 
   payload_bytes = bytearray(size)
-  # don't use a for...range(100M), range(100M) will create a list of 100mm items
-  # with each item being the default object size of 30 bytes or so, it will lead
-  # to out of memory error.
-  for i in range(size):
-    payload_bytes[i] = ord(random.choice(string.ascii_letters))
-
+  _FillWithRandomLetters(payload_bytes)
   return payload_bytes
 
 
+class SharedWritePayload(object):
+  """Random write data generated once and shared by all worker processes.
+
+  The data lives in a shared memory segment. Pickling a SharedWritePayload, as
+  multiprocessing does for Process arguments under the spawn and forkserver
+  start methods, only sends the name of the segment, so every worker maps the
+  same pages instead of receiving its own copy.
+
+  Every process that uses the payload must Close it when done. Only the
+  process that created the payload frees it, so workers that inherit it by
+  forking don't free it under the others.
+  """
+
+  def __init__(self, size):
+    self.size = size
+    # Shared memory segments can't be empty.
+    self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    self._owner_pid = os.getpid()
+    _FillWithRandomLetters(self._shm.buf[:size])
+
+  def __getstate__(self):
+    return {'size': self.size, 'name': self._shm.name}
+
+  def __setstate__(self, state):
+    self.size = state['size']
+    self._shm = shared_memory.SharedMemory(name=state['name'])
+    self._owner_pid = None
+
+  @property
+  def buf(self):
+    """A memoryview of the payload. Slicing it does not copy."""
+    return self._shm.buf[: self.size]
+
+  def Close(self):
+    """Unmaps the payload, and frees it if this process created it.
+
+    Views of the payload, e.g. PayloadStreams over it, must be closed first.
+    """
+    self._shm.close()
+    if self._owner_pid == os.getpid():
+      self._shm.unlink()
+
+
+class PayloadStream(io.RawIOBase):
+  """A read-only, seekable stream over a buffer.
+
+  Unlike six.BytesIO, constructing a PayloadStream does not copy its buffer,
+  and readinto() copies straight from the buffer into the caller's. read()
+  returns a copy of the bytes read, like any stream; clients that accept
+  buffers should slice getbuffer() instead.
+  """
+
+  def __init__(self, buf):
+    super(PayloadStream, self).__init__()
+    self._view = memoryview(buf).cast('B')
+    self._pos = 0
+
+  def readable(self):
+    return True
+
+  def seekable(self):
+    return True
+
+  def seek(self, offset, whence=io.SEEK_SET):
+    if whence == io.SEEK_SET:
+      pos = offset
+    elif whence == io.SEEK_CUR:
+      pos = self._pos + offset
+    elif whence == io.SEEK_END:
+      pos = len(self._view) + offset
+    else:
+      raise ValueError('Invalid whence: %s' % whence)
+    if pos < 0:
+      raise ValueError('Negative seek position %s' % pos)
+    self._pos = pos
+    return pos
+
+  def tell(self):
+    return self._pos
+
+  def getbuffer(self):
+    """Returns a memoryview of the whole buffer, like BytesIO.getbuffer()."""
+    return self._view
+
+  def readinto(self, b):
+    end = min(self._pos + len(b), len(self._view))
+    n = max(end - self._pos, 0)
+    memoryview(b).cast('B')[:n] = self._view[self._pos : self._pos + n]
+    self._pos += n
+    return n
+
+  def read(self, size=-1):
+    start = min(self._pos, len(self._view))
+    if size is None or size < 0:
+      end = len(self._view)
+    else:
+      end = min(start + size, len(self._view))
+    self._pos = max(self._pos, end)
+    return self._view[start:end].tobytes()
+
+  def readall(self):
+    return self.read()
+
+  def close(self):
+    self._view.release()
+    super(PayloadStream, self).close()
+
+
 def WriteObjects(
     service,
     bucket,
@@ -486,7 +620,7 @@ def WriteObjects(
   """
 
   payload = GenerateWritePayload(size)
-  handle = six.BytesIO(payload)
+  handle = PayloadStream(payload)
 
   for i in range(count):
     object_name = '%s_%d' % (object_prefix, i)
@@ -817,19 +951,21 @@ def MultiStreamWrites(service):
 
   size_distribution = yaml.safe_load(FLAGS.object_sizes)
 
-  payload = GenerateWritePayload(MaxSizeInDistribution(size_distribution))
-
-  results = RunWorkerProcesses(
-      WriteWorker,
-      (
-          service,
-          payload,
-          size_distribution,
-          FLAGS.objects_per_stream,
-          FLAGS.start_time,
-          FLAGS.object_naming_scheme,
-      ),
-  )
+  payload = SharedWritePayload(MaxSizeInDistribution(size_distribution))
+  try:
+    results = RunWorkerProcesses(
+        WriteWorker,
+        (
+            service,
+            payload,
+            size_distribution,
+            FLAGS.objects_per_stream,
+            FLAGS.start_time,
+            FLAGS.object_naming_scheme,
+        ),
+    )
+  finally:
+    payload.Close()
 
   # object_records is the data we leave on the VM for future reads. We
   # need to pass data to the reader so it will know what object names
@@ -1011,7 +1147,7 @@ def WriteWorker(
 
   Args:
     service: the ObjectStorageServiceBase object to use.
-    payload: a byte array. The bytes to upload.
+    payload: a SharedWritePayload. The bytes to upload.
     size_distribution: the distribution of object sizes to use.
     num_objects: the number of objects to upload.
     start_time: a POSIX timestamp. When to start uploading.
@@ -1048,31 +1184,35 @@ def WriteWorker(
     raise ValueError(f'Unknown naming scheme {naming_scheme}')
   size_iterator = SizeDistributionIterator(size_distribution)
 
-  payload_handle = six.BytesIO(payload)
-
-  if start_time is not None:
-    SleepUntilTime(start_time)
-
-  for _ in range(num_objects):
-    object_name = next(name_iterator)
-    object_size = next(size_iterator)
-
-    try:
-      start_time, latency = service.WriteObjectFromBuffer(
-          FLAGS.bucket, object_name, payload_handle, object_size
-      )
-
-      object_names.append(object_name)
-      start_times.append(start_time)
-      latencies.append(latency)
-      sizes.append(object_size)
-    except Exception as e:
-      logging.info(
-          'Worker %s caught exception %s while writing object %s',
-          worker_num,
-          e,
-          object_name,
-      )
+  # The payload is closed even if the worker is interrupted, e.g. by a
+  # KeyboardInterrupt while it sleeps.
+  try:
+    with PayloadStream(payload.buf) as payload_handle:
+      if start_time is not None:
+        SleepUntilTime(start_time)
+
+      for _ in range(num_objects):
+        object_name = next(name_iterator)
+        object_size = next(size_iterator)
+
+        try:
+          start_time, latency = service.WriteObjectFromBuffer(
+              FLAGS.bucket, object_name, payload_handle, object_size
+          )
+
+          object_names.append(object_name)
+          start_times.append(start_time)
+          latencies.append(latency)
+          sizes.append(object_size)
+        except Exception as e:
+          logging.info(
+              'Worker %s caught exception %s while writing object %s',
+              worker_num,
+              e,
+              object_name,
+          )
+  finally:
+    payload.Close()
 
   logging.info('Worker %s finished writing its objects', worker_num)
 
@@ -1437,6 +1577,10 @@ def Main(argv=sys.argv):
     from providers import s3
 
     service = s3.S3Service()
+  elif FLAGS.storage_provider == 'LOCAL':
+    from providers import local_service
+
+    service = local_service.LocalService()
   else:
     raise ValueError('Invalid storage provider %s' % FLAGS.storage_provider)
 
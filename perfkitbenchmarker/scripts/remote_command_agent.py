@@ -0,0 +1,158 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# -*- coding: utf-8 -*-
+
+"""Runs commands and file operations requested on stdin.
+
+PerfKitBenchmarker starts this agent over a single ssh connection and keeps it
+open, so each remote command costs a message rather than an ssh process.
+
+Requests are JSON objects, one per line on stdin, e.g.:
+
+  {"id": 1, "op": "run", "command": "echo hi", "timeout": 10}
+  {"id": 2, "op": "read", "path": "/tmp/file"}
+  {"id": 3, "op": "write", "path": "/tmp/file", "data": "aGk=", "mode": 420}
+  {"id": 4, "op": "stat", "path": "/tmp/file"}
+  {"id": 5, "op": "ping"}
+
+Requests run concurrently. Replies are JSON objects, one per line on stdout.
+Commands stream their output as {"id": 1, "stdout": "..."} and
+{"id": 1, "stderr": "..."} messages. Every request ends with a message with
+"done" set and either its result or an "error".
+
+The agent exits when stdin is closed.
+
+*Runs on the guest VM. Supports Python 3.x.*
+"""
+
+import base64
+import codecs
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+_CHUNK_SIZE = 64 * 1024
+# How long to wait for the output of a command that timed out, e.g. when a
+# background process it started still holds its stdout.
+_OUTPUT_DRAIN_TIMEOUT = 1
+
+_write_lock = threading.Lock()
+
+
+def _Send(message):
+  line = json.dumps(message) + '\n'
+  with _write_lock:
+    sys.stdout.write(line)
+    sys.stdout.flush()
+
+
+def _Stream(request_id, name, pipe):
+  """Sends the output of a pipe as it arrives."""
+  decoder = codecs.getincrementaldecoder('utf-8')('replace')
+  while True:
+    chunk = pipe.read1(_CHUNK_SIZE)
+    text = decoder.decode(chunk, final=not chunk)
+    if text:
+      _Send({'id': request_id, name: text})
+    if not chunk:
+      break
+
+
+def _Run(request):
+  """Runs a command with bash, as ssh would, and returns its return code."""
+  process = subprocess.Popen(
+      ['/bin/bash', '-c', request['command']],
+      stdin=subprocess.DEVNULL,
+      stdout=subprocess.PIPE,
+      stderr=subprocess.PIPE,
+      start_new_session=True,
+  )
+  readers = [
+      threading.Thread(
+          target=_Stream, args=(request['id'], name, pipe), daemon=True
+      )
+      for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr))
+  ]
+  for reader in readers:
+    reader.start()
+  timed_out = False
+  try:
+    retcode = process.wait(timeout=request.get('timeout'))
+  except subprocess.TimeoutExpired:
+    timed_out = True
+    os.killpg(process.pid, signal.SIGKILL)
+    retcode = process.wait()
+  for reader in readers:
+    reader.join(_OUTPUT_DRAIN_TIMEOUT if timed_out else None)
+  return {'retcode': retcode, 'timed_out': timed_out}
+
+
+def _Read(request):
+  with open(os.path.expanduser(request['path']), 'rb') as f:
+    return {'data': base64.b64encode(f.read()).decode('ascii')}
+
+
+def _Write(request):
+  path = os.path.expanduser(request['path'])
+  with open(path, 'wb') as f:
+    f.write(base64.b64decode(request['data']))
+  if request.get('mode') is not None:
+    os.chmod(path, request['mode'])
+  return {}
+
+
+def _Stat(request):
+  try:
+    result = os.stat(os.path.expanduser(request['path']))
+  except FileNotFoundError:
+    return {'stat': None}
+  return {
+      'stat': {
+          'mode': result.st_mode,
+          'size': result.st_size,
+          'mtime': result.st_mtime,
+      }
+  }
+
+
+_OPERATIONS = {
+    'run': _Run,
+    'read': _Read,
+    'write': _Write,
+    'stat': _Stat,
+    'ping': lambda request: {},
+}
+
+
+def _Handle(request):
+  try:
+    reply = _OPERATIONS[request['op']](request)
+  except Exception as e:  # pylint: disable=broad-except
+    reply = {'error': '%s: %s' % (type(e).__name__, e)}
+  reply.update(id=request['id'], done=True)
+  _Send(reply)
+
+
+def main():
+  for line in sys.stdin:
+    request = json.loads(line)
+    threading.Thread(target=_Handle, args=(request,), daemon=True).start()
+
+
+if __name__ == '__main__':
+  main()
@@ -18,12 +18,14 @@ is also imported by PKB to share flags, testing, & convenience functionality /
 constants.
 """
 
+import asyncio
 import dataclasses
 import json
 import logging
 import math
 import multiprocessing
 import os
+import random
 import subprocess
 import time
 
@@ -65,6 +67,38 @@ THROW_ON_CLIENT_ERRORS = flags.DEFINE_bool(
     ' send the desired QPS. Used for both client VM & overall PKB.',
 )
 
+BURST = 'burst'
+OPEN_LOOP = 'open_loop'
+LOAD_MODE = flags.DEFINE_enum(
+    'ai_load_mode',
+    BURST,
+    [BURST, OPEN_LOOP],
+    'How requests are sent. "burst" starts a process per request, in bursts'
+    ' of parallel requests every --ai_burst_time seconds. "open_loop" runs'
+    ' requests from one asyncio event loop at the same average rate, each at'
+    ' its own scheduled time, and reports latencies measured from that'
+    ' scheduled time. Used for both client VM & overall PKB.',
+)
+
+CONSTANT = 'constant'
+POISSON = 'poisson'
+ARRIVAL_DISTRIBUTION = flags.DEFINE_enum(
+    'ai_arrival_distribution',
+    CONSTANT,
+    [CONSTANT, POISSON],
+    'With --ai_load_mode=open_loop, whether requests are evenly spaced or'
+    ' arrive with exponentially distributed gaps. Used for both client VM &'
+    ' overall PKB.',
+)
+
+MAX_CONCURRENCY = flags.DEFINE_integer(
+    'ai_max_concurrency',
+    0,
+    'With --ai_load_mode=open_loop, the maximum number of requests in flight.'
+    ' Requests over the cap wait for a slot and the wait counts toward their'
+    ' latency. 0 means no cap. Used for both client VM & overall PKB.',
+)
+
 
 # Sagemaker times out requests if they take longer than 95 seconds.
 _FAIL_LATENCY = 95
@@ -80,6 +114,15 @@ class CommandResponse:
   response: str | None = None
   error: str | None = None
   status: int = 0
+  # When the request should have been sent in open loop mode. Latency measured
+  # from here includes any delay in sending it (coordinated omission).
+  scheduled_time: float | None = None
+
+  def CorrectedLatency(self) -> float:
+    """Returns the latency measured from when the request was scheduled."""
+    if self.scheduled_time is None:
+      return self.end_time - self.start_time
+    return self.end_time - self.scheduled_time
 
 
 class ClientError(Exception):
@@ -102,6 +145,15 @@ def main(argv):
 
 def Run() -> list[CommandResponse]:
   """Sends the load with command line flags & writes results to a file."""
+  if LOAD_MODE.value == OPEN_LOOP:
+    return SendOpenLoopRequests(
+        _REQUEST_COMMAND.value,
+        _PARALLEL_REQUESTS.value,
+        TEST_DURATION.value,
+        BURST_TIME.value,
+        ARRIVAL_DISTRIBUTION.value,
+        MAX_CONCURRENCY.value,
+    )
   responses = BurstRequestsOverTime(
       _REQUEST_COMMAND.value,
       _PARALLEL_REQUESTS.value,
@@ -122,10 +174,25 @@ def GetOutputFilePath(burst_requests: int) -> str:
 
 
 def ReadJsonResponses(burst_requests: int) -> list[CommandResponse]:
-  """Reads the json responses from the file."""
+  """Reads the json responses from the file.
+
+  The file holds either a single {'responses': [...]} document, as written in
+  burst mode, or one response per line, as streamed in open loop mode.
+
+  Args:
+    burst_requests: The number of requests sent per burst.
+
+  Returns:
+    The responses in the file.
+  """
   with open(GetOutputFilePath(burst_requests), 'r') as f:
-    loaded_json = json.load(f)
-    responses_dicts = loaded_json['responses']
+    contents = f.read()
+  try:
+    responses_dicts = json.loads(contents)['responses']
+  except json.JSONDecodeError:
+    responses_dicts = [
+        json.loads(line) for line in contents.splitlines() if line.strip()
+    ]
   responses = [
       CommandResponse(**response_dict) for response_dict in responses_dicts
   ]
@@ -302,5 +369,152 @@ def _RunCommand(
   return result.stdout, result.stderr, result.returncode
 
 
+def GetScheduledOffsets(
+    num_requests: int, qps: float, distribution: str
+) -> list[float]:
+  """Returns when to send each request, in seconds from the start."""
+  if distribution == POISSON:
+    offsets = []
+    offset = 0.0
+    for _ in range(num_requests):
+      offsets.append(offset)
+      offset += random.expovariate(qps)
+    return offsets
+  return [i / qps for i in range(num_requests)]
+
+
+def SendOpenLoopRequests(
+    command: str,
+    burst_requests: int,
+    total_duration: int,
+    time_between_bursts: float = 1.0,
+    distribution: str = CONSTANT,
+    max_concurrency: int = 0,
+) -> list[CommandResponse]:
+  """Sends requests at a fixed average rate from an asyncio event loop.
+
+  Sends as many requests as BurstRequestsOverTime would, at the same average
+  rate of burst_requests per time_between_bursts, but each request is started
+  at its own scheduled time instead of in bursts. Responses are appended to the
+  output file as they complete.
+
+  Args:
+    command: The command to run for each request.
+    burst_requests: The number of requests per time_between_bursts.
+    total_duration: Number of seconds over which requests are sent.
+    time_between_bursts: Number of seconds burst_requests are spread over.
+    distribution: CONSTANT or POISSON spacing between requests.
+    max_concurrency: Maximum number of requests in flight, or 0 for no cap.
+
+  Returns:
+    The responses, in order of completion.
+  """
+  num_requests = GetExpectedNumberResponses(
+      burst_requests, total_duration, time_between_bursts
+  )
+  qps = burst_requests / time_between_bursts
+  logging.info(
+      'Starting to send %s requests at %s qps with %s arrivals',
+      num_requests,
+      qps,
+      distribution,
+  )
+  offsets = GetScheduledOffsets(num_requests, qps, distribution)
+  file_path = GetOutputFilePath(burst_requests)
+  with open(file_path, 'w') as output_file:
+    responses = asyncio.run(
+        _SendOpenLoopRequests(
+            command, offsets, time_between_bursts, max_concurrency, output_file
+        )
+    )
+  logging.info('Wrote %s responses to %s', len(responses), file_path)
+  if len(responses) < num_requests:
+    logging.info(
+        'Scheduled %s requests but only got %s responses.',
+        num_requests,
+        len(responses),
+    )
+  return responses
+
+
+async def _SendOpenLoopRequests(
+    command: str,
+    offsets: list[float],
+    max_lag: float,
+    max_concurrency: int,
+    output_file,
+) -> list[CommandResponse]:
+  """Starts a task per request at its offset & waits for them to finish."""
+  loop = asyncio.get_running_loop()
+  # Wall clock time for the output & a monotonic clock for scheduling.
+  start_time = time.time()
+  loop_start_time = loop.time()
+  semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+  responses = []
+
+  async def _TimeRequest(scheduled_time: float):
+    if semaphore:
+      async with semaphore:
+        response = await _TimeCommandAsync(command, scheduled_time)
+    else:
+      response = await _TimeCommandAsync(command, scheduled_time)
+    responses.append(response)
+    output_file.write(json.dumps(dataclasses.asdict(response)) + '\n')
+    output_file.flush()
+
+  tasks = []
+  reported_lag = False
+  for offset in offsets:
+    await asyncio.sleep(max(0, loop_start_time + offset - loop.time()))
+    lag = loop.time() - loop_start_time - offset
+    if lag > max_lag and not reported_lag:
+      reported_lag = True
+      _EncounterClientError(
+          f'The client started a request {lag} seconds after it was'
+          f' scheduled, which is more than the {max_lag} seconds allowed.'
+          ' This means the client is not powerful enough & client with more'
+          ' CPUs should be used.'
+      )
+    tasks.append(asyncio.create_task(_TimeRequest(start_time + offset)))
+
+  _, pending = await asyncio.wait(tasks, timeout=_QUEUE_WAIT_TIME)
+  if pending:
+    for task in pending:
+      task.cancel()
+    await asyncio.wait(pending)
+    _EncounterClientError(
+        f'Waited more than {_QUEUE_WAIT_TIME} seconds for requests to finish.'
+        f' Cancelled {len(pending)} out of {len(tasks)} requests.'
+    )
+  return responses
+
+
+async def _TimeCommandAsync(
+    command: str, scheduled_time: float
+) -> CommandResponse:
+  """Times the command & returns its output."""
+  start_time = time.time()
+  response, err, status = await _RunCommandAsync(command)
+  end_time = time.time()
+  return CommandResponse(
+      start_time, end_time, response, err, status, scheduled_time
+  )
+
+
+async def _RunCommandAsync(command: str) -> tuple[str, str, int]:
+  """Runs a command and returns stdout, stderr, and return code."""
+  process = await asyncio.create_subprocess_exec(
+      *command.split(' '),
+      stdout=asyncio.subprocess.PIPE,
+      stderr=asyncio.subprocess.PIPE,
+  )
+  try:
+    stdout, stderr = await process.communicate()
+  except asyncio.CancelledError:
+    process.kill()
+    raise
+  return stdout.decode(), stderr.decode(), process.returncode
+
+
 if __name__ == '__main__':
   app.run(main)
@@ -0,0 +1,136 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Coalesces concurrent status queries of cloud resources.
+
+Resources poll their status independently, e.g. VMs in _Exists while they are
+created and deleted, so a run with many VMs issues one describe command per VM
+per poll. A StatusPoller instead collects the names queried while a list call
+is in flight and looks them all up with the next list call, so each scope,
+e.g. a project and zone, issues at most one list call per interval.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable
+
+from absl import flags
+
+COALESCE_STATUS_POLLING = flags.DEFINE_boolean(
+    'coalesce_status_polling',
+    False,
+    'Whether providers that support it look up the status of resources with '
+    'one list call for all resources of a scope, e.g. the VMs of a zone, '
+    'instead of one describe call per resource.',
+)
+_INTERVAL = flags.DEFINE_float(
+    'status_polling_interval',
+    1.0,
+    'With --coalesce_status_polling, the minimum number of seconds between '
+    'list calls of a scope.',
+    lower_bound=0,
+)
+
+# Called with the names to look up. Returns their statuses by name. Names
+# that are missing from the result don't exist.
+ListFunction = Callable[[list[str]], dict[str, Any]]
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+class _Batch:
+  """Names looked up by one list call, and its outcome."""
+
+  def __init__(self):
+    self.names = set()
+    self.done = False
+    self.results = {}
+    self.error = None
+
+
+class StatusPoller:
+  """Looks up the statuses of many resources of a scope with one call.
+
+  The first caller of Get runs the list call and every caller that arrives
+  while it runs waits for the next one, which one of them runs. List calls
+  start at least an interval apart, and the first one an interval after the
+  poller was created, so that resources that start polling together, e.g. VMs
+  created in parallel, share it.
+  """
+
+  def __init__(self, list_function: ListFunction, interval: float):
+    self._list_function = list_function
+    self._interval = interval
+    self._condition = threading.Condition()
+    self._pending = _Batch()
+    self._listing = False
+    self._last_list_time = time.time()
+
+  def Get(self, name: str) -> Any:
+    """Returns the status of the named resource, or None if it is missing.
+
+    Raises:
+      Exception: Whatever the list call raised.
+    """
+    with self._condition:
+      batch = self._pending
+      batch.names.add(name)
+      while self._listing and not batch.done:
+        self._condition.wait()
+      leader = not batch.done
+      if leader:
+        self._listing = True
+    if leader:
+      self._List()
+    if batch.error:
+      raise batch.error
+    return batch.results.get(name)
+
+  def _List(self):
+    """Runs the list call for the pending names."""
+    delay = self._last_list_time + self._interval - time.time()
+    if delay > 0:
+      time.sleep(delay)
+    with self._condition:
+      batch = self._pending
+      self._pending = _Batch()
+      self._last_list_time = time.time()
+    names = sorted(batch.names)
+    logging.debug('Listing the statuses of %s resources.', len(names))
+    try:
+      batch.results = self._list_function(names)
+    except Exception as e:  # pylint: disable=broad-except
+      batch.error = e
+    with self._condition:
+      batch.done = True
+      self._listing = False
+      self._condition.notify_all()
+
+
+def GetPoller(
+    scope: Iterable[Hashable], list_function: ListFunction
+) -> StatusPoller:
+  """Returns the poller of a scope, creating it with list_function if needed.
+
+  Args:
+    scope: Identifies the resources that list_function looks up, e.g. the
+      provider, project and zone.
+    list_function: Looks up the statuses of the given names in the scope.
+  """
+  scope = tuple(scope)
+  with _pollers_lock:
+    if scope not in _pollers:
+      _pollers[scope] = StatusPoller(list_function, _INTERVAL.value)
+    return _pollers[scope]
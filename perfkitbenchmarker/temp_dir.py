@@ -28,6 +28,8 @@ from perfkitbenchmarker import version
 
 _PERFKITBENCHMARKER = 'perfkitbenchmarker'
 _RUNS = 'runs'
+_ARTIFACTS = 'artifacts'
+_METADATA = 'metadata'
 _VERSIONS = 'versions'
 
 
@@ -60,6 +62,16 @@ def GetRunDirPath():
   return os.path.join(FLAGS.temp_dir, _RUNS, str(flags.FLAGS.run_uri))
 
 
+def GetArtifactCacheDirPath():
+  """Gets path to the content-addressed file cache shared by PKB runs."""
+  return os.path.join(FLAGS.temp_dir, _ARTIFACTS)
+
+
+def GetMetadataCacheDirPath():
+  """Gets path to the cache of cloud metadata lookups shared by PKB runs."""
+  return os.path.join(FLAGS.temp_dir, _METADATA)
+
+
 def GetSshConnectionsDir():
   """Returns the directory for SSH ControlPaths (for connection reuse)."""
   return os.path.join(GetRunDirPath(), 'ssh')
@@ -17,14 +17,17 @@
 
 import abc
 import functools
+import gzip
 import logging
 import os
 import posixpath
+import shutil
 import threading
 import time
 import uuid
 from absl import flags
 from perfkitbenchmarker import background_tasks
+from perfkitbenchmarker import context
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import events
 from perfkitbenchmarker import os_types
@@ -51,6 +54,19 @@ _TRACE_PRIMARY_SERVER = flags.DEFINE_bool(
     ),
 )
 
+_TRACE_PULL_INTERVAL = flags.DEFINE_integer(
+    'trace_pull_interval',
+    None,
+    (
+        'If set, copies the output appended by collectors since the last copy'
+        ' from the VMs every this many seconds, gzip compressed. Stopping'
+        ' collectors then only transfers the remainder, and partial output is'
+        ' kept locally if the run fails. Windows VMs still copy whole files'
+        ' when collectors stop.'
+    ),
+    lower_bound=1,
+)
+
 
 def Register(parsed_flags):
   """Registers the collector if FLAGS.<collector> is set.
@@ -90,6 +106,9 @@ class BaseCollector:
     self._role_mapping = {}  # mapping vm role to output file
     self._start_time = 0
     self.vm_groups = {}
+    self._vms = {}  # mapping vm name to vm, for incremental pulls
+    self._pull_thread = None
+    self._stop_pulling = threading.Event()
 
     if not os.path.isdir(self.output_directory):
       raise OSError(
@@ -139,6 +158,7 @@ class BaseCollector:
     stdout, _ = vm.RemoteCommand(cmd)
     with self._lock:
       self._pid_files[vm.name] = (stdout.strip(), collector_file)
+      self._vms[vm.name] = vm
 
   def _StopOnVm(self, vm, vm_role):
     """Stop collector on 'vm' and copy the files back."""
@@ -151,10 +171,10 @@ class BaseCollector:
     vm.RemoteCommand(self._KillCommand(vm, pid), ignore_failure=True)
 
     try:
-      vm.PullFile(
-          os.path.join(self.output_directory, os.path.basename(file_name)),
-          file_name,
-      )
+      if self._PullsIncrementally(vm):
+        self._PullIncrement(vm, file_name)
+      else:
+        vm.PullFile(self._LocalPath(file_name), file_name)
       self._role_mapping[vm_role] = file_name
     except errors.VirtualMachine.RemoteCommandError as ex:
       logging.exception('Failed fetching collector result from %s.', vm.name)
@@ -162,6 +182,81 @@ class BaseCollector:
 
     self._CollectorPostProcess(vm)
 
+  def _LocalPath(self, file_name):
+    """Path of the local copy of a collector output file."""
+    return os.path.join(self.output_directory, os.path.basename(file_name))
+
+  def _PullsIncrementally(self, vm):
+    return (
+        _TRACE_PULL_INTERVAL.value is not None
+        and vm.BASE_OS_TYPE != os_types.WINDOWS
+    )
+
+  def _PullIncrement(self, vm, file_name):
+    """Appends the output written since the last pull to the local copy.
+
+    The size of the local copy is the offset to resume from, so pulls pick up
+    where the previous one stopped, including across collector restarts.
+
+    Args:
+      vm: The vm running the collector.
+      file_name: Path of the collector output file on the vm.
+    """
+    local_path = self._LocalPath(file_name)
+    offset = os.path.getsize(local_path) if os.path.exists(local_path) else 0
+    remote_chunk = file_name + '.chunk.gz'
+    local_chunk = local_path + '.chunk.gz'
+    # tail seeks to the offset rather than reading the whole file.
+    try:
+      vm.RemoteCommand(
+          f'tail -c +{offset + 1} {file_name} | gzip -1 > {remote_chunk}'
+      )
+      vm.PullFile(local_chunk, remote_chunk)
+    finally:
+      vm.RemoteCommand(f'rm -f {remote_chunk}', ignore_failure=True)
+    with gzip.open(local_chunk, 'rb') as chunk, open(local_path, 'ab') as out:
+      shutil.copyfileobj(chunk, out)
+    os.remove(local_chunk)
+
+  def _TryPullIncrement(self, vm, file_name):
+    try:
+      self._PullIncrement(vm, file_name)
+    except Exception:  # pylint: disable=broad-except
+      logging.warning(
+          'Failed pulling collector output from %s.', vm.name, exc_info=True
+      )
+
+  def _PullPeriodically(self, benchmark_spec):
+    """Pulls collector output from all vms until _StopPulling is called."""
+    context.SetThreadBenchmarkSpec(benchmark_spec)
+    while not self._stop_pulling.wait(_TRACE_PULL_INTERVAL.value):
+      with self._lock:
+        args = [
+            ((self._vms[vm_name], file_name), {})
+            for vm_name, (_, file_name) in self._pid_files.items()
+            if self._PullsIncrementally(self._vms[vm_name])
+        ]
+      if args:
+        background_tasks.RunThreaded(self._TryPullIncrement, args)
+
+  def _StartPulling(self):
+    if _TRACE_PULL_INTERVAL.value is None or self._pull_thread is not None:
+      return
+    self._stop_pulling.clear()
+    self._pull_thread = threading.Thread(
+        target=self._PullPeriodically,
+        args=(context.GetThreadBenchmarkSpec(),),
+        daemon=True,
+    )
+    self._pull_thread.start()
+
+  def _StopPulling(self):
+    if self._pull_thread is None:
+      return
+    self._stop_pulling.set()
+    self._pull_thread.join()
+    self._pull_thread = None
+
   def Start(self, sender, benchmark_spec):
     """Install and start collector on VMs specified in trace vm groups'."""
     suffix = '-{}-{}'.format(benchmark_spec.uid, str(uuid.uuid4())[:8])
@@ -192,6 +287,7 @@ class BaseCollector:
     func = functools.partial(self._StartOnVm, suffix=id_suffix)
     background_tasks.RunThreaded(func, vms)
     self._start_time = time.time()
+    self._StartPulling()
     return
 
   def Stop(self, sender, benchmark_spec, name=''):  # pylint: disable=unused-argument
@@ -217,6 +313,7 @@ class BaseCollector:
       args.extend(
           [((vm, '%s_%s' % (role, idx)), {}) for idx, vm in enumerate(vms)]
       )
+    self._StopPulling()
     background_tasks.RunThreaded(self._StopOnVm, args)
     return
 
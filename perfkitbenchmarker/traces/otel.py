@@ -13,6 +13,7 @@
 # limitations under the License.
 """Runs Opentelemetry Operations Collector on VMs."""
 
+import array
 import collections
 import json
 import logging
@@ -20,6 +21,7 @@ import ntpath
 import os
 
 from absl import flags
+import numpy as np
 from perfkitbenchmarker import background_tasks
 from perfkitbenchmarker import data
 from perfkitbenchmarker import events
@@ -57,12 +59,129 @@ flags.DEFINE_string(
     ),
 )
 
+_COLUMNAR_OUTPUT = flags.DEFINE_boolean(
+    'otel_columnar_output',
+    False,
+    (
+        'Write every otel data point to a NumPy .npz file next to the otel '
+        'output and only report a downsampled series in sample metadata.'
+    ),
+)
+
+_SUMMARY_POINTS = flags.DEFINE_integer(
+    'otel_summary_points',
+    100,
+    (
+        'Maximum number of points per metric reported in sample metadata '
+        'when --otel_columnar_output is set.'
+    ),
+    lower_bound=1,
+)
+
+_AGGREGATE_METRICS = flags.DEFINE_boolean(
+    'otel_aggregate_metrics',
+    False,
+    (
+        'Also report percentiles of every otel metric and the average rate '
+        'of every cumulative sum.'
+    ),
+)
+
+_AGGREGATE_PERCENTILES = (50, 90, 99)
+_CUMULATIVE = 'AGGREGATION_TEMPORALITY_CUMULATIVE'
+
 GIT_REPO = 'https://github.com/GoogleCloudPlatform/opentelemetry-operations-collector.git'
 GIT_TAG = '08f2752ed36759c4139e8278559e15270e26e140'
 OTEL_DIR = 'otel'
 FLAGS = flags.FLAGS
 
 
+class _MetricSeries:
+  """Numeric data points of one otel metric.
+
+  Attributes:
+    unit: Unit of the metric values.
+    cumulative: Whether values are a monotonic, cumulative sum.
+    timestamps: array of int64 nanosecond timestamps.
+    values: array of float64 values.
+  """
+
+  def __init__(self, unit, cumulative):
+    self.unit = unit
+    self.cumulative = cumulative
+    self.timestamps = array.array('q')
+    self.values = array.array('d')
+
+
+def _IterDataPoints(file_contents):
+  """Yields (name, metric, data point) for each line of otel JSON output."""
+  for line in file_contents:
+    data_element = json.loads(line)
+    for resource_metric in data_element['resourceMetrics']:
+      for metric in resource_metric['scopeMetrics'][0]['metrics']:
+        for data_point in (
+            metric.get('sum', {}) or metric.get('gauge', {})
+        ).get('dataPoints', []):
+          name_string = [metric['name']] + [
+              attribute['value']['stringValue'].strip()
+              for attribute in data_point.get('attributes', [])
+          ]
+          # Filter out all falsy values
+          yield ('_').join(filter(None, name_string)), metric, data_point
+
+
+def _IsCumulative(metric):
+  metric_sum = metric.get('sum', {})
+  return bool(
+      metric_sum.get('isMonotonic')
+      and metric_sum.get('aggregationTemporality') == _CUMULATIVE
+  )
+
+
+def _Downsample(series, max_points):
+  """Returns at most max_points (timestamps, values) summarizing a series.
+
+  Points are split into consecutive chunks. Each chunk is reported at its last
+  timestamp, with the mean of a gauge or the last value of a cumulative sum.
+  """
+  timestamps = np.frombuffer(series.timestamps, dtype=np.int64)
+  values = np.frombuffer(series.values, dtype=np.float64)
+  if timestamps.size <= max_points:
+    return timestamps, values
+  ends = np.linspace(0, timestamps.size, max_points + 1).astype(np.int64)[1:]
+  starts = np.concatenate([[0], ends[:-1]])
+  if series.cumulative:
+    return timestamps[ends - 1], values[ends - 1]
+  return timestamps[ends - 1], np.add.reduceat(values, starts) / (ends - starts)
+
+
+def _AggregateSamples(name, series, metadata):
+  """Returns samples with percentiles or the rate of a metric series."""
+  values = np.frombuffer(series.values, dtype=np.float64)
+  if not values.size:
+    return []
+  if series.cumulative:
+    timestamps = np.frombuffer(series.timestamps, dtype=np.int64)
+    duration = (timestamps[-1] - timestamps[0]) / 1e9
+    if duration <= 0:
+      return []
+    # Counters restart from zero when the process they count restarts.
+    increase = np.clip(np.diff(values), 0, None).sum()
+    return [
+        sample.Sample(
+            f'{name}_rate',
+            float(increase / duration),
+            f'{series.unit}/s',
+            metadata,
+        )
+    ]
+  stats = sample.PercentileCalculator(values, _AGGREGATE_PERCENTILES)
+  return [
+      sample.Sample(f'{name}_{stat}', value, series.unit, metadata)
+      for stat, value in stats.items()
+  ]
+
+
 class _OTELCollector(base_collector.BaseCollector):
   """otel collector.
 
@@ -186,43 +305,70 @@ class _OTELCollector(base_collector.BaseCollector):
     logging.debug('Parsing otel collector data.')
 
     def _Analyze(role, file):
-      parsed_metrics = collections.defaultdict(
+      path = os.path.join(self.output_directory, os.path.basename(file))
+      series = {}
+      # Every data point as strings, only kept for the legacy sample format.
+      raw_points = collections.defaultdict(
           lambda: collections.defaultdict(list)
       )
-
-      with open(
-          os.path.join(self.output_directory, os.path.basename(file))
-      ) as file_contents:
-        for data_element in file_contents:
-          data_element = json.loads(data_element)
-          for resource_metric in data_element['resourceMetrics']:
-            for metric in resource_metric['scopeMetrics'][0]['metrics']:
-              for data_point in (
-                  metric.get('sum', {}) or metric.get('gauge', {})
-              ).get('dataPoints', []):
-                name_string = [metric['name']] + [
-                    attribute['value']['stringValue'].strip()
-                    for attribute in data_point.get('attributes', [])
-                ]
-                # Filter out all falsy values
-                name = ('_').join(filter(None, name_string))
-                parsed_metrics[name]['values'].append(
-                    str(data_point.get('asInt') or data_point.get('asDouble'))
-                )
-                parsed_metrics[name]['timestamps'].append(
-                    str(data_point['timeUnixNano'])
-                )
-                parsed_metrics[name]['unit'] = metric['unit']
-                parsed_metrics[name]['vm_role'] = role
-
-      for key, value in parsed_metrics.items():
+      # The legacy format only needs numeric arrays for aggregates, so don't
+      # keep every data point twice without them.
+      keep_arrays = _COLUMNAR_OUTPUT.value or _AGGREGATE_METRICS.value
+
+      with open(path) as file_contents:
+        for name, metric, data_point in _IterDataPoints(file_contents):
+          value = data_point.get('asInt') or data_point.get('asDouble')
+          timestamp = data_point['timeUnixNano']
+          if name not in series:
+            series[name] = _MetricSeries(metric['unit'], _IsCumulative(metric))
+          if keep_arrays:
+            series[name].timestamps.append(int(timestamp))
+            series[name].values.append(float(value or 0))
+          if not _COLUMNAR_OUTPUT.value:
+            raw_points[name]['values'].append(str(value))
+            raw_points[name]['timestamps'].append(str(timestamp))
+
+      columnar_file = None
+      if _COLUMNAR_OUTPUT.value:
+        columnar_file = f'{path}.npz'
+        arrays = {'names': np.array(list(series), dtype=str)}
+        for index, metric_series in enumerate(series.values()):
+          arrays[f'timestamps_{index}'] = np.frombuffer(
+              metric_series.timestamps, dtype=np.int64
+          )
+          arrays[f'values_{index}'] = np.frombuffer(
+              metric_series.values, dtype=np.float64
+          )
+        np.savez_compressed(columnar_file, **arrays)
+
+      for index, (name, metric_series) in enumerate(series.items()):
+        if columnar_file:
+          timestamps, values = _Downsample(metric_series, _SUMMARY_POINTS.value)
+          metadata = {
+              'values': [str(value) for value in values.tolist()],
+              'timestamps': [str(ts) for ts in timestamps.tolist()],
+              'num_points': len(metric_series.values),
+              'columnar_file': columnar_file,
+              'columnar_index': index,
+          }
+        else:
+          metadata = raw_points[name]
+        metadata['unit'] = metric_series.unit
+        metadata['vm_role'] = role
         if _HIDE_LOGGING.value:
-          value[sample.DISABLE_CONSOLE_LOG] = True
+          metadata[sample.DISABLE_CONSOLE_LOG] = True
         samples.append(
             sample.Sample(
-                metric=key, value=-1, unit=value['unit'], metadata=value
+                metric=name,
+                value=-1,
+                unit=metric_series.unit,
+                metadata=metadata,
             )
         )
+        if _AGGREGATE_METRICS.value:
+          samples.extend(
+              _AggregateSamples(name, metric_series, {'vm_role': role})
+          )
 
     background_tasks.RunThreaded(
         _Analyze, [((k, w), {}) for k, w in self._role_mapping.items()]
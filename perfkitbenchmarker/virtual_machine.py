@@ -24,11 +24,14 @@ import copy
 import enum
 import logging
 import os.path
+import posixpath
 import threading
 import typing
 from typing import Any, Dict
 
 from absl import flags
+from perfkitbenchmarker import artifact_cache
+from perfkitbenchmarker import background_tasks
 from perfkitbenchmarker import benchmark_lookup
 from perfkitbenchmarker import data
 from perfkitbenchmarker import disk
@@ -116,6 +119,16 @@ flags.DEFINE_bool(
     'Ignore checksum verification for preprovisioned data. '
     'Not recommended, please use with caution',
 )
+_PREPROVISIONED_DATA_DISTRIBUTION = flags.DEFINE_enum(
+    'preprovisioned_data_distribution',
+    'independent',
+    ['independent', 'tree'],
+    'How preprovisioned data is installed on a group of VMs. "independent" '
+    'installs it on every VM from its source. "tree" installs it on one VM '
+    'and then copies it VM to VM, doubling the number of VMs that have it in '
+    'each round, so installing on N VMs takes log2(N) copies. Only used by '
+    'callers of InstallPreprovisioned*DataOnVms.',
+)
 flags.DEFINE_boolean(
     'connect_via_internal_ip',
     False,
@@ -960,6 +973,11 @@ class BaseVirtualMachine(os_mixin.BaseOsMixin, resource.BaseResource):
         self.DownloadPreprovisionedData(
             install_path, module_name, filename, timeout
         )
+      elif url and artifact_cache.ARTIFACT_CACHE.value:
+        self.PushFile(
+            artifact_cache.FetchUrl(url, sha256sum),
+            posixpath.join(install_path, os.path.basename(url)),
+        )
       elif url:
         self.Install('wget')
         file_name = os.path.basename(url)
@@ -1018,21 +1036,9 @@ class BaseVirtualMachine(os_mixin.BaseOsMixin, resource.BaseResource):
           not defined with preprovisioned data, or if the sha256sum hash in the
           code does not match the sha256sum of the file.
     """
-    benchmark_module = benchmark_lookup.BenchmarkModule(benchmark_name)
-    if not benchmark_module:
-      raise errors.Setup.BadPreprovisionedDataError(
-          'Cannot install preprovisioned data for undefined benchmark %s.'
-          % benchmark_name
-      )
-    try:
-      # TODO(user): Change BENCHMARK_DATA to PREPROVISIONED_DATA.
-      preprovisioned_data = benchmark_module.BENCHMARK_DATA
-    except AttributeError:
-      raise errors.Setup.BadPreprovisionedDataError(
-          'Benchmark %s does not define a BENCHMARK_DATA dict with '
-          'preprovisioned data.' % benchmark_name
-      )
-    fallback_url = getattr(benchmark_module, 'BENCHMARK_DATA_URL', {})
+    preprovisioned_data, fallback_url = _GetBenchmarkPreprovisionedData(
+        benchmark_name
+    )
     self._InstallData(
         preprovisioned_data,
         benchmark_name,
@@ -1081,20 +1087,9 @@ class BaseVirtualMachine(os_mixin.BaseOsMixin, resource.BaseResource):
           not defined with preprovisioned data, or if the sha256sum hash in the
           code does not match the sha256sum of the file.
     """
-    package_module = package_lookup.PackageModule(package_name)
-    if not package_module:
-      raise errors.Setup.BadPreprovisionedDataError(
-          'Cannot install preprovisioned data for undefined package %s.'
-          % package_name
-      )
-    try:
-      preprovisioned_data = package_module.PREPROVISIONED_DATA
-    except AttributeError:
-      raise errors.Setup.BadPreprovisionedDataError(
-          'Package %s does not define a PREPROVISIONED_DATA dict with '
-          'preprovisioned data.' % package_name
-      )
-    fallback_url = getattr(package_module, 'PACKAGE_DATA_URL', {})
+    preprovisioned_data, fallback_url = _GetPackagePreprovisionedData(
+        package_name
+    )
     self._InstallData(
         preprovisioned_data,
         package_name,
@@ -1224,3 +1219,166 @@ class BaseVirtualMachine(os_mixin.BaseOsMixin, resource.BaseResource):
 
 
 VirtualMachine = typing.TypeVar('VirtualMachine', bound=BaseVirtualMachine)
+
+
+def _GetBenchmarkPreprovisionedData(benchmark_name):
+  """Returns the preprovisioned data and fallback URLs of a benchmark."""
+  benchmark_module = benchmark_lookup.BenchmarkModule(benchmark_name)
+  if not benchmark_module:
+    raise errors.Setup.BadPreprovisionedDataError(
+        'Cannot install preprovisioned data for undefined benchmark %s.'
+        % benchmark_name
+    )
+  try:
+    # TODO(user): Change BENCHMARK_DATA to PREPROVISIONED_DATA.
+    preprovisioned_data = benchmark_module.BENCHMARK_DATA
+  except AttributeError:
+    raise errors.Setup.BadPreprovisionedDataError(
+        'Benchmark %s does not define a BENCHMARK_DATA dict with '
+        'preprovisioned data.' % benchmark_name
+    )
+  fallback_url = getattr(benchmark_module, 'BENCHMARK_DATA_URL', {})
+  return preprovisioned_data, fallback_url
+
+
+def _GetPackagePreprovisionedData(package_name):
+  """Returns the preprovisioned data and fallback URLs of a package."""
+  package_module = package_lookup.PackageModule(package_name)
+  if not package_module:
+    raise errors.Setup.BadPreprovisionedDataError(
+        'Cannot install preprovisioned data for undefined package %s.'
+        % package_name
+    )
+  try:
+    preprovisioned_data = package_module.PREPROVISIONED_DATA
+  except AttributeError:
+    raise errors.Setup.BadPreprovisionedDataError(
+        'Package %s does not define a PREPROVISIONED_DATA dict with '
+        'preprovisioned data.' % package_name
+    )
+  fallback_url = getattr(package_module, 'PACKAGE_DATA_URL', {})
+  return preprovisioned_data, fallback_url
+
+
+def InstallPreprovisionedBenchmarkDataOnVms(
+    vms,
+    benchmark_name,
+    filenames,
+    install_path,
+    timeout=PREPROVISIONED_DATA_TIMEOUT,
+):
+  """Installs preprovisioned benchmark data on a group of VMs.
+
+  See BaseVirtualMachine.InstallPreprovisionedBenchmarkData and
+  --preprovisioned_data_distribution.
+
+  Args:
+    vms: The VMs to install the data on.
+    benchmark_name: The name of the benchmark defining the preprovisioned data.
+    filenames: An iterable of preprovisioned data filenames.
+    install_path: The path to download the data file on every VM.
+    timeout: The timeout for downloading the data file.
+  """
+  preprovisioned_data, _ = _GetBenchmarkPreprovisionedData(benchmark_name)
+  _InstallDataOnVms(
+      vms,
+      lambda vm: vm.InstallPreprovisionedBenchmarkData(
+          benchmark_name, filenames, install_path, timeout
+      ),
+      preprovisioned_data,
+      benchmark_name,
+      filenames,
+      install_path,
+  )
+
+
+def InstallPreprovisionedPackageDataOnVms(
+    vms,
+    package_name,
+    filenames,
+    install_path,
+    timeout=PREPROVISIONED_DATA_TIMEOUT,
+):
+  """Installs preprovisioned package data on a group of VMs.
+
+  See BaseVirtualMachine.InstallPreprovisionedPackageData and
+  --preprovisioned_data_distribution.
+
+  Args:
+    vms: The VMs to install the data on.
+    package_name: The name of the package defining the preprovisioned data.
+    filenames: An iterable of preprovisioned data filenames.
+    install_path: The path to download the data file on every VM.
+    timeout: The timeout for downloading the data file.
+  """
+  preprovisioned_data, _ = _GetPackagePreprovisionedData(package_name)
+  _InstallDataOnVms(
+      vms,
+      lambda vm: vm.InstallPreprovisionedPackageData(
+          package_name, filenames, install_path, timeout
+      ),
+      preprovisioned_data,
+      package_name,
+      filenames,
+      install_path,
+  )
+
+
+def _InstallDataOnVms(
+    vms, install, preprovisioned_data, module_name, filenames, install_path
+):
+  """Installs data on the first VM, then copies it to the others in a tree.
+
+  Args:
+    vms: The VMs to install the data on.
+    install: Installs the data on one VM from its source.
+    preprovisioned_data: The dict mapping filenames to sha256sum hashes.
+    module_name: The name of the module defining the preprovisioned data.
+    filenames: An iterable of preprovisioned data filenames.
+    install_path: The path to download the data file on every VM.
+  """
+  vms = list(vms)
+  filenames = list(filenames)
+  if (
+      _PREPROVISIONED_DATA_DISTRIBUTION.value == 'independent'
+      or len(vms) < 2
+      or any(vm.OS_TYPE not in os_types.LINUX_OS_TYPES for vm in vms)
+  ):
+    background_tasks.RunThreaded(install, vms)
+    return
+
+  install(vms[0])
+  sources, targets = vms[:1], vms[1:]
+  while targets:
+    hops = list(zip(sources, targets))
+    background_tasks.RunThreaded(
+        _CopyPreprovisionedData,
+        [
+            (
+                (source, target),
+                {
+                    'preprovisioned_data': preprovisioned_data,
+                    'module_name': module_name,
+                    'filenames': filenames,
+                    'install_path': install_path,
+                },
+            )
+            for source, target in hops
+        ],
+    )
+    sources += [target for _, target in hops]
+    targets = targets[len(hops) :]
+
+
+def _CopyPreprovisionedData(
+    source, target, preprovisioned_data, module_name, filenames, install_path
+):
+  """Copies installed data from one VM to another and verifies it."""
+  target.RemoteCommand(f'mkdir -p {install_path}')
+  for filename in filenames:
+    path = posixpath.join(install_path, filename)
+    source.MoveFile(target, path, path)
+    if not FLAGS.preprovision_ignore_checksum:
+      target.CheckPreprovisionedData(
+          install_path, module_name, filename, preprovisioned_data.get(filename)
+      )
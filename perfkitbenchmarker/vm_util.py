@@ -15,7 +15,9 @@
 """Set of utility functions for working with virtual machines."""
 
 
+import asyncio
 import contextlib
+import dataclasses
 import enum
 import logging
 import os
@@ -28,7 +30,7 @@ import subprocess
 import tempfile
 import threading
 import time
-from typing import Callable, Dict, Iterable, Tuple
+from typing import Any, Callable, Dict, Hashable, Iterable, Sequence, Tuple
 
 from absl import flags
 import jinja2
@@ -558,47 +560,271 @@ def IssueCommand(
     if should_time:
       timing_output = tf_timing.read().rstrip('\n')
 
+  return _CheckIssueCommandResult(
+      full_cmd,
+      stdout,
+      stderr,
+      process.returncode,
+      timing_output=timing_output,
+      did_timeout=did_timeout.value,
+      was_killed=was_killed.value,
+      timeout=timeout,
+      raise_on_failure=raise_on_failure,
+      suppress_failure=suppress_failure,
+      suppress_logging=suppress_logging,
+      raise_on_timeout=raise_on_timeout,
+      stack_level=stack_level,
+  )
+
+
+def _CheckIssueCommandResult(
+    full_cmd: str,
+    stdout: str,
+    stderr: str,
+    retcode: int,
+    timing_output: str = '',
+    did_timeout: bool = False,
+    was_killed: bool = False,
+    timeout: float | None = None,
+    raise_on_failure: bool = True,
+    suppress_failure: Callable[[str, str, int], bool] | None = None,
+    suppress_logging: bool = False,
+    raise_on_timeout: bool = True,
+    stack_level: int = 1,
+) -> Tuple[str, str, int]:
+  """Logs the result of a command and applies the IssueCommand semantics.
+
+  Args:
+    full_cmd: The command as logged.
+    stdout: What the command wrote to stdout.
+    stderr: What the command wrote to stderr.
+    retcode: The return code of the command.
+    timing_output: Resource usage of the command, appended to the log.
+    did_timeout: Whether the command hit its timeout.
+    was_killed: Whether the command was killed after hitting its timeout.
+    timeout: The timeout of the command in seconds.
+    raise_on_failure: See IssueCommand.
+    suppress_failure: See IssueCommand.
+    suppress_logging: See IssueCommand.
+    raise_on_timeout: See IssueCommand.
+    stack_level: Number of stack frames to skip & get an "interesting" caller,
+      for logging. 1 skips this function, 2 skips this & its caller, etc..
+
+  Returns:
+    A tuple of stdout, stderr, and retcode, see IssueCommand.
+
+  Raises:
+    IssueCommandError: When raise_on_failure=True and retcode is non-zero.
+    IssueCommandTimeoutError: When raise_on_timeout=True and did_timeout.
+  """
   logged_stdout = '[REDACTED]' if suppress_logging else stdout
   logged_stderr = '[REDACTED]' if suppress_logging else stderr
   debug_text = 'Ran: {%s}\nReturnCode:%s%s\nSTDOUT: %s\nSTDERR: %s' % (
       full_cmd,
-      process.returncode,
+      retcode,
       timing_output,
       logged_stdout,
       logged_stderr,
   )
   if _VM_COMMAND_LOG_MODE.value == VmCommandLogMode.ALWAYS_LOG or (
-      _VM_COMMAND_LOG_MODE.value == VmCommandLogMode.LOG_ON_ERROR
-      and process.returncode
+      _VM_COMMAND_LOG_MODE.value == VmCommandLogMode.LOG_ON_ERROR and retcode
   ):
-    logger.info(debug_text, stacklevel=stack_level)
+    logger.info(debug_text, stacklevel=stack_level + 1)
 
   # Raise timeout error regardless of raise_on_failure - as the intended
   # semantics is to ignore expected errors caused by invoking the command
   # not errors from PKB infrastructure.
-  if did_timeout.value and raise_on_timeout:
+  if did_timeout and raise_on_timeout:
     debug_text = (
         '{}\nIssueCommand timed out after {} seconds.  '
         '{} by perfkitbenchmarker.'.format(
             debug_text,
             timeout,
             'Process was killed'
-            if was_killed.value
+            if was_killed
             else 'Process may have been killed',
         )
     )
     raise errors.VmUtil.IssueCommandTimeoutError(debug_text)
-  elif process.returncode and (raise_on_failure or suppress_failure):
-    if suppress_failure and suppress_failure(
-        stdout, stderr, process.returncode
-    ):
+  elif retcode and (raise_on_failure or suppress_failure):
+    if suppress_failure and suppress_failure(stdout, stderr, retcode):
       # failure is suppressible, rewrite the stderr and return code as passing
       # since some callers assume either is a failure e.g.
       # perfkitbenchmarker.providers.aws.util.IssueRetryableCommand()
       return stdout, '', 0
     raise errors.VmUtil.IssueCommandError(debug_text)
 
-  return stdout, stderr, process.returncode
+  return stdout, stderr, retcode
+
+
+MAX_CONCURRENT_COMMANDS = flags.DEFINE_integer(
+    'max_concurrent_commands',
+    256,
+    'The maximum number of commands that vm_util.IssueCommands runs at once. '
+    'Each running command holds three file descriptors.',
+    lower_bound=1,
+)
+
+# How long to keep reading the output of a command after it exited, e.g. while
+# a process it started in the background still holds its stdout.
+_OUTPUT_DRAIN_TIMEOUT = 1
+
+
+@dataclasses.dataclass
+class BatchCommand:
+  """A command run by IssueCommands.
+
+  Attributes:
+    cmd: A list of strings such as is given to the subprocess.Popen()
+      constructor.
+    target: What the command acts on, e.g. a VM. At most
+      max_concurrency_per_target commands of a target run at once.
+    env: See IssueCommand.
+    timeout: See IssueCommand.
+    cwd: See IssueCommand.
+    should_pre_log: See IssueCommand.
+    raise_on_failure: See IssueCommand.
+    suppress_failure: See IssueCommand.
+    suppress_logging: See IssueCommand.
+    raise_on_timeout: See IssueCommand.
+  """
+
+  cmd: list[str]
+  target: Hashable | None = None
+  env: Dict[str, str] | None = None
+  timeout: float | None = DEFAULT_TIMEOUT
+  cwd: str | None = None
+  should_pre_log: bool = True
+  raise_on_failure: bool = True
+  suppress_failure: Callable[[str, str, int], bool] | None = None
+  suppress_logging: bool = False
+  raise_on_timeout: bool = True
+
+
+def IssueCommands(
+    commands: Sequence[BatchCommand],
+    max_concurrency: int | None = None,
+    max_concurrency_per_target: int | None = None,
+    return_exceptions: bool = False,
+) -> list[Any]:
+  """Runs many commands concurrently on an event loop.
+
+  Unlike IssueCommand in background_tasks.RunThreaded, this needs no thread per
+  command and captures output in memory rather than in temporary files, so it
+  scales to thousands of commands. Commands are not run in a shell or with
+  /usr/bin/time, and their stdin is empty.
+
+  Args:
+    commands: The commands to run.
+    max_concurrency: The maximum number of commands to run at once. Defaults to
+      --max_concurrent_commands.
+    max_concurrency_per_target: If set, the maximum number of commands with the
+      same target to run at once.
+    return_exceptions: Whether to return the exceptions IssueCommand would have
+      raised in place of the results of their commands.
+
+  Returns:
+    A tuple of stdout, stderr, and retcode, see IssueCommand, for each command
+    in order.
+
+  Raises:
+    IssueCommandError: When a command fails as in IssueCommand. All commands
+      finish before the first error in command order is raised.
+    IssueCommandTimeoutError: When a command times out as in IssueCommand.
+  """
+  if max_concurrency is None:
+    max_concurrency = MAX_CONCURRENT_COMMANDS.value
+  results = asyncio.run(
+      _IssueCommands(commands, max_concurrency, max_concurrency_per_target)
+  )
+  if not return_exceptions:
+    for result in results:
+      if isinstance(result, BaseException):
+        raise result
+  return results
+
+
+async def _IssueCommands(
+    commands: Sequence[BatchCommand],
+    max_concurrency: int,
+    max_concurrency_per_target: int | None,
+) -> list[Any]:
+  """Runs the commands within the concurrency limits."""
+  limit = asyncio.Semaphore(max_concurrency)
+  target_limits = {}
+  if max_concurrency_per_target:
+    for command in commands:
+      if command.target not in target_limits:
+        target_limits[command.target] = asyncio.Semaphore(
+            max_concurrency_per_target
+        )
+
+  async def _IssueWithinLimits(command: BatchCommand):
+    async with contextlib.AsyncExitStack() as stack:
+      # Wait for the target first, so waiting commands hold no global slot.
+      if command.target in target_limits:
+        await stack.enter_async_context(target_limits[command.target])
+      await stack.enter_async_context(limit)
+      return await _IssueBatchCommand(command)
+
+  return await asyncio.gather(
+      *(_IssueWithinLimits(command) for command in commands),
+      return_exceptions=True,
+  )
+
+
+async def _ReadStream(stream: asyncio.StreamReader, chunks: list[bytes]):
+  while chunk := await stream.read(1 << 16):
+    chunks.append(chunk)
+
+
+async def _IssueBatchCommand(command: BatchCommand) -> Tuple[str, str, int]:
+  """Runs a single command with the IssueCommand semantics."""
+  full_cmd = ' '.join(str(w) for w in command.cmd)
+  if command.should_pre_log:
+    logger.info('Running: %s', full_cmd)
+  process = await asyncio.create_subprocess_exec(
+      *command.cmd,
+      stdin=asyncio.subprocess.DEVNULL,
+      stdout=asyncio.subprocess.PIPE,
+      stderr=asyncio.subprocess.PIPE,
+      env=command.env,
+      cwd=command.cwd,
+  )
+  stdout_chunks, stderr_chunks = [], []
+  readers = [
+      asyncio.create_task(_ReadStream(process.stdout, stdout_chunks)),
+      asyncio.create_task(_ReadStream(process.stderr, stderr_chunks)),
+  ]
+  did_timeout = False
+  try:
+    await asyncio.wait_for(process.wait(), command.timeout)
+  except asyncio.TimeoutError:
+    did_timeout = True
+    if not command.raise_on_timeout:
+      logger.warning(
+          'IssueCommand timed out after %d seconds. Killing command "%s".',
+          command.timeout,
+          full_cmd,
+      )
+    process.kill()
+    await process.wait()
+  _, pending = await asyncio.wait(readers, timeout=_OUTPUT_DRAIN_TIMEOUT)
+  for reader in pending:
+    reader.cancel()
+  return _CheckIssueCommandResult(
+      full_cmd,
+      b''.join(stdout_chunks).decode('ascii', 'ignore'),
+      b''.join(stderr_chunks).decode('ascii', 'ignore'),
+      process.returncode,
+      did_timeout=did_timeout,
+      was_killed=did_timeout,
+      timeout=command.timeout,
+      raise_on_failure=command.raise_on_failure,
+      suppress_failure=command.suppress_failure,
+      suppress_logging=command.suppress_logging,
+      raise_on_timeout=command.raise_on_timeout,
+  )
 
 
 def IssueBackgroundCommand(cmd, stdout_path, stderr_path, env=None):
@@ -14,7 +14,8 @@
 """Contains package imports and a dictionary of package names and modules.
 
 All modules within this package are considered packages, and are loaded
-dynamically. Add non-package code to other packages.
+lazily when they are first looked up in PACKAGES. Add non-package code to
+other packages.
 
 Packages should, at a minimum, define an install function (Install(vm)).
 If the package manually places files in locations other than the VM's temp
@@ -23,17 +24,5 @@ directory, then it also needs to define an uninstall function (Uninstall(vm)).
 
 from perfkitbenchmarker import import_util
 
-
-def _LoadPackages():
-  """Imports all package modules and returns a dictionary of packages.
-
-  This imports all package modules in this directory and then creates a
-  mapping from module names to the modules themselves and returns it.
-  """
-  return {
-      module.__name__.split('.')[-1]: module
-      for module in import_util.LoadModulesForPath(__path__, __name__)
-  }
-
-
-PACKAGES = _LoadPackages()
+# Package modules are only imported when a VM installs them.
+PACKAGES = import_util.LazyModuleRegistry(__path__, __name__)
@@ -0,0 +1,141 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.artifact_cache."""
+
+import hashlib
+import os
+import subprocess
+import tarfile
+import unittest
+
+from absl.testing import flagsaver
+import mock
+from perfkitbenchmarker import artifact_cache
+from perfkitbenchmarker import errors
+from perfkitbenchmarker import temp_dir
+from tests import pkb_common_test_case
+
+_CONTENT = b'artifact'
+_SHA256 = hashlib.sha256(_CONTENT).hexdigest()
+
+
+class ArtifactCacheTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.temp_dir = self.create_tempdir()
+    self.enter_context(flagsaver.flagsaver(temp_dir=self.temp_dir.full_path))
+    self.response = mock.MagicMock()
+    self.response.__enter__.return_value = self.response
+    self.response.iter_content.return_value = [_CONTENT[:3], _CONTENT[3:]]
+    self.get = self.enter_context(
+        mock.patch.object(
+            artifact_cache.requests, 'get', return_value=self.response
+        )
+    )
+
+  def testFileSha256(self):
+    path = self.temp_dir.create_file('file', content=_CONTENT).full_path
+    self.assertEqual(artifact_cache.FileSha256(path), _SHA256)
+
+  def testFetchUrlDownloadsOnce(self):
+    path = artifact_cache.FetchUrl('https://example.com/a.tgz', _SHA256)
+    self.assertEqual(os.path.basename(path), _SHA256)
+    with open(path, 'rb') as f:
+      self.assertEqual(f.read(), _CONTENT)
+    self.assertEqual(
+        artifact_cache.FetchUrl('https://example.com/b.tgz', _SHA256), path
+    )
+    self.get.assert_called_once()
+
+  def testFetchUrlWithoutChecksumIsKeyedByUrl(self):
+    first = artifact_cache.FetchUrl('https://example.com/a.tgz')
+    second = artifact_cache.FetchUrl('https://example.com/b.tgz')
+    self.assertNotEqual(first, second)
+    self.assertEqual(self.get.call_count, 2)
+
+  def testFetchUrlChecksumMismatch(self):
+    with self.assertRaises(errors.Setup.BadPreprovisionedDataError):
+      artifact_cache.FetchUrl('https://example.com/a.tgz', 'bad_sum')
+    self.assertEqual(
+        os.listdir(os.path.join(self.temp_dir.full_path, 'artifacts')), []
+    )
+
+  @flagsaver.flagsaver(artifact_cache_max_gb=16 / (1 << 30))
+  def testEvictsLeastRecentlyUsedFiles(self):
+    cache_dir = os.path.join(self.temp_dir.full_path, 'artifacts')
+    os.makedirs(cache_dir)
+    for i, name in enumerate(['old', 'recent']):
+      path = os.path.join(cache_dir, name)
+      with open(path, 'wb') as f:
+        f.write(b'12345678')
+      os.utime(path, (i, i))
+
+    path = artifact_cache.FetchUrl('https://example.com/a.tgz', _SHA256)
+
+    self.assertCountEqual(os.listdir(cache_dir), ['recent', _SHA256])
+    self.assertEqual(
+        artifact_cache.FetchUrl('https://example.com/a.tgz', _SHA256), path
+    )
+
+  @flagsaver.flagsaver(artifact_cache_max_gb=24 / (1 << 30))
+  def testRemoteEvictCommand(self):
+    cache_dir = self.temp_dir.mkdir(artifact_cache.REMOTE_CACHE_DIR)
+    for i, name in enumerate(['old', 'recent', 'new', 'new.partial-1']):
+      path = cache_dir.create_file(name, content='12345678').full_path
+      os.utime(path, (i, i))
+
+    subprocess.run(
+        ['bash', '-c', artifact_cache.RemoteEvictCommand('old')],
+        cwd=self.temp_dir.full_path,
+        check=True,
+    )
+
+    self.assertCountEqual(
+        os.listdir(cache_dir.full_path), ['old', 'new', 'new.partial-1']
+    )
+
+  def testCreateTarballWithoutCache(self):
+    script = self.create_tempfile('script.sh', content='echo').full_path
+
+    tarball = artifact_cache.CreateTarball([script])
+
+    self.assertStartsWith(tarball, temp_dir.GetRunDirPath())
+    self.assertNotEqual(artifact_cache.CreateTarball([script]), tarball)
+    with tarfile.open(tarball) as tar:
+      self.assertEqual(tar.getnames(), ['script.sh'])
+
+  @flagsaver.flagsaver(artifact_cache=True)
+  def testCreateTarball(self):
+    source = self.create_tempdir()
+    script = source.create_file('script.sh', content='echo').full_path
+    directory = os.path.join(source.full_path, 'configs')
+    self.create_tempfile(os.path.join(directory, 'a.cfg'), content='a')
+
+    tarball = artifact_cache.CreateTarball([script, directory + '/'])
+
+    with tarfile.open(tarball) as tar:
+      self.assertCountEqual(
+          tar.getnames(), ['script.sh', 'configs', 'configs/a.cfg']
+      )
+    self.assertEqual(artifact_cache.CreateTarball([script, directory]), tarball)
+    with open(script, 'w') as f:
+      f.write('echo changed')
+    self.assertNotEqual(
+        artifact_cache.CreateTarball([script, directory]), tarball
+    )
+
+
+if __name__ == '__main__':
+  unittest.main()
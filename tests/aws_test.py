@@ -26,6 +26,7 @@ from perfkitbenchmarker import context
 from perfkitbenchmarker import disk
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import provider_info
+from perfkitbenchmarker import status_poller
 from perfkitbenchmarker import vm_util
 from perfkitbenchmarker.configs import benchmark_config_spec
 from perfkitbenchmarker.providers.aws import aws_disk
@@ -374,6 +375,28 @@ class AwsVirtualMachineTestCase(pkb_common_test_case.PkbCommonTestCase):
     util.IssueRetryableCommand.side_effect = [(self.response, None)]
     self.assertTrue(self.vm._Exists())
 
+  @flagsaver.flagsaver(coalesce_status_polling=True, status_polling_interval=0)
+  def testInstancePresentCoalescesStatusPolling(self):
+    self.enter_context(mock.patch.dict(status_poller._pollers, clear=True))
+    response = json.loads(self.response)
+    reservation = response['Reservations'][0]
+    instance = reservation['Instances'][0]
+    reservation['Instances'] = [
+        dict(instance, ClientToken='other-token'),
+        dict(instance, ClientToken=self.vm.client_token),
+    ]
+    util.IssueRetryableCommand.side_effect = [(json.dumps(response), None)]
+
+    self.assertTrue(self.vm._Exists())
+
+    util.IssueRetryableCommand.assert_called_once_with(
+        _AwsCommand(
+            'us-east-1',
+            'describe-instances',
+            '--filter=Name=client-token,Values=' + self.vm.client_token,
+        )
+    )
+
   @parameterized.named_parameters(
       {
           'testcase_name': 'vpcu_quota_exceeded',
@@ -20,8 +20,10 @@ import os
 import signal
 import threading
 import unittest
+from unittest import mock
 
 from perfkitbenchmarker import background_tasks
+from perfkitbenchmarker import context
 from perfkitbenchmarker import errors
 from tests import pkb_common_test_case
 
@@ -48,6 +50,10 @@ def _WaitAndAppendInt(int_list, int_to_append, event=None, timeout=None):
   int_list.append(int_to_append)
 
 
+def _GetThreadBenchmarkSpec():
+  return context.GetThreadBenchmarkSpec()
+
+
 class Counter:
 
   def __init__(self):
@@ -138,6 +144,66 @@ class RunParallelThreadsTestCase(pkb_common_test_case.PkbCommonTestCase):
       background_tasks.RunParallelThreads(calls, max_concurrency=2)
     self.assertEqual(int_list, [1])
 
+  def testReusesThreadsAcrossCalls(self):
+    calls = [(threading.get_ident, (), {})] * 4
+    first = background_tasks.RunParallelThreads(calls, max_concurrency=4)
+    second = background_tasks.RunParallelThreads(calls, max_concurrency=4)
+    self.assertEqual(set(first), set(second))
+    self.assertNotIn(threading.get_ident(), first)
+
+  def testPropagatesBenchmarkSpec(self):
+    context.SetThreadBenchmarkSpec('spec')
+    self.addCleanup(context.SetThreadBenchmarkSpec, None)
+    calls = [(_GetThreadBenchmarkSpec, (), {})] * 2
+    result = background_tasks.RunParallelThreads(calls, max_concurrency=2)
+    self.assertEqual(result, ['spec', 'spec'])
+
+
+class BackgroundTaskTestCase(pkb_common_test_case.PkbCommonTestCase):
+
+  def testRecordsQueueWaitAndRunTime(self):
+    task = background_tasks._BackgroundTask(
+        _ReturnArgs, ('a',), {}, None, queued_time=0
+    )
+    task.Run()
+    self.assertEqual(task.return_value, (None, 'a'))
+    self.assertGreater(task.queue_wait_time, 0)
+    self.assertGreaterEqual(task.run_time, 0)
+
+  def testLogTaskTimings(self):
+    tasks = []
+    for queued_time, start_time, end_time in ((0, 1, 4), (0, 3, 5), (2, 2, 3)):
+      task = background_tasks._BackgroundTask(
+          _ReturnArgs, (), {}, None, queued_time=queued_time
+      )
+      task.start_time = start_time
+      task.end_time = end_time
+      tasks.append(task)
+    unfinished = background_tasks._BackgroundTask(
+        _ReturnArgs, (), {}, None, queued_time=0
+    )
+    debug = self.enter_context(
+        mock.patch.object(background_tasks.logging, 'debug')
+    )
+
+    background_tasks._LogTaskTimings(tasks + [unfinished])
+
+    debug.assert_called_once_with(mock.ANY, 3, 4 / 3, 3, 2, 3)
+
+  def testLogTaskTimingsSkipsSingleTasks(self):
+    task = background_tasks._BackgroundTask(
+        _ReturnArgs, (), {}, None, queued_time=0
+    )
+    task.start_time = 1
+    task.end_time = 2
+    debug = self.enter_context(
+        mock.patch.object(background_tasks.logging, 'debug')
+    )
+
+    background_tasks._LogTaskTimings([task])
+
+    debug.assert_not_called()
+
 
 class RunThreadedTestCase(pkb_common_test_case.PkbCommonTestCase):
 
@@ -189,6 +255,34 @@ class RunParallelProcessesTestCase(pkb_common_test_case.PkbCommonTestCase):
     # RunParallelProcesses does not gurantee the tasks are run in order.
     self.assertLessEqual(counter.value, 2, 'Unexpected counter value')
 
+  def testPropagatesBenchmarkSpec(self):
+    context.SetThreadBenchmarkSpec('spec')
+    self.addCleanup(context.SetThreadBenchmarkSpec, None)
+    calls = [(_GetThreadBenchmarkSpec, (), {})] * 3
+    result = background_tasks.RunParallelProcesses(calls, max_concurrency=2)
+    self.assertEqual(result, ['spec', 'spec', 'spec'])
+
+  def testPropagatesBenchmarkSpecOfEachCall(self):
+    self.addCleanup(context.SetThreadBenchmarkSpec, None)
+    calls = [(_GetThreadBenchmarkSpec, (), {})] * 2
+    context.SetThreadBenchmarkSpec('spec1')
+    background_tasks.RunParallelProcesses(calls, max_concurrency=2)
+    context.SetThreadBenchmarkSpec('spec2')
+    result = background_tasks.RunParallelProcesses(calls, max_concurrency=2)
+    self.assertEqual(result, ['spec2', 'spec2'])
+
+  def testReusesProcessesAcrossCalls(self):
+    pool = background_tasks._ProcessExecutorPool()
+    self.addCleanup(pool.Shutdown)
+    self.enter_context(
+        mock.patch.object(background_tasks, '_PROCESS_EXECUTOR_POOL', pool)
+    )
+    calls = [(os.getpid, (), {})]
+    first = background_tasks.RunParallelProcesses(calls, max_concurrency=1)
+    second = background_tasks.RunParallelProcesses(calls, max_concurrency=1)
+    self.assertEqual(first, second)
+    self.assertNotEqual(first, [os.getpid()])
+
 
 if __name__ == '__main__':
   unittest.main()
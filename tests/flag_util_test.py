@@ -16,9 +16,12 @@
 
 import sys
 import unittest
+from unittest import mock
 
 from absl import flags
+from perfkitbenchmarker import errors
 from perfkitbenchmarker import flag_util
+from perfkitbenchmarker import import_util
 from perfkitbenchmarker import units
 from perfkitbenchmarker import virtual_machine
 
@@ -314,6 +317,32 @@ class OverrideFlagsTestCase(unittest.TestCase):
       self.assertFlagState(flag_values, 2, True)
       self.assertEqual(flag_values_overrides['test_flag'], 1)
 
+  @mock.patch.object(import_util, 'LoadModulesDefiningFlags')
+  def testLoadsModulesDefiningFlagsByComputedNames(self, _):
+    flag_values = flags.FlagValues()
+    flag_values([sys.argv[0]])
+
+    def _LoadAll():
+      flags.DEFINE_integer(
+          'test_flag', 0, 'Test flag.', flag_values=flag_values
+      )
+
+    with mock.patch.object(
+        import_util, 'LoadAllLazyModules', side_effect=_LoadAll
+    ) as load_all:
+      with flag_util.OverrideFlags(flag_values, {'test_flag': 1}):
+        self.assertFlagState(flag_values, 1, True)
+    load_all.assert_called_once()
+
+  @mock.patch.object(import_util, 'LoadModulesDefiningFlags')
+  @mock.patch.object(import_util, 'LoadAllLazyModules')
+  def testUnknownFlag(self, *_):
+    flag_values = flags.FlagValues()
+    flag_values([sys.argv[0]])
+    with self.assertRaises(errors.Config.UnrecognizedOption):
+      with flag_util.OverrideFlags(flag_values, {'test_flag': 1}):
+        pass
+
 
 class TestUnitsParser(unittest.TestCase):
 
@@ -18,18 +18,23 @@ import builtins
 import contextlib
 import copy
 import json
+import os
 import re
+import textwrap
+import threading
 import unittest
 
 from absl import flags
 from absl.testing import flagsaver
 from absl.testing import parameterized
 import mock
+from perfkitbenchmarker import background_tasks
 from perfkitbenchmarker import benchmark_spec
 from perfkitbenchmarker import context
 from perfkitbenchmarker import errors
 from perfkitbenchmarker import os_types
 from perfkitbenchmarker import provider_info
+from perfkitbenchmarker import status_poller
 from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker import vm_util
 from perfkitbenchmarker.configs import benchmark_config_spec
@@ -383,6 +388,56 @@ class GceVirtualMachineTestCase(pkb_common_test_case.PkbCommonTestCase):
     with PatchCriticalObjects(fake_rets):
       self.assertEqual(vm._Exists(), expected)
 
+  @flagsaver.flagsaver(
+      coalesce_status_polling=True, status_polling_interval=0.5
+  )
+  def testExistsCoalescesStatusPolling(self):
+    # A fake gcloud that logs its arguments and lists two instances.
+    gcloud = os.path.join(self.create_tempdir().full_path, 'gcloud')
+    self.create_tempfile(
+        gcloud,
+        content=textwrap.dedent("""\
+            #!/usr/bin/env python3
+            import json, sys
+            with open(__file__ + '.log', 'a') as log:
+              log.write(json.dumps(sys.argv[1:]) + '\\n')
+            print(json.dumps([
+                {'name': 'vm-a', 'status': 'RUNNING'},
+                {'name': 'vm-b', 'status': 'TERMINATED'},
+            ]))
+            """),
+    )
+    os.chmod(gcloud, 0o755)
+    self.enter_context(flagsaver.flagsaver(gcloud_path=gcloud))
+    self.enter_context(mock.patch.dict(status_poller._pollers, clear=True))
+    spec = gce_virtual_machine.GceVmSpec(
+        _COMPONENT, machine_type='test_machine_type', project='p', zone='z'
+    )
+    names = ['vm-a', 'vm-b', 'vm-c']
+    vms = []
+    for name in names:
+      vm = pkb_common_test_case.TestGceVirtualMachine(spec)
+      vm.name = name
+      vms.append(vm)
+    # The VMs start polling together, as when they are created in parallel.
+    barrier = threading.Barrier(len(vms))
+
+    def _Exists(vm):
+      barrier.wait(10)
+      return vm._Exists()
+
+    exists = background_tasks.RunThreaded(_Exists, vms)
+
+    self.assertEqual(exists, [True, False, False])
+    with open(gcloud + '.log') as f:
+      calls = [json.loads(line) for line in f]
+    self.assertLen(calls, 1)
+    (call,) = calls
+    self.assertEqual(call[:3], ['compute', 'instances', 'list'])
+    self.assertEqual(call[call.index('--filter') + 1], 'name=(vm-a vm-b vm-c)')
+    self.assertEqual(call[call.index('--zones') + 1], 'z')
+    self.assertEqual(call[call.index('--project') + 1], 'p')
+
 
 def _CreateFakeDiskMetadata(image, fake_disk):
   fake_disk = copy.copy(fake_disk)
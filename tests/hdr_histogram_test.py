@@ -0,0 +1,96 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.hdr_histogram."""
+
+import unittest
+
+from perfkitbenchmarker import hdr_histogram
+
+# Encoded by the reference implementation after recording the values 100, 200,
+# 300, 1000, 50000 and 123456 in a histogram with 3 significant figures.
+_ENCODED = (
+    'HISTFAAAAC94nJNpmSzMwMAgxAABzFCaEURcm7yEwf4DROA4I9NRMPrKxfQwgum2KBMA2+kKIQ=='
+)
+
+
+class HdrHistogramTest(unittest.TestCase):
+
+  def testDecodeMatchesRecordedValues(self):
+    expected = hdr_histogram.HdrHistogram(1, 3600 * 1000 * 1000, 3)
+    for value in (100, 200, 300, 1000, 50000, 123456):
+      expected.RecordValue(value)
+    actual = hdr_histogram.HdrHistogram.FromBase64(_ENCODED)
+    self.assertEqual(actual.significant_figures, 3)
+    self.assertEqual(actual.total_count, 6)
+    self.assertEqual(actual.counts.tolist(), expected.counts.tolist())
+
+  def testValuesAtPercentiles(self):
+    histogram = hdr_histogram.HdrHistogram.FromBase64(_ENCODED)
+    self.assertEqual(
+        histogram.ValuesAtPercentiles([0, 50, 99, 100]),
+        # Values above 2048 are reported as the top of their bucket.
+        {0: 100, 50: 300, 99: 123519, 100: 123519},
+    )
+
+  def testNonZeroBuckets(self):
+    histogram = hdr_histogram.HdrHistogram()
+    histogram.RecordValue(5, count=3)
+    histogram.RecordValue(4000)
+    self.assertEqual(list(histogram.NonZeroBuckets()), [(5, 3), (4001, 1)])
+
+  def testAdd(self):
+    histogram1 = hdr_histogram.HdrHistogram()
+    histogram1.RecordValue(10)
+    histogram2 = hdr_histogram.HdrHistogram(highest_trackable_value=10**12)
+    histogram2.RecordValue(10**11, count=3)
+    histogram1.Add(histogram2)
+    self.assertEqual(histogram1.total_count, 4)
+    self.assertEqual(histogram1.ValuesAtPercentiles([25])[25], 10)
+    self.assertAlmostEqual(
+        histogram1.ValuesAtPercentiles([100])[100], 10**11, delta=10**8
+    )
+
+  def testAddDifferentPrecisionRaises(self):
+    with self.assertRaises(hdr_histogram.HdrHistogramError):
+      hdr_histogram.HdrHistogram(significant_figures=2).Add(
+          hdr_histogram.HdrHistogram(significant_figures=3)
+      )
+
+  def testEmptyPercentilesRaises(self):
+    with self.assertRaises(ValueError):
+      hdr_histogram.HdrHistogram().ValuesAtPercentiles([50])
+
+  def testParseIntervalLog(self):
+    log = '\n'.join([
+        '#[Histogram log format version 1.3]',
+        '#[StartTime: 1523565997.000 (seconds since epoch)]',
+        '"StartTimestamp","Interval_Length","Interval_Max",'
+        '"Interval_Compressed_Histogram"',
+        f'0.127,1.007,123.519,{_ENCODED}',
+        f'Tag=read,1.134,1.000,123.519,{_ENCODED}',
+    ])
+    histogram = hdr_histogram.ParseIntervalLog(log)
+    self.assertEqual(histogram.total_count, 12)
+
+  def testMalformedLineRaises(self):
+    with self.assertRaises(hdr_histogram.HdrHistogramError):
+      hdr_histogram.ParseIntervalLogLine('0.127,1.007,HISTFAAAAC94nJNp')
+
+  def testTruncatedHistogramRaises(self):
+    with self.assertRaises(hdr_histogram.HdrHistogramError):
+      hdr_histogram.HdrHistogram.FromBase64(_ENCODED[:40])
+
+
+if __name__ == '__main__':
+  unittest.main()
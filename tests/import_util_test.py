@@ -0,0 +1,227 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.import_util."""
+
+import importlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+from absl.testing import absltest
+import mock
+from perfkitbenchmarker import import_util
+
+_PACKAGE_COUNTER = itertools.count()
+
+_ALPHA = """
+from absl import flags
+flags.DEFINE_string('{prefix}_alpha', None, 'Alpha flag.')
+FLAGS = flags.FLAGS
+BENCHMARK_NAME = 'alpha'
+
+
+def Run():
+  return FLAGS.{prefix}_beta
+"""
+
+_BETA = """
+from absl import flags
+flags.DEFINE_integer(
+    name='{prefix}_beta', default=1, help='Beta flag.')
+BENCHMARK_NAME = "beta"
+"""
+
+_GAMMA = """
+BENCHMARK_NAME = 'gam' + 'ma'
+"""
+
+
+class LazyModuleRegistryTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.enter_context(mock.patch.object(import_util, '_lazy_registries', []))
+    # Flags and modules are process wide, so every test gets its own package.
+    self.package = 'pkb_lazy_test_%d' % next(_PACKAGE_COUNTER)
+    root = self.create_tempdir()
+    self.enter_context(
+        mock.patch.object(import_util, '_PACKAGE_PREFIX', self.package + '.')
+    )
+    self.enter_context(
+        mock.patch.object(sys, 'path', [root.full_path] + sys.path)
+    )
+    self.package_dir = os.path.join(root.full_path, self.package)
+    self._WriteModule('__init__', '')
+    self._WriteModule('alpha', _ALPHA)
+    self._WriteModule('beta', _BETA)
+    self._WriteModule('sub/__init__', '')
+    self._WriteModule('sub/gamma', _GAMMA)
+    self.package_module = __import__(self.package)
+
+  def _WriteModule(self, name, source):
+    path = os.path.join(self.package_dir, name + '.py')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+      f.write(source.format(prefix=self.package))
+
+  def _Registry(self, **kwargs):
+    return import_util.LazyModuleRegistry(
+        self.package_module.__path__, self.package, **kwargs
+    )
+
+  def _Imported(self, modname):
+    return f'{self.package}.{modname}' in sys.modules
+
+  def testIndexesWithoutImporting(self):
+    registry = self._Registry(name_attribute='BENCHMARK_NAME')
+    self.assertCountEqual(registry, ['alpha', 'beta', 'gamma'])
+    self.assertIn('alpha', registry)
+    self.assertNotIn('delta', registry)
+    self.assertFalse(self._Imported('alpha'))
+    self.assertFalse(self._Imported('beta'))
+    # Modules that compute their name are imported to read it.
+    self.assertTrue(self._Imported('sub.gamma'))
+
+  def testRegistersModuleNames(self):
+    registry = self._Registry()
+    self.assertCountEqual(registry, ['alpha', 'beta', 'gamma'])
+    self.assertEqual(registry['gamma'].BENCHMARK_NAME, 'gamma')
+
+  def testGetItemImportsModuleAndFlagDependencies(self):
+    registry = self._Registry(name_attribute='BENCHMARK_NAME')
+    module = registry['alpha']
+    self.assertEqual(module.__name__, f'{self.package}.alpha')
+    # alpha reads a flag defined by beta.
+    self.assertTrue(self._Imported('beta'))
+    self.assertEqual(module.Run(), 1)
+    with self.assertRaises(KeyError):
+      registry['delta']  # pylint: disable=pointless-statement
+
+  def testDirectImportLoadsFlagDependencies(self):
+    self._Registry(name_attribute='BENCHMARK_NAME')
+    module = importlib.import_module(f'{self.package}.alpha')
+    self.assertTrue(self._Imported('beta'))
+    self.assertEqual(module.Run(), 1)
+
+  def testComputedFlagReadLoadsAllModules(self):
+    self._WriteModule(
+        'delta',
+        'from absl import flags\n'
+        "BENCHMARK_NAME = 'delta'\n"
+        'def Run(name):\n'
+        '  return flags.FLAGS[name].value\n',
+    )
+    registry = self._Registry(name_attribute='BENCHMARK_NAME')
+    registry['delta']  # pylint: disable=pointless-statement
+    self.assertTrue(self._Imported('alpha'))
+    self.assertTrue(self._Imported('beta'))
+
+  def testLoadModulesDefiningFlags(self):
+    registry = self._Registry(name_attribute='BENCHMARK_NAME')
+    self.assertEqual(
+        registry.ModulesDefiningFlags([f'{self.package}_beta', 'other']),
+        {f'{self.package}.beta'},
+    )
+    import_util.LoadModulesDefiningFlags([f'{self.package}_beta'])
+    self.assertTrue(self._Imported('beta'))
+    self.assertFalse(self._Imported('alpha'))
+
+  def testLoadAll(self):
+    registry = self._Registry(name_attribute='BENCHMARK_NAME')
+    modules = registry.LoadAll()
+    self.assertEqual(
+        [module.BENCHMARK_NAME for module in modules],
+        ['alpha', 'beta', 'gamma'],
+    )
+
+  def testExtraEntries(self):
+    extra_entries = mock.Mock(return_value=[('extra', 'value')])
+    registry = self._Registry(extra_entries=extra_entries)
+    registry['alpha']  # pylint: disable=pointless-statement
+    extra_entries.assert_not_called()
+    self.assertEqual(registry['extra'], 'value')
+    self.assertLen(registry, 4)
+    extra_entries.assert_called_once()
+
+  def testDuplicateNamesRaise(self):
+    self._WriteModule(
+        'sub/alpha_copy', _GAMMA.replace("'gam' + 'ma'", "'alpha'")
+    )
+    registry = self._Registry(name_attribute='BENCHMARK_NAME')
+    with self.assertRaisesRegex(ValueError, 'multiple modules'):
+      list(registry)
+
+
+class FindFlagReferencesTest(unittest.TestCase):
+
+  def testLiteralNames(self):
+    source = textwrap.dedent("""
+        FLAGS.a
+        FLAGS['b']
+        getattr(flags.FLAGS, 'c')
+        FLAGS.get_flag_value('d', None)
+    """)
+    names, computed = import_util._FindFlagReferences(source)
+    self.assertEqual(names, {'a', 'b', 'c', 'd'})
+    self.assertFalse(computed)
+
+  def testComputedNames(self):
+    for source in (
+        'FLAGS[flag_name].present',
+        'getattr(FLAGS, name)',
+        'FLAGS.get_flag_value(name, None)',
+    ):
+      with self.subTest(source=source):
+        self.assertTrue(import_util._FindFlagReferences(source)[1])
+
+
+class PkbStartupTest(unittest.TestCase):
+
+  def testParseFlagsOnlyImportsNeededModules(self):
+    # Guards pkb.py startup time: parsing flags for one benchmark must not
+    # import every benchmark and package module.
+    code = textwrap.dedent("""
+        import json
+        import sys
+        from perfkitbenchmarker import pkb
+        pkb._ParseFlags(['pkb', '--benchmarks=iperf', '--iperf_runtime_in_seconds=5'])
+        print(json.dumps(sorted(
+            name for name in sys.modules
+            if name.startswith('perfkitbenchmarker.linux_benchmarks.')
+        )))
+    """)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', code],
+        cwd=root,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    modules = json.loads(output.splitlines()[-1])
+    self.assertIn(
+        'perfkitbenchmarker.linux_benchmarks.iperf_benchmark', modules
+    )
+    self.assertNotIn(
+        'perfkitbenchmarker.linux_benchmarks.fio_benchmark', modules
+    )
+    self.assertLess(len(modules), 10)
+
+
+if __name__ == '__main__':
+  unittest.main()
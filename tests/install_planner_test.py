@@ -0,0 +1,162 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.install_planner."""
+
+import importlib.util
+import itertools
+import os
+import textwrap
+import unittest
+
+from absl.testing import absltest
+from perfkitbenchmarker import install_planner
+
+_MODULE_COUNTER = itertools.count()
+
+_METHODS = ('AptInstall', 'Install')
+
+_PACKAGES = {
+    'compiler': (
+        """
+        def AptInstall(vm):
+          vm.InstallPackages('gcc make')
+        """
+    ),
+    'headers': (
+        """
+        _PACKAGES = 'libfoo-dev'
+
+
+        def Install(vm):
+          \"\"\"Installs headers.\"\"\"
+          vm.InstallPackages(_PACKAGES)
+        """
+    ),
+    'library': (
+        """
+        def _Install(vm):
+          vm.Install('compiler')
+          vm.InstallPackages('zlib1g-dev')
+          vm.RemoteCommand('make -C library')
+
+
+        def AptInstall(vm):
+          _Install(vm)
+        """
+    ),
+    'tool': (
+        """
+        def AptInstall(vm):
+          for package in ['compiler', 'headers']:
+            vm.Install(package)
+          vm.InstallPackages('tool')
+        """
+    ),
+    'benchmark': (
+        """
+        def AptInstall(vm):
+          vm.InstallMany(['library', 'tool'])
+          vm.InstallPackages('python3')
+          vm.RemoteCommand('git clone benchmark')
+        """
+    ),
+    'yum_only': (
+        """
+        def YumInstall(vm):
+          vm.InstallPackages('gcc')
+        """
+    ),
+    'dynamic': (
+        """
+        def AptInstall(vm, version='1'):
+          vm.InstallPackages('dynamic-' + version)
+          vm.Install('compiler')
+        """
+    ),
+}
+
+
+class InstallPlannerTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    root = self.create_tempdir()
+    self.modules = {}
+    for name, source in _PACKAGES.items():
+      module_name = 'pkb_install_planner_test_%d' % next(_MODULE_COUNTER)
+      path = os.path.join(root.full_path, module_name + '.py')
+      with open(path, 'w') as f:
+        f.write(textwrap.dedent(source))
+      spec = importlib.util.spec_from_file_location(module_name, path)
+      module = importlib.util.module_from_spec(spec)
+      spec.loader.exec_module(module)
+      self.modules[name] = module
+
+  def _Plan(self, names, installed=()):
+    return install_planner.Plan(
+        names, set(installed), self.modules.__getitem__, _METHODS
+    )
+
+  def testLeadingStepsOfSimplePackage(self):
+    steps = install_planner.GetLeadingSteps(self.modules['headers'], _METHODS)
+    self.assertEqual(
+        steps, install_planner.LeadingSteps(('libfoo-dev',), (), True)
+    )
+
+  def testLeadingStepsFollowHelpersAndStop(self):
+    steps = install_planner.GetLeadingSteps(self.modules['library'], _METHODS)
+    self.assertEqual(steps.os_packages, ('zlib1g-dev',))
+    self.assertEqual(steps.dependencies, ('compiler',))
+    self.assertFalse(steps.complete)
+
+  def testLeadingStepsOfLoopAndInstallMany(self):
+    tool = install_planner.GetLeadingSteps(self.modules['tool'], _METHODS)
+    self.assertEqual(tool.dependencies, ('compiler', 'headers'))
+    self.assertTrue(tool.complete)
+    benchmark = install_planner.GetLeadingSteps(
+        self.modules['benchmark'], _METHODS
+    )
+    self.assertEqual(benchmark.dependencies, ('library', 'tool'))
+    self.assertEqual(benchmark.os_packages, ('python3',))
+
+  def testLeadingStepsStopAtNonConstantArguments(self):
+    steps = install_planner.GetLeadingSteps(self.modules['dynamic'], _METHODS)
+    self.assertEqual(steps, install_planner.LeadingSteps())
+
+  def testLeadingStepsWithoutInstallMethod(self):
+    steps = install_planner.GetLeadingSteps(self.modules['yum_only'], _METHODS)
+    self.assertEqual(steps, install_planner.LeadingSteps())
+
+  def testPlan(self):
+    plan = self._Plan(['benchmark'])
+    # library is incomplete, so benchmark's own OS packages wait for it.
+    self.assertEqual(
+        plan.os_packages, ['gcc', 'make', 'zlib1g-dev', 'libfoo-dev', 'tool']
+    )
+    self.assertEqual(plan.satisfied, ['compiler', 'headers', 'tool'])
+    self.assertEqual(plan.levels, [['library'], ['benchmark']])
+
+  def testPlanSkipsInstalledPackages(self):
+    plan = self._Plan(['library', 'tool'], installed=['compiler'])
+    self.assertEqual(plan.os_packages, ['zlib1g-dev', 'libfoo-dev', 'tool'])
+    self.assertEqual(plan.satisfied, ['headers', 'tool'])
+    self.assertEqual(plan.levels, [['library']])
+
+  def testPlanIndependentPackagesShareALevel(self):
+    plan = self._Plan(['dynamic', 'library'])
+    self.assertEqual(plan.levels, [['dynamic', 'library']])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,201 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.kubernetes_informer."""
+
+import io
+import json
+import os
+import threading
+import unittest
+
+from absl.testing import flagsaver
+import mock
+from perfkitbenchmarker import container_service
+from perfkitbenchmarker import kubernetes_informer
+from perfkitbenchmarker import vm_util
+from tests import pkb_common_test_case
+
+
+def _Pod(name, *true_conditions):
+  return {
+      'metadata': {'name': name},
+      'status': {
+          'conditions': [
+              {
+                  'type': condition,
+                  'status': 'True',
+                  'lastTransitionTime': '1970-01-01T00:01:00Z',
+              }
+              for condition in true_conditions
+          ]
+      },
+  }
+
+
+def _Event(event_type, pod):
+  return {'type': event_type, 'object': pod}
+
+
+class PodInformerTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.informer = kubernetes_informer.PodInformer()
+
+  def testDecodeJsonStream(self):
+    events = [
+        _Event('ADDED', _Pod('a')),
+        _Event('MODIFIED', _Pod('a', 'Ready')),
+    ]
+    stream = io.StringIO(
+        ''.join(json.dumps(e, indent=4) + '\n' for e in events)
+    )
+
+    self.assertEqual(
+        list(kubernetes_informer._DecodeJsonStream(stream)), events
+    )
+
+  def testReadLines(self):
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, 'rb') as pipe:
+      lines = kubernetes_informer._ReadLines(pipe, idle_timeout=0.01)
+      os.write(write_fd, b'{\n  "a": 1\n')
+      self.assertEqual(next(lines), '{\n')
+      self.assertEqual(next(lines), '  "a": 1\n')
+      self.assertIsNone(next(lines))
+      os.write(write_fd, b'}')
+      os.close(write_fd)
+      self.assertEqual(list(lines), ['}'])
+
+  def testRecordsTransitionsWhenFirstObserved(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('a')), observed_time=1)
+    self.informer.HandleEvent(
+        _Event('MODIFIED', _Pod('a', 'PodScheduled')), observed_time=2
+    )
+    self.informer.HandleEvent(
+        _Event('MODIFIED', _Pod('a', 'PodScheduled', 'Ready')),
+        observed_time=3,
+    )
+    self.informer.HandleEvent(
+        _Event('ADDED', _Pod('b', 'PodScheduled')), observed_time=4
+    )
+
+    self.assertEqual(
+        self.informer.GetTransitionTimes(),
+        {'PodScheduled': [2, 4], 'Ready': [3]},
+    )
+    self.assertCountEqual(self.informer.GetPodNames(), ['a', 'b'])
+    self.assertLen(self.informer.GetConditions('a'), 2)
+
+  def testDeletedPodsAreRemoved(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('a', 'Ready')))
+    self.informer.HandleEvent(_Event('DELETED', _Pod('a', 'Ready')))
+
+    self.assertEmpty(self.informer.GetPodNames())
+    self.assertEmpty(self.informer.GetConditions('a'))
+    self.assertIn('Ready', self.informer.GetTransitionTimes())
+
+  def testHandleWatchRemovesPodsMissingFromItsList(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('gone', 'Ready')))
+    self.informer.HandleEvent(_Event('ADDED', _Pod('kept')))
+
+    self.informer.HandleWatch([
+        _Event('ADDED', _Pod('kept', 'Ready')),
+        _Event('ADDED', _Pod('new')),
+        None,
+        _Event('ADDED', _Pod('later')),
+        None,
+    ])
+
+    self.assertCountEqual(self.informer.GetPodNames(), ['kept', 'new', 'later'])
+    self.assertEqual(list(self.informer.GetTransitionTimes()), ['Ready'])
+    self.assertLen(self.informer.GetTransitionTimes()['Ready'], 2)
+
+  def testHandleWatchListEndsAtOtherEvents(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('gone')))
+
+    self.informer.HandleWatch([
+        _Event('ADDED', _Pod('a')),
+        _Event('MODIFIED', _Pod('a', 'Ready')),
+    ])
+
+    self.assertEqual(self.informer.GetPodNames(), ['a'])
+
+  def testHandleWatchKeepsPodsIfItEndsDuringItsList(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('a')))
+
+    self.informer.HandleWatch([_Event('ADDED', _Pod('b'))])
+
+    self.assertCountEqual(self.informer.GetPodNames(), ['a', 'b'])
+
+  def testWaitForPods(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('old', 'Ready')))
+    thread = threading.Thread(
+        target=lambda: [
+            self.informer.HandleEvent(_Event('ADDED', _Pod(name, 'Ready')))
+            for name in ('a', 'b')
+        ]
+    )
+    thread.start()
+
+    pods = self.informer.WaitForPods(
+        2, timeout=10, condition_type='Ready', exclude=['old']
+    )
+    thread.join()
+
+    self.assertCountEqual(pods, ['a', 'b'])
+
+  def testWaitForPodsTimesOut(self):
+    self.informer.HandleEvent(_Event('ADDED', _Pod('a')))
+
+    with self.assertRaises(kubernetes_informer.InformerTimeoutError):
+      self.informer.WaitForPods(1, timeout=0.01, condition_type='Ready')
+
+  @flagsaver.flagsaver(kubectl='kubectl', kubeconfig='kubeconfig')
+  def testStartListsThenWatches(self):
+    self.enter_context(
+        mock.patch.object(
+            container_service,
+            'RunKubectlCommand',
+            return_value=(json.dumps({'items': [_Pod('old', 'Ready')]}), '', 0),
+        )
+    )
+    self.enter_context(
+        mock.patch.object(
+            vm_util,
+            'PrependTempDir',
+            return_value=self.create_tempfile().full_path,
+        )
+    )
+    watch = json.dumps(_Event('ADDED', _Pod('new', 'Ready')), indent=4)
+    popen = self.enter_context(
+        mock.patch.object(kubernetes_informer.subprocess, 'Popen')
+    )
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, watch.encode() + b'\n')
+    os.close(write_fd)
+    popen.return_value.stdout = os.fdopen(read_fd, 'rb')
+    self.addCleanup(popen.return_value.stdout.close)
+
+    with self.informer:
+      pods = self.informer.WaitForPods(2, timeout=10, condition_type='Ready')
+
+    self.assertCountEqual(pods, ['old', 'new'])
+    self.assertEqual(list(self.informer.GetTransitionTimes()), ['Ready'])
+    cmd = popen.call_args[0][0]
+    self.assertContainsSubsequence(cmd, ['get', 'pods', '--watch'])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,154 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.latency_capped_search."""
+
+import unittest
+
+from absl.testing import flagsaver
+from perfkitbenchmarker import latency_capped_search
+from tests import pkb_common_test_case
+
+
+class _FakeLoadGenerator(latency_capped_search.LoadGenerator):
+  """Latency grows linearly with load; extra latencies are used first."""
+
+  def __init__(self, latency_per_load=0.01, extra_latencies=()):
+    self.latency_per_load = latency_per_load
+    self.extra_latencies = list(extra_latencies)
+    self.runs = []
+
+  def Probe(self, load, duration_fraction):
+    self.runs.append((load, duration_fraction))
+    latency = load * self.latency_per_load
+    if self.extra_latencies:
+      latency += self.extra_latencies.pop(0)
+    return latency_capped_search.ProbeResult(
+        throughput=load, latency=latency, metadata={'target': load}
+    )
+
+
+class LatencyCappedSearchTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def testBisection(self):
+    generator = _FakeLoadGenerator()
+
+    result = latency_capped_search.Search(generator, 5.0, 0, 1000)
+
+    self.assertEqual(result.best.throughput, 500)
+    self.assertEqual([load for load, _ in generator.runs][:2], [500, 750])
+    self.assertLen(result.probes, 10)
+
+  def testInitialLoadAndResolution(self):
+    generator = _FakeLoadGenerator()
+
+    result = latency_capped_search.Search(
+        generator, 5.0, 0, 1000, initial_load=100, resolution=100
+    )
+
+    self.assertEqual(
+        [load for load, _ in generator.runs], [100, 550, 325, 438, 494]
+    )
+    self.assertEqual(result.best.throughput, 494)
+
+  @flagsaver.flagsaver(latency_search_strategy='secant')
+  def testSecantNeedsFewerProbes(self):
+    generator = _FakeLoadGenerator()
+
+    result = latency_capped_search.Search(generator, 5.0, 0, 1000)
+
+    self.assertEqual(result.best.throughput, 500)
+    self.assertLess(len(result.probes), 10)
+
+  @flagsaver.flagsaver(
+      latency_search_screening_fraction=0.1, latency_search_tolerance=0.1
+  )
+  def testScreeningStopsClearViolations(self):
+    generator = _FakeLoadGenerator()
+
+    result = latency_capped_search.Search(generator, 5.0, 0, 1000)
+
+    self.assertEqual(generator.runs[:3], [(500, 0.1), (500, 1), (750, 0.1)])
+    self.assertEqual(generator.runs[3][1], 0.1)
+    self.assertEqual(result.best.throughput, 500)
+
+  @flagsaver.flagsaver(
+      latency_search_tolerance=0.1, latency_search_max_repeats=3
+  )
+  def testNoisyProbesAreRepeated(self):
+    # The first run at 480 is noisy and over the cap, the repeats are not.
+    generator = _FakeLoadGenerator(extra_latencies=[0.3, 0, 0])
+
+    result = latency_capped_search.Search(
+        generator, 5.0, 0, 1000, initial_load=480, resolution=500
+    )
+
+    self.assertEqual(generator.runs, [(480, 1)] * 3 + [(740, 1)])
+    self.assertEqual(result.best.throughput, 480)
+
+  @flagsaver.flagsaver(
+      latency_search_tolerance=0.1, latency_search_max_repeats=3
+  )
+  def testBestIgnoresRunsOfLoadsDecidedOverTheCap(self):
+    # Only the first run at 520 is under the cap, so the median is not.
+    generator = _FakeLoadGenerator(extra_latencies=[-0.3, 0, 0])
+
+    result = latency_capped_search.Search(
+        generator, 5.0, 0, 1000, initial_load=520, resolution=500
+    )
+
+    self.assertEqual(generator.runs, [(520, 1)] * 3 + [(260, 1)])
+    self.assertTrue(result.probes[0].under_cap)
+    self.assertEqual(result.best.throughput, 260)
+
+  @flagsaver.flagsaver(
+      latency_search_tolerance=0.1, latency_search_max_repeats=3
+  )
+  def testGetBestSkipsLoadsUnderMinLatency(self):
+    # The runs straddle the cap and 500 is represented by the median run.
+    generator = _FakeLoadGenerator(extra_latencies=[0.25, -0.25, -0.5])
+
+    result = latency_capped_search.Search(
+        generator, 5.0, 0, 1000, initial_load=500, resolution=500
+    )
+
+    self.assertEqual(generator.runs, [(500, 1)] * 3)
+    self.assertEqual(result.GetBest(min_latency=4.75).throughput, 500)
+    self.assertIsNone(result.GetBest(min_latency=5))
+    self.assertEqual(result.best.throughput, 500)
+
+  def testBestIsNoneIfAllProbesViolateTheCap(self):
+    generator = _FakeLoadGenerator(latency_per_load=1)
+
+    result = latency_capped_search.Search(generator, 0.5, 0, 8)
+
+    self.assertIsNone(result.best)
+    self.assertEqual([load for load, _ in generator.runs], [4, 2, 1])
+
+  def testGetSamples(self):
+    generator = _FakeLoadGenerator()
+    result = latency_capped_search.Search(generator, 5.0, 0, 1000)
+
+    samples = result.GetSamples({'benchmark': 'fake'})
+
+    self.assertLen(samples, len(result.probes))
+    self.assertEqual(samples[0].value, 500)
+    self.assertEqual(samples[0].unit, 'ops/s')
+    self.assertEqual(samples[1].metadata['latency_search_load'], 750)
+    self.assertFalse(samples[1].metadata['latency_search_under_cap'])
+    self.assertEqual(samples[1].metadata['target'], 750)
+    self.assertEqual(samples[1].metadata['benchmark'], 'fake')
+
+
+if __name__ == '__main__':
+  unittest.main()
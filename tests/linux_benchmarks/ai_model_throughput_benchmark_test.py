@@ -106,6 +106,24 @@ class AiModelThroughputBenchmarkTest(
         ],
     )
 
+  @flagsaver.flagsaver(ai_load_mode='open_loop')
+  def testOpenLoopAddsCorrectedLatencies(self):
+    responses = [
+        throughput_load_driver.CommandResponse(
+            start_time=10.5, end_time=11, scheduled_time=10
+        ),
+        throughput_load_driver.CommandResponse(
+            start_time=11, end_time=12, scheduled_time=11
+        ),
+    ]
+    samples = ai_model_throughput_benchmark._AggregateResponses(
+        responses, [], self.bm_spec.ai_model, 2
+    )
+    values = {s.metric: s.value for s in samples}
+    self.assertEqual(values['median_response_time'], 0.75)
+    self.assertEqual(values['corrected_response_time_average'], 1)
+    self.assertEqual(samples[0].metadata['load_mode'], 'open_loop')
+
   @flagsaver.flagsaver(ai_starting_requests=1, ai_test_duration=5)
   def testBenchmarkPassesWithCorrectMetricMetadata(self):
     samples = ai_model_throughput_benchmark.Run(self.bm_spec)
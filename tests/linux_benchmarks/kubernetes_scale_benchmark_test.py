@@ -5,6 +5,7 @@ import unittest
 import mock
 from perfkitbenchmarker import benchmark_spec
 from perfkitbenchmarker import container_service
+from perfkitbenchmarker import kubernetes_informer
 from perfkitbenchmarker import sample
 from perfkitbenchmarker.linux_benchmarks import kubernetes_scale_benchmark
 from tests import pkb_common_test_case
@@ -143,6 +144,39 @@ class KubernetesScaleBenchmarkTest(pkb_common_test_case.PkbCommonTestCase):
     self.assertIn('pod_Ready_p50', samples_by_metric.keys())
     self.assertIn('pod_ContainersReady_p50', samples_by_metric.keys())
 
+  def testParseEventsWithInformer(self):
+    informer = kubernetes_informer.PodInformer()
+    run_kubectl = self.enter_context(
+        mock.patch.object(container_service, 'RunKubectlCommand')
+    )
+    for name, observed_time in (('pod1', 70), ('pod2', 90)):
+      informer.HandleEvent(
+          {
+              'type': 'ADDED',
+              'object': {
+                  'metadata': {'name': name},
+                  'status': {
+                      'conditions': [{
+                          'lastTransitionTime': '1970-01-01T00:01:00Z',
+                          'status': 'True',
+                          'type': 'Ready',
+                      }]
+                  },
+              },
+          },
+          observed_time=observed_time,
+      )
+
+    samples = kubernetes_scale_benchmark.ParseEvents(self.cluster, 40, informer)
+
+    run_kubectl.assert_not_called()
+    self.cluster.GetAllPodNames.assert_not_called()
+    self.assertLen(samples, self.expected_num_samples_per_reason * 2)
+    samples_by_metric = _SamplesByMetric(samples)
+    self.assertEqual(samples_by_metric['pod_Ready_p50'].value, 20.0)
+    self.assertEqual(samples_by_metric['pod_Ready_observed_p50'].value, 40.0)
+    self.assertEqual(samples_by_metric['pod_Ready_observed_count'].value, 2)
+
 
 if __name__ == '__main__':
   unittest.main()
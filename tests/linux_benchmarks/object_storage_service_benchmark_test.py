@@ -15,10 +15,14 @@
 """Tests for object storage service benchmark."""
 
 import datetime
+import json
 import time
 import unittest
 from absl import flags
+from absl.testing import flagsaver
 import mock
+import numpy as np
+from perfkitbenchmarker import sample
 from perfkitbenchmarker.linux_benchmarks import object_storage_service_benchmark
 from tests import pkb_common_test_case
 
@@ -86,6 +90,31 @@ class TestBuildCommands(pkb_common_test_case.PkbCommonTestCase):
     )
 
 
+class TestLatencySketch(pkb_common_test_case.PkbCommonTestCase):
+
+  @flagsaver.flagsaver(object_storage_latency_sketch_accuracy=0.01)
+  def testAppendLatencySketchToResults(self):
+    results = []
+
+    object_storage_service_benchmark._AppendLatencySketchToResults(
+        results,
+        [np.array([0.5, 0.5]), np.array([0.1, 0.2])],
+        'latency sketch',
+        {'object_size_B': 1},
+    )
+
+    (result,) = results
+    self.assertEqual(result.metric, 'latency sketch')
+    self.assertEqual(result.metadata['object_size_B'], 1)
+    sketch = sample.QuantileSketch.FromDict(
+        json.loads(result.metadata['sketch'])
+    )
+    self.assertEqual(sketch.relative_accuracy, 0.01)
+    self.assertEqual(sketch.count, 4)
+    self.assertEqual(sketch.min, 0.1)
+    self.assertEqual(sketch.max, 0.5)
+
+
 class TestDistributionToBackendFormat(pkb_common_test_case.PkbCommonTestCase):
 
   def testPointDistribution(self):
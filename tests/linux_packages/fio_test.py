@@ -1223,6 +1223,31 @@ filename=/dev/disk/by-id/google-pkb-67d581a7-0-data-0-1
     )
     self.assertEqual(expected_write_hist, actual_write_hist)
 
+  def testParseHistogramChunksMatch(self):
+    hist_dir = os.path.join(self.data_dir, 'hist')
+    hist_file = os.path.join(
+        hist_dir, 'pkb_fio_avg_1506559526.49_clat_hist.2.log'
+    )
+    bin_vals = [
+        float(f)
+        for f in _ReadFileToString(os.path.join(hist_dir, 'bin_vals')).split()
+    ]
+    expected = fio._ParseHistogram(hist_file, bin_vals)
+    with mock.patch.object(fio, '_HIST_ROWS_PER_CHUNK', 3):
+      actual = fio._ParseHistogram(hist_file, bin_vals)
+    self.assertEqual(expected, actual)
+    self.assertEqual([('read', 16384)], list(actual.keys()))
+    with open(hist_file) as f:
+      total = sum(
+          int(v)
+          for line in f
+          for v in line.split(',')[fio.HIST_BUCKET_START_IDX :]
+      )
+    self.assertEqual(total, sum(actual[('read', 16384)].values()))
+
+  def testParseHistogramNoBinVals(self):
+    self.assertEqual({}, fio._ParseHistogram('unused.log', []))
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -9,6 +9,8 @@ from absl import flags
 from absl.testing import flagsaver
 from absl.testing import parameterized
 from perfkitbenchmarker import background_tasks
+from perfkitbenchmarker import hdr_histogram
+from perfkitbenchmarker import latency_capped_search
 from perfkitbenchmarker import sample
 from perfkitbenchmarker import test_util
 from perfkitbenchmarker.linux_packages import memtier
@@ -1474,8 +1476,6 @@ class MemtierTestCase(
         GetMemtierResult(7, 1.2),
         GetMemtierResult(10, 0.9),
         GetMemtierResult(1, 1.1),
-        GetMemtierResult(9, 0.9),
-        GetMemtierResult(30, 1.2),
         # Multi-client
         GetMemtierResult(10, 10.0),
         GetMemtierResult(20, 5.0),
@@ -1483,6 +1483,9 @@ class MemtierTestCase(
         GetMemtierResult(8, 1.5),
         GetMemtierResult(9, 0.7),
         GetMemtierResult(3, 1.4),
+        GetMemtierResult(2, 1.2),
+        GetMemtierResult(4, 1.1),
+        GetMemtierResult(5, 1.3),
     ]
     self.enter_context(
         mock.patch.object(memtier, '_Run', side_effect=mock_run_results)
@@ -1494,10 +1497,14 @@ class MemtierTestCase(
     results = memtier.MeasureLatencyCappedThroughput(mock_vm, 1, 'unused', 0)
 
     actual_throughputs = []
+    probe_throughputs = []
     for s in results:
       if s.metric == 'Ops Throughput':
         actual_throughputs.append(s.value)
+      if s.metric == 'Latency Capped Search Probe Throughput':
+        probe_throughputs.append(s.value)
     self.assertEqual(actual_throughputs, [15.0, 9.0])
+    self.assertLen(probe_throughputs, len(mock_run_results))
 
   def testRunParallelSingleVm(self):
     vm1 = pkb_common_test_case.TestLinuxVirtualMachine(
@@ -1525,6 +1532,7 @@ class MemtierTestCase(
                     'clients': 2,
                     'pipeline': 3,
                     'password': None,
+                    'duration_fraction': 1.0,
                     'unique_id': vm1.ip_address,
                 },
             ),
@@ -1567,6 +1575,7 @@ class MemtierTestCase(
                     'clients': 2,
                     'pipeline': 3,
                     'password': None,
+                    'duration_fraction': 1.0,
                     'shard_addresses': (
                         '10.0.1.117:6379,10.0.2.104:6379,10.0.3.217:6379'
                     ),
@@ -1583,6 +1592,7 @@ class MemtierTestCase(
                     'clients': 2,
                     'pipeline': 3,
                     'password': None,
+                    'duration_fraction': 1.0,
                     'shard_addresses': (
                         '10.0.2.177:6379,10.0.1.174:6379,10.0.3.6:6379'
                     ),
@@ -1611,15 +1621,29 @@ class MemtierTestCase(
         memtier.MemtierConnection(vm2, '10.0.3.6', 6379),
     ]
 
-    mock_binary_search = self.enter_context(
+    mock_search = self.enter_context(
         mock.patch.object(
             memtier,
-            '_BinarySearchForLatencyCappedThroughput',
+            '_SearchForLatencyCappedThroughput',
             return_value=[
-                memtier.MemtierResult(
-                    parameters=memtier.MemtierBinarySearchParameters(
-                        pipelines=1, threads=2, clients=3
-                    )
+                latency_capped_search.SearchResult(
+                    probes=[
+                        latency_capped_search.Probe(
+                            load=6,
+                            duration_fraction=1,
+                            result=latency_capped_search.ProbeResult(
+                                throughput=100,
+                                latency=0.5,
+                                details=memtier.MemtierResult(
+                                    parameters=memtier.MemtierBinarySearchParameters(
+                                        pipelines=1, threads=2, clients=3
+                                    )
+                                ),
+                            ),
+                            under_cap=True,
+                        )
+                    ],
+                    latency_cap=1.0,
                 )
             ],
         )
@@ -1701,8 +1725,8 @@ class MemtierTestCase(
           ),
           results,
       )
-    with self.subTest('BinarySearchHasCorrectArgs'):
-      mock_binary_search.assert_called_once_with(
+    with self.subTest('SearchHasCorrectArgs'):
+      mock_search.assert_called_once_with(
           connections, [memtier._ClientModifier(10, 16)], '0.0.0.0', 1234, None
       )
     with self.subTest('RunHasCorrectArgs'):
@@ -1737,6 +1761,136 @@ class MemtierTestCase(
         expected_result, memtier._CombineResults([result1, result2])
     )
 
+  def testParseLatencyHistogram(self):
+    results = memtier.MemtierResult.Parse(TEST_OUTPUT, self.time_series)
+    self.assertEqual(results.latency_histogram.total_count, 71924614)
+    self.assertEqual(
+        memtier._GetLatencyDic(results.latency_histogram, ['50', '99.9']),
+        {'50': 0.231, '99.9': 2.575},
+    )
+
+  @flagsaver.flagsaver(memtier_histogram_aggregation=True)
+  def testParseResultsOnlyUsesJsonForHistogram(self):
+    results = memtier._ParseResults(TEST_OUTPUT, self.time_series)
+    self.assertEqual(results.latency_histogram.total_count, 71924614)
+    self.assertEmpty(results.runtime_info)
+    self.assertEmpty(results.timestamps)
+    self.assertEqual(
+        [s.metric for s in results.GetSamples()],
+        [
+            s.metric
+            for s in memtier.MemtierResult.Parse(TEST_OUTPUT, None).GetSamples()
+        ],
+    )
+
+  @flagsaver.flagsaver(
+      memtier_histogram_aggregation=True, memtier_time_series=True
+  )
+  def testParseResultsWithTimeSeries(self):
+    results = memtier._ParseResults(TEST_OUTPUT, self.time_series)
+    self.assertIsNotNone(results.latency_histogram)
+    self.assertIn('Memtier Duration', [s.metric for s in results.GetSamples()])
+
+  @flagsaver.flagsaver(memtier_histogram_aggregation=True)
+  def testCombineResultsMergesHistograms(self):
+    fast = hdr_histogram.HdrHistogram()
+    fast.RecordValue(1000, 99)
+    fast.RecordValue(2000, 1)
+    slow = hdr_histogram.HdrHistogram()
+    slow.RecordValue(10000, 100)
+    result = memtier._CombineResults([
+        memtier.MemtierResult(
+            ops_per_sec=300,
+            latency_ms=1.0,
+            latency_dic={'50': 1.0, '99': 1.0},
+            latency_histogram=fast,
+        ),
+        memtier.MemtierResult(
+            ops_per_sec=100,
+            latency_ms=10.0,
+            latency_dic={'50': 10.0, '99': 10.0},
+            latency_histogram=slow,
+        ),
+    ])
+    self.assertEqual(result.latency_dic, {'50': 2.0, '99': 10.007})
+    self.assertEqual(result.latency_ms, 3.25)
+    self.assertEqual(result.latency_histogram.total_count, 200)
+    # The inputs are left untouched.
+    self.assertEqual(fast.total_count, 100)
+
+  @flagsaver.flagsaver(memtier_histogram_aggregation=True)
+  def testCombineResultsMissingHistogram(self):
+    result = memtier._CombineResults([
+        memtier.MemtierResult(latency_dic={'50': 1.0}),
+        memtier.MemtierResult(latency_dic={'50': 3.0}),
+    ])
+    self.assertEqual(result.latency_dic, {'50': 2.0})
+    self.assertIsNone(result.latency_histogram)
+
+  @flagsaver.flagsaver(
+      memtier_histogram_aggregation=True, memtier_time_series=True
+  )
+  @mock.patch('time.time', mock.MagicMock(return_value=0))
+  def testAggregateMemtierResultsWithHistograms(self):
+    timestamps = [0, 1000]
+    results = [
+        memtier.MemtierResult(
+            ops_per_sec=2,
+            timestamps=timestamps,
+            ops_series=[100, 100],
+            latency_series={
+                'Average Latency': [1, 1],
+                'Min Latency': [1, 1],
+                'Max Latency': [1, 1],
+                'p50.00': [1, 1],
+                'p99.00': [1, 1],
+            },
+        ),
+        memtier.MemtierResult(
+            ops_per_sec=1,
+            timestamps=timestamps,
+            ops_series=[100, 0],
+            latency_series={
+                'Average Latency': [1.4, 0],
+                'Min Latency': [1.1, 0],
+                'Max Latency': [1.8, 0],
+                'p50.00': [1.2, 0],
+                'p99.00': [1.6, 0],
+            },
+        ),
+    ]
+    samples = memtier.AggregateMemtierResults(results, {})
+    series = {
+        s.metric: s.metadata['values']
+        for s in samples
+        if s.metric.endswith('_time_series') and 'client' not in s.metadata
+    }
+    self.assertEqual(series['Average Latency_time_series'], [1.2, 1.0])
+    self.assertEqual(series['Min Latency_time_series'], [1, 1])
+    self.assertEqual(series['Max Latency_time_series'], [1.8, 1])
+    # Half of all requests in the first second took 1ms.
+    self.assertEqual(series['p50.00_time_series'], [1.0, 1.0])
+    self.assertEqual(series['p99.00_time_series'], [1.6, 1.0])
+    approximate = {
+        s.metric
+        for s in samples
+        if s.metric.endswith('_time_series') and s.metadata.get('approximate')
+    }
+    self.assertEqual(approximate, {'p50.00_time_series', 'p99.00_time_series'})
+
+  def testRecordSecondReproducesPercentiles(self):
+    histogram = hdr_histogram.HdrHistogram()
+    memtier._RecordSecond(
+        histogram,
+        1000,
+        {'p50.00': 0.5, 'p99.90': 1.5, 'p99.00': 1.2, 'Max Latency': 2.0},
+    )
+    self.assertEqual(histogram.total_count, 1000)
+    self.assertEqual(
+        histogram.ValuesAtPercentiles([50, 99, 99.9, 100]),
+        {50: 500, 99: 1200, 99.9: 1500, 100: 2000},
+    )
+
   @flagsaver.flagsaver(
       memtier_key_maximum=1000, memtier_data_size_list='1024:1,32:1'
   )
@@ -365,6 +365,56 @@ class HdrLogsParserTestCase(unittest.TestCase):
     self.assertEqual(actual, expected)
 
 
+class CombineHdrHistogramLogsTestCase(unittest.TestCase):
+
+  def _MockVm(self, read_log, update_log=''):
+    vm = mock.Mock()
+
+    def _RemoteCommand(cmd):
+      return (read_log if 'READ' in cmd else update_log), ''
+
+    vm.RemoteCommand.side_effect = _RemoteCommand
+    return vm
+
+  def testCombine(self):
+    # 1000, 2000 and 3000 us on the first client; 4000, 5000 and 5 * 100000 us
+    # on the second.
+    vms = [
+        self._MockVm(
+            '0.1,60.0,3.0,HISTFAAAACl4nJNpmSzMwMDAyQABzFCaEURcm7yEwf4DROA8P9NZ'
+            'fqapHEwAidIG7Q==\n'
+        ),
+        self._MockVm(
+            '0.1,60.0,100.0,HISTFAAAACl4nJNpmSzMwMDAyQABzFCaEURcm7yEwf4DRGC+Pt'
+            'NCFqa3LlwAiWsHQg==\n'
+        ),
+    ]
+    actual = ycsb_stats.CombineHdrHistogramLogs('/hdr/', vms)
+    self.assertEqual(
+        actual,
+        {
+            'read': [
+                (0.0, 1.0, 1),
+                (10.0, 2.0, 1),
+                (20.0, 3.001, 1),
+                (30.0, 4.001, 1),
+                (40.0, 5.003, 1),
+                (50.0, 100.031, 5),
+            ]
+        },
+    )
+    percentiles = ycsb_stats._PercentilesFromHistogram(
+        [value_count[-2:] for value_count in actual['read']]
+    )
+    self.assertEqual(percentiles['p50'], 5.003)
+    self.assertEqual(percentiles['p90'], 100.031)
+
+  def testMalformedLogRaises(self):
+    vms = [self._MockVm('0.1,60.0,3.0,HISTFAAAACl4nJNp\n')]
+    with self.assertRaises(ycsb_stats.CombineHdrLogError):
+      ycsb_stats.CombineHdrHistogramLogs('/hdr/', vms)
+
+
 class YcsbResultTestCase(pkb_common_test_case.PkbCommonTestCase):
 
   def setUp(self):
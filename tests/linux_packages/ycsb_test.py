@@ -340,6 +340,12 @@ class RunTestCase(pkb_common_test_case.PkbCommonTestCase):
     self.assertEqual(results[0].value, 7)
     self.assertEqual(results[1].value, 76)
     self.assertEqual(results[2].value, 25)
+    probe_samples = [
+        s
+        for s in results
+        if s.metric == 'Latency Capped Search Probe Throughput'
+    ]
+    self.assertEqual([s.value for s in probe_samples], [5, 7, 9])
 
   @flagsaver.flagsaver(
       ycsb_latency_threshold_mode=True,
@@ -371,6 +377,40 @@ class RunTestCase(pkb_common_test_case.PkbCommonTestCase):
     self.assertEqual(results[1].value, 10.487)
     self.assertEqual(results[2].value, 20)
 
+  @flagsaver.flagsaver(
+      ycsb_latency_threshold_mode=True,
+      ycsb_latency_threshold_target=80,
+      ycsb_latency_threshold_target_min=75,
+      ycsb_latency_threshold_sleep_mins=0,
+      latency_search_tolerance=0.1,
+      latency_search_max_repeats=3,
+  )
+  def testLatencyThresholdModeDecidesLoadsByMedianOfRepeats(self):
+    self.enter_context(
+        mock.patch.object(
+            self.test_executor,
+            'RunStaircaseLoads',
+            side_effect=[
+                _GetMockThroughputLatencySamples(10, 100, 30, 'p99'),
+                # Load 5 straddles the cap, but its median run is over it.
+                _GetMockThroughputLatencySamples(5.1, 79, 30, 'p99'),
+                _GetMockThroughputLatencySamples(5.0, 85, 30, 'p99'),
+                _GetMockThroughputLatencySamples(4.9, 86, 30, 'p99'),
+                # Load 3 is under the minimum latency.
+                _GetMockThroughputLatencySamples(3, 60, 30, 'p99'),
+                _GetMockThroughputLatencySamples(4.1, 77, 25, 'p99'),
+                _GetMockThroughputLatencySamples(4.0, 78, 30, 'p99'),
+                _GetMockThroughputLatencySamples(3.9, 76, 30, 'p99'),
+            ],
+        )
+    )
+
+    results = self.test_executor.Run([self.test_vm])
+
+    self.assertEqual(results[0].value, 4.1)
+    self.assertEqual(results[1].value, 77)
+    self.assertEqual(results[2].value, 25)
+
   @flagsaver.flagsaver(
       ycsb_latency_threshold_mode=True,
       ycsb_latency_threshold_target=80,
@@ -14,16 +14,23 @@
 
 """Tests for linux_virtual_machine.py."""
 
+import os
 from typing import Dict, Union
 import unittest
 
 from absl import flags
+from absl.testing import flagsaver
 from absl.testing import parameterized
 import mock
+from perfkitbenchmarker import artifact_cache
 from perfkitbenchmarker import errors
+from perfkitbenchmarker import install_planner
+from perfkitbenchmarker import linux_packages
 from perfkitbenchmarker import linux_virtual_machine
 from perfkitbenchmarker import os_types
+from perfkitbenchmarker import remote_agent
 from perfkitbenchmarker import sample
+from perfkitbenchmarker import temp_dir
 from perfkitbenchmarker import test_util
 from perfkitbenchmarker import vm_util
 from tests import matchers
@@ -412,6 +419,146 @@ class TestRemoteCommand(pkb_common_test_case.PkbCommonTestCase):
       self.vm.RemoteCommand('foo', retries=2)
 
 
+class RemoteCommandsTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.vms = []
+    for i in range(2):
+      vm = CreateTestLinuxVm()
+      vm.name = f'pkb-test-{i}'
+      vm.GetConnectionIp = mock.Mock(return_value=f'10.0.0.{i}')
+      self.vms.append(vm)
+    self.issue_commands = self.enter_context(
+        mock.patch.object(vm_util, 'IssueCommands', autospec=True)
+    )
+
+  def testBatchesSshAndRetriesSshFailures(self):
+    self.issue_commands.side_effect = [
+        [('a', '', 0), ('', '', linux_virtual_machine.RETRYABLE_SSH_RETCODE)],
+        [('b', '', 0)],
+    ]
+
+    results = linux_virtual_machine.RemoteCommands(self.vms, 'foo')
+
+    self.assertEqual(results, [('a', ''), ('b', '')])
+    first_batch = self.issue_commands.call_args_list[0][0][0]
+    self.assertEqual(
+        [c.target for c in first_batch], ['pkb-test-0', 'pkb-test-1']
+    )
+    self.assertIn('10.0.0.0', ' '.join(first_batch[0].cmd))
+    self.assertEqual(first_batch[0].cmd[-1], 'foo')
+    retry_batch = self.issue_commands.call_args_list[1][0][0]
+    self.assertEqual([c.target for c in retry_batch], ['pkb-test-1'])
+
+  def testFailureRaises(self):
+    self.issue_commands.return_value = [('', 'err', 1), ('', '', 0)]
+
+    with self.assertRaises(errors.VirtualMachine.RemoteCommandError):
+      linux_virtual_machine.RemoteCommands(self.vms, 'foo')
+    self.assertEqual(
+        linux_virtual_machine.RemoteCommands(
+            self.vms, 'foo', ignore_failure=True
+        ),
+        [('', 'err'), ('', '')],
+    )
+
+  def testOtherVmsUseRemoteCommand(self):
+    other_vm = mock.Mock()
+    other_vm.RemoteCommand.return_value = ('c', '')
+    self.issue_commands.return_value = [('a', '', 0), ('b', '', 0)]
+
+    results = linux_virtual_machine.RemoteCommands(
+        [self.vms[0], other_vm, self.vms[1]], 'foo', ignore_failure=True
+    )
+
+    self.assertEqual(results, [('a', ''), ('c', ''), ('b', '')])
+    other_vm.RemoteCommand.assert_called_once_with('foo', ignore_failure=True)
+
+
+class RemoteAgentVmTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.enter_context(flagsaver.flagsaver(remote_command_agent=True))
+    self.vm = CreateTestLinuxVm()
+    self.vm._use_remote_agent = True
+    self.enter_context(mock.patch.object(self.vm, 'RemoteHostCopy'))
+    self.agent = mock.create_autospec(remote_agent.RemoteAgent, instance=True)
+    self.agent.closed = False
+    self.agent_class = self.enter_context(
+        mock.patch.object(remote_agent, 'RemoteAgent', return_value=self.agent)
+    )
+    self.issue_cmd = self.enter_context(
+        mock.patch.object(vm_util, 'IssueCommand', return_value=('ssh', '', 0))
+    )
+
+  def testCommandsRunOnTheAgent(self):
+    self.agent.Run.return_value = ('agent', '', 0)
+
+    self.assertEqual(self.vm.RemoteCommand('foo'), ('agent', ''))
+    self.assertEqual(self.vm.RemoteCommand('bar'), ('agent', ''))
+
+    self.agent_class.assert_called_once()
+    self.agent.Start.assert_called_once()
+    self.issue_cmd.assert_not_called()
+
+  def testFailedCommandRaises(self):
+    self.agent.Run.return_value = ('', 'error', 1)
+    with self.assertRaises(errors.VirtualMachine.RemoteCommandError):
+      self.vm.RemoteCommand('foo')
+
+  def testUnsentCommandFallsBackToSsh(self):
+    self.agent.Run.side_effect = remote_agent.AgentError('closed')
+    self.assertEqual(self.vm.RemoteCommand('foo'), ('ssh', ''))
+    self.issue_cmd.assert_called_once()
+
+  def testBrokenConnectionIsNotRetriedOverSsh(self):
+    self.agent.Run.return_value = ('', 'broke', 255)
+
+    with self.assertRaises(errors.VirtualMachine.RemoteCommandError):
+      self.vm.RemoteCommand('foo')
+    self.assertEqual(
+        self.vm.RemoteCommand('foo', ignore_failure=True), ('', 'broke')
+    )
+    self.issue_cmd.assert_not_called()
+
+  def testTimeoutIsNotRetriedOverSsh(self):
+    self.agent.Run.side_effect = errors.VmUtil.IssueCommandTimeoutError('slow')
+    with self.assertRaises(errors.VmUtil.IssueCommandTimeoutError):
+      self.vm.RemoteCommand('foo', timeout=1)
+    self.issue_cmd.assert_not_called()
+
+  def testFailedStartIsNotRetried(self):
+    self.agent.Start.side_effect = remote_agent.AgentError('no python3')
+
+    self.assertEqual(self.vm.RemoteCommand('foo'), ('ssh', ''))
+    self.assertEqual(self.vm.RemoteCommand('bar'), ('ssh', ''))
+
+    self.agent.Start.assert_called_once()
+    self.agent.Run.assert_not_called()
+
+  def testRebootStopsUsingTheAgent(self):
+    self.agent.Run.return_value = ('agent', '', 0)
+    self.vm.RemoteCommand('foo')
+
+    self.vm._Reboot()
+
+    self.agent.Close.assert_called_once()
+    self.issue_cmd.assert_called_once()
+    self.assertIn('sudo reboot', self.issue_cmd.call_args[0][0])
+
+  def testRemoteFileExistsUsesStat(self):
+    self.agent.Stat.return_value = None
+    self.assertFalse(self.vm._RemoteFileExists('/tmp/file'))
+    self.agent.Stat.assert_called_once_with('/tmp/file')
+
+  @flagsaver.flagsaver(remote_command_agent=False)
+  def testDisabled(self):
+    self.assertEqual(self.vm.RemoteCommand('foo'), ('ssh', ''))
+    self.agent_class.assert_not_called()
+
+
 class TestPartitionTable(unittest.TestCase):
 
   def CreateVm(self, remote_command_text):
@@ -842,5 +989,155 @@ class LinuxVirtualMachineTestCase(pkb_common_test_case.PkbCommonTestCase):
     self.assertNotIn('disabled_cstates', vm.os_metadata)
 
 
+class _DebianVirtualMachine(
+    linux_virtual_machine.Ubuntu2204Mixin,
+    pkb_common_test_case.TestVirtualMachine,
+):
+  pass
+
+
+class InstallManyTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.vm = _DebianVirtualMachine(pkb_common_test_case.CreateTestVmSpec())
+    self.vm._apt_updated = True
+    self.enter_context(mock.patch.object(self.vm, 'RemoteCommand'))
+    self.packages = {
+        name: mock.Mock(spec=['AptInstall'])
+        for name in ('compiler', 'library', 'benchmark')
+    }
+    self.enter_context(
+        mock.patch.object(linux_packages, 'PACKAGES', self.packages)
+    )
+
+  def testInstallsPlan(self):
+    plan = install_planner.InstallPlan(
+        os_packages=['gcc', 'zlib1g-dev'],
+        satisfied=['compiler'],
+        levels=[['library'], ['benchmark']],
+    )
+    self.enter_context(
+        mock.patch.object(install_planner, 'Plan', return_value=plan)
+    )
+
+    self.vm.InstallMany(['benchmark'])
+
+    self.vm.RemoteCommand.assert_called_once_with(
+        "sudo DEBIAN_FRONTEND='noninteractive' /usr/bin/apt-get -y install "
+        'gcc zlib1g-dev'
+    )
+    self.packages['compiler'].AptInstall.assert_not_called()
+    self.packages['library'].AptInstall.assert_called_once_with(self.vm)
+    self.packages['benchmark'].AptInstall.assert_called_once_with(self.vm)
+    self.assertEqual(
+        self.vm._installed_packages, {'compiler', 'library', 'benchmark'}
+    )
+
+  @flagsaver.flagsaver(package_install_parallelism=2)
+  def testInstallsConcurrentlyOncePerPackage(self):
+    # Both packages depend on compiler, which is not known to the planner.
+    for name in ('library', 'benchmark'):
+      self.packages[name].AptInstall.side_effect = lambda vm: vm.Install(
+          'compiler'
+      )
+
+    self.vm.InstallMany(['library', 'benchmark'])
+
+    self.packages['compiler'].AptInstall.assert_called_once_with(self.vm)
+    self.assertEqual(
+        self.vm._installed_packages, {'compiler', 'library', 'benchmark'}
+    )
+
+  def testDoesNothingWhenInstallPackagesIsFalse(self):
+    self.vm.install_packages = False
+
+    self.vm.InstallMany(['library'])
+
+    self.packages['library'].AptInstall.assert_not_called()
+
+
+class ArtifactCacheTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.enter_context(
+        flagsaver.flagsaver(
+            artifact_cache=True, temp_dir=self.create_tempdir().full_path
+        )
+    )
+    self.vm = CreateTestLinuxVm()
+    self.remote_command = self.enter_context(
+        mock.patch.object(self.vm, 'RemoteCommand', return_value=('', ''))
+    )
+    self.try_remote_command = self.enter_context(
+        mock.patch.object(self.vm, 'TryRemoteCommand', return_value=False)
+    )
+    self.remote_copy = self.enter_context(
+        mock.patch.object(self.vm, 'RemoteCopy')
+    )
+    self.path = self.create_tempfile('script.sh', content='echo').full_path
+    self.cached_path = artifact_cache.RemoteCachePath(
+        artifact_cache.FileSha256(self.path)
+    )
+
+  def testPushFileUploadsOnce(self):
+    self.vm.PushFile(self.path, '/opt/bin')
+    self.vm.PushFile(self.path, 'other.sh')
+
+    self.try_remote_command.assert_called_once_with(
+        f'test -f {self.cached_path}'
+    )
+    self.remote_copy.assert_called_once()
+    self.assertStartsWith(
+        self.remote_copy.call_args.args[1], self.cached_path + '.partial-'
+    )
+    self.remote_command.assert_any_call(
+        artifact_cache.RemoteEvictCommand(os.path.basename(self.cached_path))
+    )
+    self.remote_command.assert_called_with(
+        f'touch -c {self.cached_path} && if [ -d other.sh ]; then '
+        f'ln -f {self.cached_path} other.sh/script.sh 2>/dev/null || '
+        f'cp --reflink=auto -p {self.cached_path} other.sh/script.sh; '
+        f'else ln -f {self.cached_path} other.sh 2>/dev/null || '
+        f'cp --reflink=auto -p {self.cached_path} other.sh; fi'
+    )
+
+  def testPushFileAlreadyCachedOnVm(self):
+    self.try_remote_command.return_value = True
+
+    self.vm.PushFile(self.path)
+
+    self.remote_copy.assert_not_called()
+    self.remote_command.assert_called_once()
+    self.assertIn(
+        f'ln -f {self.cached_path} ./script.sh',
+        self.remote_command.call_args.args[0],
+    )
+
+  def testPushFilesSendsOneTarball(self):
+    other_path = self.create_tempfile('other.sh', content='ls').full_path
+
+    self.vm.PushFiles([self.path, other_path], 'scripts')
+
+    self.remote_copy.assert_called_once()
+    self.assertIn(
+        'tar -xf tar-', self.remote_command.call_args_list[-1].args[0]
+    )
+    self.assertIn('-C scripts', self.remote_command.call_args_list[-1].args[0])
+
+  @flagsaver.flagsaver(artifact_cache=False)
+  def testPushFilesWithoutCacheUsesRunDirectory(self):
+    other_path = self.create_tempfile('other.sh', content='ls').full_path
+
+    self.vm.PushFiles([self.path, other_path], 'scripts')
+
+    self.remote_copy.assert_called_once()
+    tarball = self.remote_copy.call_args.args[0]
+    self.assertStartsWith(tarball, temp_dir.GetRunDirPath())
+    self.assertFalse(os.path.exists(tarball))
+    self.assertFalse(os.path.exists(temp_dir.GetArtifactCacheDirPath()))
+
+
 if __name__ == '__main__':
   unittest.main()
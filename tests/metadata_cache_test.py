@@ -0,0 +1,103 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.metadata_cache."""
+
+import collections
+import json
+import unittest
+
+from absl.testing import flagsaver
+import mock
+from perfkitbenchmarker import metadata_cache
+from tests import pkb_common_test_case
+
+_KEY = ['gcloud', 'compute', 'zones', 'list']
+
+
+class MetadataCacheTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.enter_context(
+        flagsaver.flagsaver(
+            cloud_metadata_cache=True, temp_dir=self.create_tempdir().full_path
+        )
+    )
+    self.enter_context(
+        mock.patch.object(metadata_cache, '_stats', collections.Counter())
+    )
+    self.issue = mock.Mock(return_value='["a", "b"]')
+
+  def testCachesOutputUntilItExpires(self):
+    self.assertEqual(metadata_cache.Get(_KEY, 60, self.issue), '["a", "b"]')
+    self.assertEqual(
+        metadata_cache.Get(_KEY, 60, self.issue, json.loads), ['a', 'b']
+    )
+    self.issue.assert_called_once()
+
+    with mock.patch.object(metadata_cache.time, 'time', return_value=1e12):
+      metadata_cache.Get(_KEY, 60, self.issue)
+    self.assertEqual(self.issue.call_count, 2)
+
+  def testKeyIncludesCliConfiguration(self):
+    metadata_cache.Get(_KEY, 60, self.issue)
+    with mock.patch.dict('os.environ', {'CLOUDSDK_CORE_PROJECT': 'other'}):
+      metadata_cache.Get(_KEY, 60, self.issue)
+    self.assertEqual(self.issue.call_count, 2)
+
+  def testErrorsAreNotCached(self):
+    self.issue.side_effect = [ValueError('list failed'), '["a"]']
+    with self.assertRaises(ValueError):
+      metadata_cache.Get(_KEY, 60, self.issue)
+    self.assertEqual(metadata_cache.Get(_KEY, 60, self.issue), '["a"]')
+
+  def testOutputThatFailsToParseIsDropped(self):
+    self.issue.return_value = 'not json'
+    with self.assertRaises(ValueError):
+      metadata_cache.Get(_KEY, 60, self.issue, json.loads)
+    metadata_cache.Get(_KEY, 60, self.issue)
+    self.assertEqual(self.issue.call_count, 2)
+
+  def testInvalidate(self):
+    metadata_cache.Get(_KEY, 60, self.issue)
+    metadata_cache.Invalidate(_KEY)
+    metadata_cache.Get(_KEY, 60, self.issue)
+    self.assertEqual(self.issue.call_count, 2)
+
+  def testGetSamples(self):
+    metadata_cache.Get(_KEY, 60, self.issue)
+    metadata_cache.Get(_KEY, 60, self.issue)
+
+    samples = {s.metric: s.value for s in metadata_cache.GetSamples()}
+
+    self.assertEqual(
+        samples,
+        {
+            'Cloud Metadata Cache Hits': 1,
+            'Cloud Metadata Cache Misses': 1,
+            'Cloud Metadata Cache Errors': 0,
+        },
+    )
+    self.assertEqual(metadata_cache.GetSamples()[0].value, 0)
+
+  @flagsaver.flagsaver(cloud_metadata_cache=False)
+  def testDisabled(self):
+    metadata_cache.Get(_KEY, 60, self.issue)
+    metadata_cache.Get(_KEY, 60, self.issue)
+    self.assertEqual(self.issue.call_count, 2)
+    self.assertEmpty(metadata_cache.GetSamples())
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -25,6 +25,7 @@ from perfkitbenchmarker import benchmark_spec
 from perfkitbenchmarker import command_interface
 from perfkitbenchmarker import configs
 from perfkitbenchmarker import context
+from perfkitbenchmarker import import_util
 from perfkitbenchmarker import linux_benchmarks
 from perfkitbenchmarker import linux_virtual_machine
 from perfkitbenchmarker import os_mixin
@@ -39,6 +40,11 @@ from tests import mock_command
 FLAGS = flags.FLAGS
 FLAGS.mark_as_parsed()
 
+# Tests read and override flags of modules they don't import, e.g. with
+# flagsaver. flagsaver deletes flags defined while it is active, so the lazily
+# loaded benchmark and package modules defining them are all imported first.
+import_util.LoadAllLazyModules()
+
 
 # Tests Docker and IB filtered out and having multiple eth with same MTU
 IP_LINK_TEXT = """\
@@ -18,6 +18,7 @@ import collections
 import inspect
 import unittest
 
+from absl.testing import flagsaver
 from absl.testing import parameterized
 import mock
 from perfkitbenchmarker import resource
@@ -306,6 +307,24 @@ class GcloudCommandTestCase(pkb_common_test_case.PkbCommonTestCase):
     expected_zones = {'us-east1-a', 'us-east1-b'}
     self.assertEqual(found_zones, expected_zones)
 
+  def testGetZonesInRegionIsCached(self):
+    self.enter_context(
+        flagsaver.flagsaver(
+            cloud_metadata_cache=True, temp_dir=self.create_tempdir().full_path
+        )
+    )
+    issue_command = self.enter_context(
+        mock.patch.object(
+            vm_util, 'IssueCommand', return_value=('us-east1-a', None, 0)
+        )
+    )
+
+    self.assertEqual(util.GetZonesInRegion('us-east1'), {'us-east1-a'})
+    self.assertEqual(util.GetZonesInRegion('us-east1'), {'us-east1-a'})
+    issue_command.assert_called_once()
+    self.assertEqual(util.GetZonesInRegion('us-west1'), {'us-east1-a'})
+    self.assertEqual(issue_command.call_count, 2)
+
   def testGetAllRegions(self):
     test_output = inspect.cleandoc("""
         us-east1
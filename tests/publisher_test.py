@@ -16,11 +16,17 @@
 import collections
 import csv
 import json
+import os
+import pickle
 import re
+import shutil
 import tempfile
+import threading
 import unittest
+import time
 import uuid
 from absl import flags
+from absl.testing import flagsaver
 import mock
 
 from perfkitbenchmarker import pkb  # pylint: disable=unused-import
@@ -291,6 +297,313 @@ class SampleCollectorTestCase(unittest.TestCase):
     self.instance.AddSamples(samples, self.benchmark, self.benchmark_spec)
     self.assertDictContainsSubset({'timestamp': 1.0}, self.instance.samples[0])
 
+  @flagsaver.flagsaver(publish_array_payload_min_length=3)
+  def testAddSamples_EncodesArrays(self):
+    series = sample.CreateTimeSeriesSample(
+        [1.0, 2.0, 3.0], [10.0, 20.0, 30.0], 'latency', 'ms', 10
+    )
+    self.instance.AddSamples([series], self.benchmark, self.benchmark_spec)
+    metadata = self.instance.samples[0]['metadata']
+    self.assertIsInstance(metadata[sample.VALUES], sample.ArrayPayload)
+    self.assertEqual(list(metadata[sample.TIMESTAMPS].values), [10, 20, 30])
+    self.assertEqual(series.metadata[sample.VALUES], [1.0, 2.0, 3.0])
+
+
+def _SampleDict(value, metadata, timestamp=1.0):
+  return {
+      'metric': 'widgets',
+      'value': value,
+      'unit': 'oz',
+      'metadata': metadata,
+      'timestamp': timestamp,
+      'test': 'test',
+      'product_name': 'PerfKitBenchmarker',
+      'official': False,
+      'owner': 'owner',
+      'run_uri': 'run_uri',
+      'sample_uri': 'sample_uri_%s' % value,
+  }
+
+
+class SampleStoreTestCase(unittest.TestCase):
+
+  def testRoundTrip(self):
+    samples = [_SampleDict(float(i), {'foo': 'bar', 'i': i}) for i in range(3)]
+    store = publisher.SampleStore(samples)
+    self.assertEqual(len(store), 3)
+    self.assertEqual(store, samples)
+    self.assertEqual(list(store[1]), list(samples[1]))
+    self.assertEqual(store[-1], samples[-1])
+    self.assertEqual(store[1:], samples[1:])
+
+  def testInternsMetadata(self):
+    store = publisher.SampleStore(
+        _SampleDict(float(i), {'foo': 'bar', 'list': [1, 2]}) for i in range(5)
+    )
+    self.assertIs(store[0]['metadata'], store[4]['metadata'])
+    self.assertEqual(len(store._metadata.values), 1)
+    self.assertEqual(len(store._contexts.values), 1)
+
+  def testDoesNotConflateValuesOfDifferentTypes(self):
+    store = publisher.SampleStore([
+        _SampleDict(1.0, {'flag': 1}),
+        _SampleDict(2.0, {'flag': True}),
+        _SampleDict(3.0, {'flag': [1]}),
+        _SampleDict(4.0, {'flag': (1,)}),
+    ])
+    self.assertEqual(
+        [s['metadata']['flag'] for s in store], [1, True, [1], (1,)]
+    )
+    self.assertIs(store[1]['metadata']['flag'], True)
+
+  def testStoresOtherDictsAsIs(self):
+    odd = {'test': 'testa', 'metadata': {}}
+    int_timestamp = _SampleDict(1.0, {}, timestamp=0)
+    store = publisher.SampleStore([odd, int_timestamp])
+    self.assertEqual(store[0], odd)
+    self.assertIs(store[1]['timestamp'], 0)
+
+  def testListOperations(self):
+    store = publisher.SampleStore([_SampleDict(1.0, {})])
+    store += [_SampleDict(2.0, {})]
+    combined = [_SampleDict(0.0, {})] + store
+    self.assertEqual([s['value'] for s in combined], [0.0, 1.0, 2.0])
+    self.assertEqual([s['value'] for s in store + store], [1.0, 2.0] * 2)
+    self.assertEqual(publisher.SampleStore(), [])
+
+  def testPickle(self):
+    store = publisher.SampleStore(
+        _SampleDict(float(i), {'foo': 'bar'}) for i in range(3)
+    )
+    unpickled = pickle.loads(pickle.dumps(store))
+    self.assertEqual(unpickled, store)
+    unpickled.append(_SampleDict(3.0, {'foo': 'bar'}))
+    self.assertEqual(len(unpickled._metadata.values), 1)
+
+
+class PublishFanOutTestCase(unittest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.journal_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.journal_dir)
+    saver = flagsaver.flagsaver(
+        publish_journal_dir=self.journal_dir, publish_retry_delay=0
+    )
+    saver.__enter__()
+    self.addCleanup(saver.__exit__, None, None, None)
+    self.good = mock.create_autospec(
+        publisher.SamplePublisher, instance=True, PUBLISH_CONSOLE_LOG_DATA=True
+    )
+    self.bad = mock.create_autospec(
+        publisher.SamplePublisher, instance=True, PUBLISH_CONSOLE_LOG_DATA=True
+    )
+    self.samples = [_SampleDict(float(i), {'foo': 'bar'}) for i in range(3)]
+
+  def _Collector(self):
+    return publisher.SampleCollector(
+        publishers=[self.bad, self.good],
+        publishers_from_flags=False,
+        add_default_publishers=False,
+    )
+
+  def _JournalFiles(self):
+    return [
+        os.path.join(self.journal_dir, f) for f in os.listdir(self.journal_dir)
+    ]
+
+  def testRaisesFailureWithoutRetriesByDefault(self):
+    self.bad.PublishSamples.side_effect = Exception('sink down')
+    with self.assertRaisesRegex(Exception, 'sink down'):
+      self._Collector()._PublishBatch(self.samples)
+    self.bad.PublishSamples.assert_called_once_with(self.samples)
+    self.good.PublishSamples.assert_not_called()
+    self.assertEqual(len(self._JournalFiles()), 1)
+
+  @flagsaver.flagsaver(publish_parallel=True, publish_retries=2)
+  def testRetriesFailedPublisher(self):
+    self.bad.PublishSamples.side_effect = [Exception('sink down'), None]
+    self._Collector()._PublishBatch(self.samples)
+    self.assertEqual(self.bad.PublishSamples.call_count, 2)
+    self.good.PublishSamples.assert_called_once_with(self.samples)
+    self.assertEqual(self._JournalFiles(), [])
+
+  @flagsaver.flagsaver(publish_parallel=True, publish_retries=2)
+  def testSpillsSamplesOfFailedPublisher(self):
+    self.bad.PublishSamples.side_effect = Exception('sink down')
+    with self.assertRaisesRegex(Exception, 'sink down'):
+      self._Collector()._PublishBatch(self.samples)
+    self.assertEqual(self.bad.PublishSamples.call_count, 3)
+    self.good.PublishSamples.assert_called_once_with(self.samples)
+    (journal,) = self._JournalFiles()
+    republisher = mock.create_autospec(publisher.SamplePublisher, instance=True)
+    with mock.patch.object(
+        publisher.SampleCollector,
+        '_PublishersFromFlags',
+        return_value=[republisher],
+    ):
+      publisher.RepublishJSONSamples(journal)
+    (republished,) = republisher.PublishSamples.call_args[0]
+    self.assertEqual([s['value'] for s in republished], [0.0, 1.0, 2.0])
+    self.assertEqual(republished[0]['metadata'], {'foo': 'bar'})
+
+  @flagsaver.flagsaver(publish_batch_size=2, publish_retries=1)
+  def testPublishesInBatches(self):
+    self.bad.PublishSamples.side_effect = [None, Exception('sink down'), None]
+    self._Collector()._PublishBatch(self.samples)
+    self.assertEqual(
+        self.bad.PublishSamples.call_args_list,
+        [
+            mock.call(self.samples[:2]),
+            mock.call(self.samples[2:]),
+            mock.call(self.samples[2:]),
+        ],
+    )
+    self.assertEqual(
+        self.good.PublishSamples.call_args_list,
+        [mock.call(self.samples[:2]), mock.call(self.samples[2:])],
+    )
+    self.assertEqual(self._JournalFiles(), [])
+
+  @flagsaver.flagsaver(publish_batch_size=1)
+  def testSpillsOnlyUnpublishedBatches(self):
+    self.bad.PublishSamples.side_effect = [None, Exception('sink down')]
+    with self.assertRaisesRegex(Exception, 'sink down'):
+      self._Collector()._PublishBatch(self.samples)
+    self.assertEqual(self.bad.PublishSamples.call_count, 2)
+    spilled = []
+    for journal in self._JournalFiles():
+      with open(journal) as f:
+        spilled.extend(json.loads(line)['value'] for line in f)
+    self.assertCountEqual(spilled, [1.0, 2.0])
+
+  @flagsaver.flagsaver(
+      publish_parallel=True, publish_timeout=0.1, publish_retries=2
+  )
+  def testSpillsSamplesOfHungPublisherOnlyIfItFails(self):
+    release = threading.Event()
+    self.addCleanup(release.set)
+    failed = threading.Event()
+
+    def _Hang(_):
+      release.wait(10)
+      failed.set()
+      raise Exception('sink down')
+
+    self.bad.PublishSamples.side_effect = _Hang
+    with self.assertRaises(TimeoutError):
+      self._Collector()._PublishBatch(self.samples)
+    self.good.PublishSamples.assert_called_once_with(self.samples)
+    self.assertEqual(self._JournalFiles(), [])
+
+    release.set()
+    failed.wait(10)
+    for _ in range(100):
+      if self._JournalFiles():
+        break
+      time.sleep(0.05)
+    # The publish timed out, so its failure is not retried.
+    self.bad.PublishSamples.assert_called_once_with(self.samples)
+    self.assertEqual(len(self._JournalFiles()), 1)
+
+
+class StreamingSampleCollectorTestCase(unittest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.publisher = mock.create_autospec(
+        publisher.SamplePublisher, instance=True, PUBLISH_CONSOLE_LOG_DATA=True
+    )
+    self.instance = publisher.SampleCollector(
+        publishers=[self.publisher],
+        publishers_from_flags=False,
+        add_default_publishers=False,
+        streaming=True,
+    )
+    self.addCleanup(self.instance.PublishSamples)
+    self.samples = [
+        sample.Sample('widgets', i, 'oz', {'foo': 'bar'}) for i in range(5)
+    ]
+
+  def _PublishedValues(self):
+    return [
+        s['value']
+        for call in self.publisher.PublishSamples.call_args_list
+        for s in call[0][0]
+    ]
+
+  def testAddSamplesDoesNotBuffer(self):
+    self.instance.AddSamples(self.samples, 'test', mock.MagicMock())
+    self.assertEqual(self.instance.samples, [])
+    self.instance.Flush()
+    self.assertEqual(self._PublishedValues(), [0, 1, 2, 3, 4])
+    self.assertEqual(len(self.instance.published_samples), 5)
+
+  def testPublishSamplesDrainsQueue(self):
+    self.instance.AddSamples(self.samples[:2], 'test', mock.MagicMock())
+    self.instance.PublishSamples()
+    self.instance.AddSamples(self.samples[2:], 'test', mock.MagicMock())
+    self.instance.PublishSamples()
+    self.assertEqual(self._PublishedValues(), [0, 1, 2, 3, 4])
+    self.assertEqual(self.publisher.PublishSamples.call_count, 2)
+
+  def testDoesNotRetainPublishedSamples(self):
+    self.instance.retain_published_samples = False
+    self.instance.AddSamples(self.samples, 'test', mock.MagicMock())
+    self.instance.PublishSamples()
+    self.assertEqual(self.instance.published_samples, [])
+    self.assertEqual(self._PublishedValues(), [0, 1, 2, 3, 4])
+
+
+class StreamingSamplePublisherTestCase(unittest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.batches = []
+    self.streamer = None
+
+  def _Start(self, **kwargs):
+    self.streamer = publisher.StreamingSamplePublisher(
+        self.batches.append, **kwargs
+    )
+    self.addCleanup(self.streamer.Close)
+
+  def testPublishesFullBatches(self):
+    self._Start(batch_size=2, period=1000)
+    for i in range(5):
+      self.streamer.Put({'value': i})
+    self.streamer.Close()
+    self.assertEqual(
+        self.batches,
+        [
+            [{'value': 0}, {'value': 1}],
+            [{'value': 2}, {'value': 3}],
+            [{'value': 4}],
+        ],
+    )
+    self.assertEqual(self.streamer.num_published, 5)
+
+  def testPublishesAfterPeriod(self):
+    self._Start(batch_size=1000, period=0)
+    self.streamer.Put({'value': 0})
+    self.streamer.Flush()
+    self.assertEqual(self.batches, [[{'value': 0}]])
+
+  def testPublishErrorDoesNotStopThread(self):
+    publish_fn = mock.Mock(side_effect=[Exception('sink down'), None])
+    self.streamer = publisher.StreamingSamplePublisher(publish_fn, batch_size=1)
+    self.addCleanup(self.streamer.Close)
+    self.streamer.Put({'value': 0})
+    self.streamer.Put({'value': 1})
+    self.streamer.Close()
+    self.assertEqual(publish_fn.call_count, 2)
+
+  def testPutAfterCloseRaises(self):
+    self._Start()
+    self.streamer.Close()
+    with self.assertRaises(RuntimeError):
+      self.streamer.Put({'value': 0})
+
 
 def CreateMockVM(hostname='Hostname', vm_id='12345', ip_address='1.2.3.4'):
   mock_vm = mock.MagicMock(
@@ -534,6 +847,41 @@ class CSVPublisherTestCase(unittest.TestCase):
     self.assertEqual(['key1', 'key3'], reader.fieldnames[-2:])
     self.assertEqual(3, len(rows))
 
+  def testOverwritesOnEachCall(self):
+    instance = publisher.CSVPublisher(self.tf.name)
+    sample = {'test': 'testa', 'value': 1.0, 'unit': 'MB', 'metadata': {}}
+    instance.PublishSamples([dict(sample, metric='1')])
+    instance.PublishSamples([dict(sample, metric='2')])
+    self.tf.seek(0)
+    rows = list(csv.DictReader(self.tf))
+    self.assertEqual(['2'], [i['metric'] for i in rows])
+
+  def testAppendsBatches(self):
+    instance = publisher.CSVPublisher(self.tf.name, append_batches=True)
+    sample = {'test': 'testa', 'value': 1.0, 'unit': 'MB'}
+    instance.PublishSamples([
+        dict(sample, metric='1', metadata={'key1': 'a'}),
+        dict(sample, metric='2', metadata={}),
+    ])
+    instance.PublishSamples([dict(sample, metric='3', metadata={'key1': 'b'})])
+    # A new metadata key adds a column to the rows already written.
+    instance.PublishSamples([dict(sample, metric='4', metadata={'key0': 'c'})])
+    instance.PublishSamples([dict(sample, metric='5', metadata={'key1': 'd'})])
+    self.tf.seek(0)
+    reader = csv.DictReader(self.tf)
+    rows = list(reader)
+    self.assertEqual(['key0', 'key1'], reader.fieldnames[-2:])
+    self.assertEqual(
+        [
+            ('1', '', 'a'),
+            ('2', '', ''),
+            ('3', '', 'b'),
+            ('4', 'c', ''),
+            ('5', '', 'd'),
+        ],
+        [(i['metric'], i['key0'], i['key1']) for i in rows],
+    )
+
 
 class InfluxDBPublisherTestCase(unittest.TestCase):
 
@@ -822,6 +1170,22 @@ class LabelEncodingTestCase(unittest.TestCase):
     labels = {'x': 'y', 'a': 'b'}
     self.assertEqual('|a:b|,|x:y|', publisher.GetLabelsFromDict(labels))
 
+  def testRepublishKeepsArrayPayloads(self):
+    payload = sample.ArrayPayload.FromValues([0.5, 1.5, 2.5])
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json') as fp:
+      publisher.NewlineDelimitedJSONPublisher(fp.name).PublishSamples(
+          [_SampleDict(1.0, {'foo': 'bar', 'samples': payload})]
+      )
+      stream = six.StringIO()
+      with mock.patch.object(
+          publisher.SampleCollector,
+          '_PublishersFromFlags',
+          return_value=[publisher.PrettyPrintStreamPublisher(stream)],
+      ):
+        publisher.RepublishJSONSamples(fp.name)
+    self.assertIn('<ArrayPayload dtype=<f8 size=3>', stream.getvalue())
+    self.assertNotIn(payload, stream.getvalue())
+
 
 if __name__ == '__main__':
   unittest.main()
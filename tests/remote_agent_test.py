@@ -0,0 +1,101 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.remote_agent.
+
+The agent script runs locally, in place of ssh to a VM.
+"""
+
+import os
+import pickle
+import sys
+import unittest
+
+from perfkitbenchmarker import data
+from perfkitbenchmarker import errors
+from perfkitbenchmarker import remote_agent
+from tests import pkb_common_test_case
+
+
+class RemoteAgentTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    script = data.ResourcePath(remote_agent.AGENT_SCRIPT)
+    self.agent = remote_agent.RemoteAgent(
+        [sys.executable, '-u', script], 'local'
+    )
+    self.agent.Start()
+    self.addCleanup(self.agent.Close)
+
+  def testRun(self):
+    self.assertEqual(
+        self.agent.Run('echo out; echo err >&2; exit 3'), ('out\n', 'err\n', 3)
+    )
+
+  def testRunStreamsLargeOutput(self):
+    stdout, _, _ = self.agent.Run('head -c 200000 /dev/zero | tr "\\0" a')
+    self.assertEqual(stdout, 'a' * 200000)
+
+  def testRunTimeout(self):
+    with self.assertRaises(errors.VmUtil.IssueCommandTimeoutError):
+      self.agent.Run('sleep 10', timeout=0.1)
+
+  def testFiles(self):
+    path = os.path.join(self.create_tempdir().full_path, 'file')
+    self.assertIsNone(self.agent.Stat(path))
+
+    self.agent.WriteFile(path, b'contents', mode=0o600)
+
+    self.assertEqual(self.agent.ReadFile(path), b'contents')
+    stat = self.agent.Stat(path)
+    self.assertEqual(stat['size'], 8)
+    self.assertEqual(stat['mode'] & 0o777, 0o600)
+
+  def testBrokenConnectionFailsTheCommand(self):
+    # Gives the agent time to send the output before it is killed.
+    stdout, stderr, retcode = self.agent.Run(
+        'echo started; sleep 1; kill $PPID'
+    )
+    self.assertEqual(stdout, 'started\n')
+    self.assertIn('broke', stderr)
+    self.assertEqual(retcode, 255)
+    self.assertTrue(self.agent.closed)
+
+  def testFailedRequestRaises(self):
+    with self.assertRaises(errors.VirtualMachine.RemoteCommandError):
+      self.agent.ReadFile('/nonexistent/file')
+
+  def testClosedAgentRaisesAgentError(self):
+    self.agent.Close()
+    self.assertTrue(self.agent.closed)
+    with self.assertRaises(remote_agent.AgentError):
+      self.agent.Run('true')
+
+  def testUnpickledAgentIsClosed(self):
+    agent = pickle.loads(pickle.dumps(self.agent))
+    self.assertTrue(agent.closed)
+    self.assertEqual(self.agent.Run('echo hi')[0], 'hi\n')
+
+
+class RemoteAgentStartTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def testStartFailsWhenTheAgentExits(self):
+    agent = remote_agent.RemoteAgent(['false'], 'local')
+    with self.assertRaises(remote_agent.AgentError):
+      agent.Start()
+    self.assertTrue(agent.closed)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -13,8 +13,12 @@
 # limitations under the License.
 
 
+import array
+import json
+import random
 import unittest
 
+import numpy as np
 from perfkitbenchmarker import sample
 
 
@@ -83,6 +87,167 @@ class TestPercentileCalculator(unittest.TestCase):
     with self.assertRaises(ValueError):
       sample.PercentileCalculator([3], percentiles=['a'])
 
+  def testAcceptsArraysAndBuffers(self):
+    numbers = array.array('d', range(0, 1001))
+    for values in (numbers, memoryview(numbers), np.arange(0, 1001)):
+      percentiles = sample.PercentileCalculator(values, percentiles=[1, 50])
+      self.assertEqual(percentiles['p1'], 10)
+      self.assertEqual(percentiles['p50'], 500)
+      self.assertEqual(percentiles['average'], 500)
+
+  def testMatchesSortedNearestRank(self):
+    numbers = [random.random() for _ in range(999)]
+    percentiles = sample.PercentileCalculator(numbers)
+    numbers_sorted = sorted(numbers)
+    for percentile in sample.PERCENTILES_LIST:
+      index = min(int(len(numbers) * percentile / 100.0), len(numbers) - 1)
+      self.assertEqual(percentiles['p%s' % percentile], numbers_sorted[index])
+    self.assertAlmostEqual(percentiles['stddev'], np.std(numbers, ddof=1))
+
+  def testSingleNumber(self):
+    percentiles = sample.PercentileCalculator([3], percentiles=[50])
+    self.assertEqual(percentiles, {'p50': 3, 'average': 3.0, 'stddev': 0})
+
+
+class QuantileSketchTest(unittest.TestCase):
+
+  def assertWithinAccuracy(self, expected, actual, accuracy=0.01):
+    self.assertLessEqual(abs(actual - expected), expected * accuracy)
+
+  def testPercentiles(self):
+    numbers = list(range(1, 10001))
+    sketch = sample.QuantileSketch()
+    sketch.AddMany(numbers)
+    exact = sample.PercentileCalculator(numbers)
+    approximate = sketch.Percentiles()
+    for percentile in sample.PERCENTILES_LIST:
+      key = 'p%s' % percentile
+      self.assertWithinAccuracy(exact[key], approximate[key])
+    self.assertAlmostEqual(approximate['average'], exact['average'])
+    self.assertAlmostEqual(approximate['stddev'], exact['stddev'])
+
+  def testMinMaxAreExact(self):
+    sketch = sample.QuantileSketch()
+    sketch.AddMany([0.123, 45.6, 7.89])
+    self.assertEqual(sketch.Percentile(0), 0.123)
+    self.assertEqual(sketch.Percentile(100), 45.6)
+
+  def testZeros(self):
+    sketch = sample.QuantileSketch()
+    sketch.Add(0, count=90)
+    sketch.Add(5, count=10)
+    self.assertEqual(sketch.Percentile(50), 0)
+    self.assertWithinAccuracy(5, sketch.Percentile(95))
+
+  def testMergeMatchesSingleSketch(self):
+    numbers = [random.expovariate(1) for _ in range(5000)]
+    merged = sample.QuantileSketch()
+    for chunk in range(0, 5000, 1000):
+      client = sample.QuantileSketch()
+      client.AddMany(numbers[chunk : chunk + 1000])
+      merged.Merge(client)
+    single = sample.QuantileSketch()
+    single.AddMany(numbers)
+    self.assertEqual(merged.count, 5000)
+    single_percentiles = single.Percentiles()
+    merged_percentiles = merged.Percentiles()
+    self.assertEqual(single_percentiles.keys(), merged_percentiles.keys())
+    for key, value in single_percentiles.items():
+      self.assertAlmostEqual(value, merged_percentiles[key])
+
+  def testStddevOfLargeValuesIsStable(self):
+    # Values that are large relative to their spread, e.g. timestamps, lose
+    # all precision with a sum of squares.
+    numbers = 1e9 + np.arange(1000) * 1e-3
+    merged = sample.QuantileSketch()
+    for chunk in range(0, 1000, 100):
+      client = sample.QuantileSketch()
+      for number in numbers[chunk : chunk + 100]:
+        client.Add(number)
+      merged.Merge(client)
+    expected = np.std(numbers, ddof=1)
+    self.assertAlmostEqual(
+        merged.Percentiles([50])['stddev'], expected, delta=1e-6
+    )
+    self.assertAlmostEqual(
+        merged.Percentiles([50])['average'], np.mean(numbers), delta=1e-5
+    )
+
+  def testMergeEmptySketches(self):
+    merged = sample.QuantileSketch()
+    merged.Merge(sample.QuantileSketch())
+    merged.AddMany([1, 3])
+    merged.Merge(sample.QuantileSketch())
+    self.assertEqual(merged.Percentiles([50])['average'], 2)
+    self.assertAlmostEqual(merged.Percentiles([50])['stddev'], 2**0.5)
+
+  def testMergeDifferentAccuracyRaises(self):
+    with self.assertRaises(ValueError):
+      sample.QuantileSketch(0.01).Merge(sample.QuantileSketch(0.02))
+
+  def testNegativeValueRaises(self):
+    with self.assertRaises(ValueError):
+      sample.QuantileSketch().Add(-1)
+
+  def testEmptyRaises(self):
+    with self.assertRaises(ValueError):
+      sample.QuantileSketch().Percentiles()
+
+  def testDictRoundTrip(self):
+    sketch = sample.QuantileSketch()
+    sketch.AddMany([1, 2, 3, 500])
+    restored = sample.QuantileSketch.FromDict(
+        json.loads(json.dumps(sketch.ToDict()))
+    )
+    self.assertEqual(sketch.Percentiles(), restored.Percentiles())
+
+
+class ArrayPayloadTest(unittest.TestCase):
+
+  def testRoundTrip(self):
+    values = [random.lognormvariate(0, 1) for _ in range(1000)]
+    payload = sample.ArrayPayload.FromValues(values)
+    self.assertTrue(payload.startswith(sample.ARRAY_PAYLOAD_PREFIX))
+    self.assertLess(len(payload), len(json.dumps(values)))
+    self.assertEqual(list(payload.values), values)
+    self.assertEqual(repr(payload), '<ArrayPayload dtype=<f8 size=1000>')
+
+  def testKeepsIntegerType(self):
+    payload = sample.ArrayPayload.FromValues(array.array('q', [3, 1, 2]))
+    decoded = sample.ArrayPayload(str(payload)).values
+    self.assertEqual(decoded.dtype, np.int64)
+    self.assertEqual(list(decoded), [3, 1, 2])
+    self.assertEqual(list(sample.ArrayPayload.FromValues([]).values), [])
+
+  def testRejectsOtherValues(self):
+    with self.assertRaises(ValueError):
+      sample.ArrayPayload('[1, 2]')
+    with self.assertRaises(ValueError):
+      sample.ArrayPayload.FromValues(['a', 'b'])
+
+  def testEncodeArrays(self):
+    metadata = {
+        'values': [1.5, 2.5, 3.5],
+        'short': [1.0],
+        'names': ['a', 'b', 'c'],
+        'flags': [True, False, True],
+        'name': 'abc',
+    }
+    encoded = sample.EncodeArrays(metadata, min_length=2)
+    self.assertIsInstance(encoded['values'], sample.ArrayPayload)
+    self.assertEqual(list(encoded['values'].values), [1.5, 2.5, 3.5])
+    self.assertEqual(
+        {k: v for k, v in encoded.items() if k != 'values'},
+        {k: v for k, v in metadata.items() if k != 'values'},
+    )
+    self.assertEqual(metadata['values'], [1.5, 2.5, 3.5])
+    self.assertIs(sample.EncodeArrays(metadata, min_length=4), metadata)
+
+  def testDecodeArray(self):
+    payload = sample.ArrayPayload.FromValues([1, 2])
+    self.assertEqual(list(sample.DecodeArray(str(payload))), [1, 2])
+    self.assertEqual(list(sample.DecodeArray([1, 2])), [1, 2])
+
 
 if __name__ == '__main__':
   unittest.main()
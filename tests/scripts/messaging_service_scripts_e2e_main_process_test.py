@@ -11,6 +11,7 @@ from typing import Any
 import unittest
 from unittest import mock
 
+from absl.testing import flagsaver
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import app
 from perfkitbenchmarker.scripts.messaging_service_scripts.common import errors
 from perfkitbenchmarker.scripts.messaging_service_scripts.common.e2e import latency_runner
@@ -289,6 +290,30 @@ class MessagingServiceScriptsE2EMainProcessTest(
       await worker.publish(1)
     await worker.stop()
 
+  @mock.patch.object(main_process.BaseWorker, 'start')
+  @mock.patch.object(main_process.BaseWorker, 'stop')
+  @mock.patch.object(main_process.BaseWorker, '_read_subprocess_output')
+  @AsyncTest
+  async def testPublishBatch(self, read_subprocess_output_mock, *_):
+    ack_batch = protocol.AckPublishBatch(
+        acks=[
+            protocol.AckPublish(seq=1, publish_timestamp=1000),
+            protocol.AckPublish(seq=2, publish_error='blahblah'),
+        ]
+    )
+    read_subprocess_output_mock.return_value = ack_batch
+    worker = main_process.PublisherWorker()
+    await worker.start()
+    worker.start_publish_batch(range(1, 3), 0.25)
+    self._GetSubprocessInWriter(worker).send.assert_called_once_with(
+        protocol.PublishBatch(seqs=[1, 2], interval=0.25)
+    )
+    self.assertEqual(await worker.await_publish_batch(), ack_batch)
+    read_subprocess_output_mock.assert_called_once_with(
+        protocol.AckPublishBatch, None
+    )
+    await worker.stop()
+
   @mock.patch.object(main_process.BaseWorker, 'start')
   @mock.patch.object(main_process.BaseWorker, 'stop')
   @mock.patch.object(main_process.BaseWorker, '_read_subprocess_output')
@@ -305,6 +330,28 @@ class MessagingServiceScriptsE2EMainProcessTest(
     )
     await worker.stop()
 
+  @mock.patch.object(main_process.BaseWorker, 'start')
+  @mock.patch.object(main_process.BaseWorker, 'stop')
+  @mock.patch.object(main_process.BaseWorker, '_read_subprocess_output')
+  @AsyncTest
+  async def testStreamConsumption(self, read_subprocess_output_mock, *_):
+    report_batch = protocol.ReceptionReportBatch(
+        reports=[protocol.ReceptionReport(seq=0)], done=True
+    )
+    worker = main_process.ReceiverWorker()
+    await worker.start()
+    await worker.start_stream_consumption(10)
+    self._GetSubprocessInWriter(worker).send.assert_called_once_with(
+        protocol.ConsumeStream(number_of_messages=10)
+    )
+    read_subprocess_output_mock.return_value = report_batch
+    self.assertEqual(await worker.receive_batch(), report_batch)
+    read_subprocess_output_mock.assert_has_calls([
+        mock.call(protocol.AckConsume, None),
+        mock.call(protocol.ReceptionReportBatch, None),
+    ])
+    await worker.stop()
+
   @mock.patch.object(main_process.BaseWorker, 'start')
   @mock.patch.object(main_process.BaseWorker, 'stop')
   @mock.patch.object(
@@ -382,6 +429,67 @@ class MessagingServiceScriptsEndToEndLatencyRunnerTest(
     print_mock.assert_called_once_with(json.dumps(metrics))
     self.assertEqual(metrics, AGGREGATE_E2E_METRICS)
 
+  @flagsaver.flagsaver(e2e_window_size=2)
+  @mock.patch.object(asyncio, 'run')
+  @mock.patch.object(
+      latency_runner.EndToEndLatencyRunner,
+      '_async_run_windowed_phase',
+      new=mock_coro,
+  )
+  def testRunPhaseWindowed(self, asyncio_run_mock):
+    self.mock_coro.reset_mock()
+    runner = latency_runner.EndToEndLatencyRunner(mock.Mock())
+    runner.run_phase(13, 14)
+    asyncio_run_mock.assert_called_once()
+    self.mock_coro.assert_called_once_with(13)
+
+  @flagsaver.flagsaver(e2e_window_size=2, e2e_target_publish_rate=4)
+  @mock.patch.object(asyncio, 'sleep', new=mock_sleep_coro)
+  @mock.patch.object(latency_runner, 'print')
+  @AsyncTest
+  async def testAsyncRunWindowedPhase(self, print_mock):
+    self.publisher_instance_mock.await_publish_batch.return_value = (
+        protocol.AckPublishBatch(
+            acks=[
+                protocol.AckPublish(seq=0, publish_timestamp=1_000_000_000),
+                protocol.AckPublish(seq=1, publish_error='blahblah'),
+            ]
+        )
+    )
+    published = asyncio.Event()
+
+    async def ReceiveBatch():
+      await published.wait()
+      return protocol.ReceptionReportBatch(
+          reports=[
+              protocol.ReceptionReport(
+                  seq=0,
+                  receive_timestamp=1_500_000_000,
+                  ack_timestamp=2_000_000_000,
+              )
+          ],
+          done=True,
+      )
+
+    self.publisher_instance_mock.start_publish_batch.side_effect = (
+        lambda *_: published.set()
+    )
+    self.receiver_instance_mock.receive_batch.side_effect = ReceiveBatch
+    runner = latency_runner.EndToEndLatencyRunner(mock.Mock())
+    metrics = await runner._async_run_windowed_phase(2)
+    print_mock.assert_called_once_with(json.dumps(metrics))
+    self.receiver_instance_mock.start_stream_consumption.assert_called_once_with(
+        2
+    )
+    self.publisher_instance_mock.start_publish_batch.assert_called_once_with(
+        range(0, 2), 0.25
+    )
+    self.assertEqual(metrics['e2e_latency_failure_counter']['value'], 1)
+    self.assertEqual(metrics['e2e_latency_p50']['value'], 500.0)
+    self.assertEqual(metrics['e2e_acknowledge_latency_p50']['value'], 1000.0)
+    self.publisher_instance_mock.stop.assert_called_once_with()
+    self.receiver_instance_mock.stop.assert_called_once_with()
+
   @mock.patch.object(asyncio, 'sleep', new=mock_sleep_coro)
   @mock.patch.object(latency_runner, 'print')
   @mock.patch.object(os, 'sched_getaffinity', return_value={1, 2, 3, 4, 5, 6})
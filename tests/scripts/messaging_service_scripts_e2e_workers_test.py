@@ -158,7 +158,7 @@ class MessagingServiceScriptsE2EReceiverTest(BaseSubprocessTest):
     self.parent_mock.assert_has_calls([
         mock.call.communicator.greet(),
         mock.call.communicator.await_from_main(
-            protocol.Consume, protocol.AckConsume()
+            (protocol.Consume, protocol.ConsumeStream), protocol.AckConsume()
         ),
         mock.call.client.pull_message(client.TIMEOUT),
         mock.call.client.acknowledge_received_message(mock.ANY),
@@ -186,7 +186,7 @@ class MessagingServiceScriptsE2EReceiverTest(BaseSubprocessTest):
     self.parent_mock.assert_has_calls([
         mock.call.communicator.greet(),
         mock.call.communicator.await_from_main(
-            protocol.Consume, protocol.AckConsume()
+            (protocol.Consume, protocol.ConsumeStream), protocol.AckConsume()
         ),
         mock.call.client.pull_message(client.TIMEOUT),
         mock.call.communicator.send(
@@ -194,6 +194,46 @@ class MessagingServiceScriptsE2EReceiverTest(BaseSubprocessTest):
         ),
     ])
 
+  @mock.patch.object(receiver, 'REPORT_FLUSH_INTERVAL', 3600)
+  def testMainLoopConsumeStream(self):
+    self.communicator_instance_mock.await_from_main.return_value = (
+        protocol.ConsumeStream(number_of_messages=2)
+    )
+    # seq 0 is delivered twice and seq 7 doesn't belong to this stream.
+    self.client_instance_mock.decode_seq_from_message.side_effect = [0, 0, 7, 1]
+    self.time_mock.side_effect = None
+    self.time_mock.return_value = 0
+    self.Main(
+        input_conn=self.input_conn_mock,
+        output_conn=self.output_conn_mock,
+        serialized_flags='--foo=bar\n--bar=qux',
+        app=app.App(),
+        iterations=1,
+    )
+    self.communicator_instance_mock.send.assert_called_once()
+    report_batch = self.communicator_instance_mock.send.call_args[0][0]
+    self.assertIsInstance(report_batch, protocol.ReceptionReportBatch)
+    self.assertTrue(report_batch.done)
+    self.assertEqual([report.seq for report in report_batch.reports], [0, 1])
+    self.assertEqual(self.client_instance_mock.pull_message.call_count, 4)
+
+  def testMainLoopConsumeStreamDeadline(self):
+    self.communicator_instance_mock.await_from_main.return_value = (
+        protocol.ConsumeStream(number_of_messages=2)
+    )
+    self.client_instance_mock.pull_message.return_value = None
+    self.time_mock.side_effect = [0, 0, client.TIMEOUT + 1]
+    self.Main(
+        input_conn=self.input_conn_mock,
+        output_conn=self.output_conn_mock,
+        serialized_flags='--foo=bar\n--bar=qux',
+        app=app.App(),
+        iterations=1,
+    )
+    self.communicator_instance_mock.send.assert_called_once_with(
+        protocol.ReceptionReportBatch(reports=[], done=True)
+    )
+
 
 class MessagingServiceScriptsE2EPublisherTest(BaseSubprocessTest):
   subprocess_module = publisher
@@ -212,7 +252,9 @@ class MessagingServiceScriptsE2EPublisherTest(BaseSubprocessTest):
     )
     self.parent_mock.assert_has_calls([
         mock.call.communicator.greet(),
-        mock.call.communicator.await_from_main(protocol.Publish),
+        mock.call.communicator.await_from_main(
+            (protocol.Publish, protocol.PublishBatch)
+        ),
         mock.call.client.generate_message(42, self.flags_mock.message_size),
         mock.call.client.publish_message(mock.ANY),
         mock.call.communicator.send(
@@ -235,14 +277,62 @@ class MessagingServiceScriptsE2EPublisherTest(BaseSubprocessTest):
     )
     self.parent_mock.assert_has_calls([
         mock.call.communicator.greet(),
-        mock.call.communicator.await_from_main(protocol.Publish),
+        mock.call.communicator.await_from_main(
+            (protocol.Publish, protocol.PublishBatch)
+        ),
         mock.call.client.generate_message(33, self.flags_mock.message_size),
         mock.call.client.publish_message(mock.ANY),
         mock.call.communicator.send(
-            protocol.AckPublish(publish_error=repr(error))
+            protocol.AckPublish(seq=33, publish_error=repr(error))
         ),
     ])
 
+  def testMainLoopPublishBatch(self):
+    self.communicator_instance_mock.await_from_main.return_value = (
+        protocol.PublishBatch(seqs=[4, 5])
+    )
+    error = Exception('Too bad')
+    self.client_instance_mock.publish_message.side_effect = [None, error]
+    self.Main(
+        input_conn=self.input_conn_mock,
+        output_conn=self.output_conn_mock,
+        serialized_flags='--foo=bar\n--bar=qux',
+        app=app.App(),
+        iterations=1,
+    )
+    self.parent_mock.assert_has_calls([
+        mock.call.client.generate_message(4, self.flags_mock.message_size),
+        mock.call.client.publish_message(mock.ANY),
+        mock.call.client.generate_message(5, self.flags_mock.message_size),
+        mock.call.client.publish_message(mock.ANY),
+        mock.call.communicator.send(
+            protocol.AckPublishBatch(
+                acks=[
+                    protocol.AckPublish(
+                        seq=4, publish_timestamp=self._curr_timens - 1_000_000_000
+                    ),
+                    protocol.AckPublish(seq=5, publish_error=repr(error)),
+                ]
+            )
+        ),
+    ])
+
+  @mock.patch('time.sleep')
+  @mock.patch('time.monotonic', side_effect=[10.0, 10.0, 10.0, 10.0])
+  def testMainLoopPublishBatchPacing(self, _, sleep_mock):
+    self.communicator_instance_mock.await_from_main.return_value = (
+        protocol.PublishBatch(seqs=[1, 2, 3], interval=0.5)
+    )
+    self.Main(
+        input_conn=self.input_conn_mock,
+        output_conn=self.output_conn_mock,
+        serialized_flags='--foo=bar\n--bar=qux',
+        app=app.App(),
+        iterations=1,
+    )
+    sleep_mock.assert_has_calls([mock.call(0.5), mock.call(1.0)])
+    self.assertEqual(self.client_instance_mock.publish_message.call_count, 3)
+
 
 # Don't run the BaseSubprocessTest itself
 del BaseSubprocessTest
@@ -0,0 +1,194 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for the local object storage API test provider."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import unittest
+from unittest import mock
+
+from absl import flags
+from absl.testing import flagsaver
+from absl.testing import parameterized
+from perfkitbenchmarker.scripts import object_storage_api_test_scripts
+from perfkitbenchmarker.scripts.object_storage_api_test_scripts import local_flags  # pylint: disable=unused-import
+from perfkitbenchmarker.scripts.object_storage_api_test_scripts import local_service
+
+FLAGS = flags.FLAGS
+FLAGS.mark_as_parsed()
+
+BUCKET = 'bucket'
+SCRIPTS_DIR = os.path.dirname(object_storage_api_test_scripts.__file__)
+
+
+class LocalServiceTest(parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.root = self.create_tempdir().full_path
+    self.enter_context(flagsaver.flagsaver(local_storage_root=self.root))
+    self.tmpfs_dir = self.create_tempdir().full_path
+    self.enter_context(
+        mock.patch.object(local_service, '_TMPFS_DIR', self.tmpfs_dir)
+    )
+
+  @parameterized.parameters(False, True)
+  def testWriteListReadDelete(self, tmpfs):
+    with flagsaver.flagsaver(local_storage_tmpfs=tmpfs):
+      service = local_service.LocalService()
+
+    service.WriteObjectFromBuffer(BUCKET, 'a/b_0', io.BytesIO(b'abcdef'), 3)
+    service.WriteObjectFromBuffer(BUCKET, 'a/b_1', io.BytesIO(b'xyz'), 3)
+    service.WriteObjectFromBuffer(BUCKET, 'c', io.BytesIO(b'xyz'), 3)
+
+    self.assertCountEqual(
+        service.ListObjects(BUCKET, 'a/b'), ['a/b_0', 'a/b_1']
+    )
+    self.assertCountEqual(
+        service.ListObjects(BUCKET, None), ['a/b_0', 'a/b_1', 'c']
+    )
+    service.ReadObject(BUCKET, 'a/b_0')
+    deleted = []
+    service.DeleteObjects(BUCKET, ['a/b_0', 'missing'], objects_deleted=deleted)
+    self.assertEqual(deleted, ['a/b_0'])
+    service.BulkDeleteObjects(BUCKET, ['a/b_1', 'c'], 0)
+    self.assertEqual(service.ListObjects(BUCKET, ''), [])
+    self.assertFalse(os.path.exists(os.path.join(self.root, BUCKET, 'c')))
+
+  def testWritesObjectFiles(self):
+    service = local_service.LocalService()
+
+    service.WriteObjectFromBuffer(BUCKET, 'dir/obj', io.BytesIO(b'abcdef'), 4)
+
+    with open(os.path.join(self.root, BUCKET, 'dir', 'obj'), 'rb') as f:
+      self.assertEqual(f.read(), b'abcd')
+    self.assertEqual(
+        os.listdir(os.path.join(self.root, BUCKET, 'dir')), ['obj']
+    )
+
+  def testWritesBufferOfStreamWithoutReading(self):
+    service = local_service.LocalService()
+    stream = io.BytesIO(b'abcdef')
+    self.enter_context(mock.patch.object(stream, 'read'))
+
+    service.WriteObjectFromBuffer(BUCKET, 'obj', stream, 4)
+
+    stream.read.assert_not_called()
+    with open(os.path.join(self.root, BUCKET, 'obj'), 'rb') as f:
+      self.assertEqual(f.read(), b'abcd')
+
+  @flagsaver.flagsaver(local_storage_tmpfs=True)
+  def testTmpfsObjectsAreShared(self):
+    writer = local_service.LocalService()
+    reader = local_service.LocalService()
+
+    writer.WriteObjectFromBuffer(BUCKET, 'obj', io.BytesIO(b'abc'), 3)
+
+    self.assertEqual(reader.ListObjects(BUCKET, None), ['obj'])
+    self.assertTrue(
+        os.path.exists(
+            os.path.join(self.tmpfs_dir, os.path.basename(self.root), BUCKET)
+        )
+    )
+
+  def testRelativeRoot(self):
+    self.enter_context(mock.patch.object(os, 'getcwd', return_value=self.root))
+    with flagsaver.flagsaver(local_storage_root='./store'):
+      service = local_service.LocalService()
+
+    service.WriteObjectFromBuffer(BUCKET, 'obj', io.BytesIO(b'a'), 1)
+
+    self.assertEqual(service.root, os.path.join(self.root, 'store'))
+    self.assertEqual(service.ListObjects(BUCKET, None), ['obj'])
+
+  def testRejectsObjectsOutsideBucket(self):
+    service = local_service.LocalService()
+
+    with self.assertRaises(ValueError):
+      service.WriteObjectFromBuffer(BUCKET, '../obj', io.BytesIO(b'a'), 1)
+
+  @flagsaver.flagsaver(local_storage_latency=0.5, local_storage_bandwidth=100)
+  def testInjectedLatencyAndBandwidth(self):
+    service = local_service.LocalService()
+    self.enter_context(mock.patch.object(time, 'sleep'))
+
+    service.WriteObjectFromBuffer(BUCKET, 'obj', io.BytesIO(b'a' * 50), 50)
+    service.ReadObject(BUCKET, 'obj')
+
+    self.assertEqual(
+        time.sleep.call_args_list, [mock.call(1.0), mock.call(1.0)]
+    )
+
+
+class LocalScenarioTest(parameterized.TestCase):
+  """Runs the API test script against the local provider, as on a VM.
+
+  The script defines flags that clash with PKB's, so it runs in its own
+  process, with the provider files importable as the providers package.
+  """
+
+  def setUp(self):
+    super().setUp()
+    self.root = self.create_tempdir().full_path
+    self.path_dir = self.create_tempdir().full_path
+    os.symlink(SCRIPTS_DIR, os.path.join(self.path_dir, 'providers'))
+
+  def _RunScenario(self, scenario, *args):
+    cmd = [
+        sys.executable,
+        os.path.join(SCRIPTS_DIR, 'object_storage_api_tests.py'),
+        '--storage_provider=LOCAL',
+        f'--bucket={BUCKET}',
+        f'--local_storage_root={self.root}',
+        f'--scenario={scenario}',
+        *args,
+    ]
+    env = dict(os.environ, PYTHONPATH=self.path_dir)
+    return subprocess.run(
+        cmd, env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+  @parameterized.parameters(False, True)
+  def testMultiStreamScenariosShareObjects(self, tmpfs):
+    objects_written_file = os.path.join(self.root, 'objects_written.json')
+    args = [
+        f'--local_storage_tmpfs={tmpfs}',
+        '--num_streams=2',
+        '--objects_per_stream=5',
+        f'--objects_written_file={objects_written_file}',
+    ]
+    if tmpfs:
+      self.addCleanup(
+          subprocess.run,
+          ['rm', '-rf', os.path.join('/dev/shm', os.path.basename(self.root))],
+      )
+
+    self._RunScenario('MultiStreamWrite', f'--start_time={time.time()}', *args)
+    reads = json.loads(
+        self._RunScenario(
+            'MultiStreamRead', f'--start_time={time.time()}', *args
+        )
+    )
+    self._RunScenario('MultiStreamDelete', f'--start_time={time.time()}', *args)
+
+    self.assertEqual(sum(len(stream['sizes']) for stream in reads), 10)
+    self.assertEqual(os.path.isdir(os.path.join(self.root, BUCKET)), not tmpfs)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -15,7 +15,10 @@
 """Tests for the object_storage_service benchmark worker process."""
 
 import itertools
+import os
+import pickle
 import random
+import string
 import time
 import unittest
 
@@ -93,5 +96,104 @@ class TestIterators(unittest.TestCase):
     )
 
 
+class TestWritePayload(unittest.TestCase):
+
+  def testGenerateWritePayload(self):
+    payload = object_storage_api_tests.GenerateWritePayload(1000)
+
+    self.assertIsInstance(payload, bytearray)
+    self.assertEqual(len(payload), 1000)
+    self.assertTrue(set(payload.decode()) <= set(string.ascii_letters))
+
+  def testSharedWritePayloadPicklesByName(self):
+    payload = object_storage_api_tests.SharedWritePayload(10000)
+    self.addCleanup(payload.Close)
+
+    attached = pickle.loads(pickle.dumps(payload))
+    self.addCleanup(attached.Close)
+
+    self.assertLess(len(pickle.dumps(payload)), 1000)
+    self.assertEqual(bytes(attached.buf), bytes(payload.buf))
+    payload.buf[0] = ord('x')
+    self.assertEqual(attached.buf[0], ord('x'))
+
+  def testOnlyCreatorFreesSharedWritePayload(self):
+    payload = object_storage_api_tests.SharedWritePayload(100)
+    self.addCleanup(payload.Close)
+    attached = pickle.loads(pickle.dumps(payload))
+    attached.Close()
+    # As in a worker forked from the process that created the payload.
+    with mock.patch.object(os, 'getpid', return_value=-1):
+      payload.Close()
+
+    self.assertTrue(os.path.exists(os.path.join('/dev/shm', payload._shm.name)))
+
+
+class TestWriteWorker(unittest.TestCase):
+
+  def testClosesPayloadIfInterrupted(self):
+    payload = mock.Mock(buf=bytearray(10))
+    service = mock.Mock()
+    service.WriteObjectFromBuffer.side_effect = KeyboardInterrupt
+    object_storage_api_tests.FLAGS.mark_as_parsed()
+
+    with self.assertRaises(KeyboardInterrupt):
+      object_storage_api_tests.WriteWorker(
+          service,
+          payload,
+          {10: 100.0},
+          1,
+          None,
+          object_storage_api_tests.SEQUENTIAL_BY_STREAM,
+          mock.Mock(),
+          0,
+      )
+
+    payload.Close.assert_called_once_with()
+    (_, _, stream, _), _ = service.WriteObjectFromBuffer.call_args
+    self.assertTrue(stream.closed)
+
+
+class TestPayloadStream(unittest.TestCase):
+
+  def testReadAndSeek(self):
+    stream = object_storage_api_tests.PayloadStream(b'abcdef')
+
+    self.assertEqual(stream.read(4), b'abcd')
+    self.assertEqual(stream.read(4), b'ef')
+    self.assertEqual(stream.read(4), b'')
+    stream.seek(0)
+    self.assertEqual(stream.read(), b'abcdef')
+    stream.seek(-2, 2)
+    self.assertEqual(stream.tell(), 4)
+    self.assertEqual(stream.read(), b'ef')
+
+  def testReadInto(self):
+    stream = object_storage_api_tests.PayloadStream(bytearray(b'abcdef'))
+    stream.seek(2)
+    buf = bytearray(3)
+
+    self.assertEqual(stream.readinto(buf), 3)
+    self.assertEqual(buf, bytearray(b'cde'))
+    self.assertEqual(stream.readinto(buf), 1)
+    self.assertEqual(buf[:1], bytearray(b'f'))
+
+  def testCloseReleasesBuffer(self):
+    payload = object_storage_api_tests.SharedWritePayload(100)
+    stream = object_storage_api_tests.PayloadStream(payload.buf)
+    stream.read(10)
+
+    stream.close()
+
+    payload.Close()
+
+  def testDoesNotCopyBuffer(self):
+    buf = bytearray(b'abc')
+    stream = object_storage_api_tests.PayloadStream(buf)
+    buf[0] = ord('x')
+
+    self.assertEqual(stream.read(), b'xbc')
+
+
 if __name__ == '__main__':
   unittest.main()
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import time
 import unittest
 from unittest import mock
@@ -194,5 +195,97 @@ class ThroughputLoadDriverTest(
       self.assertEqual(response.error, 'Error')
 
 
+class OpenLoopThroughputLoadDriverTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.in_flight = 0
+    self.max_in_flight = 0
+    self.request_latency = 0
+
+    async def _run_command_mock(command: str):
+      self.in_flight += 1
+      self.max_in_flight = max(self.max_in_flight, self.in_flight)
+      await asyncio.sleep(self.request_latency)
+      self.in_flight -= 1
+      return command, '', 0
+
+    self.enter_context(
+        mock.patch.object(
+            throughput_load_driver,
+            '_RunCommandAsync',
+            side_effect=_run_command_mock,
+        )
+    )
+    fs = fake_filesystem.FakeFilesystem()
+    fake_open = fake_filesystem.FakeFileOpen(fs)
+    self.enter_context(
+        mock.patch.object(throughput_load_driver, 'open', fake_open)
+    )
+    fs.create_dir('/tmp')
+    self.enter_context(flagsaver.flagsaver(ai_load_mode='open_loop'))
+
+  @flagsaver.flagsaver(
+      _ai_throughput_parallel_requests=20,
+      ai_test_duration=1,
+      ai_burst_time=0.5,
+  )
+  def testSendsScheduledRequests(self):
+    responses = throughput_load_driver.Run()
+    self.assertLen(responses, 40)
+    scheduled_times = sorted(r.scheduled_time for r in responses)
+    # Evenly spaced at 40 qps.
+    self.assertAlmostEqual(
+        scheduled_times[1] - scheduled_times[0], 0.025, places=5
+    )
+    for response in responses:
+      self.assertGreaterEqual(response.start_time, response.scheduled_time)
+
+  @flagsaver.flagsaver(
+      _ai_throughput_parallel_requests=10,
+      ai_test_duration=1,
+      ai_max_concurrency=2,
+  )
+  def testConcurrencyCapDelaysRequests(self):
+    self.request_latency = 0.2
+    responses = throughput_load_driver.Run()
+    self.assertLen(responses, 10)
+    self.assertEqual(self.max_in_flight, 2)
+    # Queued requests count their wait for a slot toward latency.
+    self.assertGreater(
+        max(r.CorrectedLatency() for r in responses),
+        max(r.end_time - r.start_time for r in responses),
+    )
+
+  @flagsaver.flagsaver(_ai_throughput_parallel_requests=5, ai_test_duration=1)
+  def testStreamsResponsesToFile(self):
+    throughput_load_driver.Run()
+    responses = throughput_load_driver.ReadJsonResponses(5)
+    self.assertLen(responses, 5)
+    for response in responses:
+      self.assertIsNotNone(response.scheduled_time)
+
+  def testPoissonOffsets(self):
+    offsets = throughput_load_driver.GetScheduledOffsets(
+        1000, 100, throughput_load_driver.POISSON
+    )
+    self.assertLen(offsets, 1000)
+    self.assertEqual(offsets, sorted(offsets))
+    self.assertAlmostEqual(offsets[-1], 10, delta=2)
+
+  @flagsaver.flagsaver(
+      _ai_throughput_parallel_requests=2,
+      ai_test_duration=1,
+      ai_throw_on_client_errors=True,
+  )
+  def testPastTimeoutThrows(self):
+    self.request_latency = 10
+    self.enter_context(
+        mock.patch.object(throughput_load_driver, '_QUEUE_WAIT_TIME', 1)
+    )
+    with self.assertRaises(throughput_load_driver.ClientError):
+      throughput_load_driver.Run()
+
+
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,115 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.status_poller."""
+
+import threading
+import time
+import unittest
+
+import mock
+from perfkitbenchmarker import status_poller
+from tests import pkb_common_test_case
+
+_STATUSES = {'a': 'RUNNING', 'b': 'STOPPING', 'c': 'RUNNING'}
+
+
+class StatusPollerTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.calls = []
+    self.listing = threading.Event()
+    self.release = threading.Event()
+    self.addCleanup(self.release.set)
+    self.error = None
+
+  def _List(self, names):
+    self.calls.append(names)
+    self.listing.set()
+    self.release.wait(10)
+    if self.error:
+      raise self.error
+    return {name: _STATUSES[name] for name in names if name in _STATUSES}
+
+  def _StartGets(self, poller, names):
+    results = {}
+
+    def _Get(name):
+      try:
+        results[name] = poller.Get(name)
+      except Exception as e:  # pylint: disable=broad-except
+        results[name] = e
+
+    threads = [threading.Thread(target=_Get, args=(n,)) for n in names]
+    for thread in threads:
+      thread.start()
+    return threads, results
+
+  def _WaitForWaiters(self, poller, count):
+    for _ in range(1000):
+      with poller._condition:
+        if len(poller._pending.names) == count:
+          return
+      time.sleep(0.01)
+    self.fail('Callers did not wait for the list call.')
+
+  def testCoalescesCallersThatArriveWhileListing(self):
+    poller = status_poller.StatusPoller(self._List, interval=0)
+    first, results = self._StartGets(poller, ['a'])
+    self.assertTrue(self.listing.wait(10))
+    rest, rest_results = self._StartGets(poller, ['b', 'c', 'missing'])
+    self._WaitForWaiters(poller, 3)
+
+    self.release.set()
+    for thread in first + rest:
+      thread.join(10)
+
+    self.assertEqual(self.calls, [['a'], ['b', 'c', 'missing']])
+    self.assertEqual(results, {'a': 'RUNNING'})
+    self.assertEqual(
+        rest_results, {'b': 'STOPPING', 'c': 'RUNNING', 'missing': None}
+    )
+
+  def testErrorsReachEveryCallerOfTheBatch(self):
+    poller = status_poller.StatusPoller(self._List, interval=0)
+    self.error = ValueError('list failed')
+    self.release.set()
+
+    with self.assertRaises(ValueError):
+      poller.Get('a')
+    self.error = None
+    self.assertEqual(poller.Get('a'), 'RUNNING')
+
+  def testWaitsForTheInterval(self):
+    poller = status_poller.StatusPoller(self._List, interval=5)
+    self.release.set()
+    sleep = self.enter_context(mock.patch.object(status_poller.time, 'sleep'))
+
+    # The first list call also waits, for callers that start polling together.
+    poller.Get('a')
+    sleep.assert_called_once()
+    self.assertGreater(sleep.call_args[0][0], 4)
+    poller.Get('b')
+    self.assertEqual(sleep.call_count, 2)
+    self.assertGreater(sleep.call_args[0][0], 4)
+
+  def testGetPollerIsSharedByScope(self):
+    self.enter_context(mock.patch.dict(status_poller._pollers, clear=True))
+    poller = status_poller.GetPoller(('gce', 'p', 'z'), self._List)
+    self.assertIs(status_poller.GetPoller(['gce', 'p', 'z'], None), poller)
+    self.assertIsNot(status_poller.GetPoller(('gce', 'p', 'y'), None), poller)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,150 @@
+# Copyright 2024 PerfKitBenchmarker Authors. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for perfkitbenchmarker.traces.base_collector."""
+
+import os
+import shutil
+import subprocess
+import unittest
+
+from absl.testing import flagsaver
+import mock
+from perfkitbenchmarker import os_types
+from perfkitbenchmarker.traces import base_collector
+from tests import pkb_common_test_case
+
+
+class _TestCollector(base_collector.BaseCollector):
+
+  def _CollectorName(self):
+    return 'test'
+
+  def _InstallCollector(self, vm):
+    pass
+
+  def _CollectorRunCommand(self, vm, collector_file):
+    return 'start'
+
+  def _CollectorPostProcess(self, vm):
+    pass
+
+  def Analyze(self, sender, benchmark_spec, samples):
+    pass
+
+
+class _LocalVm:
+  """A vm whose remote commands and files are local."""
+
+  BASE_OS_TYPE = os_types.DEBIAN
+
+  def __init__(self, name):
+    self.name = name
+    self.pulled_files = []
+
+  def RemoteCommand(self, command, ignore_failure=False):
+    del ignore_failure
+    if command == 'start':
+      return '1234\n', ''
+    if command.startswith(('kill', 'taskkill')):
+      return '', ''
+    subprocess.run(command, shell=True, check=True)
+    return '', ''
+
+  def PullFile(self, local_path, remote_path):
+    self.pulled_files.append(remote_path)
+    shutil.copyfile(remote_path, local_path)
+
+
+class BaseCollectorTestCase(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.remote_dir = self.create_tempdir('remote').full_path
+    self.local_dir = self.create_tempdir('local').full_path
+    self.enter_context(
+        mock.patch.object(base_collector.vm_util, 'VM_TMP_DIR', self.remote_dir)
+    )
+    self.vm = _LocalVm('vm0')
+    self.collector = _TestCollector(output_directory=self.local_dir)
+    self.collector.vm_groups = {'servers': [self.vm]}
+    self.collector._StartOnVm(self.vm, suffix='-run')
+    _, self.remote_file = self.collector._pid_files['vm0']
+    self.local_file = os.path.join(
+        self.local_dir, os.path.basename(self.remote_file)
+    )
+
+  def _AppendRemote(self, data):
+    with open(self.remote_file, 'ab') as f:
+      f.write(data)
+
+  def _ReadLocal(self):
+    with open(self.local_file, 'rb') as f:
+      return f.read()
+
+  def testStopPullsWholeFile(self):
+    self._AppendRemote(b'line 1\n')
+    self.collector.StopOnVms(None, 'test')
+    self.assertEqual(self._ReadLocal(), b'line 1\n')
+    self.assertEqual(self.vm.pulled_files, [self.remote_file])
+    self.assertEqual(
+        self.collector._role_mapping, {'servers_0': self.remote_file}
+    )
+
+  @flagsaver.flagsaver(trace_pull_interval=60)
+  def testPullIncrementOnlyCopiesNewBytes(self):
+    self._AppendRemote(b'line 1\n')
+    self.collector._PullIncrement(self.vm, self.remote_file)
+    self.assertEqual(self._ReadLocal(), b'line 1\n')
+    self._AppendRemote(b'line 2\n' + bytes(range(256)))
+    self.collector._PullIncrement(self.vm, self.remote_file)
+    self.assertEqual(self._ReadLocal(), b'line 1\nline 2\n' + bytes(range(256)))
+    self.assertEqual(self.vm.pulled_files, [self.remote_file + '.chunk.gz'] * 2)
+    self.assertFalse(os.path.exists(self.local_file + '.chunk.gz'))
+    self.assertFalse(os.path.exists(self.remote_file + '.chunk.gz'))
+
+  @flagsaver.flagsaver(trace_pull_interval=60)
+  def testStopPullsRemainder(self):
+    self._AppendRemote(b'line 1\n')
+    self.collector._PullIncrement(self.vm, self.remote_file)
+    self._AppendRemote(b'line 2\n')
+    self.collector.StopOnVms(None, 'test')
+    self.assertEqual(self._ReadLocal(), b'line 1\nline 2\n')
+    self.assertNotIn(self.remote_file, self.vm.pulled_files)
+
+  @flagsaver.flagsaver(trace_pull_interval=1)
+  def testPullsPeriodically(self):
+    self._AppendRemote(b'line 1\n')
+    pulled = mock.Mock()
+    with mock.patch.object(
+        self.collector, '_stop_pulling', wraps=self.collector._stop_pulling
+    ) as stop_pulling:
+      # Run one cycle of the pull loop, then stop it.
+      stop_pulling.wait.side_effect = [False, True]
+      with mock.patch.object(
+          self.collector, '_TryPullIncrement', side_effect=pulled
+      ):
+        self.collector._PullPeriodically(None)
+    pulled.assert_called_once_with(self.vm, self.remote_file)
+
+  @flagsaver.flagsaver(trace_pull_interval=60)
+  def testWindowsPullsWholeFile(self):
+    self.vm.BASE_OS_TYPE = os_types.WINDOWS
+    self._AppendRemote(b'line 1\n')
+    self.collector.StopOnVms(None, 'test')
+    self.assertEqual(self._ReadLocal(), b'line 1\n')
+    self.assertEqual(self.vm.pulled_files, [self.remote_file])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -12,11 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Tests for otel trace utility."""
+
 import json
 import os
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
 from absl import flags
+from absl.testing import absltest
+from absl.testing import flagsaver
+import numpy as np
 from perfkitbenchmarker.traces import otel
 
 FLAGS = flags.FLAGS
@@ -25,12 +32,13 @@ FLAGS.mark_as_parsed()
 TEST_VM = 'test_vm0'
 
 
-class OtelTestCase(unittest.TestCase):
+class OtelTestCase(absltest.TestCase):
 
   def setUp(self):
     super().setUp()
     directory = os.path.join(os.path.dirname(__file__), '..', 'data')
 
+    self.directory = directory
     self.collector = otel._OTELCollector(output_directory=directory)
     self.collector._role_mapping[TEST_VM] = 'otel_output.txt'
 
@@ -61,6 +69,105 @@ class OtelTestCase(unittest.TestCase):
       )
       self.assertEqual(sample.metadata['vm_role'], TEST_VM)
 
+  def testOtelAnalyzeOnlyKeepsStringsForLegacyOutput(self):
+    series = []
+    metric_series_class = otel._MetricSeries
+
+    def _MetricSeries(*args):
+      series.append(metric_series_class(*args))
+      return series[-1]
+
+    with mock.patch.object(otel, '_MetricSeries', side_effect=_MetricSeries):
+      self.collector.Analyze('test_sender', None, [])
+
+    self.assertLen(series, 30)
+    for metric_series in series:
+      self.assertEmpty(metric_series.timestamps)
+      self.assertEmpty(metric_series.values)
+
+  def _UseTempOutputDirectory(self):
+    temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(temp_dir.cleanup)
+    shutil.copy(os.path.join(self.directory, 'otel_output.txt'), temp_dir.name)
+    self.collector.output_directory = temp_dir.name
+    return temp_dir.name
+
+  @flagsaver.flagsaver(otel_columnar_output=True, otel_summary_points=1)
+  def testOtelAnalyzeColumnar(self):
+    directory = self._UseTempOutputDirectory()
+    samples = []
+    self.collector.Analyze('test_sender', None, samples)
+    self.assertEqual(len(samples), 30)
+
+    columnar_file = os.path.join(directory, 'otel_output.txt.npz')
+    with np.load(columnar_file) as arrays:
+      names = arrays['names'].tolist()
+      for sample in samples:
+        expected = self.contents[sample.metric]
+        self.assertEqual(sample.metadata['columnar_file'], columnar_file)
+        index = sample.metadata['columnar_index']
+        self.assertEqual(names[index], sample.metric)
+        timestamps = arrays[f'timestamps_{index}']
+        values = arrays[f'values_{index}']
+        self.assertEqual(timestamps.dtype, np.int64)
+        self.assertEqual(values.dtype, np.float64)
+        self.assertEqual(
+            timestamps.tolist(), [int(ts) for ts in expected['timestamps']]
+        )
+        self.assertEqual(
+            values.tolist(), [float(value) for value in expected['values']]
+        )
+        self.assertEqual(sample.metadata['num_points'], len(values))
+        self.assertLen(sample.metadata['values'], 1)
+        self.assertEqual(
+            sample.metadata['timestamps'], [expected['timestamps'][-1]]
+        )
+        self.assertEqual(sample.metadata['unit'], expected['unit'])
+        self.assertEqual(sample.metadata['vm_role'], TEST_VM)
+
+  def testDownsampleGauge(self):
+    series = otel._MetricSeries('By', cumulative=False)
+    series.timestamps.extend([1, 2, 3, 4, 5])
+    series.values.extend([1, 3, 5, 7, 9])
+    timestamps, values = otel._Downsample(series, 2)
+    self.assertEqual(timestamps.tolist(), [2, 5])
+    self.assertEqual(values.tolist(), [2, 7])
+
+  def testDownsampleCumulative(self):
+    series = otel._MetricSeries('By', cumulative=True)
+    series.timestamps.extend([1, 2, 3, 4, 5])
+    series.values.extend([1, 3, 5, 7, 9])
+    timestamps, values = otel._Downsample(series, 2)
+    self.assertEqual(timestamps.tolist(), [2, 5])
+    self.assertEqual(values.tolist(), [3, 9])
+
+  def testAggregateCumulativeRate(self):
+    series = otel._MetricSeries('By', cumulative=True)
+    series.timestamps.extend([0, 10**9, 2 * 10**9, 3 * 10**9])
+    # The counter restarts between the second and third points.
+    series.values.extend([100, 300, 50, 150])
+    samples = otel._AggregateSamples('bytes', series, {'vm_role': TEST_VM})
+    self.assertLen(samples, 1)
+    self.assertEqual(samples[0].metric, 'bytes_rate')
+    self.assertAlmostEqual(samples[0].value, 100)
+    self.assertEqual(samples[0].unit, 'By/s')
+
+  @flagsaver.flagsaver(otel_aggregate_metrics=True)
+  def testOtelAnalyzeAggregates(self):
+    samples = []
+    self.collector.Analyze('test_sender', None, samples)
+    aggregates = {
+        sample.metric: sample
+        for sample in samples
+        if sample.metric not in self.contents
+    }
+    # Cumulative sums need two points for a rate; the output has one.
+    self.assertNotIn('network_traffic_lo_transmit_rate', aggregates)
+    p50 = aggregates['disk_pending_operations_sda_p50']
+    self.assertEqual(p50.unit, '{operations}')
+    self.assertEqual(p50.metadata, {'vm_role': TEST_VM})
+    self.assertIn('disk_pending_operations_sda_average', aggregates)
+
 
 if __name__ == '__main__':
   unittest.main()
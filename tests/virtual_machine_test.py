@@ -15,8 +15,12 @@
 
 import unittest
 from absl import flags
+from absl.testing import flagsaver
 import mock
+from perfkitbenchmarker import artifact_cache
+from perfkitbenchmarker import benchmark_lookup
 from perfkitbenchmarker import errors
+from perfkitbenchmarker import os_types
 from perfkitbenchmarker import virtual_machine
 from perfkitbenchmarker.configs import option_decoders
 from tests import pkb_common_test_case
@@ -191,6 +195,32 @@ class TestInstallData(pkb_common_test_case.PkbCommonTestCase):
         self.install_path, self.module_name, 'fake_pkg', 'fake_checksum'
     )
 
+  @flagsaver.flagsaver(artifact_cache=True)
+  def testPreprovisionNotAvailableFallBackFromArtifactCache(self):
+    with mock.patch.object(self.vm, 'ShouldDownloadPreprovisionedData') as show:
+      with mock.patch.object(self.vm, 'PushFile') as push_file:
+        with mock.patch.object(self.vm, 'CheckPreprovisionedData') as check:
+          with mock.patch.object(
+              artifact_cache, 'FetchUrl', return_value='/cache/fake_checksum'
+          ) as fetch_url:
+            show.side_effect = [False]
+            self.vm._InstallData(
+                self.preprovisioned_data,
+                self.module_name,
+                self.filenames,
+                self.install_path,
+                self.fallback_url,
+            )
+    fetch_url.assert_called_once_with(
+        'https://fake_url/fake_pkg.tar.gz', 'fake_checksum'
+    )
+    push_file.assert_called_once_with(
+        '/cache/fake_checksum', '/fake_path/fake_pkg.tar.gz'
+    )
+    check.assert_called_once_with(
+        self.install_path, self.module_name, 'fake_pkg', 'fake_checksum'
+    )
+
   def testPreprovisionSucceed(self):
     with mock.patch.object(self.vm, 'ShouldDownloadPreprovisionedData') as show:
       with mock.patch.object(self.vm, 'DownloadPreprovisionedData') as download:
@@ -225,5 +255,64 @@ class TestInstallData(pkb_common_test_case.PkbCommonTestCase):
     check.assert_not_called()
 
 
+class InstallDataOnVmsTest(pkb_common_test_case.PkbCommonTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.vms = [
+        mock.Mock(OS_TYPE=os_types.DEFAULT, name='vm%d' % i) for i in range(5)
+    ]
+    self.enter_context(
+        mock.patch.object(
+            benchmark_lookup,
+            'BenchmarkModule',
+            return_value=mock.Mock(BENCHMARK_DATA={'fake_pkg': 'fake_sum'}),
+        )
+    )
+
+  def _InstallData(self):
+    virtual_machine.InstallPreprovisionedBenchmarkDataOnVms(
+        self.vms, 'fake_benchmark', ['fake_pkg'], '/fake_path'
+    )
+
+  @flagsaver.flagsaver(preprovisioned_data_distribution='independent')
+  def testIndependent(self):
+    self._InstallData()
+    for vm in self.vms:
+      vm.InstallPreprovisionedBenchmarkData.assert_called_once_with(
+          'fake_benchmark', ['fake_pkg'], '/fake_path', 600
+      )
+      vm.MoveFile.assert_not_called()
+
+  @flagsaver.flagsaver(preprovisioned_data_distribution='tree')
+  def testTree(self):
+    self._InstallData()
+    self.vms[0].InstallPreprovisionedBenchmarkData.assert_called_once()
+    for vm in self.vms[1:]:
+      vm.InstallPreprovisionedBenchmarkData.assert_not_called()
+      vm.CheckPreprovisionedData.assert_called_once_with(
+          '/fake_path', 'fake_benchmark', 'fake_pkg', 'fake_sum'
+      )
+    copies = {
+        (source, call.args[0])
+        for source in self.vms
+        for call in source.MoveFile.call_args_list
+    }
+    # Round 1: vm0 -> vm1. Round 2: vm0 -> vm2, vm1 -> vm3. Round 3: vm0 -> vm4.
+    vm0, vm1, vm2, vm3, vm4 = self.vms
+    self.assertEqual(copies, {(vm0, vm1), (vm0, vm2), (vm1, vm3), (vm0, vm4)})
+    vm1.MoveFile.assert_called_once_with(
+        vm3, '/fake_path/fake_pkg', '/fake_path/fake_pkg'
+    )
+
+  @flagsaver.flagsaver(preprovisioned_data_distribution='tree')
+  def testTreeFallsBackForWindows(self):
+    self.vms[1].OS_TYPE = os_types.WINDOWS2022_DESKTOP
+    self._InstallData()
+    for vm in self.vms:
+      vm.InstallPreprovisionedBenchmarkData.assert_called_once()
+      vm.MoveFile.assert_not_called()
+
+
 if __name__ == '__main__':
   unittest.main()
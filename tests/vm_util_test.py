@@ -14,6 +14,7 @@
 
 """Tests for perfkitbenchmarker.vm_util."""
 
+import dataclasses
 import os
 import subprocess
 import threading
@@ -237,6 +238,59 @@ class IssueCommandTestCase(pkb_common_test_case.PkbCommonTestCase):
     )
 
 
+class IssueCommandsTestCase(pkb_common_test_case.PkbCommonTestCase):
+
+  def testReturnsOutputsInOrder(self):
+    results = vm_util.IssueCommands([
+        vm_util.BatchCommand(['sh', '-c', 'sleep 0.2; echo a; echo b >&2']),
+        vm_util.BatchCommand(['echo', 'c']),
+    ])
+    self.assertEqual(results, [('a\n', 'b\n', 0), ('c\n', '', 0)])
+
+  def testRunsConcurrentlyWithinLimits(self):
+    sleep = vm_util.BatchCommand(['sleep', '0.3'], should_pre_log=False)
+    start = time.monotonic()
+    vm_util.IssueCommands([sleep] * 4, max_concurrency=4)
+    self.assertLess(time.monotonic() - start, 1.2)
+
+    start = time.monotonic()
+    vm_util.IssueCommands(
+        [dataclasses.replace(sleep, target='vm')] * 3,
+        max_concurrency_per_target=1,
+    )
+    self.assertGreaterEqual(time.monotonic() - start, 0.9)
+
+  def testFailureRaisesAfterAllCommandsFinish(self):
+    path = self.create_tempfile().full_path
+    with self.assertRaises(errors.VmUtil.IssueCommandError) as cm:
+      vm_util.IssueCommands([
+          vm_util.BatchCommand(['cat', 'non_existent_file']),
+          vm_util.BatchCommand(['sh', '-c', f'sleep 0.2; echo done > {path}']),
+      ])
+    self.assertIn('non_existent_file', str(cm.exception))
+    with open(path) as f:
+      self.assertEqual(f.read(), 'done\n')
+
+  def testFailureSemantics(self):
+    results = vm_util.IssueCommands(
+        [
+            vm_util.BatchCommand(
+                ['cat', 'non_existent_file'], raise_on_failure=False
+            ),
+            vm_util.BatchCommand(
+                ['cat', 'non_existent_file'],
+                suppress_failure=lambda stdout, stderr, retcode: True,
+            ),
+            vm_util.BatchCommand(['sh', '-c', 'echo a; sleep 5'], timeout=0.5),
+        ],
+        return_exceptions=True,
+    )
+    self.assertEqual(results[0][2], 1)
+    self.assertEqual(results[1], ('', '', 0))
+    self.assertIsInstance(results[2], errors.VmUtil.IssueCommandTimeoutError)
+    self.assertIn('STDOUT: a', str(results[2]))
+
+
 class VmUtilTest(pkb_common_test_case.PkbCommonTestCase):
 
   def setUp(self):